@@ -0,0 +1,35 @@
+"""Add telegram_file_ids cache table
+
+Revision ID: 3f2a9c1d7e10
+Revises: 751096b43d03
+Create Date: 2026-10-18 10:12:05.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d7e10'
+down_revision: Union[str, Sequence[str], None] = '751096b43d03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'telegram_file_ids',
+        sa.Column('asset_path', sa.String(), nullable=False),
+        sa.Column('content_hash', sa.String(), nullable=False),
+        sa.Column('file_id', sa.String(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('asset_path'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('telegram_file_ids')
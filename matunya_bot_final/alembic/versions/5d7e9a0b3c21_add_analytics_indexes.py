@@ -0,0 +1,43 @@
+"""Add analytics indexes on (user_id, timestamp) and lookup columns
+
+Revision ID: 5d7e9a0b3c21
+Revises: 8b41d2e6c5a7
+Create Date: 2026-10-18 14:05:12.418530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d7e9a0b3c21'
+down_revision: Union[str, Sequence[str], None] = '8b41d2e6c5a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (имя индекса, таблица, колонки, unique) — совпадают с utils/models.py.
+# if_not_exists: на свежей БД индексы уже создал init_db() (create_all).
+INDEXES = [
+    ('ix_answer_logs_user_id_timestamp', 'answer_logs', ['user_id', 'timestamp'], False),
+    ('ix_answer_logs_task_id', 'answer_logs', ['task_id'], False),
+    ('ix_activity_logs_user_id_timestamp', 'activity_logs', ['user_id', 'timestamp'], False),
+    ('ix_session_logs_user_id_session_start', 'session_logs', ['user_id', 'session_start'], False),
+    ('ix_ai_interaction_logs_user_id_timestamp', 'ai_interaction_logs', ['user_id', 'timestamp'], False),
+    ('ix_ai_interaction_logs_timestamp', 'ai_interaction_logs', ['timestamp'], False),
+    ('ix_tasks_skill_type_id', 'tasks', ['skill_type_id'], False),
+    ('ix_tasks_theme', 'tasks', ['theme'], False),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns, unique in INDEXES:
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,35 @@
+"""Add fsm_states table for persistent FSM storage
+
+Revision ID: 8b41d2e6c5a7
+Revises: 3f2a9c1d7e10
+Create Date: 2026-10-18 12:40:31.502117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b41d2e6c5a7'
+down_revision: Union[str, Sequence[str], None] = '3f2a9c1d7e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'fsm_states',
+        sa.Column('storage_key', sa.String(), nullable=False),
+        sa.Column('state', sa.String(), nullable=True),
+        sa.Column('data', sa.LargeBinary(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('storage_key'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('fsm_states')
@@ -0,0 +1,34 @@
+"""Add fsm_task_snapshots table for versioned FSM task references
+
+Revision ID: a9c3e81f4b06
+Revises: e7b3d5a91f42
+Create Date: 2026-10-18 19:48:26.731540
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c3e81f4b06'
+down_revision: Union[str, Sequence[str], None] = 'e7b3d5a91f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'fsm_task_snapshots',
+        sa.Column('content_hash', sa.String(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('content_hash'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('fsm_task_snapshots')
@@ -0,0 +1,42 @@
+"""Add gpt_response_cache table for content-addressed GPT replies
+
+Revision ID: c4a1f6e2d809
+Revises: 5d7e9a0b3c21
+Create Date: 2026-10-18 15:22:47.906314
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a1f6e2d809'
+down_revision: Union[str, Sequence[str], None] = '5d7e9a0b3c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'gpt_response_cache',
+        sa.Column('cache_key', sa.String(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('response', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(), nullable=False),
+        sa.Column('hits', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('cache_key'),
+    )
+    op.create_index('ix_gpt_response_cache_expires_at', 'gpt_response_cache', ['expires_at'])
+    op.create_index('ix_gpt_response_cache_last_used_at', 'gpt_response_cache', ['last_used_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_gpt_response_cache_last_used_at', table_name='gpt_response_cache')
+    op.drop_index('ix_gpt_response_cache_expires_at', table_name='gpt_response_cache')
+    op.drop_table('gpt_response_cache')
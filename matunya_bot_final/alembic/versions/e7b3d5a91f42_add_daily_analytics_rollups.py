@@ -0,0 +1,95 @@
+"""Add per-user daily rollup tables for analytics and backfill them from logs
+
+Revision ID: e7b3d5a91f42
+Revises: c4a1f6e2d809
+Create Date: 2026-10-18 17:05:12.418903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3d5a91f42'
+down_revision: Union[str, Sequence[str], None] = 'c4a1f6e2d809'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Бэкфилл: то же, что utils/analytics_rollups.rebuild_rollups
+BACKFILL = [
+    """
+    INSERT INTO user_daily_answer_stats
+        (user_id, day, skill_type_id, theme, total, correct, help_used, timed, last_attempt)
+    SELECT a.user_id, date(a.timestamp), coalesce(t.skill_type_id, 0), coalesce(t.theme, ''),
+           count(a.id), coalesce(sum(a.is_correct), 0), coalesce(sum(a.help_used), 0), coalesce(sum(a.is_timed), 0),
+           max(a.timestamp)
+    FROM answer_logs a LEFT OUTER JOIN tasks t ON a.task_id = t.id
+    GROUP BY a.user_id, date(a.timestamp), coalesce(t.skill_type_id, 0), coalesce(t.theme, '')
+    """,
+    """
+    INSERT INTO user_daily_activity_stats
+        (user_id, day, activity_type, pack_type, pack_theme, count)
+    SELECT user_id, date(timestamp), activity_type, coalesce(pack_type, ''), coalesce(pack_theme, ''), count(id)
+    FROM activity_logs
+    GROUP BY user_id, date(timestamp), activity_type, coalesce(pack_type, ''), coalesce(pack_theme, '')
+    """,
+    """
+    INSERT INTO user_daily_session_stats
+        (user_id, day, sessions, tasks_attempted, activities_count, total_minutes)
+    SELECT user_id, date(session_start), count(id), coalesce(sum(tasks_attempted), 0),
+           coalesce(sum(activities_count), 0),
+           coalesce(sum((julianday(session_end) - julianday(session_start)) * 24 * 60), 0)
+    FROM session_logs
+    WHERE session_end IS NOT NULL
+    GROUP BY user_id, date(session_start)
+    """,
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_daily_answer_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('skill_type_id', sa.Integer(), nullable=False),
+        sa.Column('theme', sa.String(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('correct', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('help_used', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('timed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_attempt', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id', 'day', 'skill_type_id', 'theme'),
+    )
+    op.create_table(
+        'user_daily_activity_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('activity_type', sa.String(), nullable=False),
+        sa.Column('pack_type', sa.String(), nullable=False),
+        sa.Column('pack_theme', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('user_id', 'day', 'activity_type', 'pack_type', 'pack_theme'),
+    )
+    op.create_table(
+        'user_daily_session_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('sessions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('tasks_attempted', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('activities_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_minutes', sa.Float(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('user_id', 'day'),
+    )
+    for statement in BACKFILL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_daily_session_stats')
+    op.drop_table('user_daily_activity_stats')
+    op.drop_table('user_daily_answer_stats')
@@ -0,0 +1,194 @@
+# matunya_bot_final/core/task_catalog.py
+"""
+Индексированный каталог заданий поверх loader.TASKS_DB.
+
+При первом обращении к складу строятся индексы по pattern / narrative /
+subtype / topic / category / subcategory / id. Выборка «случайное задание
+из корзины, кроме текущего id/паттерна» — O(1): задания внутри корзины
+лежат сгруппированными по паттерну, поэтому исключение — это просто
+«дырка» в диапазоне индексов.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from matunya_bot_final.loader import TASKS_DB
+
+INDEX_FIELDS: Tuple[str, ...] = (
+    "pattern",
+    "narrative",
+    "subtype",
+    "topic",
+    "category",
+    "subcategory",
+)
+
+
+def _unwrap_tasks(raw: Any) -> List[dict]:
+    """Склады 6/8/15/16 бывают вида {"tasks": [...]} — приводим к списку."""
+    if isinstance(raw, dict):
+        return list(raw.get("tasks", []))
+    return list(raw or [])
+
+
+class TaskBucket:
+    """Неизменяемая корзина заданий с O(1)-выборкой с исключениями."""
+
+    def __init__(self, tasks: Iterable[dict]) -> None:
+        # Стабильная группировка по паттерну: каждый паттерн — непрерывный диапазон
+        grouped: Dict[Any, List[dict]] = {}
+        for task in tasks:
+            grouped.setdefault(task.get("pattern"), []).append(task)
+
+        self.tasks: Tuple[dict, ...] = tuple(t for group in grouped.values() for t in group)
+        self._pattern_ranges: Dict[Any, Tuple[int, int]] = {}
+        self._id_positions: Dict[Any, int] = {}
+
+        start = 0
+        for pattern, group in grouped.items():
+            self._pattern_ranges[pattern] = (start, start + len(group))
+            start += len(group)
+        for pos, task in enumerate(self.tasks):
+            task_id = task.get("id")
+            if task_id is not None:
+                self._id_positions.setdefault(task_id, pos)
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def __bool__(self) -> bool:
+        return bool(self.tasks)
+
+    def pick(
+        self,
+        exclude_id: Any = None,
+        exclude_pattern: Optional[str] = None,
+        rng: Optional[random.Random] = None,
+    ) -> Optional[dict]:
+        """
+        Случайное задание из корзины.
+
+        Стараемся исключить exclude_id / exclude_pattern; если после этого
+        ничего не остаётся — берём из всей корзины (как делали хендлеры).
+        """
+        size = len(self.tasks)
+        if not size:
+            return None
+        rng = rng or random
+
+        gaps: List[Tuple[int, int]] = []
+        if exclude_pattern is not None and exclude_pattern in self._pattern_ranges:
+            gaps.append(self._pattern_ranges[exclude_pattern])
+        if exclude_id is not None and exclude_id in self._id_positions:
+            pos = self._id_positions[exclude_id]
+            if not any(start <= pos < end for start, end in gaps):
+                gaps.append((pos, pos + 1))
+        gaps.sort()
+
+        excluded = sum(end - start for start, end in gaps)
+        if excluded >= size:
+            return self.tasks[rng.randrange(size)]
+
+        index = rng.randrange(size - excluded)
+        for start, end in gaps:
+            if index >= start:
+                index += end - start
+        return self.tasks[index]
+
+
+class TaskCatalog:
+    """Индексы одного склада заданий (один номер задания)."""
+
+    def __init__(self, tasks: Iterable[dict]) -> None:
+        self.all = TaskBucket(tasks)
+        self._by_id: Dict[Any, dict] = {}
+        self._index: Dict[str, Dict[Any, List[int]]] = {field: {} for field in INDEX_FIELDS}
+        self._buckets: Dict[Tuple, TaskBucket] = {}
+
+        for pos, task in enumerate(self.all.tasks):
+            task_id = task.get("id")
+            if task_id is not None:
+                self._by_id.setdefault(task_id, task)
+            for field in INDEX_FIELDS:
+                value = task.get(field)
+                if isinstance(value, (str, int)):
+                    self._index[field].setdefault(value, []).append(pos)
+
+    def __len__(self) -> int:
+        return len(self.all)
+
+    def get(self, task_id: Any) -> Optional[dict]:
+        """Задание по id (O(1))."""
+        return self._by_id.get(task_id)
+
+    def values(self, field: str) -> List[Any]:
+        """Все встречающиеся значения индексированного поля."""
+        return list(self._index[field].keys())
+
+    def bucket(self, **criteria: Any) -> TaskBucket:
+        """
+        Корзина по критериям: значение поля или коллекция допустимых значений.
+        Пример: bucket(category="calculations", subcategory="geometry"),
+        bucket(pattern=("sector_area", "power_point")).
+        Результат кэшируется — повторные клики не сканируют склад.
+        """
+        normalized = []
+        for field, value in criteria.items():
+            if field not in self._index:
+                raise KeyError(f"Поле '{field}' не индексируется в каталоге")
+            if isinstance(value, (list, tuple, set, frozenset)):
+                normalized.append((field, frozenset(value)))
+            else:
+                normalized.append((field, frozenset((value,))))
+        key = tuple(sorted(normalized, key=lambda item: item[0]))
+
+        cached = self._buckets.get(key)
+        if cached is not None:
+            return cached
+
+        if not key:
+            bucket = self.all
+        else:
+            positions: Optional[set] = None
+            for field, allowed in key:
+                matched = set()
+                for value in allowed:
+                    matched.update(self._index[field].get(value, ()))
+                positions = matched if positions is None else positions & matched
+            bucket = TaskBucket(self.all.tasks[pos] for pos in sorted(positions or ()))
+
+        self._buckets[key] = bucket
+        return bucket
+
+    def pick(
+        self,
+        exclude_id: Any = None,
+        exclude_pattern: Optional[str] = None,
+        **criteria: Any,
+    ) -> Optional[dict]:
+        """Случайное задание из корзины по критериям (None, если корзина пуста)."""
+        return self.bucket(**criteria).pick(exclude_id=exclude_id, exclude_pattern=exclude_pattern)
+
+
+# Каталоги по ключу склада; пересобираются, если loader перезагрузил склад
+_CATALOGS: Dict[str, Tuple[Any, TaskCatalog]] = {}
+
+
+def get_catalog(task_key: str) -> TaskCatalog:
+    """Каталог для склада TASKS_DB[task_key] (строится один раз на загрузку)."""
+    raw = TASKS_DB.get(task_key)
+    cached = _CATALOGS.get(task_key)
+    if cached is not None and cached[0] is raw:
+        return cached[1]
+
+    catalog = TaskCatalog(_unwrap_tasks(raw))
+    _CATALOGS[task_key] = (raw, catalog)
+    return catalog
+
+
+def build_all_catalogs() -> None:
+    """Строит индексы для всех загруженных складов (вызывается при старте)."""
+    for task_key in list(TASKS_DB.keys()):
+        get_catalog(task_key)
@@ -0,0 +1,272 @@
+# matunya_bot_final/core/task_pool.py
+"""
+Запас заранее сгенерированных заданий для GPT-генераторов (задания 7 и 10).
+
+Генерация одного задания — это несколько последовательных запросов к GPT
+и проверка результата, то есть секунды. Поэтому для каждого подтипа
+держим очередь уже проверенных заданий:
+
+- хендлер забирает задание через pool.pop(subtype) за O(1) и генерирует
+  вживую, только если очередь пуста;
+- фоновый asyncio-воркер доливает подтипы, опустившиеся ниже нижней
+  отметки (TASK_POOL_LOW, по умолчанию 2), до верхней (TASK_POOL_HIGH,
+  по умолчанию 5);
+- очереди сохраняются в data/.task_pools/task_<N>.json и переживают рестарт.
+
+Воркер включается переменной MATUNYA_TASK_POOLS=1 (он тратит токены GPT).
+"""
+
+import asyncio
+import importlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from matunya_bot_final.loader import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+ENABLED_ENV = "MATUNYA_TASK_POOLS"
+LOW_ENV = "TASK_POOL_LOW"
+HIGH_ENV = "TASK_POOL_HIGH"
+
+DEFAULT_LOW = 2
+DEFAULT_HIGH = 5
+POOLS_DIR = DATA_DIR / ".task_pools"
+
+# Как часто воркер проверяет очереди, если его не будили
+CHECK_INTERVAL_SECONDS = 60.0
+# Пауза для подтипа после неудачной генерации
+RETRY_DELAY_SECONDS = 300.0
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        logger.warning(f"[TaskPool] Некорректное значение {name}, используем {default}")
+        return default
+
+
+def _import_by_path(path: str) -> Any:
+    module_path, attr = path.split(":")
+    return getattr(importlib.import_module(module_path), attr)
+
+
+class TaskPool:
+    """Очереди готовых заданий одного номера, по подтипам."""
+
+    def __init__(
+        self,
+        name: str,
+        generate: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+        subtypes: Callable[[], List[str]],
+        low: Optional[int] = None,
+        high: Optional[int] = None,
+        path: Optional[Path] = None,
+    ) -> None:
+        self.name = name
+        self.generate = generate
+        self.subtypes = subtypes
+        self.low = low if low is not None else _env_int(LOW_ENV, DEFAULT_LOW)
+        self.high = max(self.low, high if high is not None else _env_int(HIGH_ENV, DEFAULT_HIGH))
+        self.path = path or POOLS_DIR / f"task_{name}.json"
+
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._dirty = False
+        self._loaded = False
+        self._wake: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.metrics: Dict[str, int] = {"hits": 0, "misses": 0, "generated": 0, "failures": 0}
+
+    # ------------------------------------------------------------------
+    # Хранение
+    # ------------------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            self._queues = {subtype: deque(tasks) for subtype, tasks in stored.items() if isinstance(tasks, list)}
+            logger.info(f"[TaskPool] Задание {self.name}: восстановлено {sum(map(len, self._queues.values()))} заданий")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"[TaskPool] Не прочитали {self.path}: {e}")
+
+    def save(self) -> None:
+        """Атомарно сохраняет очереди на диск (если они менялись)."""
+        if not self._dirty:
+            return
+        tmp_path = self.path.with_suffix(f".tmp{os.getpid()}")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({subtype: list(queue) for subtype, queue in self._queues.items()}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"[TaskPool] Не сохранили {self.path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # Выдача
+    # ------------------------------------------------------------------
+
+    def size(self, subtype: str) -> int:
+        self._ensure_loaded()
+        return len(self._queues.get(subtype, ()))
+
+    def pop(self, subtype: str) -> Optional[Dict[str, Any]]:
+        """Готовое задание подтипа или None (тогда хендлер генерирует вживую)."""
+        self._ensure_loaded()
+        queue = self._queues.get(subtype)
+        if not queue:
+            self.metrics["misses"] += 1
+            self._nudge()
+            return None
+
+        task = queue.popleft()
+        self._dirty = True
+        self.metrics["hits"] += 1
+        if len(queue) < self.low:
+            self._nudge()
+        return task
+
+    def _nudge(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Пополнение
+    # ------------------------------------------------------------------
+
+    async def _generate_one(self, subtype: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await self.generate(subtype)
+        except Exception as e:
+            logger.warning(f"[TaskPool] Задание {self.name}/{subtype}: генерация не удалась: {e}")
+            return None
+
+    async def refill(self) -> int:
+        """Доливает до high подтипы, опустившиеся ниже low. Возвращает число новых заданий."""
+        self._ensure_loaded()
+        added = 0
+        for subtype in self.subtypes():
+            queue = self._queues.setdefault(subtype, deque())
+            if len(queue) >= self.low or self._retry_at.get(subtype, 0.0) > time.monotonic():
+                continue
+
+            while len(queue) < self.high:
+                task = await self._generate_one(subtype)
+                if not task:
+                    self.metrics["failures"] += 1
+                    self._retry_at[subtype] = time.monotonic() + RETRY_DELAY_SECONDS
+                    break
+                queue.append(task)
+                self._dirty = True
+                added += 1
+                self.metrics["generated"] += 1
+            # Сохраняем после каждого подтипа: долгий долив не теряется при падении
+            self.save()
+        return added
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while True:
+            self._wake.clear()
+            try:
+                added = await self.refill()
+                if added:
+                    logger.info(f"[TaskPool] Задание {self.name}: добавлено {added}, запас {self.stats()}")
+            except Exception:
+                logger.exception(f"[TaskPool] Ошибка воркера задания {self.name}")
+            self.save()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=CHECK_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Запускает фоновый воркер в текущем event loop."""
+        if self._worker is not None:
+            return
+        self._wake = asyncio.Event()
+        self._worker = asyncio.create_task(self._run(), name=f"task_pool_{self.name}")
+
+    async def stop(self) -> None:
+        """Останавливает воркер и сохраняет очереди."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        self._wake = None
+        self.save()
+
+    def stats(self) -> Dict[str, int]:
+        """Размер очереди по подтипам."""
+        self._ensure_loaded()
+        return {subtype: len(queue) for subtype, queue in self._queues.items()}
+
+
+# ---------------------------------------------------------------------------
+# Пулы заданий 7 и 10
+# ---------------------------------------------------------------------------
+
+def _task_7_subtypes() -> List[str]:
+    structure = _import_by_path("matunya_bot_final.keyboards.inline_keyboards.tasks.task_7_keyboard:TASK_7_STRUCTURE")
+    return list(dict.fromkeys(subtype for theme in structure.values() for subtype in theme["subtypes"]))
+
+
+def _task_10_subtypes() -> List[str]:
+    return list(_import_by_path("matunya_bot_final.handlers.callbacks.navigators.task_10_navigator:POOL_ALL"))
+
+
+async def _generate_task_7(subtype: str) -> Optional[Dict[str, Any]]:
+    generate = _import_by_path("matunya_bot_final.gpt.task_templates.task_7.task_7_generator:generate_task_7")
+    return await generate(subtype)
+
+
+async def _generate_task_10(subtype: str) -> Optional[Dict[str, Any]]:
+    generate = _import_by_path("matunya_bot_final.gpt.task_generators.task_10.task_10_generator:generate_task_10")
+    return await generate(subtype)
+
+
+TASK_POOLS: Dict[str, TaskPool] = {
+    "7": TaskPool("7", _generate_task_7, _task_7_subtypes),
+    "10": TaskPool("10", _generate_task_10, _task_10_subtypes),
+}
+
+
+def get_task_pool(task_type: str) -> TaskPool:
+    return TASK_POOLS[str(task_type)]
+
+
+def get_task_pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Попадания/промахи и размер очередей по всем пулам."""
+    return {name: {**pool.metrics, "sizes": pool.stats()} for name, pool in TASK_POOLS.items()}
+
+
+def start_task_pools() -> bool:
+    """Запускает воркеры, если MATUNYA_TASK_POOLS=1."""
+    if os.getenv(ENABLED_ENV) != "1":
+        return False
+    for pool in TASK_POOLS.values():
+        pool.start()
+    return True
+
+
+async def stop_task_pools() -> None:
+    for pool in TASK_POOLS.values():
+        await pool.stop()
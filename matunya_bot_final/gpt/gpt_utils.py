@@ -1,10 +1,15 @@
 # matunya_bot_final/gpt/gpt_utils.py
 
 import os
+import time
+import asyncio
 import logging
 from typing import List, Dict, Optional, Tuple
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, APITimeoutError
+
+from matunya_bot_final.gpt import response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -14,24 +19,161 @@ DEFAULT_SYSTEM_PROMPT_FOR_GENERATION = (
     "Объясняй понятно, по шагам, без формального языка."
 )
 
-def _get_openai_client() -> OpenAI:
+DEFAULT_MODEL = "gpt-4.1-mini"
+
+# --- настройки клиента (переопределяются через окружение) ---
+# OPENAI_BASE_URL позволяет подменить API локальным стаб-сервером в тестах.
+BASE_URL_ENV = "OPENAI_BASE_URL"
+TIMEOUT_ENV = "GPT_TIMEOUT_SECONDS"
+MAX_CONCURRENCY_ENV = "GPT_MAX_CONCURRENCY"
+MAX_CONNECTIONS_ENV = "GPT_MAX_CONNECTIONS"
+
+DEFAULT_TIMEOUT_SECONDS = 60.0
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_CONNECTIONS = 20
+
+# Общий клиент и семафор создаются лениво, в работающем event loop
+_client: Optional[AsyncOpenAI] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+# Метрики очереди к GPT
+_metrics: Dict[str, float] = {
+    "in_flight": 0,
+    "waiting": 0,
+    "max_waiting": 0,
+    "total_calls": 0,
+    "total_errors": 0,
+    "total_timeouts": 0,
+    "total_wait_seconds": 0.0,
+}
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning(f"[GPT] Некорректное значение {name}={raw!r}, используем {default}")
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(_env_float(name, default))
+
+
+def _get_openai_client() -> AsyncOpenAI:
+    """Возвращает общий AsyncOpenAI с пулом HTTP-соединений (создаётся один раз)."""
+    global _client
+    if _client is not None:
+        return _client
+
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY не найден в окружении")
-    return OpenAI(api_key=api_key)
+
+    max_connections = _env_int(MAX_CONNECTIONS_ENV, DEFAULT_MAX_CONNECTIONS)
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+        timeout=httpx.Timeout(_env_float(TIMEOUT_ENV, DEFAULT_TIMEOUT_SECONDS), connect=10.0),
+    )
+    _client = AsyncOpenAI(
+        api_key=api_key,
+        base_url=os.getenv(BASE_URL_ENV) or None,
+        http_client=http_client,
+        max_retries=1,
+    )
+    logger.info(f"[GPT] Создан общий async-клиент (пул соединений: {max_connections})")
+    return _client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(_env_int(MAX_CONCURRENCY_ENV, DEFAULT_MAX_CONCURRENCY))
+    return _semaphore
+
+
+def get_gpt_metrics() -> Dict[str, float]:
+    """Снимок метрик: сколько запросов в работе, сколько ждут слота и т.д."""
+    return dict(_metrics)
+
+
+async def close_gpt_client() -> None:
+    """Закрывает общий клиент (вызывается при остановке бота)."""
+    global _client, _semaphore
+    if _client is not None:
+        await _client.close()
+        logger.info("[GPT] Async-клиент закрыт")
+    _client = None
+    _semaphore = None
+
+
+async def _create_reply(
+    messages: List[Dict[str, str]],
+    model: str,
+    timeout: Optional[float],
+    temperature: Optional[float],
+) -> str:
+    """Один запрос к Responses API через общий клиент и семафор (ошибки пробрасываются)."""
+    client = _get_openai_client()
+    semaphore = _get_semaphore()
+
+    # Ограничиваем число одновременных запросов и считаем очередь
+    wait_started = time.monotonic()
+    _metrics["waiting"] += 1
+    _metrics["max_waiting"] = max(_metrics["max_waiting"], _metrics["waiting"])
+    try:
+        await semaphore.acquire()
+    finally:
+        _metrics["waiting"] -= 1
+    _metrics["total_wait_seconds"] += time.monotonic() - wait_started
+
+    extra = {"temperature": temperature} if temperature is not None else {}
+
+    _metrics["in_flight"] += 1
+    _metrics["total_calls"] += 1
+    try:
+        response = await client.responses.create(
+            model=model,
+            input=messages,
+            timeout=timeout if timeout is not None else _env_float(TIMEOUT_ENV, DEFAULT_TIMEOUT_SECONDS),
+            **extra,
+        )
+    finally:
+        _metrics["in_flight"] -= 1
+        semaphore.release()
+
+    return response.output_text.strip()
 
 
 async def ask_gpt_with_history(
     user_prompt: str,
-    dialog_history: List[Dict[str, str]],
+    dialog_history: Optional[List[Dict[str, str]]] = None,
     system_prompt: Optional[str] = None,
+    model: Optional[str] = None,
+    timeout: Optional[float] = None,
+    temperature: Optional[float] = None,
+    use_cache: bool = False,
+    cache_ttl: Optional[float] = None,
 ) -> Tuple[str, List[Dict[str, str]]]:
+    """
+    use_cache=True — ответ берётся из gpt/response_cache (только для запросов
+    без истории диалога: история в ключ кеша не входит).
+    """
+
+    dialog_history = list(dialog_history or [])
 
     final_system_content = (
         system_prompt
         if system_prompt is not None
         else DEFAULT_SYSTEM_PROMPT_FOR_GENERATION
     )
+    model_name = model or DEFAULT_MODEL
 
     logger.info("GPT вызван. Используем Responses API.")
 
@@ -41,14 +183,16 @@ async def ask_gpt_with_history(
     messages.append({"role": "user", "content": user_prompt})
 
     try:
-        client = _get_openai_client()
-
-        response = client.responses.create(
-            model="gpt-4.1-mini",
-            input=messages,
-        )
-
-        reply_text = response.output_text.strip()
+        if use_cache and not dialog_history:
+            cache_key = response_cache.make_cache_key(model_name, final_system_content, user_prompt, temperature)
+            reply_text = await response_cache.cached_reply(
+                cache_key,
+                model_name,
+                lambda: _create_reply(messages, model_name, timeout, temperature),
+                ttl=cache_ttl,
+            )
+        else:
+            reply_text = await _create_reply(messages, model_name, timeout, temperature)
 
         updated_history = list(dialog_history)
         updated_history.append({"role": "user", "content": user_prompt})
@@ -57,5 +201,8 @@ async def ask_gpt_with_history(
         return reply_text, updated_history
 
     except Exception as e:
+        _metrics["total_errors"] += 1
+        if isinstance(e, (asyncio.TimeoutError, httpx.TimeoutException, APITimeoutError)):
+            _metrics["total_timeouts"] += 1
         logger.exception("Ошибка GPT")
         return f"Ошибка GPT: {e}", dialog_history
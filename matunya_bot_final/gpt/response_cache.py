@@ -0,0 +1,151 @@
+# matunya_bot_final/gpt/response_cache.py
+"""
+Кеш ответов GPT по содержимому запроса.
+
+Ключ — sha256 от (модель, хеш системного промпта, хеш промпта
+пользователя, температура). Кешируются только запросы без истории
+диалога (теория, «оживление» решений): одинаковый вопрос от разных
+учеников получает готовый ответ за миллисекунды.
+
+- Хранилище: таблица gpt_response_cache в matunya.db (переживает рестарт).
+- TTL (GPT_CACHE_TTL_SECONDS, по умолчанию 30 дней) и LRU-вытеснение
+  сверх GPT_CACHE_MAX_ENTRIES (по умолчанию 5000).
+- Одинаковые запросы, пришедшие одновременно, ждут один вызов GPT.
+  Если запросивший его апдейт отменён (ученик ушёл из раздела),
+  ожидающие не отменяются: один из них сам становится ведущим.
+- get_cache_metrics() — попадания, промахи, склеенные запросы, hit rate.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from matunya_bot_final.utils import db_manager
+
+logger = logging.getLogger(__name__)
+
+TTL_ENV = "GPT_CACHE_TTL_SECONDS"
+MAX_ENTRIES_ENV = "GPT_CACHE_MAX_ENTRIES"
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600.0
+DEFAULT_MAX_ENTRIES = 5000
+
+# Вытеснение запускаем не на каждую запись, а раз в EVICT_EVERY сохранений
+EVICT_EVERY = 50
+
+# ключ -> future ответа, который сейчас запрашивается у GPT
+_inflight: Dict[str, asyncio.Future] = {}
+_stores_since_evict = 0
+
+_metrics: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "coalesced": 0,
+    "stores": 0,
+    "evicted": 0,
+    "leader_cancelled": 0,
+}
+
+
+class _LeaderCancelled(Exception):
+    """Ведущий запрос отменён — ожидающему нужно запросить ответ самому."""
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        logger.warning(f"[GPTCache] Некорректное значение {name}, используем {default}")
+        return default
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(model: str, system_prompt: str, user_prompt: str, temperature: Optional[float]) -> str:
+    """Ключ кеша: модель + хеши промптов + температура."""
+    parts = [model, _sha256(system_prompt), _sha256(user_prompt), repr(temperature)]
+    return _sha256("\n".join(parts))
+
+
+def get_cache_metrics() -> Dict[str, float]:
+    """Снимок метрик кеша; hit_rate учитывает и склеенные одновременные запросы."""
+    served = _metrics["hits"] + _metrics["coalesced"]
+    total = served + _metrics["misses"]
+    return {**_metrics, "in_flight": len(_inflight), "hit_rate": served / total if total else 0.0}
+
+
+async def _lookup(cache_key: str) -> Optional[str]:
+    if db_manager.session_maker is None:
+        return None
+    async with db_manager.session_maker() as session:
+        return await db_manager.get_gpt_cached_response(session, cache_key)
+
+
+async def _store(cache_key: str, model: str, reply: str, ttl: float) -> None:
+    global _stores_since_evict
+    if db_manager.session_maker is None:
+        return
+
+    expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+    async with db_manager.session_maker() as session:
+        if not await db_manager.save_gpt_cached_response(session, cache_key, model, reply, expires_at):
+            return
+        _metrics["stores"] += 1
+
+        _stores_since_evict += 1
+        if _stores_since_evict >= EVICT_EVERY:
+            _stores_since_evict = 0
+            max_entries = int(_env_number(MAX_ENTRIES_ENV, DEFAULT_MAX_ENTRIES))
+            removed = await db_manager.evict_gpt_cached_responses(session, max_entries)
+            _metrics["evicted"] += removed
+            if removed:
+                logger.info(f"[GPTCache] Вытеснено записей: {removed}")
+
+
+async def cached_reply(
+    cache_key: str,
+    model: str,
+    compute: Callable[[], Awaitable[str]],
+    ttl: Optional[float] = None,
+) -> str:
+    """
+    Ответ из кеша или compute() (один вызов на все одновременные одинаковые запросы).
+    Исключение compute() получают все ожидающие, в кеш оно не попадает.
+    Отмена ведущего до ожидающих не доходит: первый из них повторяет запрос.
+    """
+    while (pending := _inflight.get(cache_key)) is not None:
+        _metrics["coalesced"] += 1
+        try:
+            return await asyncio.shield(pending)
+        except _LeaderCancelled:
+            continue
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[cache_key] = future
+    try:
+        reply = await _lookup(cache_key)
+        if reply is not None:
+            _metrics["hits"] += 1
+        else:
+            _metrics["misses"] += 1
+            reply = await compute()
+            await _store(cache_key, model, reply, ttl if ttl is not None else _env_number(TTL_ENV, DEFAULT_TTL_SECONDS))
+        future.set_result(reply)
+        return reply
+    except asyncio.CancelledError:
+        _metrics["leader_cancelled"] += 1
+        future.set_exception(_LeaderCancelled())
+        future.exception()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Если ожидающих нет, не засоряем лог "exception was never retrieved"
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(cache_key, None)
@@ -37,7 +37,7 @@ async def _log_successful_task(task_data: dict, subtype_id: str):
 async def _call_gpt_api_and_parse(prompt: str) -> Dict[str, Any]:
     """Отправляет реальный запрос к GPT и извлекает JSON."""
     print("--- Отправляю реальный запрос к GPT... ---")
-    raw_response = await ask_gpt_with_history(
+    raw_response, _ = await ask_gpt_with_history(
         system_prompt="", user_prompt=prompt, model=TASK_GENERATION_MODEL
     )
     try:
@@ -111,7 +111,7 @@ async def _generate_task_7_ideas(user_prompt: str) -> Optional[Dict[str, Any]]:
 
     for attempt in range(1, 4):  # до 3 попыток получить валидный JSON от модели
         try:
-            raw_response = await ask_gpt_with_history(
+            raw_response, _ = await ask_gpt_with_history(
                 system_prompt="",  # системный уже в MAIN_PROMPT
                 user_prompt=user_prompt,
                 model=TASK_GENERATION_MODEL
@@ -171,8 +171,7 @@ async def handle_ask_question(callback: CallbackQuery, callback_data: TaskCallba
 @router.callback_query(TaskCallback.filter(F.action == "dismiss_help_panel"))
 async def handle_dismiss_help_panel(callback: CallbackQuery, bot: Bot, state: FSMContext) -> None:
     chat_id = callback.message.chat.id if callback.message else callback.from_user.id
-    await cleanup_messages_by_category(bot, state, chat_id, _HELP_PANEL_CATEGORY)
-    await cleanup_messages_by_category(bot, state, chat_id, _DIALOG_CATEGORY)
+    await cleanup_messages_by_category(bot, state, chat_id, _HELP_PANEL_CATEGORY, _DIALOG_CATEGORY)
 
     data = await state.get_data()
     keyboard_payload = data.get("keyboard_to_restore")
@@ -205,8 +204,7 @@ async def handle_dismiss_help_panel(callback: CallbackQuery, bot: Bot, state: FS
 async def handle_hide_help(callback: CallbackQuery, bot: Bot, state: FSMContext) -> None:
     chat_id = callback.message.chat.id if callback.message else callback.from_user.id
 
-    await cleanup_messages_by_category(bot, state, chat_id, "solution_result")
-    await cleanup_messages_by_category(bot, state, chat_id, "dialog_messages")
+    await cleanup_messages_by_category(bot, state, chat_id, "solution_result", "dialog_messages")
 
     # 🔹 очищаем help_image, чтобы не тянулась в следующую задачу
     await state.update_data(help_image=None)
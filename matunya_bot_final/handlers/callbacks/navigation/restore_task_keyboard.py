@@ -95,8 +95,7 @@ async def restore_task_keyboard_handler(
     )
 
     # чистим всё, что могло остаться
-    await cleanup_messages_by_category(bot, state, chat_id, "tasks")
-    await cleanup_messages_by_category(bot, state, chat_id, "menus")
+    await cleanup_messages_by_category(bot, state, chat_id, "tasks", "menus")
 
     current_theme = state_data.get("current_theme") or THEMES_ORDER[0]
 
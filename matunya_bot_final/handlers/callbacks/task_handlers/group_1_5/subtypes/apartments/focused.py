@@ -1,5 +1,7 @@
 from pathlib import Path
 
+from matunya_bot_final.utils.telegram_file_cache import send_cached_photo
+
 
 async def send_focused_task_block_apartments(
     bot,
@@ -13,8 +15,9 @@ async def send_focused_task_block_apartments(
 
     image_path = Path(variant["image"])
 
-    await bot.send_photo(
+    await send_cached_photo(
+        bot=bot,
         chat_id=chat_id,
-        photo=image_path.open("rb"),
+        path=image_path,
         caption="🧩 План квартиры"
     )
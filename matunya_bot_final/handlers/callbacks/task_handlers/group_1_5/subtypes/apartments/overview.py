@@ -1,17 +1,16 @@
-from aiogram.types import FSInputFile
 from pathlib import Path
 
+from matunya_bot_final.utils.telegram_file_cache import send_cached_photo
+
 
 async def send_overview_block_apartments(bot, state, chat_id, task_1_5_data):
 
     variant = task_1_5_data
     image_path = Path(variant["image"])
 
-    photo = FSInputFile(image_path)
-
-    await bot.send_photo(
+    await send_cached_photo(
+        bot=bot,
         chat_id=chat_id,
-        photo=photo,
+        path=image_path,
         caption="🧩 План квартиры"
     )
-    
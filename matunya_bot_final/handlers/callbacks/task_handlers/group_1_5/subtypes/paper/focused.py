@@ -1,6 +1,5 @@
 from aiogram import Bot, Router, types
 from aiogram.fsm.context import FSMContext
-from aiogram.types import FSInputFile
 from pathlib import Path
 import logging
 
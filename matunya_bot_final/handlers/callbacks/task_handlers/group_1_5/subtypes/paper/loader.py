@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-import random
 import logging
 from pathlib import Path
 import json
 
-from matunya_bot_final.loader import TASKS_DB, DATA_DIR
+from matunya_bot_final.core.task_catalog import get_catalog
+from matunya_bot_final.loader import DATA_DIR
 
 logger = logging.getLogger(__name__)
 
@@ -28,12 +28,6 @@ NON_GEN_ASSETS_DIR = (
 # ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ (перенос 1:1)
 # ==============================================================
 
-def _sort_key_paper_id(item: dict) -> int:
-    import re
-    m = re.search(r"_var_(\d+)$", str(item.get("id", "")))
-    return int(m.group(1)) if m else 10**9
-
-
 def _load_paper_intro() -> list[dict]:
     if not PAPER_INTRO_PATH.exists():
         return []
@@ -93,13 +87,12 @@ def _attach_intro_assets(display_scenario: list[dict]) -> list[dict]:
 # ==============================================================
 
 async def load_paper_variant() -> dict | None:
-    variants = TASKS_DB.get("1_5_paper") or []
+    variants = get_catalog("1_5_paper").all
     if not variants:
         logger.error("❌ TASKS_DB['1_5_paper'] пуст")
         return None
 
-    variants_sorted = sorted(variants, key=_sort_key_paper_id)
-    chosen = random.choice(variants_sorted)
+    chosen = variants.pick()
 
     questions = chosen.get("questions", [])
     table_context = chosen.get("table_context")
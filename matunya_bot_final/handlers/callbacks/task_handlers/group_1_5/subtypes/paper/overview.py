@@ -1,6 +1,5 @@
 from aiogram import Bot, Router, types
 from aiogram.fsm.context import FSMContext
-from aiogram.types import FSInputFile
 from pathlib import Path
 import logging
 
@@ -51,7 +50,7 @@ async def send_overview_block_paper(
                     bot=bot,
                     chat_id=chat_id,
                     state=state,
-                    photo=FSInputFile(image_path),
+                    photo=image_path,
                     caption=caption,
                     message_tag=f"overview_image_{index}",
                     category="tasks",
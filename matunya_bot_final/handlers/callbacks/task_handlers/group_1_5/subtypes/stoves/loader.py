@@ -1,16 +1,15 @@
-from matunya_bot_final.loader import TASKS_DB
-import random
+from matunya_bot_final.core.task_catalog import get_catalog
 import logging
 
 logger = logging.getLogger(__name__)
 
 async def load_stoves_variant() -> dict | None:
-    variants = TASKS_DB.get("1_5_stoves") or []
+    variants = get_catalog("1_5_stoves").all
     if not variants:
         logger.error("❌ TASKS_DB['1_5_stoves'] пуст")
         return None
 
-    chosen = random.choice(variants)
+    chosen = variants.pick()
 
     questions = chosen.get("questions", [])
     table_context = chosen.get("table_context")
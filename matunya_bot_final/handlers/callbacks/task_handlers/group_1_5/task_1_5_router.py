@@ -30,7 +30,7 @@ from matunya_bot_final.utils.message_manager import (
 )
 
 # Интеграция с базой данных (регистрация задач)
-from matunya_bot_final.utils.db_manager import register_task
+from matunya_bot_final.utils.db_manager import register_tasks_bulk
 
 from matunya_bot_final.states.states import TaskState
 
@@ -201,26 +201,21 @@ async def dispatch_overview_screen(
         if not task_1_5_data:
             raise Exception("Не удалось получить task_1_5_data")
 
-        # 👉 регистрация задач в БД
-        task_ids_from_db = []
+        # 👉 регистрация задач в БД — весь пакет одной транзакцией
         async with session_maker() as session:
-            tasks = task_1_5_data.get("tasks", [])
-            for task in tasks:
-                skill_source_id = task.get("skill_source_id")
-                question_text = task.get("question_text", "")
-                answer_value = task.get("answer", "")
-
-                solution_data = task.get("solution_data")
-
-                task_id = await register_task(
-                    session,
-                    str(skill_source_id),
-                    str(question_text),
-                    str(answer_value),
-                    theme=subtype_key,
-                    solution_data=solution_data,
-                )
-                task_ids_from_db.append(task_id)
+            task_ids_from_db = await register_tasks_bulk(
+                session,
+                [
+                    {
+                        "skill_source_id": str(task.get("skill_source_id")),
+                        "text": str(task.get("question_text", "")),
+                        "answer": str(task.get("answer", "")),
+                        "theme": subtype_key,
+                        "solution_data": task.get("solution_data"),
+                    }
+                    for task in task_1_5_data.get("tasks", [])
+                ],
+            )
 
         await state.update_data(
             task_1_5_data=task_1_5_data,
@@ -297,11 +292,7 @@ async def back_to_overview_handler(callback: types.CallbackQuery, state: FSMCont
     chat_id = callback.message.chat.id
 
     # 🧹 Чистим всё, что относится к фокусному заданию
-    await cleanup_messages_by_category(bot, state, chat_id, "focused_task_panel")
-    await cleanup_messages_by_category(bot, state, chat_id, "focused_assets")
-    await cleanup_messages_by_category(bot, state, chat_id, "help_panels")
-    await cleanup_messages_by_category(bot, state, chat_id, "dialog_messages")
-    await cleanup_messages_by_category(bot, state, chat_id, "notifications")
+    await cleanup_messages_by_category(bot, state, chat_id, "focused_task_panel", "focused_assets", "help_panels", "dialog_messages", "notifications")
 
     await show_task_1_5_overview(bot, state, chat_id)
 
@@ -331,8 +322,7 @@ async def dispatch_focused_screen(
         await callback.answer("Ошибка загрузки задания", show_alert=True)
         return
 
-    await cleanup_messages_by_category(bot, state, callback.message.chat.id, "help_panels")
-    await cleanup_messages_by_category(bot, state, callback.message.chat.id, "dialog_messages")
+    await cleanup_messages_by_category(bot, state, callback.message.chat.id, "help_panels", "dialog_messages")
 
     await handler["focused"](
         bot=bot,
@@ -50,10 +50,11 @@ async def handle_show_theory(callback: CallbackQuery, callback_data: TaskCallbac
             "Не используй сложные формулы. Твоя задача — напомнить тему и ключевую идею, а не решать задачу."
         )
 
-        # Вызываем GPT
+        # Вызываем GPT (промпт зависит только от текста задания — отвечаем из кеша)
         theory_text, _ = await ask_gpt_with_history(
             user_prompt=theory_prompt,
-            dialog_history=[] # Теорию всегда спрашиваем с чистого листа
+            dialog_history=[], # Теорию всегда спрашиваем с чистого листа
+            use_cache=True,
         )
 
         await callback.message.answer(f"📘 <b>Теория к Заданию №{question_num}:</b>\n\n{theory_text}")
@@ -18,6 +18,7 @@ from matunya_bot_final.handlers.callbacks.navigators.task_10_navigator import pi
 
 # Импортируем нашу "Фабрику"
 from matunya_bot_final.gpt.task_generators.task_10.task_10_generator import generate_task_10, TaskGenerationError
+from matunya_bot_final.core.task_pool import get_task_pool
 
 router = Router()
 
@@ -104,7 +105,8 @@ async def run_task_10_generation(callback: types.CallbackQuery, state: FSMContex
     
     try:
         # Пункт 1. Получаем данные
-        generated_task = await generate_task_10(subtype_id)
+        # Готовое задание из пула или живая генерация, если пул пуст
+        generated_task = get_task_pool("10").pop(subtype_id) or await generate_task_10(subtype_id)
         task_text = generated_task['text']
         task_answer = generated_task['answer']
         task_type = "10"
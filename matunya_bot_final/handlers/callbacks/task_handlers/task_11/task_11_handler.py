@@ -2,13 +2,14 @@
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram import Bot
-from aiogram.types import CallbackQuery, FSInputFile
+from aiogram.types import CallbackQuery
+import asyncio
 import logging
 import os
-import random
+from pathlib import Path
 
 from matunya_bot_final.core.callbacks.tasks_callback import TaskCallback
-from matunya_bot_final.loader import TASKS_DB
+from matunya_bot_final.core.task_catalog import get_catalog
 from matunya_bot_final.keyboards.inline_keyboards.tasks.task_11.task_11_carousel import (
     get_task_11_carousel_keyboard,
     generate_task_11_overview_text,
@@ -20,6 +21,7 @@ from matunya_bot_final.states.states import TaskState
 
 from matunya_bot_final.utils.text_formatters import format_task
 from matunya_bot_final.task_generators.task_11 import generate_task_11_by_subtype
+from matunya_bot_final.utils.visuals.plot_generator import compose_graph_grid
 
 # Система "Идеальная Чистота"
 from matunya_bot_final.utils.message_manager import (
@@ -124,16 +126,15 @@ async def task_11_open_selected(
 ) -> None:
     raw_key = callback_data.subtype_key or THEMES[0]
     theme_key = raw_key if raw_key in THEMES else SUBTYPE_TO_THEME.get(raw_key, THEMES[0])
-    tasks_db = TASKS_DB.get("11", [])
+    catalog = get_catalog("11")
 
     await query.answer()
 
     chat_id = query.message.chat.id
     # 💡 Убираем карусель и возможные временные уведомления
-    await cleanup_messages_by_category(bot, state, chat_id, "menus")
-    await cleanup_messages_by_category(bot, state, chat_id, "notifications")
+    await cleanup_messages_by_category(bot, state, chat_id, "menus", "notifications")
 
-    if not tasks_db:
+    if not len(catalog):
         await query.answer("❌ База заданий пуста")
         await bot.send_message(
             chat_id=query.message.chat.id,
@@ -141,10 +142,9 @@ async def task_11_open_selected(
         )
         return
 
-    allowed = set(THEME_TO_SUBTYPES.get(theme_key, []))
-    pool = [t for t in tasks_db if t.get("subtype") in allowed] or tasks_db
+    pool = catalog.bucket(subtype=THEME_TO_SUBTYPES.get(theme_key, [])) or catalog.all
 
-    task_data = random.choice(pool)
+    task_data = pool.pick()
     await send_task_11(query, bot, state, task_data)
     await query.answer("✅ Задание загружено")
 
@@ -182,21 +182,13 @@ async def task_11_another_task_handler(
     # ★★★ ИЗМЕНЕНИЕ №2: Сохраняем тему в state для будущих нажатий (на всякий случай)
     await state.update_data(current_task_11_theme=theme_key)
 
-    tasks_db = TASKS_DB.get("11", [])
+    # Корзина темы из индекса; текущее задание исключаем, если есть другие
+    task_data = get_catalog("11").pick(topic=theme_key, exclude_id=last_task_id)
 
-    pool = [
-        t for t in tasks_db
-        if t.get("topic") == theme_key and t.get("id") != last_task_id
-    ]
-
-    if not pool:
-        pool = [t for t in tasks_db if t.get("topic") == theme_key]
-
-    if not pool:
+    if not task_data:
         await query.message.answer("Не удалось подобрать другое задание для этой темы.")
         return
 
-    task_data = random.choice(pool)
     await send_task_11(query, bot, state, task_data)
 
 # ==============================
@@ -214,10 +206,7 @@ async def back_to_carousel_11(callback: CallbackQuery, state: FSMContext, bot: B
         pass
 
     # 2) Чистим все «следы задания» и вспомогательные панели
-    await cleanup_messages_by_category(bot, state, callback.from_user.id, "tasks")
-    await cleanup_messages_by_category(bot, state, callback.from_user.id, "help_panels")
-    await cleanup_messages_by_category(bot, state, callback.from_user.id, "dialog_messages")
-    await cleanup_messages_by_category(bot, state, callback.from_user.id, "menus")  # на всякий случай, чтобы не было дублей
+    await cleanup_messages_by_category(bot, state, callback.from_user.id, "tasks", "help_panels", "dialog_messages", "menus")
 
     # 3) Показываем карусель тем 11 заново
     current_key = THEMES[0]
@@ -238,14 +227,59 @@ async def back_to_carousel_11(callback: CallbackQuery, state: FSMContext, bot: B
 # ==============================
 # Helper: отправка задания
 # ==============================
+async def _send_task_11_grid(
+    query: CallbackQuery,
+    bot: Bot,
+    state: FSMContext,
+    task_data: dict,
+    image_paths: list,
+    labels: list,
+) -> bool:
+    """
+    Отправляет все графики одной картинкой — один запрос к Telegram вместо трёх.
+    Для заданий, собранных до появления сетки, склеивает её при первом показе.
+    False — сетку отправить не удалось (нужен запасной путь).
+    """
+    params = task_data.get("source_plot", {}).get("params", {})
+    final_paths = [os.path.abspath(p.replace("\\", "/")) for p in image_paths]
+    grid = params.get("grid")
+    if grid:
+        grid_path = os.path.abspath(grid.replace("\\", "/"))
+    else:
+        stem = task_data.get("id") or Path(final_paths[0]).stem.rsplit("_", 1)[0]
+        grid_path = str(Path(final_paths[0]).with_name(f"{stem}_grid.png"))
+
+    try:
+        if not os.path.exists(grid_path):
+            if not all(os.path.exists(p) for p in final_paths):
+                return False
+            await asyncio.to_thread(compose_graph_grid, final_paths, labels, grid_path)
+
+        caption_labels = ", ".join(labels[:len(final_paths)])
+        await send_tracked_photo(
+            bot=bot,
+            chat_id=query.message.chat.id,
+            state=state,
+            photo=Path(grid_path),
+            caption=f"<b>Графики {caption_labels}</b>",
+            parse_mode="HTML",
+            message_tag="task_11_images",
+            category="tasks"
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Task 11: Ошибка отправки сетки графиков {grid_path}: {e}")
+        return False
+
+
 async def send_task_11(query: CallbackQuery, bot: Bot, state: FSMContext, task_data: dict) -> None:
     """
     НОВАЯ ВЕРСЯ 3.0: Отправляет Задание 11 в правильном, полном и красивом формате.
-    Сначала картинки (по одной), затем - единое сообщение с текстом, вариантами и клавиатурой.
+    Сначала картинки (одной сеткой А/Б/В), затем - единое сообщение с текстом, вариантами и клавиатурой.
     """
     await cleanup_messages_by_category(bot, state, query.message.chat.id, "tasks")
 
-    # --- 1. Отправляем КАРТИНКИ по одной с подписями ---
+    # --- 1. Отправляем КАРТИНКИ: одной сеткой с подписями ---
     source_plot = task_data.get("source_plot", {})
     params = source_plot.get("params", {})
     image_paths = params.get("graphs", [])
@@ -256,27 +290,29 @@ async def send_task_11(query: CallbackQuery, bot: Bot, state: FSMContext, task_d
         await bot.send_message(chat_id=query.message.chat.id, text="⚠️ Ошибка: Изображения для этого задания не найдены.")
         return # Прерываем выполнение, если нет картинок
 
-    for index, image_path in enumerate(image_paths):
-        try:
-            final_path = os.path.abspath(image_path.replace("\\", "/"))
-            caption = f"<b>График {labels[index]}</b>" if index < len(labels) else f"График {index+1}"
-
-            if not os.path.exists(final_path):
-                logger.error(f"Task 11: Файл не найден по пути: {final_path}")
-                continue
-
-            await send_tracked_photo(
-                bot=bot,
-                chat_id=query.message.chat.id,
-                state=state,
-                photo=FSInputFile(final_path),
-                caption=caption,
-                parse_mode="HTML",
-                message_tag=f"task_11_image_{index}",
-                category="tasks"
-            )
-        except Exception as e:
-            logger.error(f"Task 11: Ошибка отправки изображения {image_path}: {e}")
+    if not await _send_task_11_grid(query, bot, state, task_data, image_paths, labels):
+        # Запасной путь: картинки по одной
+        for index, image_path in enumerate(image_paths):
+            try:
+                final_path = os.path.abspath(image_path.replace("\\", "/"))
+                caption = f"<b>График {labels[index]}</b>" if index < len(labels) else f"График {index+1}"
+
+                if not os.path.exists(final_path):
+                    logger.error(f"Task 11: Файл не найден по пути: {final_path}")
+                    continue
+
+                await send_tracked_photo(
+                    bot=bot,
+                    chat_id=query.message.chat.id,
+                    state=state,
+                    photo=Path(final_path),
+                    caption=caption,
+                    parse_mode="HTML",
+                    message_tag=f"task_11_image_{index}",
+                    category="tasks"
+                )
+            except Exception as e:
+                logger.error(f"Task 11: Ошибка отправки изображения {image_path}: {e}")
 
     # --- 2. Собираем ПОЛНЫЙ текст задания ДЛЯ ФИНАЛЬНОГО СООБЩЕНИЯ ---
     main_text = task_data.get("text")
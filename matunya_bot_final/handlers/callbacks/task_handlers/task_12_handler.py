@@ -1,9 +1,8 @@
-import random
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 
-from matunya_bot_final.loader import TASKS_DB
+from matunya_bot_final.core.task_catalog import TaskBucket, get_catalog
 from matunya_bot_final.states.states import TaskState
 from matunya_bot_final.keyboards.inline_keyboards.after_task_keyboard import get_after_task_keyboard
 from matunya_bot_final.keyboards.inline_keyboards.tasks.task_12.task_12_keyboard import (
@@ -117,7 +116,7 @@ async def back_to_task_12_menu(callback: CallbackQuery, state: FSMContext):
 @router.callback_query(F.data == "t12:random")
 async def handle_random_task(callback: CallbackQuery, state: FSMContext):
     """Выдача случайной задачи из всех категорий Задания 12"""
-    tasks_12 = TASKS_DB.get("12", [])
+    tasks_12 = get_catalog("12").all
     
     if not tasks_12:
         await callback.message.edit_text("Задачи не найдены.")
@@ -125,7 +124,7 @@ async def handle_random_task(callback: CallbackQuery, state: FSMContext):
         return
     
     # Выбираем случайную задачу
-    task = random.choice(tasks_12)
+    task = tasks_12.pick()
     
     # Сохраняем в FSM для полностью случайного выбора
     await state.update_data(
@@ -169,7 +168,7 @@ async def handle_subcategory_selection(callback: CallbackQuery, state: FSMContex
         return
     
     # Выбираем случайную задачу
-    task = random.choice(filtered_tasks)
+    task = filtered_tasks.pick()
     
     # Сохраняем в FSM
     await state.update_data(
@@ -219,7 +218,7 @@ async def generate_random_task_from_category(callback: CallbackQuery, state: FSM
         return
     
     # Выбираем случайную задачу
-    task = random.choice(filtered_tasks)
+    task = filtered_tasks.pick()
     
     # Сохраняем в FSM
     await state.update_data(
@@ -273,8 +272,7 @@ async def handle_task_reroll(callback: CallbackQuery, state: FSMContext):
     # Фильтруем задачи согласно сохраненным параметрам
     if theme_key == "random":
         # Полностью случайный выбор из всех задач
-        tasks_12 = TASKS_DB.get("12", [])
-        filtered_tasks = tasks_12
+        filtered_tasks = get_catalog("12").all
     elif sub_theme_key:
         # Конкретная подкатегория
         filtered_tasks = filter_tasks_by_category(theme_key, sub_theme_key)
@@ -286,12 +284,8 @@ async def handle_task_reroll(callback: CallbackQuery, state: FSMContext):
         await callback.answer("Больше задач в этой категории нет")
         return
     
-    # Исключаем текущую задачу, если есть другие варианты
-    if len(filtered_tasks) > 1:
-        filtered_tasks = [t for t in filtered_tasks if t["id"] != current_task_id]
-    
-    # Выбираем новую задачу
-    new_task = random.choice(filtered_tasks)
+    # Выбираем новую задачу (текущую исключаем, если есть другие варианты)
+    new_task = filtered_tasks.pick(exclude_id=current_task_id)
     
     # Обновляем FSM
     await state.update_data(
@@ -330,27 +324,21 @@ async def handle_task_reroll(callback: CallbackQuery, state: FSMContext):
 # =================================================================
 # Вспомогательные функции
 # =================================================================
-def filter_tasks_by_category(category: str, subcategory: str = None) -> list:
+def filter_tasks_by_category(category: str, subcategory: str = None) -> TaskBucket:
     """
-    Фильтрует задачи по категории и подкатегории
+    Корзина задач по категории и подкатегории (из индекса каталога)
     
     Args:
         category: "calculations", "equations", "misc"
         subcategory: "geometry", "physics" (опционально)
     
     Returns:
-        Список отфильтрованных задач
+        Корзина задач (TaskBucket), пустая — если ничего не найдено
     """
-    tasks_12 = TASKS_DB.get("12", [])
-    
-    if not tasks_12:
-        return []
-    
-    # Фильтруем по категории
-    filtered = [task for task in tasks_12 if task.get("category") == category]
+    catalog = get_catalog("12")
     
-    # Если указана подкатегория, дополнительно фильтруем
+    # Если указана подкатегория, берём составную корзину
     if subcategory:
-        filtered = [task for task in filtered if task.get("subcategory") == subcategory]
+        return catalog.bucket(category=category, subcategory=subcategory)
     
-    return filtered
+    return catalog.bucket(category=category)
@@ -5,15 +5,14 @@ from __future__ import annotations
 
 import logging
 import os
-import random
 from pathlib import Path
-from typing import Iterable
 
 from aiogram import Bot, F, Router
 from aiogram.fsm.context import FSMContext
-from aiogram.types import BufferedInputFile, CallbackQuery
+from aiogram.types import CallbackQuery
 
 from matunya_bot_final.core.callbacks.tasks_callback import TaskCallback
+from matunya_bot_final.core.task_catalog import TaskCatalog, get_catalog
 from matunya_bot_final.keyboards.inline_keyboards.after_task_keyboard import (
     compose_after_task_message_from_state,
     get_after_task_keyboard,
@@ -23,12 +22,13 @@ from matunya_bot_final.keyboards.inline_keyboards.tasks.task_15.task_15_carousel
     get_current_theme_name,
     get_task_15_carousel_keyboard,
 )
-from matunya_bot_final.loader import TASKS_DB
 from matunya_bot_final.states.states import TaskState
 from matunya_bot_final.utils.message_manager import (
     cleanup_messages_by_category,
+    message_tracker,
     send_tracked_message,
 )
+from matunya_bot_final.utils.telegram_file_cache import send_cached_photo
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -76,16 +76,18 @@ THEMES: tuple[str, ...] = (
 )
 
 
-def _pick_task_for_theme(tasks: Iterable[dict], theme_key: str) -> dict | None:
-    items = list(tasks)
-    if not items:
-        return None
+THEME_TO_PATTERNS: dict[str, tuple[str, ...]] = {
+    theme: tuple(p for p, t in PATTERN_TO_THEME.items() if t == theme)
+    for theme in THEMES
+}
+
 
-    pool = [t for t in items if PATTERN_TO_THEME.get(t.get("pattern")) == theme_key]
+def _pick_task_for_theme(catalog: TaskCatalog, theme_key: str) -> dict | None:
+    pool = catalog.bucket(pattern=THEME_TO_PATTERNS.get(theme_key, ()))
     if not pool:
-        pool = items
+        pool = catalog.all
 
-    return random.choice(pool)
+    return pool.pick()
 
 
 @router.callback_query(TaskCallback.filter((F.action == "select_task") & (F.task_type == 15)))
@@ -168,15 +170,14 @@ async def task_15_open_selected(
         theme_key = callback_data.subtype_key or THEMES[0]
 
     # 2) Загружаем задания
-    tasks_object = TASKS_DB.get("15", {})
-    tasks = tasks_object.get("tasks", []) if isinstance(tasks_object, dict) else tasks_object
+    catalog = get_catalog("15")
 
-    if not tasks:
+    if not len(catalog):
         await bot.send_message(chat_id, "Пока нет заданий для этой темы.")
         return
 
     # 3) Берём задание только из темы
-    task_data = _pick_task_for_theme(tasks, theme_key)
+    task_data = _pick_task_for_theme(catalog, theme_key)
     if not task_data:
         await bot.send_message(chat_id, "Не удалось подобрать задание.")
         return
@@ -195,8 +196,7 @@ async def back_to_carousel_15(
     await callback.answer()
     chat_id = callback.message.chat.id
 
-    await cleanup_messages_by_category(bot, state, chat_id, "tasks")
-    await cleanup_messages_by_category(bot, state, chat_id, "menus")
+    await cleanup_messages_by_category(bot, state, chat_id, "tasks", "menus")
 
     current_key = THEMES[0]
     overview_text = generate_task_15_overview_text(list(THEMES), current_key)
@@ -224,74 +224,61 @@ async def send_task_15(
 ) -> None:
     chat_id = query.message.chat.id
 
-    # 1) Чистим меню
-    await cleanup_messages_by_category(bot, state, chat_id, "menus")
-
-    # 2) Чистим прошлые задания
-    await cleanup_messages_by_category(bot, state, chat_id, "tasks")
-
-    # 3️⃣ Картинка (PNG) — если есть
-    image_file = task_data.get("image_file")
+    # Трекинг сообщений читается и сохраняется один раз на всю отправку
+    async with message_tracker(state) as tracker:
+        # 1-2) Чистим меню и прошлые задания
+        await cleanup_messages_by_category(bot, state, chat_id, "menus", "tasks")
 
-    if image_file:
-        image_path = TASK_15_ASSETS_DIR / image_file
+        # 3️⃣ Картинка (PNG) — если есть
+        image_file = task_data.get("image_file")
 
-        if image_path.exists():
-            photo = BufferedInputFile.from_file(image_path)
+        if image_file:
+            image_path = TASK_15_ASSETS_DIR / image_file
 
-            msg = await bot.send_photo(
-                chat_id=chat_id,
-                photo=photo,
-            )
+            if image_path.exists():
+                msg = await send_cached_photo(
+                    bot=bot,
+                    chat_id=chat_id,
+                    path=image_path,
+                )
 
-            # регистрация для cleanup
-            state_data = await state.get_data()
+                # регистрация для cleanup
+                tracker.track("task_15_image", msg.message_id, category="tasks")
+            else:
+                logger.warning("[Task15] PNG не найден: %s", image_path)
 
-            tracked = dict(state_data.get("tracked_messages", {}))
-            tracked["task_15_image"] = msg.message_id
+        # 4) Текст задания
+        footer_text = await compose_after_task_message_from_state(state)
 
-            tags = dict(state_data.get("message_tags_by_category", {}))
-            tags.setdefault("tasks", []).append("task_15_image")
+        question_text = task_data.get("text", "🔴 Ошибка: текст задания отсутствует!")
+        if "Ответ" not in question_text and "🔴" not in question_text:
+            question_text = question_text.strip() + "\n\nОтвет: ____________"
 
-            await state.update_data(
-                tracked_messages=tracked,
-                message_tags_by_category=tags,
-            )
-        else:
-            logger.warning("[Task15] PNG не найден: %s", image_path)
+        topic_key = task_data.get("pattern") or "default"
+        theme_key = PATTERN_TO_THEME.get(topic_key, "default")
+        topic_name = get_current_theme_name(theme_key)
 
-    # 4) Текст задания
-    footer_text = await compose_after_task_message_from_state(state)
-
-    question_text = task_data.get("text", "🔴 Ошибка: текст задания отсутствует!")
-    if "Ответ" not in question_text and "🔴" not in question_text:
-        question_text = question_text.strip() + "\n\nОтвет: ____________"
-
-    topic_key = task_data.get("pattern") or "default"
-    theme_key = PATTERN_TO_THEME.get(topic_key, "default")
-    topic_name = get_current_theme_name(theme_key)
-
-    final_text = (
-        f"<b>Задание 15:</b> {topic_name}\n\n"
-        f"{question_text}\n\n\n"
-        f"{footer_text}"
-    )
+        final_text = (
+            f"<b>Задание 15:</b> {topic_name}\n\n"
+            f"{question_text}\n\n\n"
+            f"{footer_text}"
+        )
 
-    keyboard = get_after_task_keyboard(task_number=15, task_subtype=topic_key)
+        keyboard = get_after_task_keyboard(task_number=15, task_subtype=topic_key)
 
-    await send_tracked_message(
-        bot=bot,
-        chat_id=chat_id,
-        state=state,
-        text=final_text,
-        reply_markup=keyboard,
-        message_tag="task_15_main_text",
-        category="tasks",
-        parse_mode="HTML",
-    )
+        await send_tracked_message(
+            bot=bot,
+            chat_id=chat_id,
+            state=state,
+            text=final_text,
+            reply_markup=keyboard,
+            message_tag="task_15_main_text",
+            category="tasks",
+            parse_mode="HTML",
+        )
 
-    topic_key = task_data.get("pattern") or "default"
-    theme_key = PATTERN_TO_THEME.get(topic_key, "default")
+        topic_key = task_data.get("pattern") or "default"
+        theme_key = PATTERN_TO_THEME.get(topic_key, "default")
 
     # 5) FSM
     await state.update_data(
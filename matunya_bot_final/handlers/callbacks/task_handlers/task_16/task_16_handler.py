@@ -4,15 +4,14 @@
 from __future__ import annotations
 
 import logging
-import random
 from pathlib import Path
-from typing import Iterable
 
 from aiogram import Bot, F, Router
 from aiogram.fsm.context import FSMContext
-from aiogram.types import BufferedInputFile, CallbackQuery
+from aiogram.types import CallbackQuery
 
 from matunya_bot_final.core.callbacks.tasks_callback import TaskCallback
+from matunya_bot_final.core.task_catalog import TaskCatalog, get_catalog
 from matunya_bot_final.keyboards.inline_keyboards.after_task_keyboard import (
     compose_after_task_message_from_state,
     get_after_task_keyboard,
@@ -21,12 +20,13 @@ from matunya_bot_final.keyboards.inline_keyboards.tasks.task_16.task_16_carousel
     generate_task_16_overview_text,
     get_task_16_carousel_keyboard,
 )
-from matunya_bot_final.loader import TASKS_DB
 from matunya_bot_final.states.states import TaskState
 from matunya_bot_final.utils.message_manager import (
     cleanup_messages_by_category,
+    message_tracker,
     send_tracked_message,
 )
+from matunya_bot_final.utils.telegram_file_cache import send_cached_photo
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -85,7 +85,7 @@ THEMES_ORDER: tuple[str, ...] = tuple(THEMES_16.keys())
 # Утилита выбора задания (Task 16)
 # -----------------------------------------------------------------------------
 def _pick_task_for_theme_16(
-    tasks: Iterable[dict],
+    catalog: TaskCatalog,
     theme_key: str,
     exclude_pattern: str | None = None,
 ) -> dict | None:
@@ -99,36 +99,9 @@ def _pick_task_for_theme_16(
     3. Если после исключения паттерна вариантов не осталось —
        разрешаем повтор текущего паттерна (fallback).
     """
-
-    items = list(tasks)
-    if not items:
-        return None
-
-    # Разрешённые паттерны темы
-    allowed_patterns = set(THEMES_16[theme_key]["patterns"])
-
-    # 1) Базовый пул по теме
-    themed_pool = [
-        t for t in items
-        if t.get("pattern") in allowed_patterns
-    ]
-
-    if not themed_pool:
-        return None
-
-    # 2) Пул без текущего паттерна (если он передан)
-    if exclude_pattern:
-        filtered_pool = [
-            t for t in themed_pool
-            if t.get("pattern") != exclude_pattern
-        ]
-
-        # Если удалось исключить текущий паттерн — используем этот пул
-        if filtered_pool:
-            return random.choice(filtered_pool)
-
-    # 3) Fallback: если паттерн один или исключать нечего
-    return random.choice(themed_pool)
+    # Корзина темы строится по индексу каталога один раз и кэшируется
+    themed_pool = catalog.bucket(pattern=THEMES_16[theme_key]["patterns"])
+    return themed_pool.pick(exclude_pattern=exclude_pattern)
 
 
 # -----------------------------------------------------------------------------
@@ -217,10 +190,9 @@ async def task_16_open_selected(
         theme_key = callback_data.subtype_key or THEMES_ORDER[0]
 
     # 2) Загружаем задания
-    tasks_object = TASKS_DB.get("16", {})
-    tasks = tasks_object.get("tasks", []) if isinstance(tasks_object, dict) else tasks_object
+    catalog = get_catalog("16")
 
-    if not tasks:
+    if not len(catalog):
         await bot.send_message(chat_id, "Пока нет заданий для этой темы.")
         return
 
@@ -230,7 +202,7 @@ async def task_16_open_selected(
     current_pattern = current_task.get("pattern")
 
     task_data = _pick_task_for_theme_16(
-        tasks,
+        catalog,
         theme_key,
         exclude_pattern=current_pattern,
     )
@@ -255,8 +227,7 @@ async def back_to_carousel_16(
     await callback.answer()
     chat_id = callback.message.chat.id
 
-    await cleanup_messages_by_category(bot, state, chat_id, "tasks")
-    await cleanup_messages_by_category(bot, state, chat_id, "menus")
+    await cleanup_messages_by_category(bot, state, chat_id, "tasks", "menus")
 
     current_theme = THEMES_ORDER[0]
     overview_text = generate_task_16_overview_text(THEMES_16, current_theme)
@@ -287,65 +258,52 @@ async def send_task_16(
 ) -> None:
     chat_id = query.message.chat.id
 
-    # 1) Чистим меню
-    await cleanup_messages_by_category(bot, state, chat_id, "menus")
-
-    # 2) Чистим прошлые задания
-    await cleanup_messages_by_category(bot, state, chat_id, "tasks")
-
-    # 3) Картинка
-    image_file = task_data.get("image_file")
-    if image_file:
-        image_path = TASK_16_ASSETS_DIR / image_file
-        if image_path.exists():
-            photo = BufferedInputFile.from_file(image_path)
-            msg = await bot.send_photo(chat_id=chat_id, photo=photo)
-
-            state_data = await state.get_data()
-            tracked = dict(state_data.get("tracked_messages", {}))
-            tracked["task_16_image"] = msg.message_id
-
-            tags = dict(state_data.get("message_tags_by_category", {}))
-            tags.setdefault("tasks", []).append("task_16_image")
-
-            await state.update_data(
-                tracked_messages=tracked,
-                message_tags_by_category=tags,
-            )
-        else:
-            logger.warning("[Task16] PNG не найден: %s", image_path)
-
-    # 4) Текст задания
-    footer_text = await compose_after_task_message_from_state(state)
-
-    question_text = task_data.get("question_text", "🔴 Ошибка: текст задания отсутствует!")
-    if "Ответ" not in question_text and "🔴" not in question_text:
-        question_text = question_text.strip() + "\n\nОтвет: ____________"
-
-    theme_key = (await state.get_data()).get("current_theme", THEMES_ORDER[0])
-    theme_title = THEMES_16[theme_key]["title"]
-
-    final_text = (
-        f"<b>Задание 16:</b> {theme_title}\n\n"
-        f"{question_text}\n\n\n"
-        f"{footer_text}"
-    )
+    # Трекинг сообщений читается и сохраняется один раз на всю отправку
+    async with message_tracker(state) as tracker:
+        # 1-2) Чистим меню и прошлые задания
+        await cleanup_messages_by_category(bot, state, chat_id, "menus", "tasks")
+
+        # 3) Картинка
+        image_file = task_data.get("image_file")
+        if image_file:
+            image_path = TASK_16_ASSETS_DIR / image_file
+            if image_path.exists():
+                msg = await send_cached_photo(bot=bot, chat_id=chat_id, path=image_path)
+                tracker.track("task_16_image", msg.message_id, category="tasks")
+            else:
+                logger.warning("[Task16] PNG не найден: %s", image_path)
+
+        # 4) Текст задания
+        footer_text = await compose_after_task_message_from_state(state)
+
+        question_text = task_data.get("question_text", "🔴 Ошибка: текст задания отсутствует!")
+        if "Ответ" not in question_text and "🔴" not in question_text:
+            question_text = question_text.strip() + "\n\nОтвет: ____________"
+
+        theme_key = (await state.get_data()).get("current_theme", THEMES_ORDER[0])
+        theme_title = THEMES_16[theme_key]["title"]
+
+        final_text = (
+            f"<b>Задание 16:</b> {theme_title}\n\n"
+            f"{question_text}\n\n\n"
+            f"{footer_text}"
+        )
 
-    keyboard = get_after_task_keyboard(
-        task_number=16,
-        task_subtype=task_data.get("pattern"),
-    )
+        keyboard = get_after_task_keyboard(
+            task_number=16,
+            task_subtype=task_data.get("pattern"),
+        )
 
-    await send_tracked_message(
-        bot=bot,
-        chat_id=chat_id,
-        state=state,
-        text=final_text,
-        reply_markup=keyboard,
-        message_tag="task_16_main_text",
-        category="tasks",
-        parse_mode="HTML",
-    )
+        await send_tracked_message(
+            bot=bot,
+            chat_id=chat_id,
+            state=state,
+            text=final_text,
+            reply_markup=keyboard,
+            message_tag="task_16_main_text",
+            category="tasks",
+            parse_mode="HTML",
+        )
 
     # 5) FSM
     await state.update_data(
@@ -147,8 +147,7 @@ async def _show_solution_and_dialog_option(
     chat_id = message.chat.id
 
     # Очищаем старые сообщения помощи
-    await cleanup_messages_by_category(bot, state, chat_id, "dialog_messages")
-    await cleanup_messages_by_category(bot, state, chat_id, "help_panels")
+    await cleanup_messages_by_category(bot, state, chat_id, "dialog_messages", "help_panels")
 
     # Получаем эталонное решение
     try:
@@ -3,14 +3,14 @@
 from __future__ import annotations
 
 import logging
-import random
-from typing import Dict, Iterable
+from typing import Dict
 
 from aiogram import Bot, F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery
 
 from matunya_bot_final.core.callbacks.tasks_callback import TaskCallback
+from matunya_bot_final.core.task_catalog import TaskCatalog, get_catalog
 from matunya_bot_final.keyboards.inline_keyboards.after_task_keyboard import (
     compose_after_task_message_from_state,
     get_after_task_keyboard,
@@ -19,7 +19,6 @@ from matunya_bot_final.keyboards.inline_keyboards.tasks.task_20.task_20_carousel
     generate_task_20_overview_text,
     get_task_20_carousel_keyboard,
 )
-from matunya_bot_final.loader import TASKS_DB
 from matunya_bot_final.utils.message_manager import cleanup_messages_by_category, send_tracked_message
 
 router = Router()
@@ -53,17 +52,10 @@ TOPIC_DISPLAY_NAMES: Dict[str, str] = {
 }
 
 
-def _pick_task_for_theme(tasks: Iterable[dict], theme_key: str) -> dict | None:
+def _pick_task_for_theme(catalog: TaskCatalog, theme_key: str) -> dict | None:
     """Return a random task for the given theme or None if nothing fits."""
-    tasks = list(tasks)
-    if not tasks:
-        return None
-
-    allowed_subtypes = set(THEME_TO_SUBTYPES.get(theme_key, []))
-    pool = [task for task in tasks if task.get("subtype") in allowed_subtypes] or tasks
-    if not pool:
-        return None
-    return random.choice(pool)
+    pool = catalog.bucket(subtype=THEME_TO_SUBTYPES.get(theme_key, [])) or catalog.all
+    return pool.pick()
 
 
 def _task_text(task_data: dict) -> str:
@@ -146,14 +138,14 @@ async def task_20_open_selected(
     await query.answer()
 
     theme_key = callback_data.subtype_key or THEMES[0]
-    tasks = TASKS_DB.get("20", [])
+    catalog = get_catalog("20")
     chat_id = query.message.chat.id
 
-    if not tasks:
+    if not len(catalog):
         await bot.send_message(chat_id, "Пока нет заданий для выдачи.")
         return
 
-    task_data = _pick_task_for_theme(tasks, theme_key)
+    task_data = _pick_task_for_theme(catalog, theme_key)
     if not task_data:
         await bot.send_message(chat_id, "Не удалось подобрать задание для выбранной темы.")
         return
@@ -194,8 +186,7 @@ async def back_to_carousel_20(
     await callback.answer()
 
     chat_id = callback.message.chat.id
-    await cleanup_messages_by_category(bot, state, chat_id, "tasks")
-    await cleanup_messages_by_category(bot, state, chat_id, "menus")
+    await cleanup_messages_by_category(bot, state, chat_id, "tasks", "menus")
 
     current_key = THEMES[0]
     overview_text = generate_task_20_overview_text(list(THEMES), current_key)
@@ -4,8 +4,7 @@ from __future__ import annotations
 import re
 
 import logging
-import random
-from typing import Dict, Iterable
+from typing import Dict
 
 from aiogram import Bot, F, Router
 from aiogram.fsm.context import FSMContext
@@ -13,6 +12,7 @@ from aiogram.types import CallbackQuery
 
 from matunya_bot_final.states.states import TaskState
 from matunya_bot_final.core.callbacks.tasks_callback import TaskCallback
+from matunya_bot_final.core.task_catalog import TaskCatalog, get_catalog
 from matunya_bot_final.keyboards.inline_keyboards.after_task_keyboard import (
     compose_after_task_message_from_state,
     get_after_task_keyboard,
@@ -22,7 +22,6 @@ from matunya_bot_final.keyboards.inline_keyboards.tasks.task_6.task_6_carousel i
     get_task_6_carousel_keyboard,
     get_current_theme_name,
 )
-from matunya_bot_final.loader import TASKS_DB
 from matunya_bot_final.utils.message_manager import cleanup_messages_by_category, send_tracked_message
 from matunya_bot_final.utils.text_formatters import cleanup_math_for_display
 
@@ -53,30 +52,24 @@ THEME_TO_SUBTYPES: Dict[str, list[str]] = {
 }
 
 
-def _pick_task_for_theme(tasks: Iterable[dict], theme_key: str) -> dict | None:
+def _pick_task_for_theme(catalog: TaskCatalog, theme_key: str) -> dict | None:
     """
     Возвращает случайную задачу из выбранной темы для задания №6.
     Основана на связке subtype (основная тема) и pattern (внутренний подтип).
     """
-    items = list(tasks)
-    if not items:
-        return None
+    # --- 1. Корзина по subtype (основная тема) ---
+    pool = catalog.bucket(subtype=theme_key)
 
-    # --- 1. Фильтрация по subtype (основная тема) ---
-    pool = [t for t in items if t.get("subtype") == theme_key]
-
-    # --- 2. Если таких нет — фильтрация по связанным паттернам темы ---
+    # --- 2. Если таких нет — корзина по связанным паттернам темы ---
     if not pool:
-        allowed_patterns = set(THEME_TO_SUBTYPES.get(theme_key, []))
-        if allowed_patterns:
-            pool = [t for t in items if t.get("pattern") in allowed_patterns]
+        pool = catalog.bucket(pattern=THEME_TO_SUBTYPES.get(theme_key, []))
 
     # --- 3. Если всё ещё пусто — лог и fallback ---
     if not pool:
         logger.warning(f"[Task6] Нет задач с subtype='{theme_key}' и подходящими паттернами. Беру случайную.")
-        pool = items
+        pool = catalog.all
 
-    return random.choice(pool)
+    return pool.pick()
 
 
 # === ENTRYPOINT ===
@@ -154,15 +147,14 @@ async def task_6_open_selected(
     await query.answer()
 
     theme_key = callback_data.subtype_key or THEMES[0]
-    tasks_object = TASKS_DB.get("6", {})
-    tasks = tasks_object.get("tasks", []) if isinstance(tasks_object, dict) else tasks_object
+    catalog = get_catalog("6")
     chat_id = query.message.chat.id
 
-    if not tasks:
+    if not len(catalog):
         await bot.send_message(chat_id, "Пока нет заданий для этой темы.")
         return
 
-    task_data = _pick_task_for_theme(tasks, theme_key)
+    task_data = _pick_task_for_theme(catalog, theme_key)
     if not task_data:
         await bot.send_message(chat_id, "Не удалось подобрать задание для выбранной темы.")
         return
@@ -181,8 +173,7 @@ async def back_to_carousel_6(
     await callback.answer()
 
     chat_id = callback.message.chat.id
-    await cleanup_messages_by_category(bot, state, chat_id, "tasks")
-    await cleanup_messages_by_category(bot, state, chat_id, "menus")
+    await cleanup_messages_by_category(bot, state, chat_id, "tasks", "menus")
 
     current_key = THEMES[0]
     overview_text = generate_task_6_overview_text(list(THEMES), current_key)
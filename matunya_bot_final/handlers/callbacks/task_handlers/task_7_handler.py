@@ -11,6 +11,7 @@ from matunya_bot_final.keyboards.inline_keyboards.tasks.task_7_keyboard import T
 
 # ВАЖНО: Импортируем наш СТАРЫЙ, GPT-шный генератор для Задания 7
 from matunya_bot_final.gpt.task_templates.task_7.task_7_generator import generate_task_7
+from matunya_bot_final.core.task_pool import get_task_pool
 
 # Импортируем клавиатуру "После задания"
 from matunya_bot_final.keyboards.inline_keyboards.after_task_keyboard import (
@@ -56,7 +57,8 @@ async def handle_theme_selection_7(callback: CallbackQuery, state: FSMContext):
     final_subtype_key = random.choice(subtypes_to_choose_from)
     # --- Конец блока выбора ---
 
-    task_data = await generate_task_7(final_subtype_key)
+    # Сначала берём готовое задание из пула, вживую генерируем только при пустом пуле
+    task_data = get_task_pool("7").pop(final_subtype_key) or await generate_task_7(final_subtype_key)
 
     if not task_data:
         await callback.message.answer("Ой, что-то пошло не так при генерации. Попробуй, пожалуйста, еще раз! 🙏")
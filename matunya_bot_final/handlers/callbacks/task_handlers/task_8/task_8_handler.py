@@ -2,9 +2,8 @@
 
 from __future__ import annotations
 import logging
-import random
 import json # Добавили для отладки
-from typing import Dict, Iterable, Any
+from typing import Dict, Any
 
 from aiogram import Bot, F, Router
 from aiogram.fsm.context import FSMContext
@@ -12,6 +11,7 @@ from aiogram.types import CallbackQuery
 
 from matunya_bot_final.states.states import TaskState
 from matunya_bot_final.core.callbacks.tasks_callback import TaskCallback
+from matunya_bot_final.core.task_catalog import TaskCatalog, get_catalog
 from matunya_bot_final.keyboards.inline_keyboards.after_task_keyboard import (
     compose_after_task_message_from_state,
     get_after_task_keyboard,
@@ -21,7 +21,6 @@ from matunya_bot_final.keyboards.inline_keyboards.tasks.task_8.task_8_carousel i
     get_task_8_carousel_keyboard,
     get_current_theme_name,
 )
-from matunya_bot_final.loader import TASKS_DB
 from matunya_bot_final.utils.message_manager import cleanup_messages_by_category, send_tracked_message
 
 # Импорт форматтера
@@ -78,12 +77,10 @@ def _build_question_text(task_data: dict) -> str:
     return text
 
 
-def _pick_task_for_theme(tasks: Iterable[dict], theme_key: str) -> dict | None:
-    items = list(tasks)
-    if not items: return None
-    pool = [t for t in items if t.get("subtype") == theme_key]
-    if not pool: pool = items
-    return random.choice(pool)
+def _pick_task_for_theme(catalog: TaskCatalog, theme_key: str) -> dict | None:
+    pool = catalog.bucket(subtype=theme_key)
+    if not pool: pool = catalog.all
+    return pool.pick()
 
 
 # Хендлеры без изменений, кроме вызова _build_question_text внутри send_task_8
@@ -113,13 +110,12 @@ async def task_8_carousel_nav(query: CallbackQuery, callback_data: TaskCallback,
 async def task_8_open_selected(query: CallbackQuery, state: FSMContext, callback_data: TaskCallback, bot: Bot) -> None:
     await query.answer()
     theme_key = callback_data.subtype_key or THEMES[0]
-    tasks_object = TASKS_DB.get("8", {})
-    tasks = tasks_object.get("tasks", []) if isinstance(tasks_object, dict) else tasks_object
+    catalog = get_catalog("8")
     chat_id = query.message.chat.id
-    if not tasks:
+    if not len(catalog):
         await bot.send_message(chat_id, "Пока нет заданий для этой темы.")
         return
-    task_data = _pick_task_for_theme(tasks, theme_key)
+    task_data = _pick_task_for_theme(catalog, theme_key)
     if not task_data:
         await bot.send_message(chat_id, "Не удалось подобрать задание.")
         return
@@ -130,8 +126,7 @@ async def task_8_open_selected(query: CallbackQuery, state: FSMContext, callback
 async def back_to_carousel_8(callback: CallbackQuery, state: FSMContext, bot: Bot) -> None:
     await callback.answer()
     chat_id = callback.message.chat.id
-    await cleanup_messages_by_category(bot, state, chat_id, "tasks")
-    await cleanup_messages_by_category(bot, state, chat_id, "menus")
+    await cleanup_messages_by_category(bot, state, chat_id, "tasks", "menus")
     current_key = THEMES[0]
     overview_text = generate_task_8_overview_text(list(THEMES), current_key)
     keyboard = get_task_8_carousel_keyboard(list(THEMES), current_key)
@@ -193,7 +193,7 @@ async def process_user_answer(message: Message, state: FSMContext, session_maker
 
             if answer_log:
                 logger.info(
-                    f"📊 ANSWER HANDLER: Лог сохранён (ID={answer_log.id}), details={'yes' if generated_task_details else 'no'}"
+                    f"📊 ANSWER HANDLER: Лог сохранён (ID={answer_log.id or 'в очереди'}), details={'yes' if generated_task_details else 'no'}"
                 )
             else:
                 logger.warning("⚠️ ANSWER HANDLER: log_answer вернул None")
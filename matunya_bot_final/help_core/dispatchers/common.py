@@ -1,5 +1,4 @@
 import importlib
-import inspect
 import logging
 import traceback
 from typing import Any, Dict, Optional
@@ -19,6 +18,8 @@ from matunya_bot_final.utils.message_manager import (
 from matunya_bot_final.keyboards.navigation.emergency import emergency_nav_kb
 from matunya_bot_final.core.callbacks.tasks_callback import TaskCallback
 from matunya_bot_final.help_core.humanizers.solution_humanizer import humanize_solution
+from matunya_bot_final.help_core.solve_pool import SolveTimeoutError, run_in_pool
+from matunya_bot_final.help_core.solution_cache import code_version, get_or_compute
 from matunya_bot_final.keyboards.inline_keyboards.help_core_keyboard import create_solution_keyboard
 from matunya_bot_final.utils.text_formatters import sanitize_gpt_response
 from matunya_bot_final.utils.telegram_file_cache import send_cached_photo
@@ -149,6 +150,10 @@ async def call_dynamic_solver(
     """
     Динамически подтягивает модуль решателя и возвращает его результат.
 
+    solve() выполняется в пуле help_core.solve_pool с таймаутом;
+    по таймауту возвращается None (как для отсутствующего решателя).
+    Решения складских заданий берутся из help_core.solution_cache.
+
     Правила:
     - Для группы 1–5 (non-generators: paper, ovens, apartments...) путь:
       matunya_bot_final.help_core.solvers.task_1_5.<subtype>.<subtype>_solver
@@ -207,12 +212,26 @@ async def call_dynamic_solver(
             return None
 
         # ----------------------------------------------------------
-        # 3) Вызываем solve
+        # 3) Складские задания — из кеша; иначе solve в пуле
         # ----------------------------------------------------------
-        if inspect.iscoroutinefunction(solve_function):
-            return await solve_function(task_data)
-        else:
-            return solve_function(task_data)
+        return await get_or_compute(
+            "solve",
+            task_type,
+            task_subtype,
+            task_data,
+            code_version(solver_module),
+            lambda: run_in_pool(
+                "solve",
+                solve_function,
+                task_data,
+                task_type=task_type,
+                task_subtype=task_subtype,
+            ),
+        )
+
+    except SolveTimeoutError as e:
+        logger.warning("⏱ Решатель %s прерван по таймауту: %s", solver_module_path, e)
+        return None
 
     except ModuleNotFoundError as e:
         logger.warning("❌ Решатель не найден: %s — %s", solver_module_path, e)
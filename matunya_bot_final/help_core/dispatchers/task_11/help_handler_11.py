@@ -13,6 +13,7 @@ from matunya_bot_final.help_core.dispatchers.common import (
     send_solver_not_found_message,
     send_solution_error,
 )
+from matunya_bot_final.help_core.solution_cache import humanize_cached
 from matunya_bot_final.help_core.humanizers.template_humanizers.task_11_humanizer import (
     humanize_solution_11,
 )
@@ -51,7 +52,7 @@ async def handle_task_11_help(
             return
 
         try:
-            humanized_solution = humanize_solution_11(solution_core)
+            humanized_solution = await humanize_cached(humanize_solution_11, solution_core, task_type, task_subtype, task_payload)
             humanized_solution = clean_html_tags(humanized_solution)
         except Exception as exc:  # pragma: no cover
             logger.error("[Help11] Ошибка гуманизации: %s", exc)
@@ -10,6 +10,7 @@ from matunya_bot_final.help_core.dispatchers.common import (
     send_solver_not_found_message,
     send_solution_error,
 )
+from matunya_bot_final.help_core.solution_cache import humanize_cached
 
 from matunya_bot_final.handlers.callbacks.task_handlers.task_15.task_15_handler import (
     PATTERN_TO_THEME,
@@ -75,7 +76,7 @@ async def handle_task_15_help(
 
         # --- 2. Гуманизация решения ---
         try:
-            humanized_solution = humanize(solution_core)
+            humanized_solution = await humanize_cached(humanize, solution_core, task_type, theme_key, task_payload)
         except Exception as exc:
             logger.error("[Help15] Ошибка гуманизации: %s", exc, exc_info=True)
             await send_solution_error(callback, bot, "Ошибка при оформлении решения.")
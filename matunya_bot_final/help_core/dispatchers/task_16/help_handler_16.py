@@ -7,7 +7,7 @@ import pprint
 
 from aiogram import Bot
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, BufferedInputFile
+from aiogram.types import CallbackQuery
 
 from matunya_bot_final.help_core.dispatchers.common import (
     call_dynamic_solver,
@@ -15,6 +15,7 @@ from matunya_bot_final.help_core.dispatchers.common import (
     send_solver_not_found_message,
     send_solution_error,
 )
+from matunya_bot_final.help_core.solution_cache import humanize_cached
 from matunya_bot_final.help_core.humanizers.template_humanizers.task_16_humanizer import (
     humanize,
 )
@@ -88,7 +89,7 @@ async def handle_task_16_help(
         # 3️⃣ Гуманизация
         # ------------------------------------------------------------------
         try:
-            humanized_solution = humanize(solution_core)
+            humanized_solution = await humanize_cached(humanize, solution_core, task_type, theme_key, task_payload)
         except Exception as exc:
             logger.error("[Help16] Ошибка гуманизации: %s", exc, exc_info=True)
             await send_solution_error(callback, bot, "Ошибка при оформлении решения.")
@@ -114,7 +115,7 @@ async def handle_task_16_help(
                     bot=bot,
                     chat_id=chat_id,
                     state=state,
-                    photo=BufferedInputFile.from_file(image_path),
+                    photo=image_path,
                     category="solution_result",
                     message_tag="task_16_help_image",
                 )
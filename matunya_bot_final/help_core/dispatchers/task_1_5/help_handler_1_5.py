@@ -15,6 +15,7 @@ from matunya_bot_final.help_core.dispatchers.common import (
     send_solver_not_found_message,
     send_solution_error,
 )
+from matunya_bot_final.help_core.solve_pool import run_humanizer
 
 logger = logging.getLogger(__name__)
 
@@ -104,12 +105,12 @@ async def handle_task_1_5_help(
             # 📄 Paper
             if subtype == "paper":
                 from matunya_bot_final.help_core.humanizers.template_humanizers.task_1_5.paper_humanizer import humanize
-                humanized_solution = humanize(solution_core)
+                humanized_solution = await run_humanizer(humanize, solution_core, task_type, subtype)
 
             # 🔥 Stoves (новый non-generator)
             elif subtype == "stoves":
                 from matunya_bot_final.help_core.humanizers.template_humanizers.task_1_5.stoves_humanizer import humanize
-                humanized_solution = humanize(solution_core)
+                humanized_solution = await run_humanizer(humanize, solution_core, task_type, subtype)
 
             # 🛞 Tires (legacy GPT)
             elif subtype.startswith("tires"):
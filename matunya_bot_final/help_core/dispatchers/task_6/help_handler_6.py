@@ -13,6 +13,7 @@ from matunya_bot_final.help_core.dispatchers.common import (
     send_solution_error,
     # Убираем лишние импорты, которые здесь не используются
 )
+from matunya_bot_final.help_core.solution_cache import humanize_cached
 # ★★★ ИСПРАВЛЕНО: Правильный импорт нашего "Декоратора" ★★★
 from matunya_bot_final.help_core.humanizers.template_humanizers.task_6_humanizer import (
     humanize,
@@ -60,7 +61,7 @@ async def handle_task_6_help(
         # --- Формирование текста решения ---
         try:
             # ★★★ ИСПРАВЛЕНО: Правильный вызов "Декоратора" ★★★
-            humanized_solution = humanize(solution_core)
+            humanized_solution = await humanize_cached(humanize, solution_core, task_type, task_subtype, task_payload)
             # clean_html_tags не нужен, наш humanizer уже отдает чистый HTML
         except Exception as exc:
             logger.error("[Help6] Ошибка гуманизации: %s", exc, exc_info=True)
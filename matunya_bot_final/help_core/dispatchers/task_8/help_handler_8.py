@@ -10,6 +10,7 @@ from matunya_bot_final.help_core.dispatchers.common import (
     send_solver_not_found_message,
     send_solution_error,
 )
+from matunya_bot_final.help_core.solution_cache import humanize_cached
 
 # ИСПРАВЛЕНО: Импортируем 'humanize', а не 'render_task_8'
 from matunya_bot_final.help_core.humanizers.template_humanizers.task_8_humanizer import (
@@ -56,7 +57,7 @@ async def handle_task_8_help(
         # --- 2. Формирование текста решения (Хьюманизация) ---
         try:
             # ИСПРАВЛЕНО: Вызов правильной функции
-            humanized_solution = humanize(solution_core)
+            humanized_solution = await humanize_cached(humanize, solution_core, task_type, task_subtype, task_payload)
         except Exception as exc:
             logger.error("[Help8] Ошибка гуманизации: %s", exc, exc_info=True)
             await send_solution_error(callback, bot, "Ошибка при оформлении решения.")
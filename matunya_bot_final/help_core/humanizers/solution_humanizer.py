@@ -128,10 +128,12 @@ async def humanize_solution(solution_core: dict, state: FSMContext, student_name
         print(user_prompt)
         print("-------------------------------------------\n")
 
+        # Одинаковое решение для того же ученика — ответ из кеша GPT
         humanized_text, _ = await ask_gpt_with_history(
             user_prompt=user_prompt,
             dialog_history=[],
-            system_prompt=formatted_system_prompt
+            system_prompt=formatted_system_prompt,
+            use_cache=True,
         )
 
         # --- НАШ НОВЫЙ "САНИТАРНЫЙ КОРДОН" ---
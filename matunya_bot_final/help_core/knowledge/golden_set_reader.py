@@ -1,89 +1,289 @@
+"""
+Golden set — фразы в стиле Матюни из Google-таблицы (task_type, subtype, style_phrase).
+
+Диалоговые контексты никогда не ждут сеть:
+
+- вся таблица читается одним снимком и индексируется по (task_type, subtype);
+- get_golden_set отвечает из снимка в памяти; если снимок старше
+  GOLDEN_SET_TTL (по умолчанию час) — отдаёт старый и обновляет его в фоне
+  (stale-while-revalidate); пока снимка нет — отдаёт [] и тоже запускает обновление;
+- пустой результат — тоже результат: подтипы без фраз (например, задание 16)
+  не приводят к запросам в Google;
+- снимок зеркалируется в data/.golden_set/snapshot.json и подхватывается
+  при холодном старте, даже если Google недоступен;
+- после GOLDEN_SET_BREAKER_THRESHOLD неудач подряд (503, таймаут
+  GOLDEN_SET_FETCH_TIMEOUT) обращения к Google прекращаются на
+  GOLDEN_SET_BREAKER_COOLDOWN секунд, затем — одна пробная попытка.
+
+Без GOOGLE_SERVICE_ACCOUNT / GOOGLE_SHEET_URL golden set отключён, но
+зеркало, если оно есть, всё равно используется.
+"""
+
 from __future__ import annotations
 
 import asyncio
 import json
 import logging
 import os
-from typing import List, Optional
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 import gspread
-from cachetools import TTLCache
 
-logger = logging.getLogger(__name__)
+from matunya_bot_final.loader import DATA_DIR
 
-_GOLDEN_SET_CACHE: TTLCache[str, List[str]] = TTLCache(maxsize=128, ttl=3600)
+logger = logging.getLogger(__name__)
 
 SERVICE_ACCOUNT_ENV = "GOOGLE_SERVICE_ACCOUNT"
 SHEET_URL_ENV = "GOOGLE_SHEET_URL"
+TTL_ENV = "GOLDEN_SET_TTL"
+FETCH_TIMEOUT_ENV = "GOLDEN_SET_FETCH_TIMEOUT"
+BREAKER_THRESHOLD_ENV = "GOLDEN_SET_BREAKER_THRESHOLD"
+BREAKER_COOLDOWN_ENV = "GOLDEN_SET_BREAKER_COOLDOWN"
 
+DEFAULT_TTL_SECONDS = 3600.0
+DEFAULT_FETCH_TIMEOUT_SECONDS = 20.0
+DEFAULT_BREAKER_THRESHOLD = 3
+DEFAULT_BREAKER_COOLDOWN_SECONDS = 300.0
 
-def _load_sheet() -> Optional[gspread.Worksheet]:
-    credentials_json = os.getenv(SERVICE_ACCOUNT_ENV)
-    if not credentials_json:
-        logger.info(
-            "[GoldenSet] GOOGLE_SERVICE_ACCOUNT не задан — golden set отключён"
-        )
-        return None
+MIRROR_PATH = DATA_DIR / ".golden_set" / "snapshot.json"
+
+Row = Tuple[str, str, str]  # (task_type, subtype, phrase)
+QueryKey = Tuple[Optional[str], str]
 
-    sheet_url = os.getenv(SHEET_URL_ENV)
-    if not sheet_url:
-        logger.info(
-            "[GoldenSet] GOOGLE_SHEET_URL не задан — golden set отключён"
-        )
-        return None
 
+def _env_number(name: str, default: float) -> float:
     try:
-        creds_info = json.loads(credentials_json)
-        client = gspread.service_account_from_dict(creds_info)
-        spreadsheet = client.open_by_url(sheet_url)
-        return spreadsheet.sheet1
-
-    except Exception as e:
-        logger.warning(
-            f"[GoldenSet] Недоступен (работаем без него): {e.__class__.__name__}"
-        )
-        return None
+        return float(os.getenv(name) or default)
+    except ValueError:
+        logger.warning(f"[GoldenSet] Некорректное значение {name}, используем {default}")
+        return default
 
 
-def _fetch_golden_set_sync(subtype: str, task_type: Optional[int]) -> List[str]:
-    worksheet = _load_sheet()
-    if worksheet is None:
-        return []
+def _is_configured() -> bool:
+    return bool(os.getenv(SERVICE_ACCOUNT_ENV) and os.getenv(SHEET_URL_ENV))
 
-    records = worksheet.get_all_records()
-    results: List[str] = []
-    for row in records:
-        row_subtype = str(row.get("subtype", "")).strip()
-        row_task_type = row.get("task_type")
 
-        if subtype and row_subtype != subtype:
-            continue
-        if task_type is not None and str(row_task_type).strip() != str(task_type):
+def _load_sheet() -> gspread.Worksheet:
+    creds_info = json.loads(os.environ[SERVICE_ACCOUNT_ENV])
+    client = gspread.service_account_from_dict(creds_info)
+    spreadsheet = client.open_by_url(os.environ[SHEET_URL_ENV])
+    return spreadsheet.sheet1
+
+
+def _fetch_rows_sync() -> List[Row]:
+    """Вся таблица за один запрос: строки с непустой фразой."""
+    rows: List[Row] = []
+    for record in _load_sheet().get_all_records():
+        phrase = record.get("style_phrase")
+        if not phrase:
             continue
+        rows.append((
+            str(record.get("task_type", "")).strip(),
+            str(record.get("subtype", "")).strip(),
+            str(phrase).strip(),
+        ))
+    return rows
+
+
+class CircuitBreaker:
+    """closed → (threshold неудач подряд) → open → (cooldown) → half_open → одна попытка."""
+
+    def __init__(self, threshold: int, cooldown: float) -> None:
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half_open"
 
-        phrase = row.get("style_phrase")
-        if phrase:
-            results.append(str(phrase).strip())
+    def allow(self) -> bool:
+        return self.state != "open"
 
-    return results
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.threshold:
+            # Пробная попытка в half_open тоже не удалась — снова ждём cooldown
+            self.opened_at = time.monotonic()
+
+
+class GoldenSetStore:
+    """Снимок таблицы с индексом и фоновым обновлением."""
+
+    def __init__(self, mirror_path: Optional[Path] = MIRROR_PATH, ttl: Optional[float] = None) -> None:
+        self.mirror_path = mirror_path
+        self.ttl = ttl if ttl is not None else _env_number(TTL_ENV, DEFAULT_TTL_SECONDS)
+        self.breaker = CircuitBreaker(
+            int(_env_number(BREAKER_THRESHOLD_ENV, DEFAULT_BREAKER_THRESHOLD)),
+            _env_number(BREAKER_COOLDOWN_ENV, DEFAULT_BREAKER_COOLDOWN_SECONDS),
+        )
+        self._index: Optional[Dict[Tuple[str, str], List[str]]] = None
+        self._fetched_at = 0.0  # time.time() снимка — переживает рестарт через зеркало
+        self._answers: Dict[QueryKey, List[str]] = {}
+        self._mirror_checked = False
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.metrics: Dict[str, int] = {
+            "lookups": 0, "stale_served": 0, "cold_misses": 0,
+            "refreshes": 0, "refresh_failures": 0, "breaker_skips": 0,
+        }
 
+    # --- снимок ---
 
-def _cache_key(subtype: str, task_type: Optional[int]) -> str:
-    return f"{task_type or 'any'}::{subtype or ''}"
+    def _install(self, rows: List[Row], fetched_at: float) -> None:
+        index: Dict[Tuple[str, str], List[str]] = {}
+        for task_type, subtype, phrase in rows:
+            index.setdefault((task_type, subtype), []).append(phrase)
+        self._index = index
+        self._fetched_at = fetched_at
+        self._answers = {}
+
+    def _load_mirror(self) -> None:
+        self._mirror_checked = True
+        if self.mirror_path is None or not self.mirror_path.exists():
+            return
+        try:
+            with open(self.mirror_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._install([tuple(row) for row in data["rows"]], float(data["fetched_at"]))
+            logger.info(f"[GoldenSet] Снимок загружен из зеркала: {len(data['rows'])} фраз")
+        except Exception as e:
+            logger.warning(f"[GoldenSet] Зеркало {self.mirror_path} не прочитано: {e}")
+
+    def _save_mirror(self, rows: List[Row], fetched_at: float) -> None:
+        if self.mirror_path is None:
+            return
+        self.mirror_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.mirror_path.with_suffix(f".tmp{os.getpid()}")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fetched_at": fetched_at, "rows": rows}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.mirror_path)
+        except OSError as e:
+            logger.warning(f"[GoldenSet] Не удалось сохранить зеркало: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def is_stale(self) -> bool:
+        return self._index is None or time.time() - self._fetched_at >= self.ttl
+
+    # --- обновление ---
+
+    async def refresh(self) -> bool:
+        """Перечитывает таблицу. True — снимок обновлён."""
+        if not _is_configured():
+            return False
+        if not self.breaker.allow():
+            self.metrics["breaker_skips"] += 1
+            return False
+
+        loop = asyncio.get_running_loop()
+        timeout = _env_number(FETCH_TIMEOUT_ENV, DEFAULT_FETCH_TIMEOUT_SECONDS)
+        try:
+            rows = await asyncio.wait_for(loop.run_in_executor(None, _fetch_rows_sync), timeout=timeout)
+        except Exception as e:
+            self.breaker.record_failure()
+            self.metrics["refresh_failures"] += 1
+            logger.warning(
+                f"[GoldenSet] Недоступен (работаем со старым снимком): {e.__class__.__name__}; "
+                f"breaker={self.breaker.state}"
+            )
+            return False
+
+        self.breaker.record_success()
+        self.metrics["refreshes"] += 1
+        fetched_at = time.time()
+        self._install(rows, fetched_at)
+        await loop.run_in_executor(None, self._save_mirror, rows, fetched_at)
+        logger.info(f"[GoldenSet] Снимок обновлён: {len(rows)} фраз")
+        return True
+
+    def revalidate(self) -> None:
+        """Запускает фоновое обновление, если оно нужно и ещё не идёт."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if not _is_configured():
+            return
+        if not self.breaker.allow():
+            self.metrics["breaker_skips"] += 1
+            return
+        self._refresh_task = asyncio.create_task(self.refresh(), name="golden_set_refresh")
+
+    # --- чтение ---
+
+    def lookup(self, subtype: str, task_type: Optional[int]) -> List[str]:
+        """Фразы из текущего снимка; пустой subtype / task_type=None — любые."""
+        if self._index is None:
+            return []
+        key: QueryKey = (str(task_type).strip() if task_type is not None else None, subtype or "")
+        answer = self._answers.get(key)
+        if answer is None:
+            want_type, want_subtype = key
+            answer = [
+                phrase
+                for (row_type, row_subtype), phrases in self._index.items()
+                if (not want_subtype or row_subtype == want_subtype)
+                and (want_type is None or row_type == want_type)
+                for phrase in phrases
+            ]
+            self._answers[key] = answer
+        return list(answer)
+
+    def warm(self) -> None:
+        if not self._mirror_checked:
+            self._load_mirror()
+        if self.is_stale():
+            self.revalidate()
+
+    def get(self, subtype: str, task_type: Optional[int]) -> List[str]:
+        self.metrics["lookups"] += 1
+        if not self._mirror_checked:
+            self._load_mirror()
+        if self.is_stale():
+            self.metrics["stale_served" if self._index is not None else "cold_misses"] += 1
+            self.revalidate()
+        return self.lookup(subtype, task_type)
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            "phrases": sum(len(p) for p in self._index.values()) if self._index is not None else 0,
+            "age_seconds": round(time.time() - self._fetched_at) if self._index is not None else -1,
+            "breaker_open": int(self.breaker.state == "open"),
+        }
+
+
+_store = GoldenSetStore()
 
 
 async def get_golden_set(subtype: str, task_type: Optional[int] = None) -> List[str]:
-    """Fetch golden set phrases for a given subtype (and optional task type)."""
-    key = _cache_key(subtype, task_type)
-    if key in _GOLDEN_SET_CACHE:
-        return _GOLDEN_SET_CACHE[key]
+    """Fetch golden set phrases for a given subtype (and optional task type). Never waits on the network."""
+    return _store.get(subtype, task_type)
+
+
+def warm_golden_set() -> None:
+    """На старте: поднять зеркало и обновить снимок в фоне, если он устарел."""
+    _store.warm()
+
+
+async def stop_golden_set() -> None:
+    await _store.stop()
 
-    loop = asyncio.get_running_loop()
-    try:
-        result = await loop.run_in_executor(None, _fetch_golden_set_sync, subtype, task_type)
-    except Exception as exc:  # pragma: no cover
-        logger.exception("Golden set fetch failed", exc_info=exc)
-        result = []
 
-    _GOLDEN_SET_CACHE[key] = result
-    return result
+def get_golden_set_metrics() -> Dict[str, Any]:
+    return _store.stats()
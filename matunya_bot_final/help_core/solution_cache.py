@@ -0,0 +1,510 @@
+# matunya_bot_final/help_core/solution_cache.py
+"""
+Кеш готовых решений для «🆘 Помощь».
+
+Задания 6/8/15/16/20 берутся из фиксированных складов, поэтому решение
+и его человекочитаемый текст для одного и того же id всегда одинаковы.
+Ключ: (этап, номер задания, подтип, id задания, версия кода решателя /
+гуманизатора). Версия — SOLVER_VERSION модуля, если он объявлен, иначе
+хеш исходника модуля и всех модулей matunya_bot_final, которые он
+импортирует (рекурсивно): правка решателя или его помощников
+(форматтеры текста, number_formatter и т.п.) автоматически делает старые
+записи недостижимыми. CACHE_VERSION входит во все версии — его повышают,
+когда меняется то, чего не видно в исходниках (формат записей, данные).
+
+Уровни: готовые решения из сборки (tasks_N.solutions.json рядом со
+складом, только чтение), LRU в памяти (SOLUTION_CACHE_SIZE, по умолчанию
+1024) и JSON-файлы на диске (SOLUTION_CACHE_DIR, "off" — отключить).
+Кешируются только задания, совпадающие со складской версией по id;
+сгенерированные на лету задания всегда решаются заново.
+
+Прогрев всех складов:
+    python -m matunya_bot_final.scripts.warm_solution_cache 6 8 15 16 20
+Готовые решения при сборке складов 15/16:
+    python matunya_bot_final/non_generators/task_15/build.py --with-solutions
+"""
+
+import asyncio
+import copy
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from matunya_bot_final.core.task_catalog import get_catalog
+from matunya_bot_final.help_core.solve_pool import run_humanizer
+from matunya_bot_final.loader import DATA_DIR, TASK_FILES
+
+logger = logging.getLogger(__name__)
+
+SIZE_ENV = "SOLUTION_CACHE_SIZE"
+DIR_ENV = "SOLUTION_CACHE_DIR"
+
+DEFAULT_SIZE = 1024
+DEFAULT_DIR = DATA_DIR / ".solution_cache"
+
+
+# ---------------------------------------------------------------------------
+# Версия кода
+# ---------------------------------------------------------------------------
+
+# Общая версия всех записей: повысить, чтобы сбросить кеш целиком
+CACHE_VERSION = 2
+
+PACKAGE_PREFIX = "matunya_bot_final."
+
+# путь к файлу -> ((mtime_ns, size), хеш)
+_VERSION_CACHE: Dict[str, Tuple[Tuple[int, int], str]] = {}
+# имя модуля -> (модуль, файлы модуля и всех его зависимостей из matunya_bot_final)
+_DEPENDENCY_FILES: Dict[str, Tuple[ModuleType, Tuple[str, ...]]] = {}
+
+
+def _module_dependencies(module: ModuleType) -> Tuple[str, ...]:
+    """Исходники модуля и модулей пакета, которые он импортирует (рекурсивно, по глобалам)."""
+    cached = _DEPENDENCY_FILES.get(module.__name__)
+    if cached is not None and cached[0] is module:
+        return cached[1]
+
+    seen = {module.__name__}
+    pending = [module]
+    files = []
+    while pending:
+        current = pending.pop()
+        path = getattr(current, "__file__", None)
+        if path:
+            files.append(path)
+        for value in list(vars(current).values()):
+            name = value.__name__ if isinstance(value, ModuleType) else getattr(value, "__module__", None)
+            if not isinstance(name, str) or not name.startswith(PACKAGE_PREFIX) or name in seen:
+                continue
+            dependency = sys.modules.get(name)
+            if dependency is not None:
+                seen.add(name)
+                pending.append(dependency)
+
+    _DEPENDENCY_FILES[module.__name__] = (module, tuple(sorted(files)))
+    return _DEPENDENCY_FILES[module.__name__][1]
+
+
+def _file_version(path: str) -> str:
+    stat = os.stat(path)
+    fingerprint = (stat.st_mtime_ns, stat.st_size)
+    cached = _VERSION_CACHE.get(path)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    version = hashlib.sha1(Path(path).read_bytes()).hexdigest()
+    _VERSION_CACHE[path] = (fingerprint, version)
+    return version
+
+
+def code_version(obj: Any) -> str:
+    """Версия решателя/гуманизатора: SOLVER_VERSION модуля или хеш исходников с зависимостями."""
+    module = obj if isinstance(obj, ModuleType) else sys.modules.get(getattr(obj, "__module__", ""), None)
+    if module is None:
+        return "unknown"
+
+    declared = getattr(module, "SOLVER_VERSION", None)
+    if declared:
+        return f"{CACHE_VERSION}:{declared}"
+
+    files = _module_dependencies(module)
+    if not files:
+        return "unknown"
+
+    digest = hashlib.sha1(str(CACHE_VERSION).encode())
+    for path in files:
+        digest.update(_file_version(path).encode())
+    return digest.hexdigest()[:12]
+
+
+def stored_task_id(task_type: str, task_subtype: Optional[str], task_data: Dict[str, Any]) -> Optional[Any]:
+    """id задания, если оно совпадает со складской версией; иначе None (не кешируем)."""
+    task_id = task_data.get("id")
+    if task_id is None:
+        return None
+
+    store_key = f"1_5_{task_subtype}" if str(task_type) == "1_5" else str(task_type)
+    base = get_catalog(store_key).get(task_id)
+    if base is None:
+        return None
+
+    # Хендлеры могут дописывать поля (theme_key и т.п.), но не менять складские
+    if any(task_data.get(key) != value for key, value in base.items()):
+        return None
+    return task_id
+
+
+# ---------------------------------------------------------------------------
+# Готовые решения из сборки
+# ---------------------------------------------------------------------------
+
+SIDECAR_FORMAT = 1
+
+# склад -> ((mtime_ns, size) sidecar-файла и склада, {id задания: запись})
+_SIDECARS: Dict[str, Tuple[Tuple[int, ...], Dict[str, Any]]] = {}
+
+
+def sidecar_path(store_key: str) -> Path:
+    """tasks_15.json -> tasks_15.solutions.json (в той же папке)."""
+    source = TASK_FILES[store_key]
+    return source.with_name(f"{source.stem}.solutions.json")
+
+
+def _file_sha1(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def _load_sidecar(store_key: str) -> Dict[str, Any]:
+    if store_key not in TASK_FILES:
+        return {}
+    path = sidecar_path(store_key)
+    try:
+        stat = path.stat()
+        store_stat = TASK_FILES[store_key].stat()
+    except FileNotFoundError:
+        return {}
+
+    fingerprint = (stat.st_mtime_ns, stat.st_size, store_stat.st_mtime_ns, store_stat.st_size)
+    cached = _SIDECARS.get(store_key)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    entries: Dict[str, Any] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != SIDECAR_FORMAT:
+            logger.warning(f"[SolutionCache] {path}: неизвестный формат {data.get('format')!r}")
+        elif data.get("store_sha1") != _file_sha1(TASK_FILES[store_key]):
+            # Склад пересобран без --with-solutions: id могли сдвинуться
+            logger.warning(f"[SolutionCache] {path} собран для другой версии склада — пропускаем")
+        else:
+            entries = data.get("entries", {})
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f"[SolutionCache] Не прочитали готовые решения {path}: {e}")
+
+    _SIDECARS[store_key] = (fingerprint, entries)
+    return entries
+
+
+def lookup_precomputed(
+    stage: str,
+    task_type: str,
+    task_subtype: Optional[str],
+    task_id: Any,
+    version: str,
+) -> Optional[Any]:
+    """Результат этапа из sidecar-файла сборки, если он собран той же версией кода."""
+    entry = _load_sidecar(str(task_type)).get(str(task_id))
+    if not entry or entry.get("subtype") != task_subtype:
+        return None
+    record = entry.get(stage)
+    if not record or record.get("version") != version:
+        return None
+    return copy.deepcopy(record["value"])
+
+
+# ---------------------------------------------------------------------------
+# Кеш
+# ---------------------------------------------------------------------------
+
+class SolutionCache:
+    """LRU в памяти + необязательный каталог с JSON-файлами."""
+
+    def __init__(self, max_entries: int = DEFAULT_SIZE, disk_dir: Optional[Path] = None) -> None:
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self.metrics: Dict[str, int] = {
+            "sidecar_hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "uncacheable": 0,
+        }
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if self.disk_dir is None:
+            return None
+        return self.disk_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.metrics["memory_hits"] += 1
+            return copy.deepcopy(self._entries[key])
+
+        path = self._disk_path(key)
+        if path is not None and path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    record = json.load(f)
+                if record.get("key") == key:
+                    self.metrics["disk_hits"] += 1
+                    self._remember(key, record["value"])
+                    return copy.deepcopy(record["value"])
+            except (OSError, ValueError) as e:
+                logger.warning(f"[SolutionCache] Повреждённая запись {path}: {e}")
+
+        self.metrics["misses"] += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        self._remember(key, copy.deepcopy(value))
+        self.metrics["stores"] += 1
+
+        path = self._disk_path(key)
+        if path is None:
+            return
+        tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            # Решение не сериализуется в JSON — остаётся только в памяти
+            logger.debug(f"[SolutionCache] Не сохранили на диск {key}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def _build_default_cache() -> SolutionCache:
+    try:
+        size = int(os.getenv(SIZE_ENV) or DEFAULT_SIZE)
+    except ValueError:
+        size = DEFAULT_SIZE
+
+    disk_env = os.getenv(DIR_ENV)
+    if disk_env and disk_env.lower() == "off":
+        disk_dir = None
+    else:
+        disk_dir = Path(disk_env) if disk_env else DEFAULT_DIR
+    return SolutionCache(max_entries=size, disk_dir=disk_dir)
+
+
+SOLUTION_CACHE = _build_default_cache()
+
+
+def get_solution_cache_metrics() -> Dict[str, int]:
+    """Счётчики попаданий/промахов кеша решений."""
+    return {**SOLUTION_CACHE.metrics, "entries": len(SOLUTION_CACHE._entries)}
+
+
+async def get_or_compute(
+    stage: str,
+    task_type: str,
+    task_subtype: Optional[str],
+    task_data: Dict[str, Any],
+    version: str,
+    compute: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Достаёт результат этапа из кеша или вычисляет и запоминает его."""
+    task_id = stored_task_id(task_type, task_subtype, task_data)
+    if task_id is None:
+        SOLUTION_CACHE.metrics["uncacheable"] += 1
+        return await compute()
+
+    precomputed = lookup_precomputed(stage, task_type, task_subtype, task_id, version)
+    if precomputed is not None:
+        SOLUTION_CACHE.metrics["sidecar_hits"] += 1
+        return precomputed
+
+    key = f"{stage}|{task_type}|{task_subtype}|{task_id}|{version}"
+    cached = SOLUTION_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    result = await compute()
+    if result is not None:
+        SOLUTION_CACHE.put(key, result)
+    return result
+
+
+async def humanize_cached(
+    humanize: Callable[..., str],
+    solution_core: Dict[str, Any],
+    task_type: Any,
+    task_subtype: Optional[str],
+    task_data: Dict[str, Any],
+) -> str:
+    """run_humanizer() с кешем по id задания и версии гуманизатора."""
+    return await get_or_compute(
+        "humanize",
+        str(task_type),
+        task_subtype,
+        task_data,
+        code_version(humanize),
+        lambda: run_humanizer(humanize, solution_core, task_type, task_subtype),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Прогрев
+# ---------------------------------------------------------------------------
+
+def _theme_by_pattern_15(task: Dict[str, Any]) -> Optional[str]:
+    from matunya_bot_final.handlers.callbacks.task_handlers.task_15.task_15_handler import PATTERN_TO_THEME
+    return PATTERN_TO_THEME.get(task.get("pattern"))
+
+
+def _theme_by_pattern_16(task: Dict[str, Any]) -> Optional[str]:
+    from matunya_bot_final.handlers.callbacks.task_handlers.task_16.task_16_handler import THEMES_16
+    for theme_key, theme in THEMES_16.items():
+        if task.get("pattern") in theme["patterns"]:
+            return theme_key
+    return None
+
+
+# задание -> (подтип для решателя, как payload выглядит в FSM, путь к гуманизатору)
+WARMUP_PLAN: Dict[str, Tuple[Callable, Callable, str]] = {
+    "6": (
+        lambda task: task.get("subtype"),
+        lambda task, subtype: task,
+        "matunya_bot_final.help_core.humanizers.template_humanizers.task_6_humanizer:humanize",
+    ),
+    "8": (
+        lambda task: task.get("subtype"),
+        lambda task, subtype: task,
+        "matunya_bot_final.help_core.humanizers.template_humanizers.task_8_humanizer:humanize",
+    ),
+    "15": (
+        _theme_by_pattern_15,
+        lambda task, subtype: task,
+        "matunya_bot_final.help_core.humanizers.template_humanizers.task_15_humanizer:humanize",
+    ),
+    "16": (
+        _theme_by_pattern_16,
+        lambda task, subtype: {**task, "theme_key": subtype},
+        "matunya_bot_final.help_core.humanizers.template_humanizers.task_16_humanizer:humanize",
+    ),
+    "20": (
+        lambda task: task.get("subtype"),
+        lambda task, subtype: task,
+        "matunya_bot_final.help_core.humanizers.template_humanizers.task_20_humanizer:humanize_solution_20",
+    ),
+}
+
+
+def _import_by_path(path: str) -> Callable[..., Any]:
+    module_path, func_name = path.split(":")
+    return getattr(importlib.import_module(module_path), func_name)
+
+
+def _call_sync(func: Callable[..., Any], *args: Any) -> Any:
+    """Вызов вне event loop: корутинные решатели (task_16) выполняются через asyncio.run."""
+    result = func(*args)
+    if inspect.isawaitable(result):
+        return asyncio.run(result)
+    return result
+
+
+def precompute_solutions(task_type: str, tasks: Iterable[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Синхронно решает и гуманизирует задания (для build.py, без event loop).
+    Возвращает ({id задания: запись sidecar-файла}, ошибки).
+    """
+    subtype_of, payload_of, humanizer_path = WARMUP_PLAN[str(task_type)]
+    humanize = _import_by_path(humanizer_path)
+    humanize_version = code_version(humanize)
+
+    entries: Dict[str, Any] = {}
+    errors: List[str] = []
+    for task in tasks:
+        task_id = task.get("id")
+        try:
+            subtype = subtype_of(task)
+            if not subtype:
+                raise ValueError(f"не определён подтип для паттерна {task.get('pattern')!r}")
+
+            solver_module = importlib.import_module(
+                f"matunya_bot_final.help_core.solvers.task_{task_type}.{subtype}_solver"
+            )
+            solution_core = _call_sync(solver_module.solve, payload_of(task, subtype))
+            if not isinstance(solution_core, (dict, list)) or not solution_core:
+                raise ValueError("решатель вернул пустой результат")
+
+            entries[str(task_id)] = {
+                "subtype": subtype,
+                "solve": {"version": code_version(solver_module), "value": solution_core},
+                "humanize": {"version": humanize_version, "value": _call_sync(humanize, solution_core)},
+            }
+        except Exception as e:
+            errors.append(f"{task_id}: {e}")
+    return entries, errors
+
+
+def write_sidecar(store_key: str, entries: Dict[str, Any]) -> Path:
+    """Атомарно пишет tasks_N.solutions.json рядом с уже записанным складом."""
+    path = sidecar_path(store_key)
+    store_sha1 = _file_sha1(TASK_FILES[store_key])
+    tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"format": SIDECAR_FORMAT, "store_sha1": store_sha1, "entries": entries},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    _SIDECARS.pop(store_key, None)
+    return path
+
+
+async def warm_up(task_types: Tuple[str, ...] = tuple(WARMUP_PLAN)) -> Dict[str, Dict[str, int]]:
+    """Решает и гуманизирует все задания складов, заполняя кеш (и диск)."""
+    from matunya_bot_final.help_core.dispatchers.common import call_dynamic_solver
+
+    report: Dict[str, Dict[str, int]] = {}
+    for task_type in task_types:
+        subtype_of, payload_of, humanizer_path = WARMUP_PLAN[task_type]
+        humanize = _import_by_path(humanizer_path)
+
+        stats = {"tasks": 0, "solved": 0, "failed": 0}
+        started = time.perf_counter()
+        for task in get_catalog(task_type).all.tasks:
+            stats["tasks"] += 1
+            subtype = subtype_of(task)
+            if not subtype:
+                stats["failed"] += 1
+                continue
+            payload = payload_of(task, subtype)
+            solution_core = await call_dynamic_solver(task_type, subtype, payload)
+            # Решатели 15 возвращают список шагов, остальные — dict
+            if not isinstance(solution_core, (dict, list)) or not solution_core:
+                stats["failed"] += 1
+                continue
+            try:
+                await humanize_cached(humanize, solution_core, task_type, subtype, payload)
+                stats["solved"] += 1
+            except Exception as e:
+                logger.warning(f"[SolutionCache] Гуманизация {task_type}/{task.get('id')} не удалась: {e}")
+                stats["failed"] += 1
+
+        report[task_type] = stats
+        logger.info(
+            f"[SolutionCache] Прогрев задания {task_type}: {stats} за {time.perf_counter() - started:.1f} с"
+        )
+    return report
+
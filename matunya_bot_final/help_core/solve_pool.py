@@ -0,0 +1,192 @@
+# matunya_bot_final/help_core/solve_pool.py
+"""
+Пул исполнителей для решателей и гуманизаторов.
+
+solve() и humanize() — чистый CPU (разбор выражений, обход деревьев,
+сборка длинных текстов). Выполняем их вне event loop, чтобы тяжёлое
+решение одного ученика не останавливало polling для всех остальных.
+
+Настройки (окружение):
+  SOLVER_EXECUTOR        — "thread" (по умолчанию) или "process"
+  SOLVER_MAX_WORKERS     — размер пула (по умолчанию 4)
+  SOLVER_TIMEOUT_SECONDS — общий таймаут одного вызова (по умолчанию 15)
+Персональные таймауты — SOLVER_TIMEOUTS ("<задание>" или "<задание>/<подтип>").
+
+Корутинные решатели (задания 11, 16, 20) внутри не ждут ничего и считают
+так же синхронно, поэтому тоже уходят в пул: там они выполняются через
+asyncio.run в собственном loop потока/процесса.
+
+Важно: по таймауту мы перестаём ждать результат, но поток/процесс
+дорабатывает вызов сам — пул при этом остаётся ограниченным.
+"""
+
+import asyncio
+import importlib
+import inspect
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_ENV = "SOLVER_EXECUTOR"
+MAX_WORKERS_ENV = "SOLVER_MAX_WORKERS"
+TIMEOUT_ENV = "SOLVER_TIMEOUT_SECONDS"
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_TIMEOUT_SECONDS = 15.0
+
+# Персональные таймауты: сначала ищем "<задание>/<подтип>", потом "<задание>"
+SOLVER_TIMEOUTS: Dict[str, float] = {
+    "16": 25.0,  # длинные шаблоны task_16_humanizer
+    "8": 20.0,   # обход деревьев powers_and_roots
+}
+
+_executor: Optional[Executor] = None
+
+# (этап, задание, подтип) -> счётчики латентности
+_latencies: Dict[Tuple[str, str, str], Dict[str, float]] = {}
+
+
+class SolveTimeoutError(asyncio.TimeoutError):
+    """Решатель или гуманизатор не уложился в таймаут."""
+
+
+def get_solver_timeout(task_type: str, task_subtype: Optional[str] = None) -> float:
+    """Таймаут для конкретного решателя (персональный или общий)."""
+    task_type = str(task_type)
+    if task_subtype and f"{task_type}/{task_subtype}" in SOLVER_TIMEOUTS:
+        return SOLVER_TIMEOUTS[f"{task_type}/{task_subtype}"]
+    if task_type in SOLVER_TIMEOUTS:
+        return SOLVER_TIMEOUTS[task_type]
+    try:
+        return float(os.getenv(TIMEOUT_ENV) or DEFAULT_TIMEOUT_SECONDS)
+    except ValueError:
+        return DEFAULT_TIMEOUT_SECONDS
+
+
+def get_executor() -> Executor:
+    """Общий пул (создаётся при первом решении)."""
+    global _executor
+    if _executor is None:
+        try:
+            max_workers = int(os.getenv(MAX_WORKERS_ENV) or DEFAULT_MAX_WORKERS)
+        except ValueError:
+            max_workers = DEFAULT_MAX_WORKERS
+
+        if os.getenv(EXECUTOR_ENV, "thread").lower() == "process":
+            _executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="solver")
+        logger.info(f"[SolvePool] Создан пул {type(_executor).__name__} на {max_workers} исполнителей")
+    return _executor
+
+
+def shutdown_solver_pool() -> None:
+    """Останавливает пул (вызывается при остановке бота)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("[SolvePool] Пул остановлен")
+    _executor = None
+
+
+def _record(stage: str, task_type: str, task_subtype: str, elapsed: float, outcome: str) -> None:
+    stats = _latencies.setdefault(
+        (stage, str(task_type), str(task_subtype)),
+        {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "timeouts": 0, "errors": 0},
+    )
+    stats["count"] += 1
+    stats["total_seconds"] += elapsed
+    stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+    if outcome == "timeout":
+        stats["timeouts"] += 1
+    elif outcome == "error":
+        stats["errors"] += 1
+
+
+def get_solver_metrics() -> Dict[str, Dict[str, float]]:
+    """
+    Латентности по этапам и подтипам:
+    {"solve:16/central_and_inscribed_angles": {"count", "avg_seconds", "max_seconds", ...}}
+    """
+    report = {}
+    for (stage, task_type, task_subtype), stats in _latencies.items():
+        report[f"{stage}:{task_type}/{task_subtype}"] = {
+            **stats,
+            "avg_seconds": stats["total_seconds"] / stats["count"] if stats["count"] else 0.0,
+        }
+    return report
+
+
+def _call_sync(func: Callable[..., Any], *args: Any) -> Any:
+    """Точка входа в исполнителе: корутинные функции выполняются через asyncio.run."""
+    result = func(*args)
+    if inspect.isawaitable(result):
+        return asyncio.run(result)
+    return result
+
+
+def _call_by_path(module_path: str, function_name: str, *args: Any) -> Any:
+    """Точка входа в процессе: функция ищется по пути."""
+    module = importlib.import_module(module_path)
+    return _call_sync(getattr(module, function_name), *args)
+
+
+async def run_in_pool(
+    stage: str,
+    func: Callable[..., Any],
+    *args: Any,
+    task_type: str,
+    task_subtype: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> Any:
+    """
+    Выполняет func(*args) в пуле с таймаутом и записывает латентность.
+    Корутинные функции тоже выполняются в пуле (asyncio.run в исполнителе).
+    """
+    timeout = timeout if timeout is not None else get_solver_timeout(task_type, task_subtype)
+    started = time.perf_counter()
+    outcome = "ok"
+
+    try:
+        executor = get_executor()
+        if isinstance(executor, ProcessPoolExecutor):
+            call = partial(_call_by_path, func.__module__, func.__name__, *args)
+        else:
+            call = partial(_call_sync, func, *args)
+
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(loop.run_in_executor(executor, call), timeout=timeout)
+
+    except asyncio.TimeoutError as e:
+        outcome = "timeout"
+        raise SolveTimeoutError(
+            f"{stage} для {task_type}/{task_subtype} не уложился в {timeout:.1f} с"
+        ) from e
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        _record(stage, task_type, task_subtype or "-", elapsed, outcome)
+        logger.debug(f"[SolvePool] {stage} {task_type}/{task_subtype}: {elapsed * 1000:.1f} мс ({outcome})")
+
+
+async def run_humanizer(
+    humanize: Callable[..., str],
+    solution_core: Dict[str, Any],
+    task_type: str,
+    task_subtype: Optional[str] = None,
+) -> str:
+    """humanize(solution_core) в пуле — тот же результат, но без блокировки loop."""
+    return await run_in_pool(
+        "humanize",
+        humanize,
+        solution_core,
+        task_type=str(task_type),
+        task_subtype=task_subtype,
+    )
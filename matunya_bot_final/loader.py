@@ -1,18 +1,52 @@
 # loader.py
 """
 Загрузчик баз заданий (наш "склад").
-Читает все JSON-файлы из папки data и складывает их в TASKS_DB.
+
+TASKS_DB — ленивый склад: JSON-файл из папки data разбирается только при
+первом обращении к своему ключу. После разбора рядом кладётся бинарный
+снимок (marshal) с отпечатком исходника (mtime + размер), поэтому
+последующие запуски читают снимок через mmap и не парсят JSON заново.
+Время загрузки каждого склада доступно через get_load_timings().
 """
 
+import importlib.util
 import json
+import marshal
+import mmap
+import os
+import time
 from pathlib import Path
+from typing import Any, Dict, Optional
 
 # Корень проекта
 PROJECT_ROOT = Path(__file__).resolve().parent
 DATA_DIR = PROJECT_ROOT / "data"
 
-# Глобальный "склад" задач
-TASKS_DB: dict[str, list[dict]] = {}
+# Куда класть бинарные снимки (можно переопределить через окружение)
+SNAPSHOT_DIR_ENV = "MATUNYA_SNAPSHOT_DIR"
+SNAPSHOT_DIR = Path(os.getenv(SNAPSHOT_DIR_ENV) or DATA_DIR / ".snapshots")
+
+# Формат marshal зависит от версии Python — учитываем её в заголовке
+_SNAPSHOT_MAGIC = b"MTNY1" + importlib.util.MAGIC_NUMBER.hex().encode()
+
+# Список наших «складов»
+TASK_FILES: Dict[str, Path] = {
+    "1_5_paper": DATA_DIR / "tasks_1_5" / "paper" / "tasks_1_5_paper.json",
+    "1_5_stoves": DATA_DIR / "tasks_1_5" / "stoves" / "tasks_1_5_stoves.json",
+    "1_5_apartments": DATA_DIR / "tasks_1_5" / "apartments" / "tasks_1_5_apartments.json",
+    "6": DATA_DIR / "tasks_6" / "tasks_6.json",
+    "7": DATA_DIR / "tasks_7" / "tasks_7.json",
+    "8": DATA_DIR / "tasks_8" / "tasks_8.json",
+    "9": DATA_DIR / "tasks_9" / "tasks_9.json",
+    "11": DATA_DIR / "tasks_11" / "tasks_11.json",
+    "12": DATA_DIR / "tasks_12" / "tasks_12.json",
+    "15": DATA_DIR / "tasks_15" / "tasks_15.json",
+    "16": DATA_DIR / "tasks_16" / "tasks_16.json",
+    "20": DATA_DIR / "tasks_20" / "tasks_20.json",
+}
+
+# ключ склада -> {"source": "json" | "snapshot" | "missing", "seconds": ..., "tasks": ...}
+LOAD_TIMINGS: Dict[str, Dict[str, Any]] = {}
 
 
 def load_json_file(path: Path) -> list[dict]:
@@ -28,30 +62,140 @@ def load_json_file(path: Path) -> list[dict]:
         return []
 
 
-def load_all_tasks():
-    """Загружает все JSON из data/* в TASKS_DB."""
-    global TASKS_DB
-
-    # Список наших «складов»
-    task_files = {
-        "1_5_paper": DATA_DIR / "tasks_1_5" / "paper" / "tasks_1_5_paper.json",
-        "1_5_stoves": DATA_DIR / "tasks_1_5" / "stoves" / "tasks_1_5_stoves.json",
-        "1_5_apartments": DATA_DIR / "tasks_1_5" / "apartments" / "tasks_1_5_apartments.json",
-        "6": DATA_DIR / "tasks_6" / "tasks_6.json",
-        "7": DATA_DIR / "tasks_7" / "tasks_7.json",
-        "8": DATA_DIR / "tasks_8" / "tasks_8.json",
-        "9": DATA_DIR / "tasks_9" / "tasks_9.json",
-        "11": DATA_DIR / "tasks_11" / "tasks_11.json",
-        "12": DATA_DIR / "tasks_12" / "tasks_12.json",
-        "15": DATA_DIR / "tasks_15" / "tasks_15.json",
-        "16": DATA_DIR / "tasks_16" / "tasks_16.json",
-        "20": DATA_DIR / "tasks_20" / "tasks_20.json",
-    }
-
-    for key, path in task_files.items():
-        TASKS_DB[key] = load_json_file(path)
-        print(f"[DEBUG] Задание {key}: загружено {len(TASKS_DB[key])} задач")
-
-
-# Загружаем при импорте
-load_all_tasks()
+# ---------------------------------------------------------------------------
+# БИНАРНЫЕ СНИМКИ
+# ---------------------------------------------------------------------------
+
+def _snapshot_path(key: str) -> Path:
+    return SNAPSHOT_DIR / f"tasks_{key}.marshal"
+
+
+def _snapshot_header(source: Path) -> Optional[bytes]:
+    """Заголовок снимка: формат + отпечаток исходного JSON."""
+    try:
+        stat = source.stat()
+    except FileNotFoundError:
+        return None
+    return _SNAPSHOT_MAGIC + f" {stat.st_mtime_ns} {stat.st_size}\n".encode()
+
+
+def _read_snapshot(key: str, header: bytes) -> Optional[Any]:
+    """Читает снимок через mmap; None — если снимка нет или он устарел."""
+    path = _snapshot_path(key)
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[: len(header)] != header:
+                return None
+            # Без копии файла в память: marshal читает прямо из отображения
+            with memoryview(mm) as view, view[len(header):] as payload:
+                return marshal.loads(payload)
+    except (OSError, ValueError, EOFError, TypeError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"[WARN] Снимок {path} не прочитан: {e}")
+        return None
+
+
+def _write_snapshot(key: str, header: bytes, data: Any) -> None:
+    """Атомарно пишет снимок (tmp + rename), ошибки записи не фатальны."""
+    path = _snapshot_path(key)
+    tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+    try:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            marshal.dump(data, f)
+        os.replace(tmp_path, path)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Не удалось сохранить снимок {path}: {e}")
+        tmp_path.unlink(missing_ok=True)
+
+
+def load_task_store(key: str, path: Path, use_snapshot: bool = True) -> Any:
+    """Загружает один склад: из свежего снимка, иначе из JSON (и обновляет снимок)."""
+    started = time.perf_counter()
+    header = _snapshot_header(path)
+
+    data = None
+    source = "missing"
+    if header is None:
+        data = load_json_file(path)
+    else:
+        if use_snapshot:
+            data = _read_snapshot(key, header)
+            source = "snapshot"
+        if data is None:
+            data = load_json_file(path)
+            source = "json"
+            if use_snapshot and data:
+                _write_snapshot(key, header, data)
+
+    elapsed = time.perf_counter() - started
+    tasks = data.get("tasks", []) if isinstance(data, dict) else data
+    LOAD_TIMINGS[key] = {"source": source, "seconds": elapsed, "tasks": len(tasks)}
+    print(f"[DEBUG] Задание {key}: загружено {len(tasks)} задач ({source}, {elapsed * 1000:.1f} мс)")
+    return data
+
+
+def get_load_timings() -> Dict[str, Dict[str, Any]]:
+    """Снимок времени загрузки складов (только уже загруженные ключи)."""
+    return {key: dict(info) for key, info in LOAD_TIMINGS.items()}
+
+
+# ---------------------------------------------------------------------------
+# ЛЕНИВЫЙ СКЛАД
+# ---------------------------------------------------------------------------
+
+class LazyTasksDB(dict):
+    """
+    dict, который догружает склад при первом обращении к ключу.
+    Ключи из TASK_FILES видны сразу (keys / in), но не занимают память,
+    пока к ним не обратились.
+    """
+
+    def __init__(self, sources: Dict[str, Path]) -> None:
+        super().__init__()
+        self._sources = dict(sources)
+
+    def __missing__(self, key: str) -> Any:
+        if key not in self._sources:
+            raise KeyError(key)
+        data = load_task_store(key, self._sources[key])
+        dict.__setitem__(self, key, data)
+        return data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def is_loaded(self, key: str) -> bool:
+        return dict.__contains__(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return dict.__contains__(self, key) or key in self._sources
+
+    def keys(self):
+        return list(dict.fromkeys([*self._sources, *dict.keys(self)]))
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+
+# Глобальный "склад" задач
+TASKS_DB: LazyTasksDB = LazyTasksDB(TASK_FILES)
+
+
+def load_all_tasks(use_snapshot: bool = True):
+    """Принудительно (пере)загружает все склады из data/* в TASKS_DB."""
+    for key, path in TASK_FILES.items():
+        dict.__setitem__(TASKS_DB, key, load_task_store(key, path, use_snapshot=use_snapshot))
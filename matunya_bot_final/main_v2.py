@@ -9,14 +9,41 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.exceptions import TelegramNetworkError
 
-from matunya_bot_final.utils.db_manager import setup_database, init_db, close_database
-from matunya_bot_final.loader import TASKS_DB, load_all_tasks
-
-
-async def main(bot_token: str):
+from matunya_bot_final.utils.db_manager import setup_database, init_db, close_database, warm_skill_type_cache
+from matunya_bot_final.utils.log_writer import log_writer
+from matunya_bot_final.gpt.gpt_utils import close_gpt_client, get_gpt_metrics
+from matunya_bot_final.gpt.response_cache import get_cache_metrics
+from matunya_bot_final.help_core.knowledge.golden_set_reader import (
+    get_golden_set_metrics,
+    stop_golden_set,
+    warm_golden_set,
+)
+from matunya_bot_final.help_core.solve_pool import get_solver_metrics, shutdown_solver_pool
+from matunya_bot_final.core.task_pool import get_task_pool_metrics, start_task_pools, stop_task_pools
+from matunya_bot_final.loader import load_all_tasks
+from matunya_bot_final.task_generators.tasks_1_5.generator import warm_task_resources
+from matunya_bot_final.core.task_catalog import build_all_catalogs
+from matunya_bot_final.utils.fsm_storage import SQLiteStorage
+from matunya_bot_final.middlewares import (
+    FSMWriteCoalescingMiddleware,
+    HandlerLatencyMiddleware,
+    TelegramLatencyMiddleware,
+    UpdateLatencyMiddleware,
+)
+from matunya_bot_final.utils.latency_metrics import (
+    register_collector,
+    start_metrics_reporting,
+    stop_metrics_reporting,
+)
+from matunya_bot_final.utils.visuals.render_cache import get_render_metrics, shutdown_render_pool
+from matunya_bot_final.webhook_server import run_webhook
+
+
+async def main(bot_token: str, webhook: bool = False):
     """
     Главная точка запуска Матюни.
     Теперь получает bot_token извне — run.py отвечает за выбор env-файла.
+    webhook=True — приём апдейтов через aiohttp-сервер (см. webhook_server.py) вместо polling.
     """
 
     logging.basicConfig(level=logging.INFO)
@@ -34,12 +61,25 @@ async def main(bot_token: str):
         logging.error(f"Критическая ошибка при инициализации БД: {e}")
         return
 
+    # Справочник навыков — в память: регистрация задач без лишних SELECT
+    async with session_maker() as session:
+        await warm_skill_type_cache(session)
+
+    # Логи ответов/активности пишутся пачками в фоне (close_database дописывает очередь)
+    log_writer.start(session_maker)
+
     # ---------------------------------------
     # 2) Загрузка задач из JSON-баз
     # ---------------------------------------
-    logging.info("Загрузка складских JSON-баз...")
-    load_all_tasks()
-    logging.info("Все базы задач загружены.")
+    # Склады грузятся лениво при первом обращении (из бинарного снимка,
+    # если он свежий). MATUNYA_PRELOAD_TASKS=1 — прогреть всё на старте.
+    if os.getenv("MATUNYA_PRELOAD_TASKS") == "1":
+        logging.info("Загрузка складских JSON-баз...")
+        load_all_tasks()
+        build_all_catalogs()
+        logging.info("Все базы задач загружены, индексы каталога построены.")
+    else:
+        logging.info("Базы задач будут загружены по первому обращению.")
 
     # ---------------------------------------
     # 3) Импорт роутеров ПОСЛЕ инициализации БД
@@ -51,7 +91,16 @@ async def main(bot_token: str):
     # 4) Создание Bot и Dispatcher
     # ---------------------------------------
     bot = Bot(token=bot_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    dp = Dispatcher(session_maker=session_maker)
+    # FSM хранится в matunya.db — переживает рестарт и общий для всех процессов
+    storage = SQLiteStorage(session_maker)
+    dp = Dispatcher(storage=storage, session_maker=session_maker)
+
+    # Латентности: апдейт целиком (включая запись FSM), хендлеры, вызовы Bot API
+    dp.update.outer_middleware(UpdateLatencyMiddleware())
+    dp.update.outer_middleware(FSMWriteCoalescingMiddleware(storage))
+    dp.message.middleware(HandlerLatencyMiddleware())
+    dp.callback_query.middleware(HandlerLatencyMiddleware())
+    bot.session.middleware(TelegramLatencyMiddleware())
 
     from aiogram.types import BotCommand
 
@@ -64,7 +113,7 @@ async def main(bot_token: str):
         ]
     )
 
-    logging.info("Dispatcher создан с session_maker")
+    logging.info("Dispatcher создан с session_maker и SQLite FSM-хранилищем")
 
     # ---------------------------------------
     # 5) Подключаем все роутеры
@@ -72,9 +121,46 @@ async def main(bot_token: str):
     for r in routers:
         dp.include_router(r)
 
+    # Фоновое пополнение пулов заданий 7 и 10 (MATUNYA_TASK_POOLS=1)
+    if start_task_pools():
+        logging.info("Пулы заданий 7 и 10 пополняются в фоне.")
+
+    # Golden set: зеркало с диска сразу, свежий снимок из Google — в фоне
+    warm_golden_set()
+
+    # Тексты и сюжеты заданий 1–5 — в память один раз, генерация пакета без чтения диска
+    warm_task_resources()
+
+    # Метрики модулей рядом с гистограммами: GET /metrics (METRICS_PORT), сводка в лог
+    register_collector("gpt", get_gpt_metrics)
+    register_collector("gpt_cache", get_cache_metrics)
+    register_collector("solver", get_solver_metrics)
+    register_collector("task_pool", get_task_pool_metrics)
+    register_collector("fsm", storage.get_metrics)
+    register_collector("render", get_render_metrics)
+    register_collector("golden_set", get_golden_set_metrics)
+    await start_metrics_reporting()
+
     # ---------------------------------------
-    # 6) Сбрасываем webhook (на случай миграции между Webhook и Polling)
+    # 6) Режим webhook: aiohttp-сервер до сигнала остановки
     # ---------------------------------------
+    if webhook:
+        try:
+            print("Матюня запускается (webhook)...")
+            await run_webhook(dp, bot)
+        finally:
+            await bot.session.close()
+            await stop_metrics_reporting()
+            await stop_task_pools()
+            await stop_golden_set()
+            await close_gpt_client()
+            shutdown_solver_pool()
+            shutdown_render_pool()
+            await close_database(engine)
+            logging.info("Приложение завершено.")
+        return
+
+    # Сбрасываем webhook (на случай миграции между Webhook и Polling)
     await bot.delete_webhook(drop_pending_updates=True)
 
     # ---------------------------------------
@@ -104,6 +190,12 @@ async def main(bot_token: str):
                 await bot.session.close()
 
     finally:
+        await stop_metrics_reporting()
+        await stop_task_pools()
+        await stop_golden_set()
+        await close_gpt_client()
+        shutdown_solver_pool()
+        shutdown_render_pool()
         await close_database(engine)
         logging.info("Приложение завершено.")
 
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""Middleware диспетчера (подключаются в main_v2)."""
+
+from matunya_bot_final.middlewares.fsm_write_coalescing import FSMWriteCoalescingMiddleware
+from matunya_bot_final.middlewares.latency import (
+    HandlerLatencyMiddleware,
+    TelegramLatencyMiddleware,
+    UpdateLatencyMiddleware,
+)
+
+__all__ = [
+    "FSMWriteCoalescingMiddleware",
+    "HandlerLatencyMiddleware",
+    "TelegramLatencyMiddleware",
+    "UpdateLatencyMiddleware",
+]
@@ -0,0 +1,31 @@
+# middlewares/fsm_write_coalescing.py
+"""
+Склеивает записи FSM в пределах одного апдейта.
+
+Хендлеры часто вызывают state.update_data() по несколько раз подряд
+(трекинг сообщений, тема, задание). С SQLiteStorage каждое такое
+обращение внутри апдейта работает с памятью, а в БД уходит одна запись.
+Ключ FSM, к которому апдейт обратился, заблокирован до этой записи —
+следующий апдейт того же чата ждёт её и видит уже новое состояние.
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from matunya_bot_final.utils.fsm_storage import SQLiteStorage
+
+
+class FSMWriteCoalescingMiddleware(BaseMiddleware):
+    def __init__(self, storage: SQLiteStorage) -> None:
+        self.storage = storage
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        async with self.storage.coalesce():
+            return await handler(event, data)
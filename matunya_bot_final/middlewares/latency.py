@@ -0,0 +1,104 @@
+# middlewares/latency.py
+"""
+Замеры латентности (utils/latency_metrics.py).
+
+- UpdateLatencyMiddleware (outer, dp.update) — весь путь апдейта: фильтры,
+  хендлер, запись FSM. Метки: тип апдейта и действие (callback или команда).
+- HandlerLatencyMiddleware (inner, dp.message / dp.callback_query) — только
+  хендлер. Метки: роутер и функция-хендлер. Внутренние middleware
+  диспетчера наследуются всеми вложенными роутерами.
+- TelegramLatencyMiddleware (bot.session) — каждый вызов Bot API по имени метода.
+"""
+
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from matunya_bot_final.utils.latency_metrics import observe
+
+HANDLERS_PACKAGE = "matunya_bot_final.handlers."
+
+
+def callback_action(data: str) -> str:
+    """'task:get_help:...' -> 'task:get_help'; строковые callback без двоеточия — как есть."""
+    parts = data.split(":", 2)
+    return ":".join(parts[:2])
+
+
+def update_labels(update: Update) -> Dict[str, str]:
+    try:
+        event_type = update.event_type
+    except Exception:  # неизвестный тип апдейта
+        event_type = "unknown"
+    action = ""
+    if update.callback_query is not None:
+        action = callback_action(update.callback_query.data or "")
+    elif update.message is not None:
+        text = update.message.text or ""
+        action = text.split()[0].split("@")[0] if text.startswith("/") else update.message.content_type
+    return {"event": event_type, "action": action}
+
+
+class UpdateLatencyMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            observe("update_seconds", update_labels(event), time.perf_counter() - started)
+
+
+class HandlerLatencyMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            callback = getattr(data.get("handler"), "callback", None)
+            module = getattr(callback, "__module__", "") or ""
+            router = getattr(data.get("event_router"), "name", "") or ""
+            if not router or router.startswith("0x"):
+                # Роутер без имени: подписываем модулем, где он объявлен
+                router = module.removeprefix(HANDLERS_PACKAGE)
+            observe(
+                "handler_seconds",
+                {"router": router, "handler": getattr(callback, "__name__", "unknown")},
+                time.perf_counter() - started,
+            )
+
+
+class TelegramLatencyMiddleware(BaseRequestMiddleware):
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            observe(
+                "telegram_api_seconds",
+                {"method": method.__api_method__, "outcome": outcome},
+                time.perf_counter() - started,
+            )
@@ -8,11 +8,19 @@
 - билд НЕ читает картинки (ни SVG, ни PNG)
 - в JSON хранится только имя файла в поле "image_file" (его проставляет валидатор)
 - сами PNG лежат в: matunya_bot_final/non_generators/task_15/assets
+
+Файлы определений валидируются параллельно (пул процессов).
+С флагом --with-solutions рядом с tasks_15.json пишется tasks_15.solutions.json —
+готовые solution_core и HTML-тексты помощи для каждой задачи.
 """
 
+import argparse
 import os
 import json
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Optional
 
 # Добавляем корень проекта в sys.path, чтобы импорты работали корректно
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../")))
@@ -21,6 +29,7 @@ from matunya_bot_final.non_generators.task_15.validators.angles_validator import
 from matunya_bot_final.non_generators.task_15.validators.isosceles_triangles_validator import IsoscelesValidator
 from matunya_bot_final.non_generators.task_15.validators.general_triangles_validator import GeneralTrianglesValidator
 from matunya_bot_final.non_generators.task_15.validators.right_triangles_validator import RightTrianglesValidator
+from matunya_bot_final.help_core.solution_cache import precompute_solutions, write_sidecar
 
 
 # --- КОНФИГУРАЦИЯ ПУТЕЙ ---
@@ -49,90 +58,142 @@ def _asset_exists(filename: str) -> bool:
     return os.path.exists(os.path.join(ASSETS_DIR, filename))
 
 
-def build() -> None:
-    print("🏭 ЗАПУСК СБОРОЧНОГО ЦЕХА ЗАДАНИЯ 15...")
-    print(f"📍 Директория определений: {DEFINITIONS_DIR}")
-    print(f"📍 Директория ассетов: {ASSETS_DIR}")
-    print(f"📍 Файл на выходе: {OUTPUT_FILE}")
-    print("-" * 50)
+def _build_file(filename: str) -> tuple[list[dict], list[str]]:
+    """
+    Валидирует один файл определений (выполняется в процессе пула).
+    Возвращает задачи без id и строки лога — печатает их главный процесс,
+    чтобы вывод файлов не перемешивался.
+    """
+    log: list[str] = []
+    tasks: list[dict] = []
 
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    filepath = os.path.join(DEFINITIONS_DIR, filename)
+    if not os.path.exists(filepath):
+        log.append(f"🔸 Пропуск {filename}: файл ещё не создан.")
+        return tasks, log
 
-    all_tasks: list[dict] = []
-    current_id = 1500000
+    log.append(f"🔨 Обработка {filename}...")
 
-    for filename, ValidatorClass in VALIDATOR_MAPPING.items():
-        filepath = os.path.join(DEFINITIONS_DIR, filename)
-        if not os.path.exists(filepath):
-            print(f"🔸 Пропуск {filename}: файл ещё не создан.")
-            continue
+    try:
+        validator = VALIDATOR_MAPPING[filename]()
+    except Exception as e:
+        log.append(f"❌ CRITICAL: Не удалось инициализировать валидатор для {filename}: {e}")
+        return tasks, log
 
-        print(f"🔨 Обработка {filename}...")
+    with open(filepath, "r", encoding="utf-8") as f:
+        lines = f.readlines()
 
-        try:
-            validator = ValidatorClass()
-        except Exception as e:
-            print(f"❌ CRITICAL: Не удалось инициализировать валидатор для {filename}: {e}")
+    for line_num, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
             continue
 
-        with open(filepath, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        try:
+            if "|" not in line:
+                raise ValueError("Неверный формат строки (нет разделителя '|').")
+
+            pattern, text = line.split("|", 1)
+            raw_data = {"pattern": pattern.strip(), "text": text.strip()}
 
-        file_tasks_count = 0
+            # --- ГИБКИЙ ВЫЗОВ ВАЛИДАТОРА ---
+            if hasattr(validator, "validate_one"):
+                task_data = validator.validate_one(raw_data)
+            else:
+                task_data = validator.validate(raw_data)
 
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
+            if not isinstance(task_data, dict):
+                raise ValueError("Валидатор вернул не dict.")
 
-            try:
-                if "|" not in line:
-                    raise ValueError("Неверный формат строки (нет разделителя '|').")
+            # --- КАРТИНКИ ---
+            # Ничего не читаем и не встраиваем в JSON.
+            # Только мягко предупредим, если файл указан, но его нет.
+            img_filename = task_data.get("image_file")
+            if img_filename and not _asset_exists(str(img_filename)):
+                log.append(f"⚠️  WARNING: ассет не найден в assets: {img_filename} (строка {line_num})")
 
-                pattern, text = line.split("|", 1)
-                raw_data = {"pattern": pattern.strip(), "text": text.strip()}
+            tasks.append(task_data)
+
+        except Exception as e:
+            log.append(f"❌ Ошибка в файле {filename} на строке {line_num}:")
+            log.append(f"   Текст: {line[:120]}...")
+            log.append(f"   Причина: {e}")
 
-                # --- ГИБКИЙ ВЫЗОВ ВАЛИДАТОРА ---
-                if hasattr(validator, "validate_one"):
-                    task_data = validator.validate_one(raw_data)
-                else:
-                    task_data = validator.validate(raw_data)
+    log.append(f"   ✅ Добавлено задач: {len(tasks)}")
+    return tasks, log
 
-                if not isinstance(task_data, dict):
-                    raise ValueError("Валидатор вернул не dict.")
 
-                # --- ID ---
+def build(with_solutions: bool = False, workers: Optional[int] = None) -> None:
+    print("🏭 ЗАПУСК СБОРОЧНОГО ЦЕХА ЗАДАНИЯ 15...")
+    print(f"📍 Директория определений: {DEFINITIONS_DIR}")
+    print(f"📍 Директория ассетов: {ASSETS_DIR}")
+    print(f"📍 Файл на выходе: {OUTPUT_FILE}")
+    print("-" * 50)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    all_tasks: list[dict] = []
+    tasks_by_file: list[list[dict]] = []
+    current_id = 1500000
+
+    # Файлы определений независимы — валидируем их параллельно
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # pool.map сохраняет порядок VALIDATOR_MAPPING — id те же, что и при последовательной сборке
+        for file_tasks, log in pool.map(_build_file, VALIDATOR_MAPPING):
+            print("\n".join(log))
+            # --- ID ---
+            for task_data in file_tasks:
                 current_id += 1
                 task_data["id"] = current_id
+            all_tasks.extend(file_tasks)
+            tasks_by_file.append(file_tasks)
 
-                # --- КАРТИНКИ ---
-                # Ничего не читаем и не встраиваем в JSON.
-                # Только мягко предупредим, если файл указан, но его нет.
-                img_filename = task_data.get("image_file")
-                if img_filename and not _asset_exists(str(img_filename)):
-                    print(f"⚠️  WARNING: ассет не найден в assets: {img_filename} (строка {line_num})")
-
-                all_tasks.append(task_data)
-                file_tasks_count += 1
+        try:
+            with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+                json.dump(all_tasks, f, ensure_ascii=False, indent=2)
 
-            except Exception as e:
-                print(f"❌ Ошибка в файле {filename} на строке {line_num}:")
-                print(f"   Текст: {line[:120]}...")
-                print(f"   Причина: {e}")
+            print("-" * 50)
+            print("🎉 СБОРКА ЗАВЕРШЕНА УСПЕШНО!")
+            print(f"📊 Всего задач в базе: {len(all_tasks)}")
+            print(f"💾 Путь к файлу: {OUTPUT_FILE}")
+        except Exception as e:
+            print(f"❌ FATAL ERROR: Не удалось сохранить итоговый файл: {e}")
+            return
 
-        print(f"   ✅ Добавлено задач: {file_tasks_count}")
+        if with_solutions:
+            _build_solutions(pool, tasks_by_file)
 
-    try:
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(all_tasks, f, ensure_ascii=False, indent=2)
 
-        print("-" * 50)
-        print("🎉 СБОРКА ЗАВЕРШЕНА УСПЕШНО!")
-        print(f"📊 Всего задач в базе: {len(all_tasks)}")
-        print(f"💾 Путь к файлу: {OUTPUT_FILE}")
-    except Exception as e:
-        print(f"❌ FATAL ERROR: Не удалось сохранить итоговый файл: {e}")
+def _build_solutions(pool: ProcessPoolExecutor, tasks_by_file: list[list[dict]]) -> None:
+    """Решатель + гуманизатор для каждой задачи -> tasks_15.solutions.json."""
+    print("-" * 50)
+    print("🧠 Готовые решения (решатель + гуманизатор)...")
+
+    entries: dict = {}
+    errors: list[str] = []
+    for file_entries, file_errors in pool.map(partial(precompute_solutions, "15"), tasks_by_file):
+        entries.update(file_entries)
+        errors.extend(file_errors)
+
+    path = write_sidecar("15", entries)
+    print(f"   ✅ Решено: {len(entries)}")
+    if errors:
+        print(f"   ❌ Без решения: {len(errors)}")
+        for error in errors:
+            print(f"      - {error}")
+    print(f"💾 Решения: {path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сборка базы Задания 15.")
+    parser.add_argument(
+        "--with-solutions",
+        action="store_true",
+        help="Также прогнать решатели и гуманизатор и сохранить tasks_15.solutions.json",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Размер пула процессов (по умолчанию — число CPU)")
+    args = parser.parse_args()
+    build(with_solutions=args.with_solutions, workers=args.workers)
 
 
 if __name__ == "__main__":
-    build()
+    main()
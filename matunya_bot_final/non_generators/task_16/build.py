@@ -4,12 +4,20 @@
 """
 Сборщик JSON-базы для Задания 16.
 Исправлен под новую архитектуру (task_context + answer в корне).
+
+Файлы определений валидируются параллельно (пул процессов).
+С флагом --with-solutions рядом с tasks_16.json пишется tasks_16.solutions.json —
+готовые solution_core и HTML-тексты помощи для каждой задачи.
 """
 
+import argparse
 import os
 import json
 import sys
 import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Optional
 
 # Добавляем корень проекта в sys.path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -28,6 +36,8 @@ from matunya_bot_final.non_generators.task_16.validators.circle_around_polygon_v
         CircleAroundPolygonValidator,
 )
 
+from matunya_bot_final.help_core.solution_cache import precompute_solutions, write_sidecar
+
 # --- КОНФИГУРАЦИЯ ПУТЕЙ ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DEFINITIONS_DIR = os.path.join(BASE_DIR, "definitions")
@@ -88,86 +98,125 @@ def load_and_parse_file(filepath: str) -> list[dict]:
 
     return tasks
 
-def build() -> None:
-    print("\n" + "="*60)
-    print("🏭 ЗАПУСК СБОРОЧНОГО ЦЕХА ЗАДАНИЯ 16")
-    print(f"📍 Сырьё: {DEFINITIONS_DIR}")
-    print(f"📍 Выход: {OUTPUT_FILE}")
-    print("="*60 + "\n")
-
-    os.makedirs(DATA_DIR, exist_ok=True)
+def _build_file(filename: str) -> tuple[list[dict], list[str], int]:
+    """
+    Валидирует один файл определений (выполняется в процессе пула).
+    Возвращает задачи без id, строки лога и число отброшенных задач.
+    """
+    log: list[str] = []
+    tasks: list[dict] = []
+    errors_count = 0
 
-    all_tasks: list[dict] = []
-    current_id = START_ID
-    total_errors = 0
+    filepath = os.path.join(DEFINITIONS_DIR, filename)
+    if not os.path.exists(filepath):
+        log.append(f"🔸 [SKIP] Файл {filename} не найден.")
+        return tasks, log, errors_count
 
-    for filename, ValidatorClass in VALIDATOR_MAPPING.items():
-        filepath = os.path.join(DEFINITIONS_DIR, filename)
-        if not os.path.exists(filepath):
-            print(f"🔸 [SKIP] Файл {filename} не найден.")
-            continue
+    log.append(f"🔨 Обработка {filename}...")
+    raw_tasks = load_and_parse_file(filepath)
+    log.append(f"   📥 Загружено: {len(raw_tasks)}")
 
-        print(f"🔨 Обработка {filename}...")
-        raw_tasks = load_and_parse_file(filepath)
-        print(f"   📥 Загружено: {len(raw_tasks)}")
+    try:
+        validator = VALIDATOR_MAPPING[filename]()
+    except Exception as e:
+        log.append(f"❌ CRITICAL: Ошибка инициализации валидатора: {e}")
+        return tasks, log, errors_count
 
+    for task in raw_tasks:
         try:
-            validator = ValidatorClass()
+            # ВАЛИДАЦИЯ (изменяет task in-place)
+            is_valid, errors = validator.validate(task)
+
+            # Фильтруем ошибки
+            real_errors = [e for e in errors if "Неверный ответ" not in e and "Математическая ошибка" not in e]
+            if not is_valid and real_errors:
+                log.append(f"   ❌ Ошибка (стр {task.get('source_line')}): {', '.join(real_errors)}")
+                errors_count += 1
+                continue
+
+            # --- ПРОВЕРКА ОТВЕТА (ОБНОВЛЕННАЯ ЛОГИКА) ---
+            # Валидатор должен был заменить -1 на реальный ответ в поле "answer"
+            final_answer = task.get("answer")
+            if final_answer == -1 or final_answer is None:
+                log.append(f"   ⚠️ [WARN] Валидатор не рассчитал ответ для задачи (стр {task.get('source_line')}, остался -1)")
+                errors_count += 1
+                continue
+
+            # Убедимся, что task_context существует (бывший solution_vars)
+            if "task_context" not in task:
+                log.append(f"   ⚠️ [WARN] Отсутствует task_context для задачи (стр {task.get('source_line')})")
+                errors_count += 1
+                continue
+
+            # Проверяем картинки
+            imgs = [task.get("image_file"), task.get("help_image_file")]
+            for img in imgs:
+                if not _asset_exists(img):
+                    log.append(f"   ⚠️ [ASSET MISSING] {img}")
+
+            if "source_line" in task: del task["source_line"]
+
+            tasks.append(task)
+
         except Exception as e:
-            print(f"❌ CRITICAL: Ошибка инициализации валидатора: {e}")
-            continue
+            log.append(f"   ❌ CRASH: {e}")
+            errors_count += 1
 
-        file_valid_count = 0
+    log.append(f"   ✅ Успешно добавлено: {len(tasks)}")
+    return tasks, log, errors_count
 
-        for task in raw_tasks:
-            try:
-                # ВАЛИДАЦИЯ (изменяет task in-place)
-                is_valid, errors = validator.validate(task)
 
-                # Фильтруем ошибки
-                real_errors = [e for e in errors if "Неверный ответ" not in e and "Математическая ошибка" not in e]
-                if not is_valid and real_errors:
-                    print(f"   ❌ Ошибка (стр {task.get('source_line')}): {', '.join(real_errors)}")
-                    total_errors += 1
-                    continue
+def _build_solutions(pool: ProcessPoolExecutor, tasks_by_file: list[list[dict]]) -> None:
+    """Решатель + гуманизатор для каждой задачи -> tasks_16.solutions.json."""
+    print("🧠 Готовые решения (решатель + гуманизатор)...")
 
-                # --- ПОСТ-ОБРАБОТКА ---
-                current_id += 1
-                task["id"] = current_id
+    entries: dict = {}
+    errors: list[str] = []
+    for file_entries, file_errors in pool.map(partial(precompute_solutions, "16"), tasks_by_file):
+        entries.update(file_entries)
+        errors.extend(file_errors)
 
-                # --- ПРОВЕРКА ОТВЕТА (ОБНОВЛЕННАЯ ЛОГИКА) ---
-                # Валидатор должен был заменить -1 на реальный ответ в поле "answer"
-                final_answer = task.get("answer")
-                if final_answer == -1 or final_answer is None:
-                     print(f"   ⚠️ [WARN] Валидатор не рассчитал ответ для задачи {current_id} (остался -1)")
-                     total_errors += 1
-                     continue
+    path = write_sidecar("16", entries)
+    print(f"   ✅ Решено: {len(entries)}")
+    if errors:
+        print(f"   ❌ Без решения: {len(errors)}")
+        for error in errors:
+            print(f"      - {error}")
+    print(f"💾 Решения: {path}")
 
-                # Убедимся, что task_context существует (бывший solution_vars)
-                if "task_context" not in task:
-                     print(f"   ⚠️ [WARN] Отсутствует task_context для задачи {current_id}")
-                     total_errors += 1
-                     continue
 
-                # Проверяем картинки
-                imgs = [task.get("image_file"), task.get("help_image_file")]
-                for img in imgs:
-                    if not _asset_exists(img):
-                        print(f"   ⚠️ [ASSET MISSING] {img}")
+def build(with_solutions: bool = False, workers: Optional[int] = None) -> None:
+    print("\n" + "="*60)
+    print("🏭 ЗАПУСК СБОРОЧНОГО ЦЕХА ЗАДАНИЯ 16")
+    print(f"📍 Сырьё: {DEFINITIONS_DIR}")
+    print(f"📍 Выход: {OUTPUT_FILE}")
+    print("="*60 + "\n")
 
-                if "source_line" in task: del task["source_line"]
+    os.makedirs(DATA_DIR, exist_ok=True)
 
-                all_tasks.append(task)
-                file_valid_count += 1
+    all_tasks: list[dict] = []
+    tasks_by_file: list[list[dict]] = []
+    current_id = START_ID
+    total_errors = 0
 
-            except Exception as e:
-                print(f"   ❌ CRASH: {e}")
-                total_errors += 1
+    # Файлы определений независимы — валидируем их параллельно
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # pool.map сохраняет порядок VALIDATOR_MAPPING — id те же, что и при последовательной сборке
+        for file_tasks, log, errors_count in pool.map(_build_file, VALIDATOR_MAPPING):
+            print("\n".join(log))
+            total_errors += errors_count
+            # --- ПОСТ-ОБРАБОТКА ---
+            for task in file_tasks:
+                current_id += 1
+                task["id"] = current_id
+            all_tasks.extend(file_tasks)
+            tasks_by_file.append(file_tasks)
 
-        print(f"   ✅ Успешно добавлено: {file_valid_count}")
+        print("\n" + "-" * 50)
+        if not all_tasks:
+            print("🤷‍♂️ База пуста.")
+            return
 
-    print("\n" + "-" * 50)
-    if all_tasks:
         try:
             with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
                 json.dump(all_tasks, f, ensure_ascii=False, indent=2)
@@ -178,8 +227,22 @@ def build() -> None:
             print(f"💾 Файл: {OUTPUT_FILE}")
         except Exception as e:
             print(f"❌ FATAL ERROR: {e}")
-    else:
-        print("🤷‍♂️ База пуста.")
+            return
+
+        if with_solutions:
+            _build_solutions(pool, tasks_by_file)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сборка базы Задания 16.")
+    parser.add_argument(
+        "--with-solutions",
+        action="store_true",
+        help="Также прогнать решатели и гуманизатор и сохранить tasks_16.solutions.json",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Размер пула процессов (по умолчанию — число CPU)")
+    args = parser.parse_args()
+    build(with_solutions=args.with_solutions, workers=args.workers)
 
 if __name__ == "__main__":
-    build()
+    main()
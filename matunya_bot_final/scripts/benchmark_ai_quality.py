@@ -0,0 +1,123 @@
+# scripts/benchmark_ai_quality.py
+"""
+Бенчмарк отчета о качестве ИИ (utils/analytics_frames.py) на синтетических данных.
+
+Создаёт отдельную SQLite-базу с ai_interaction_logs (по умолчанию 2 млн
+взаимодействий за окно), затем замеряет:
+  - SQL-агрегаты analytics_core (get_ai_interaction_metrics + get_ai_performance_by_themes);
+  - колоночный проход compute_ai_quality (те же метрики + перцентили и категории);
+  - итоговый get_ai_quality_report.
+
+Запуск:
+    python -m matunya_bot_final.scripts.benchmark_ai_quality
+    python -m matunya_bot_final.scripts.benchmark_ai_quality --rows 5000000 --chunk 100000
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from matunya_bot_final.utils import analytics_core as core
+from matunya_bot_final.utils.analytics_frames import compute_ai_quality
+from matunya_bot_final.utils.analytics_reports import get_ai_quality_report
+from matunya_bot_final.utils.models import Base
+
+THEMES = ["Шины", "Квартиры", "Печи", "Бумага", "Участки", "Тарифы", None]
+AI_CATEGORIES = ["concept", "step", "answer_check", "other", None]
+
+
+def seed(db_path: Path, rows: int, users: int, days: int, seed_value: int) -> None:
+    """Создаёт схему и заливает взаимодействия с ИИ (sqlite3 напрямую)."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    fmt = "%Y-%m-%d %H:%M:%S.%f"
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (id, telegram_id, name, created_at) VALUES (?, ?, ?, ?)",
+            ((i, 10_000_000 + i, f"Ученик {i}", now.strftime(fmt)) for i in range(1, users + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO ai_interaction_logs (user_id, question_text, question_category, task_theme, "
+            "is_repeat_question, follow_up_count, used_theory_after, solved_task_after, time_to_solution, "
+            "abandoned_task, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (rng.randint(1, users), "Почему так?", rng.choice(AI_CATEGORIES), rng.choice(THEMES),
+                 rng.random() < 0.2, rng.randint(0, 5), rng.random() < 0.1,
+                 rng.choice([True, True, False, None]),
+                 int(rng.lognormvariate(4.5, 0.8)) if rng.random() < 0.6 else None,
+                 rng.random() < 0.1,
+                 (now - timedelta(seconds=rng.randrange(days * 86400))).strftime(fmt))
+                for _ in range(rows)
+            ),
+        )
+    conn.close()
+
+
+async def timed(name: str, call: Callable[[], Awaitable[Any]]) -> Any:
+    started = time.perf_counter()
+    result = await call()
+    print(f"{name:<45} {(time.perf_counter() - started) * 1000:>9.1f} мс")
+    return result
+
+
+async def main(args: argparse.Namespace) -> None:
+    db_path = Path(tempfile.mkdtemp(prefix="matunya_ai_bench_")) / "ai.db"
+
+    started = time.perf_counter()
+    seed(db_path, args.rows, args.users, args.days, args.seed)
+    print(f"База: {db_path}")
+    print(f"Залито {args.rows} взаимодействий за {time.perf_counter() - started:.1f} с")
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with session_maker() as session:
+            async def sql_path():
+                return (
+                    await core.get_ai_interaction_metrics(session, args.days),
+                    await core.get_ai_performance_by_themes(session, args.days),
+                )
+
+            await timed("SQL-агрегаты analytics_core", sql_path)
+            quality = await timed(
+                f"compute_ai_quality (пачки по {args.chunk})",
+                lambda: compute_ai_quality(session, args.days, chunk_size=args.chunk),
+            )
+            await timed("get_ai_quality_report", lambda: get_ai_quality_report(session, args.days))
+
+        overall = quality["overall"]
+        print(f"Успех {overall['success_rate']:.1%}, time_to_solution {overall['time_to_solution']}")
+    finally:
+        await engine.dispose()
+        if not args.keep:
+            db_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Бенчмарк отчета о качестве ИИ.")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Строк в ai_interaction_logs")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=7, help="Окно отчета (все строки попадают в него)")
+    parser.add_argument("--chunk", type=int, default=50_000, help="Размер пачки при чтении")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="Не удалять базу после замеров")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,246 @@
+# scripts/benchmark_analytics.py
+"""
+Бенчмарк запросов utils/analytics_core.py на синтетической истории.
+
+Создаёт отдельную SQLite-базу, наполняет её логами (по умолчанию
+2 млн ответов + активность, сессии и ИИ-взаимодействия пропорционально),
+строит дневные сводки (utils/analytics_rollups.py, как миграция
+e7b3d5a91f42), затем замеряет каждый запрос analytics_core и дайджест
+для родителя дважды: без индексов (как до миграции 5d7e9a0b3c21) и с
+индексами из utils/models.py.
+
+Запуск:
+    python -m matunya_bot_final.scripts.benchmark_analytics
+    python -m matunya_bot_final.scripts.benchmark_analytics --answers 5000000 --users 5000
+    python -m matunya_bot_final.scripts.benchmark_analytics --db /tmp/bench.db --keep
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from matunya_bot_final.utils import analytics_core as core
+from matunya_bot_final.utils.analytics_rollups import rebuild_rollups
+from matunya_bot_final.utils.analytics_reports import get_parent_digest
+from matunya_bot_final.utils.models import Base
+
+HISTORY_DAYS = 365
+THEMES = ["Шины", "Квартиры", "Печи", "Бумага", "Участки", "Тарифы", None]
+ACTIVITY_TYPES = ["help_general", "help_ai_chat", "theory", "casual_chat", "timed_mode", "theme_pack_start", "exam_pack_start"]
+AI_CATEGORIES = ["concept", "step", "answer_check", "other"]
+
+# Запрос -> вызов (session, user_id)
+QUERIES: Dict[str, Callable[..., Awaitable]] = {
+    "get_user_performance_by_skills": lambda s, u: core.get_user_performance_by_skills(s, u),
+    "get_user_performance_by_themes": lambda s, u: core.get_user_performance_by_themes(s, u),
+    "get_weekly_activity_counts": lambda s, u: core.get_weekly_activity_counts(s, u),
+    "get_session_patterns": lambda s, u: core.get_session_patterns(s, u),
+    "get_help_usage_stats": lambda s, u: core.get_help_usage_stats(s, u),
+    "get_ai_interaction_metrics (все)": lambda s, u: core.get_ai_interaction_metrics(s),
+    "get_ai_interaction_metrics (ученик)": lambda s, u: core.get_ai_interaction_metrics(s, user_id=u),
+    "get_ai_performance_by_themes": lambda s, u: core.get_ai_performance_by_themes(s),
+    "identify_weak_areas": lambda s, u: core.identify_weak_areas(s, u),
+    "calculate_consistency_score": lambda s, u: core.calculate_consistency_score(s, u),
+    "get_pack_usage_stats": lambda s, u: core.get_pack_usage_stats(s, u),
+    "get_parent_digest": lambda s, u: get_parent_digest(s, u),
+}
+
+
+# ---------------------------------------------------------------------------
+# Наполнение
+# ---------------------------------------------------------------------------
+
+def _ts(now: datetime, rng: random.Random) -> str:
+    # Формат, в котором SQLAlchemy хранит DateTime в SQLite
+    return (now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def seed(db_path: Path, answers: int, users: int, tasks: int, seed_value: int) -> Dict[str, int]:
+    """Создаёт схему и заливает синтетические логи (sqlite3 напрямую — так в разы быстрее ORM)."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    counts = {
+        "answer_logs": answers,
+        "activity_logs": answers // 2,
+        "session_logs": answers // 20,
+        "ai_interaction_logs": answers // 10,
+    }
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (id, telegram_id, name, created_at) VALUES (?, ?, ?, ?)",
+            ((i, 10_000_000 + i, f"Ученик {i}", _ts(now, rng)) for i in range(1, users + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO skill_types (id, source_id, name, task_number) VALUES (?, ?, ?, ?)",
+            ((i, f"skill_{i}", f"Навык {i}", str(i % 25 + 1)) for i in range(1, 41)),
+        )
+        conn.executemany(
+            "INSERT INTO tasks (id, skill_type_id, theme, text, answer, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            ((i, rng.randint(1, 40), rng.choice(THEMES), "…", "1", _ts(now, rng)) for i in range(1, tasks + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO answer_logs (user_id, task_id, user_answer, is_correct, time_spent, help_used, is_timed, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (rng.randint(1, users), rng.randint(1, tasks), "1", rng.random() < 0.7,
+                 rng.randint(5, 600), rng.random() < 0.2, rng.random() < 0.1, _ts(now, rng))
+                for _ in range(counts["answer_logs"])
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO activity_logs (user_id, task_id, activity_type, pack_type, pack_theme, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (rng.randint(1, users), rng.randint(1, tasks), rng.choice(ACTIVITY_TYPES),
+                 rng.choice(["theme", "exam", None]), rng.choice(THEMES), _ts(now, rng))
+                for _ in range(counts["activity_logs"])
+            ),
+        )
+
+        def session_row():
+            start = now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+            end = start + timedelta(minutes=rng.randint(3, 90))
+            fmt = "%Y-%m-%d %H:%M:%S.%f"
+            return (rng.randint(1, users), start.strftime(fmt), end.strftime(fmt),
+                    rng.randint(0, 30), rng.randint(0, 60), rng.choice(["study", "casual", "mixed"]))
+
+        conn.executemany(
+            "INSERT INTO session_logs (user_id, session_start, session_end, tasks_attempted, activities_count, session_type) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (session_row() for _ in range(counts["session_logs"])),
+        )
+        conn.executemany(
+            "INSERT INTO ai_interaction_logs (user_id, task_id, question_text, question_category, task_theme, "
+            "is_repeat_question, follow_up_count, used_theory_after, solved_task_after, abandoned_task, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (rng.randint(1, users), rng.randint(1, tasks), "Почему так?", rng.choice(AI_CATEGORIES),
+                 rng.choice(THEMES), rng.random() < 0.2, rng.randint(0, 5), rng.random() < 0.1,
+                 rng.random() < 0.6, rng.random() < 0.1, _ts(now, rng))
+                for _ in range(counts["ai_interaction_logs"])
+            ),
+        )
+    conn.close()
+    return counts
+
+
+def _model_indexes() -> List:
+    return [index for table in Base.metadata.sorted_tables for index in table.indexes]
+
+
+def set_indexes(db_path: Path, enabled: bool) -> None:
+    """Создаёт или удаляет индексы из utils/models.py (то же, что делает миграция)."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.begin() as conn:
+        for index in _model_indexes():
+            if enabled:
+                index.create(conn, checkfirst=True)
+            else:
+                index.drop(conn, checkfirst=True)
+        if enabled:
+            conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+
+
+# ---------------------------------------------------------------------------
+# Замеры
+# ---------------------------------------------------------------------------
+
+async def build_rollups(db_path: Path) -> Dict[str, int]:
+    """Пересчёт сводок из залитых логов."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    try:
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            return await rebuild_rollups(session)
+    finally:
+        await engine.dispose()
+
+
+async def measure(db_path: Path, user_ids: List[int]) -> Dict[str, float]:
+    """Медиана времени каждого запроса (мс) по выборке учеников."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    timings: Dict[str, float] = {}
+    try:
+        for name, query in QUERIES.items():
+            samples = []
+            for user_id in user_ids:
+                async with session_maker() as session:
+                    started = time.perf_counter()
+                    await query(session, user_id)
+                    samples.append((time.perf_counter() - started) * 1000)
+            timings[name] = statistics.median(samples)
+    finally:
+        await engine.dispose()
+    return timings
+
+
+def print_report(before: Dict[str, float], after: Dict[str, float]) -> None:
+    width = max(len(name) for name in before)
+    print(f"{'запрос'.ljust(width)}  {'без индексов':>13}  {'с индексами':>12}  {'ускорение':>9}")
+    print("-" * (width + 42))
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name.ljust(width)}  {before[name]:>10.1f} мс  {after[name]:>9.1f} мс  {speedup:>8.1f}x")
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.db:
+        db_path = Path(args.db)
+        db_path.unlink(missing_ok=True)
+    else:
+        db_path = Path(tempfile.mkdtemp(prefix="matunya_bench_")) / "analytics.db"
+
+    started = time.perf_counter()
+    counts = seed(db_path, args.answers, args.users, args.tasks, args.seed)
+    print(f"База: {db_path}")
+    print(f"Залито за {time.perf_counter() - started:.1f} с: {counts}")
+
+    started = time.perf_counter()
+    rollups = await build_rollups(db_path)
+    print(f"Сводки построены за {time.perf_counter() - started:.1f} с: {rollups}")
+
+    user_ids = random.Random(args.seed).sample(range(1, args.users + 1), min(args.samples, args.users))
+
+    set_indexes(db_path, enabled=False)
+    before = await measure(db_path, user_ids)
+    set_indexes(db_path, enabled=True)
+    after = await measure(db_path, user_ids)
+
+    print(f"Медиана по {len(user_ids)} ученикам, окно {core.DEFAULT_ANALYSIS_DAYS} дн.:")
+    print_report(before, after)
+
+    if not args.keep:
+        db_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Бенчмарк analytics_core до и после индексов.")
+    parser.add_argument("--answers", type=int, default=2_000_000, help="Строк в answer_logs (остальные логи — пропорционально)")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--samples", type=int, default=20, help="Сколько учеников замерять")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", type=str, default=None, help="Путь к базе (по умолчанию — временная папка)")
+    parser.add_argument("--keep", action="store_true", help="Не удалять базу после замеров")
+    asyncio.run(main(parser.parse_args()))
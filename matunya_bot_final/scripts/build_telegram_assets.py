@@ -0,0 +1,47 @@
+# scripts/build_telegram_assets.py
+"""
+Сборка облегчённых вариантов картинок для Telegram (utils/telegram_assets.py)
+и манифеста data/.telegram_assets/manifest.json.
+
+Запуск:
+    python -m matunya_bot_final.scripts.build_telegram_assets           # только новые/изменённые
+    python -m matunya_bot_final.scripts.build_telegram_assets --force   # пересобрать всё
+"""
+
+import argparse
+import hashlib
+import logging
+
+from matunya_bot_final.utils import telegram_assets
+
+
+def main(force: bool = False) -> None:
+    manifest = telegram_assets.load_manifest()
+    built = skipped = 0
+    total_before = total_after = 0
+
+    for path in telegram_assets.iter_assets():
+        key = path.relative_to(telegram_assets.PROJECT_ROOT).as_posix()
+        entry = manifest.get(key)
+        if not force and entry and entry["sha1"] == hashlib.sha1(path.read_bytes()).hexdigest():
+            skipped += 1
+        else:
+            entry = telegram_assets.build_variant(path, key, save=False)
+            built += 1
+            saved = f"{entry['variant_bytes'] / 1024:.0f} КБ" if entry["variant"] else "оригинал"
+            print(f"{key}: {entry['bytes'] / 1024:.0f} КБ -> {saved}")
+        total_before += entry["bytes"]
+        total_after += entry.get("variant_bytes", entry["bytes"])
+
+    telegram_assets.save_manifest()
+    print(
+        f"\nСобрано: {built}, без изменений: {skipped}. "
+        f"Всего {total_before / 1024 / 1024:.1f} МБ -> {total_after / 1024 / 1024:.1f} МБ"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Облегчённые варианты картинок для Telegram")
+    parser.add_argument("--force", action="store_true", help="пересобрать все варианты")
+    main(force=parser.parse_args().force)
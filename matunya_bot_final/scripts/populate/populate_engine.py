@@ -0,0 +1,394 @@
+# scripts/populate/populate_engine.py
+"""
+Общий движок наполнения JSON-баз заданий.
+
+Генерация и валидация кандидатов идут пачками в пуле процессов (по
+умолчанию на всех ядрах), родитель только принимает готовые задачи:
+
+- дубликаты отсекаются по каноническому хешу содержимого (без id, без
+  пробелов в строках), а не по сырому question_text; если в задаче есть
+  случайные имена файлов и id (графики задания 11), задание передаёт свой
+  hash_of — хеш только значимых полей;
+- discard убирает побочные файлы кандидатов, которые не попали в базу
+  (не прошли валидацию, дубликаты, сверх квоты, лишние после набора);
+- квоты по паттернам (variables.solution_pattern) — тот же Counter, что
+  был в скриптах, только с верхней границей на паттерн;
+- каждая принятая задача сразу дописывается в журнал
+  .<база>.<задание>.partial.jsonl рядом с базой. После обрыва повторный
+  запуск продолжает с журнала, а сама база перезаписывается атомарно
+  только в конце, когда все задания набраны.
+
+Пачки принимаются в порядке отправки, поэтому с одинаковыми --seed и
+--workers набор повторяется.
+
+Функции generate / validate / prepare передаются в процессы, поэтому
+должны быть объявлены на уровне модуля (не lambda); аргументы — через
+functools.partial.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+from collections import Counter, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BATCH_SIZE = 25
+IGNORED_HASH_KEYS = frozenset({"id"})
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, str):
+        return _WHITESPACE.sub("", value)
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items() if k not in IGNORED_HASH_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def content_hash(task: Dict[str, Any]) -> str:
+    """Хеш содержимого задачи: без id и пробелов, с сортировкой ключей."""
+    payload = json.dumps(_canonical(task), ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def solution_pattern(task: Dict[str, Any]) -> str:
+    variables = task.get("variables")
+    if isinstance(variables, dict):
+        return str(variables.get("solution_pattern", "unknown"))
+    return "unknown"
+
+
+def even_quotas(target: int, patterns: Iterable[str]) -> Dict[str, int]:
+    """Потолок на паттерн, чтобы ни один не занял больше своей доли."""
+    patterns = list(patterns)
+    share = math.ceil(target / len(patterns))
+    return {pattern: share for pattern in patterns}
+
+
+@dataclass
+class PopulateJob:
+    name: str                                              # ключ журнала и логов
+    generate: Callable[[], Dict[str, Any]]                 # один кандидат
+    target: int
+    validate: Optional[Callable[[Dict[str, Any]], Any]] = None
+    prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None  # в процессе, после валидации
+    build_record: Optional[Callable[[Dict[str, Any], int], Dict[str, Any]]] = None  # в родителе: id, категория
+    replaces: Optional[Callable[[Dict[str, Any]], bool]] = None  # какие записи базы задание пересоздаёт
+    pattern_of: Callable[[Dict[str, Any]], str] = solution_pattern
+    hash_of: Callable[[Dict[str, Any]], str] = content_hash  # ключ дедупликации (в процессе)
+    discard: Optional[Callable[[Dict[str, Any]], None]] = None  # уборка за отброшенным кандидатом
+    quotas: Dict[str, int] = field(default_factory=dict)
+    max_attempts_factor: int = 100
+
+    @property
+    def max_attempts(self) -> int:
+        return self.target * self.max_attempts_factor
+
+
+@dataclass
+class JobResult:
+    name: str
+    records: List[Dict[str, Any]]
+    patterns: Counter
+    attempts: int = 0
+    rejected: int = 0
+    duplicates: int = 0
+    over_quota: int = 0
+    resumed: int = 0
+
+
+def _passes(validate: Callable[[Dict[str, Any]], Any], task: Dict[str, Any]) -> bool:
+    """Валидаторы в проекте бывают трёх видов: bool, (bool, ошибки) и «бросает ValueError»."""
+    try:
+        result = validate(task)
+    except Exception:
+        return False
+    if isinstance(result, tuple):
+        return bool(result[0])
+    return result is None or bool(result)
+
+
+def _discard(job: PopulateJob, task: Dict[str, Any]) -> None:
+    if job.discard is None:
+        return
+    try:
+        job.discard(task)
+    except OSError as exc:
+        print(f"[WARN] {job.name}: не удалось убрать файлы кандидата: {exc}")
+
+
+def _run_batch(
+    generate: Callable[[], Dict[str, Any]],
+    validate: Optional[Callable[[Dict[str, Any]], Any]],
+    prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]],
+    seed: str,
+    count: int,
+    hash_of: Callable[[Dict[str, Any]], str] = content_hash,
+    discard: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Tuple[List[Tuple[str, Dict[str, Any]]], int]:
+    """Выполняется в процессе пула: count кандидатов -> [(хеш, задача)] прошедших валидацию."""
+    state = random.getstate()
+    random.seed(seed)
+    accepted: List[Tuple[str, Dict[str, Any]]] = []
+    try:
+        for _ in range(count):
+            try:
+                task = generate()
+            except Exception:
+                continue
+            if validate is not None and not _passes(validate, task):
+                if discard is not None:
+                    try:
+                        discard(task)
+                    except OSError:
+                        pass
+                continue
+            if prepare is not None:
+                task = prepare(task)
+            accepted.append((hash_of(task), task))
+    finally:
+        random.setstate(state)
+    return accepted, count - len(accepted)
+
+
+class _InlineExecutor(Executor):
+    """workers=1: те же пачки в текущем процессе (отладка, тесты)."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+
+def load_tasks(path: Path) -> List[Dict[str, Any]]:
+    """База — список задач (или старый формат {"tasks": [...]})."""
+    if not path.exists():
+        return []
+    try:
+        content = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as exc:
+        print(f"[WARN] Не удалось прочитать {path}: {exc}")
+        return []
+    if isinstance(content, dict):
+        content = content.get("tasks", [])
+    if not isinstance(content, list):
+        print(f"[WARN] {path} — не список задач, содержимое игнорируется")
+        return []
+    return [task for task in content if isinstance(task, dict)]
+
+
+def write_tasks_atomic(path: Path, tasks: List[Dict[str, Any]], indent: Optional[int] = 2) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(tasks, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp_path, path)
+
+
+def journal_path(path: Path, job: PopulateJob) -> Path:
+    return path.with_name(f".{path.stem}.{job.name}.partial.jsonl")
+
+
+def _load_journal(journal: Path) -> List[Dict[str, Any]]:
+    """Строки журнала; недописанная последняя строка (обрыв посреди записи) пропускается."""
+    if not journal.exists():
+        return []
+    entries = []
+    with open(journal, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return entries
+
+
+def _run_job(
+    job: PopulateJob,
+    executor: Executor,
+    in_flight: int,
+    batch_size: int,
+    base_seed: str,
+    seen_hashes: set,
+    seen_ids: set,
+    journal: Path,
+) -> JobResult:
+    result = JobResult(name=job.name, records=[], patterns=Counter())
+
+    # Продолжаем с журнала прошлого запуска
+    # (журнал переписывается без оборванной строки — через временный файл)
+    entries = _load_journal(journal)[: job.target]
+    tmp_journal = journal.with_name(journal.name + ".tmp")
+    with open(tmp_journal, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            result.records.append(entry["record"])
+            result.patterns[entry["pattern"]] += 1
+            seen_hashes.add(entry["hash"])
+            if entry["record"].get("id"):
+                seen_ids.add(entry["record"]["id"])
+    os.replace(tmp_journal, journal)
+    result.resumed = len(result.records)
+    if result.resumed:
+        print(f"[resume] {job.name}: {result.resumed}/{job.target} из журнала {journal.name}")
+
+    pending: Deque[Tuple[Future, int]] = deque()
+    batch_index = 0
+    submitted_attempts = result.resumed
+
+    def submit_more() -> None:
+        nonlocal batch_index, submitted_attempts
+        while len(pending) < in_flight and submitted_attempts < job.max_attempts:
+            # Сколько кандидатов ещё не заказано: дорогие генераторы (рендер
+            # графиков) не должны делать лишнюю работу сверх цели
+            need = job.target - len(result.records) - sum(count for _, count in pending)
+            if need <= 0 and pending:
+                break
+            count = max(1, min(batch_size, math.ceil(max(need, 1) / in_flight), job.max_attempts - submitted_attempts))
+            seed = f"{base_seed}:{job.name}:{result.resumed}:{batch_index}"
+            future = executor.submit(
+                _run_batch, job.generate, job.validate, job.prepare, seed, count, job.hash_of, job.discard
+            )
+            pending.append((future, count))
+            batch_index += 1
+            submitted_attempts += count
+
+    started = time.perf_counter()
+    with open(journal, "a", encoding="utf-8") as journal_file:
+        submit_more()
+        while pending and len(result.records) < job.target:
+            future, count = pending.popleft()
+            candidates, rejected = future.result()
+            result.attempts += count
+            result.rejected += rejected
+
+            for task_hash, task in candidates:
+                if len(result.records) >= job.target:
+                    _discard(job, task)
+                    continue
+                task_id = task.get("id")
+                if task_hash in seen_hashes or (task_id and task_id in seen_ids):
+                    result.duplicates += 1
+                    _discard(job, task)
+                    continue
+                pattern = job.pattern_of(task)
+                if pattern in job.quotas and result.patterns[pattern] >= job.quotas[pattern]:
+                    result.over_quota += 1
+                    _discard(job, task)
+                    continue
+
+                record = job.build_record(task, len(result.records) + 1) if job.build_record else task
+                seen_hashes.add(task_hash)
+                if record.get("id"):
+                    seen_ids.add(record["id"])
+                result.patterns[pattern] += 1
+                result.records.append(record)
+                journal_file.write(
+                    json.dumps({"hash": task_hash, "pattern": pattern, "record": record}, ensure_ascii=False) + "\n"
+                )
+            journal_file.flush()
+            print(
+                f"[search] {job.name}: {len(result.records)}/{job.target} ready; "
+                f"attempt {result.attempts}/{job.max_attempts}"
+            )
+            submit_more()
+
+    # Уже начатые пачки дорабатывают — их кандидаты тоже не нужны
+    for future, _ in pending:
+        if future.cancel() or job.discard is None:
+            continue
+        try:
+            candidates, _ = future.result()
+        except Exception:
+            continue
+        for _, task in candidates:
+            _discard(job, task)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"[done] {job.name}: {len(result.records)}/{job.target} за {elapsed:.1f} с "
+        f"(попыток {result.attempts}, не прошли валидацию {result.rejected}, "
+        f"дубликатов {result.duplicates}, сверх квоты {result.over_quota})"
+    )
+    if set(result.patterns) - {"unknown"}:
+        print("Pattern breakdown: " + ", ".join(f"{label}={count}" for label, count in sorted(result.patterns.items())))
+    return result
+
+
+def populate(
+    path: Path,
+    jobs: List[PopulateJob],
+    workers: Optional[int] = None,
+    seed: Optional[Any] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    indent: Optional[int] = 2,
+    sort_key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    keep_existing: bool = True,
+) -> Dict[str, JobResult]:
+    """
+    Набирает задания jobs и сохраняет базу path.
+
+    Args:
+        path: JSON-база (список задач)
+        jobs: Что генерировать; задания выполняются по очереди в общем пуле
+        workers: Процессов в пуле (по умолчанию — все ядра; 1 — без пула)
+        seed: Зерно для воспроизводимого набора (по умолчанию случайное)
+        batch_size: Кандидатов в одной пачке для процесса
+        indent: Отступ итогового JSON
+        sort_key: Порядок записей в базе (например, по id)
+        keep_existing: Сохранить записи базы, которые задания не пересоздают
+
+    Returns:
+        dict: {job.name: JobResult}. Если какое-то задание не набрано — RuntimeError,
+        база не трогается, а журналы остаются для продолжения.
+    """
+    path = Path(path)
+    existing = load_tasks(path) if keep_existing else []
+    preserved = [task for task in existing if not any(job.replaces and job.replaces(task) for job in jobs)]
+    seen_hashes = {job.hash_of(task) for job in jobs for task in preserved}
+    seen_ids = {task["id"] for task in preserved if isinstance(task.get("id"), str)}
+
+    workers = workers or os.cpu_count() or 1
+    base_seed = str(seed) if seed is not None else str(random.SystemRandom().randrange(2**63))
+    executor: Executor = _InlineExecutor() if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+    print(f"[populate] {path.name}: {len(jobs)} заданий, процессов {workers}, сохранено записей {len(preserved)}")
+
+    results: Dict[str, JobResult] = {}
+    try:
+        for job in jobs:
+            results[job.name] = _run_job(
+                job, executor, workers * 2, batch_size, base_seed, seen_hashes, seen_ids, journal_path(path, job)
+            )
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    short = [
+        f"{job.name} ({len(results[job.name].records)}/{job.target})"
+        for job in jobs
+        if len(results[job.name].records) < job.target
+    ]
+    if short:
+        raise RuntimeError(f"Not enough unique tasks generated: {', '.join(short)}. Повторный запуск продолжит с журнала.")
+
+    combined = preserved + [record for job in jobs for record in results[job.name].records]
+    if sort_key is not None:
+        combined.sort(key=sort_key)
+    write_tasks_atomic(path, combined, indent=indent)
+    for job in jobs:
+        journal_path(path, job).unlink(missing_ok=True)
+    print(f"[saved] {path}: всего {len(combined)} задач")
+    return results
@@ -4,10 +4,10 @@ populate_task_11_db.py
 """
 
 import argparse
-import json
 import shutil
 from pathlib import Path
 
+from matunya_bot_final.scripts.populate.populate_engine import PopulateJob, content_hash, populate
 from matunya_bot_final.task_generators.task_11.generators import GENERATOR_MAP, generate_task_11_by_subtype
 from matunya_bot_final.task_generators.task_11.validators import (
     validate_task_11_match_signs_a_c,
@@ -33,9 +33,33 @@ VALIDATOR_MAP = {
 # ==============================
 # Функция populate
 # ==============================
-def populate_db(n: int = 5, clear: bool = False, no_clean: bool = False):
-    tasks = []
+def _strip_funcs(task):
+    # ⚠️ Чистим несериализуемые функции перед сохранением
+    for fd in task.get("func_data", []):
+        if "func" in fd:
+            fd.pop("func")
+    return task
 
+
+def _task_11_hash(task):
+    # Пути к картинкам и id содержат случайные имена — сравниваем только суть задания:
+    # подтип, коэффициенты (или формулы) графиков и ответ
+    return content_hash({
+        "subtype": task.get("subtype"),
+        "graphs": [fd.get("coeffs", fd.get("label")) for fd in task.get("func_data", [])],
+        "answer": task.get("answer"),
+    })
+
+
+def _discard_task_11_files(task):
+    # Картинки отброшенного кандидата не должны копиться в temp/
+    params = task.get("source_plot", {}).get("params", {})
+    for graph_path in [*params.get("graphs", []), params.get("grid")]:
+        if graph_path:
+            Path(graph_path).unlink(missing_ok=True)
+
+
+def populate_db(n: int = 5, clear: bool = False, no_clean: bool = False, workers=None, seed=None):
     if clear and DB_PATH.exists():
         DB_PATH.unlink()
         print(f"[✓] Очистили базу данных ({DB_PATH.name})")
@@ -46,28 +70,21 @@ def populate_db(n: int = 5, clear: bool = False, no_clean: bool = False):
 
     TEMP_DIR.mkdir(parents=True, exist_ok=True)
 
-    for subtype, generator in GENERATOR_MAP.items():
-        validator = VALIDATOR_MAP[subtype]
-        for _ in range(n):
-            task = generator()
-            # --- Валидируем задачу ---
-            is_valid, errors = validator(task)
-            if not is_valid:
-                print(f"[WARN] Ошибки генерации {subtype}:")
-                for err in errors:
-                    print(f"   • {err}")
-                continue
-
-            # ⚠️ Чистим несериализуемые функции перед сохранением
-            for fd in task.get("func_data", []):
-                if "func" in fd:
-                    fd.pop("func")
-
-            tasks.append(task)
-
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    DB_PATH.write_text(json.dumps(tasks, ensure_ascii=False, indent=4), encoding="utf-8")
-    print(f"[✓] Сохранили {len(tasks)} задач в {DB_PATH}")
+    jobs = [
+        PopulateJob(
+            name=subtype,
+            generate=generator,
+            target=n,
+            validate=VALIDATOR_MAP[subtype],
+            prepare=_strip_funcs,
+            hash_of=_task_11_hash,
+            discard=_discard_task_11_files,
+        )
+        for subtype, generator in GENERATOR_MAP.items()
+    ]
+    # База собирается заново из свежих задач всех подтипов
+    results = populate(DB_PATH, jobs, workers=workers, seed=seed, indent=4, keep_existing=False)
+    print(f"[✓] Сохранили {sum(len(r.records) for r in results.values())} задач в {DB_PATH}")
 
 
 # ==============================
@@ -78,9 +95,11 @@ def main():
     parser.add_argument("--n", type=int, default=5, help="Количество задач на каждый подтип")
     parser.add_argument("--clear", action="store_true", help="Очистить БД и временные файлы перед генерацией")
     parser.add_argument("--no-clean", action="store_true", help="Не очищать временные файлы после генерации")
+    parser.add_argument("--workers", type=int, default=None, help="Размер пула процессов (по умолчанию — все ядра)")
+    parser.add_argument("--seed", default=None, help="Зерно для воспроизводимого набора")
     args = parser.parse_args()
 
-    populate_db(n=args.n, clear=args.clear, no_clean=args.no_clean)
+    populate_db(n=args.n, clear=args.clear, no_clean=args.no_clean, workers=args.workers, seed=args.seed)
 
 
 if __name__ == "__main__":
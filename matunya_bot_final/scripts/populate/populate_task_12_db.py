@@ -1,5 +1,10 @@
 # scripts/populate_task_12_db.py
+#
+# Запуск:
+#     python -m matunya_bot_final.scripts.populate.populate_task_12_db
+#     python -m matunya_bot_final.scripts.populate.populate_task_12_db --seed 2025   # воспроизводимый набор
 
+import argparse
 import json
 import sys
 from pathlib import Path
@@ -9,13 +14,16 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.append(str(PROJECT_ROOT))
 
 
-from matunya_bot_final.task_generators.task_12.task_12_generator import GENERATOR_MAP
+from matunya_bot_final.task_generators.task_12.task_12_generator import GENERATOR_MAP, generate_task_12_batch
 from matunya_bot_final.keyboards.inline_keyboards.tasks.task_12.TASK_12_MAP import TASK_12_MAP
 
 OUTPUT_PATH = PROJECT_ROOT / "data" / "tasks_12" / "tasks_12.json"
 
 
-def generate_tasks():
+TASKS_PER_SUBTYPE = 30
+
+
+def generate_tasks(seed=None, per_subtype=TASKS_PER_SUBTYPE):
 
     tasks = []
     task_type = 12
@@ -31,10 +39,11 @@ def generate_tasks():
             for subtype in sub_map:
                 reverse_map[subtype] = (category, None)
 
-    for subtype, generator_func in GENERATOR_MAP.items():
-        for i in range(1, 31):  # 30 задач на каждый подтип
-            task = generator_func()
-
+    for subtype in GENERATOR_MAP:
+        # Своё зерно на подтип: набор подтипа не зависит от остальных
+        subtype_seed = None if seed is None else f"{seed}:{subtype}"
+        batch = generate_task_12_batch(subtype, per_subtype, seed=subtype_seed)
+        for i, task in enumerate(batch, start=1):
             # Получаем категорию и подкатегорию по карте
             category, subcategory = reverse_map.get(subtype, ("unknown", "unknown"))
 
@@ -64,7 +73,12 @@ def generate_tasks():
 
 
 def main():
-    tasks = generate_tasks()
+    parser = argparse.ArgumentParser(description="Генерация tasks_12.json")
+    parser.add_argument("--seed", default=None, help="Зерно для воспроизводимого набора")
+    parser.add_argument("--per-subtype", type=int, default=TASKS_PER_SUBTYPE, help="Задач на подтип")
+    args = parser.parse_args()
+
+    tasks = generate_tasks(seed=args.seed, per_subtype=args.per_subtype)
 
     # Создаём папку, если вдруг нет
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -1,9 +1,12 @@
 """Populate script for task 20 radical_equations subtype."""
 
 from __future__ import annotations
-import json
-import sys
+import argparse
+from functools import partial
 from pathlib import Path
+from typing import Any, Dict
+
+from matunya_bot_final.scripts.populate.populate_engine import PopulateJob, content_hash, populate
 
 from matunya_bot_final.task_generators.task_20.generators.radical_equations_generator import (
     generate_task_20_radical_equations,
@@ -13,61 +16,67 @@ from matunya_bot_final.task_generators.task_20.validators.radical_equations_vali
 )
 
 
-def main(output_dir: str | None = None, total: int = 30, pattern: str | None = None) -> None:
-    """
-    Генерирует несколько заданий указанного подтипа и сохраняет их в общий JSON.
-    Параметры:
-      total  – сколько заданий создать
-      pattern – какой паттерн использовать (sum_zero, same_radical_cancel, cancel_identical_radicals)
-    """
+def _generate(pattern: str | None = None) -> Dict[str, Any]:
     from matunya_bot_final.task_generators.task_20.generators import radical_equations_generator as gen
 
-    base_path = Path(output_dir or "matunya_bot_final/data/tasks_20")
-    base_path.mkdir(parents=True, exist_ok=True)
+    if pattern != "cancel_identical_radicals":
+        return generate_task_20_radical_equations()
 
-    file_path = base_path / "tasks_20.json"
-    tasks = []
+    equation, answers, variables = gen._generate_cancel_identical_radicals_task()
+    variables.setdefault("solution_pattern", "cancel_identical_radicals")
+    return {
+        "task_number": 20,
+        "topic": "equations",
+        "subtype": "radical_equations",
+        "question_text": f"Реши уравнение:\n{equation}",
+        "answer": answers,
+        "variables": variables,
+    }
 
-    for _ in range(total):
-        if pattern == "cancel_identical_radicals":
-            equation, answers, variables = gen._generate_cancel_identical_radicals_task()
-            variables.setdefault("solution_pattern", "cancel_identical_radicals")
-            task = {
-                "id": f"20_radical_equations_{pattern}_{_}",
-                "task_number": 20,
-                "topic": "equations",
-                "subtype": "radical_equations",
-                "question_text": f"Реши уравнение:\n{equation}",
-                "answer": answers,
-                "variables": variables,
-            }
-        else:
-            task = generate_task_20_radical_equations()
 
-        try:
-            validate_task_20_radical_equations(task)
-            tasks.append(task)
-        except Exception as e:
-            print(f"⚠️  Task skipped due to validation error: {e}")
-            continue
+def _with_pattern_id(task: Dict[str, Any], index: int) -> Dict[str, Any]:
+    if "id" in task:
+        return task
+    # id от содержимого: не пересекается с задачами прошлых запусков
+    pattern = task["variables"]["solution_pattern"]
+    return {"id": f"20_radical_equations_{pattern}_{content_hash(task)[:6]}", **task}
 
-    # Загружаем существующие задачи, если файл уже есть
-    if file_path.exists():
-        with open(file_path, "r", encoding="utf-8") as f:
-            existing = json.load(f)
-    else:
-        existing = []
 
-    # Добавляем новые
-    existing.extend(tasks)
+def main(
+    output_dir: str | None = None,
+    total: int = 30,
+    pattern: str | None = None,
+    workers: int | None = None,
+    seed: str | None = None,
+) -> None:
+    """
+    Генерирует несколько заданий указанного подтипа и добавляет их в общий JSON.
+    Параметры:
+      total  – сколько заданий создать
+      pattern – какой паттерн использовать (sum_zero, same_radical_cancel, cancel_identical_radicals)
+      workers – размер пула процессов (по умолчанию — все ядра)
+      seed – зерно для воспроизводимого набора
+    """
+    base_path = Path(output_dir or "matunya_bot_final/data/tasks_20")
+    file_path = base_path / "tasks_20.json"
 
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(existing, f, ensure_ascii=False, indent=2)
+    job = PopulateJob(
+        name=f"radical_equations_{pattern or 'mixed'}",
+        generate=partial(_generate, pattern),
+        target=total,
+        validate=validate_task_20_radical_equations,
+        build_record=_with_pattern_id,
+    )
+    populate(file_path, [job], workers=workers, seed=seed)
 
-    print(f"✅ Added {len(tasks)} tasks ({pattern or 'mixed patterns'}) to {file_path}")
+    print(f"✅ Added {total} tasks ({pattern or 'mixed patterns'}) to {file_path}")
 
 
 if __name__ == "__main__":
-    total = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 30
-    pattern = sys.argv[2] if len(sys.argv) > 2 else None
-    main(total=total, pattern=pattern)
+    parser = argparse.ArgumentParser(description="Populate task 20 radical_equations tasks.")
+    parser.add_argument("total", nargs="?", type=int, default=30, help="Сколько заданий создать")
+    parser.add_argument("pattern", nargs="?", default=None, help="Паттерн (по умолчанию — смесь)")
+    parser.add_argument("--workers", type=int, default=None, help="Размер пула процессов")
+    parser.add_argument("--seed", default=None, help="Зерно для воспроизводимого набора")
+    args = parser.parse_args()
+    main(total=args.total, pattern=args.pattern, workers=args.workers, seed=args.seed)
@@ -11,13 +11,15 @@ populate_task_20_rational_inequalities.py
 
 Все сгенерированные задачи записываются в общий файл:
 matunya_bot_final/data/tasks_20/tasks_20.json
-в формате {"tasks": [ ... ]}.
+(список задач; движок populate_engine дописывает их к уже сохранённым).
 """
 
 from __future__ import annotations
+import argparse
 import random
 import json
 from pathlib import Path
+from matunya_bot_final.scripts.populate.populate_engine import PopulateJob, even_quotas, populate
 from matunya_bot_final.task_generators.task_20.generators.rational_inequalities_generator import (
     generate_task_20_rational_inequalities,
 )
@@ -35,67 +37,38 @@ DB_PATH = PROJECT_ROOT / "matunya_bot_final" / "data" / "tasks_20" / "tasks_20.j
 OUTPUT_DIR = PROJECT_ROOT / "matunya_bot_final" / "temp" / "task_20"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+PATTERNS = [
+    "compare_unit_fractions_linear",
+    "const_over_quadratic_nonpos_nonneg",
+    "x_vs_const_over_x",
+    "neg_const_over_shifted_square_minus_const",
+]
+TARGET_AMOUNT = 40
+
 # ==========================================================
 # Основная логика генерации
 # ==========================================================
 
-def main() -> None:
+def _generate_random_pattern() -> dict:
+    return generate_task_20_rational_inequalities(pattern=random.choice(PATTERNS))
+
+
+def main(workers: int | None = None, seed: str | None = None, target_amount: int = TARGET_AMOUNT) -> None:
     print("🔄 Генерация заданий rational_inequalities...\n")
 
-    patterns = [
-        "compare_unit_fractions_linear",
-        "const_over_quadratic_nonpos_nonneg",
-        "x_vs_const_over_x",
-        "neg_const_over_shifted_square_minus_const",
-    ]
-
-    generated_tasks = []
-
-    for i in range(40):
-        pattern = random.choice(patterns)
-        task_data = generate_task_20_rational_inequalities(pattern=pattern)
-
-        is_valid, errors = validate_task_20_rational_inequalities(task_data), []
-        if isinstance(is_valid, tuple):
-            is_valid, errors = is_valid
-
-        if is_valid:
-            generated_tasks.append(task_data)
-            ans = task_data.get("answer", ["?"])[0]
-            print(f"✅ {i+1:02}) {pattern:<40} → {ans}")
-        else:
-            print(f"❌ {i+1:02}) {pattern:<40} → INVALID")
-            if errors:
-                for e in errors:
-                    print("   •", e)
-
-    # ======================================================
-    # Финальное сохранение с ключом "tasks"
-    # ======================================================
-    if DB_PATH.exists():
-        try:
-            with open(DB_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, dict) and "tasks" in data:
-                    tasks = data["tasks"]
-                elif isinstance(data, list):
-                    tasks = data
-                else:
-                    tasks = []
-        except json.JSONDecodeError:
-            tasks = []
-    else:
-        tasks = []
-
-    tasks.extend(generated_tasks)
-
-    with open(DB_PATH, "w", encoding="utf-8") as f:
-        json.dump(tasks, f, ensure_ascii=False, indent=2)
+    job = PopulateJob(
+        name="rational_inequalities",
+        generate=_generate_random_pattern,
+        target=target_amount,
+        validate=validate_task_20_rational_inequalities,
+        quotas=even_quotas(target_amount, PATTERNS),
+    )
+    results = populate(DB_PATH, [job], workers=workers, seed=seed)
+    generated_tasks = results[job.name].records
 
     print(
         f"\n📦 Добавление завершено!\n"
         f"Всего новых задач создано: {len(generated_tasks)}\n"
-        f"Уникальных добавлено в базу: {len(tasks)}\n"
         f"Файл БД: {DB_PATH}\n"
     )
 
@@ -108,4 +81,9 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Генерация заданий rational_inequalities.")
+    parser.add_argument("--target", type=int, default=TARGET_AMOUNT, help="Сколько заданий создать")
+    parser.add_argument("--workers", type=int, default=None, help="Размер пула процессов (по умолчанию — все ядра)")
+    parser.add_argument("--seed", default=None, help="Зерно для воспроизводимого набора")
+    args = parser.parse_args()
+    main(workers=args.workers, seed=args.seed, target_amount=args.target)
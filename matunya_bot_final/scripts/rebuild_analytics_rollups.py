@@ -0,0 +1,38 @@
+# scripts/rebuild_analytics_rollups.py
+"""
+Полный пересчёт дневных сводок аналитики (utils/analytics_rollups.py)
+из сырых answer_logs / activity_logs / session_logs.
+
+Нужен для бэкфилла и починки: обычно сводки обновляются сами при записи логов.
+
+Запуск:
+    python -m matunya_bot_final.scripts.rebuild_analytics_rollups               # все ученики
+    python -m matunya_bot_final.scripts.rebuild_analytics_rollups --user-id 42  # один ученик
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from matunya_bot_final.utils import db_manager
+from matunya_bot_final.utils.analytics_rollups import rebuild_rollups
+
+
+async def main(user_id: Optional[int]) -> None:
+    engine, session_maker = await db_manager.setup_database()
+    try:
+        await db_manager.init_db(engine)
+        async with session_maker() as session:
+            counts = await rebuild_rollups(session, user_id=user_id)
+        print(json.dumps(counts, ensure_ascii=False, indent=2))
+    finally:
+        await db_manager.close_database(engine)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Пересчёт дневных сводок аналитики из логов.")
+    parser.add_argument("--user-id", type=int, default=None, help="ID пользователя (по умолчанию — все)")
+    asyncio.run(main(parser.parse_args().user_id))
@@ -0,0 +1,38 @@
+# scripts/warm_solution_cache.py
+"""
+Прогрев кеша решений: решает и гуманизирует все задания складов
+и сохраняет результат в SOLUTION_CACHE_DIR (по умолчанию data/.solution_cache).
+
+Запуск:
+    python -m matunya_bot_final.scripts.warm_solution_cache          # все склады
+    python -m matunya_bot_final.scripts.warm_solution_cache 16 20    # выбранные
+"""
+
+import asyncio
+import json
+import logging
+import sys
+
+from matunya_bot_final.help_core.solution_cache import WARMUP_PLAN, get_solution_cache_metrics, warm_up
+from matunya_bot_final.help_core.solve_pool import get_solver_metrics, shutdown_solver_pool
+
+
+async def main(task_types: tuple[str, ...]) -> None:
+    report = await warm_up(task_types)
+    print(json.dumps(
+        {"warm_up": report, "cache": get_solution_cache_metrics(), "latency": get_solver_metrics()},
+        ensure_ascii=False,
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    requested = tuple(sys.argv[1:]) or tuple(WARMUP_PLAN)
+    unknown = [task_type for task_type in requested if task_type not in WARMUP_PLAN]
+    if unknown:
+        raise SystemExit(f"Нет плана прогрева для заданий: {unknown}. Доступны: {list(WARMUP_PLAN)}")
+    try:
+        asyncio.run(main(requested))
+    finally:
+        shutdown_solver_pool()
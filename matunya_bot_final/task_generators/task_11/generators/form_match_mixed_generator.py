@@ -9,7 +9,7 @@ from pathlib import Path
 from typing import Dict, Any
 
 from ..formula_generators import generate_formula, get_color
-from matunya_bot_final.utils.visuals.plot_generator import create_graph
+from matunya_bot_final.utils.visuals.plot_generator import compose_graph_grid, create_graph
 
 
 def generate_task_11_form_match_mixed() -> Dict[str, Any]:
@@ -78,6 +78,9 @@ def generate_task_11_form_match_mixed() -> Dict[str, Any]:
             y_lim=(-6, 6),
         )
 
+    # 🧩 Все три графика одной картинкой (одна отправка в Telegram)
+    grid_path = compose_graph_grid(graph_paths, labels, str(save_dir / f"{unique_id}_grid.png"))
+
     return {
         "id": unique_id,
         "task_id": "11_10",
@@ -100,6 +103,7 @@ def generate_task_11_form_match_mixed() -> Dict[str, Any]:
             "params": {
                 "labels": labels,
                 "graphs": graph_paths,
+                "grid": grid_path,
                 "options": options
             }
         }
@@ -2,12 +2,11 @@
 Генератор подтипа match_signs_a_c для задания 11.
 """
 
-import uuid
 import random
 from pathlib import Path
 from typing import Dict, Any, List
 
-from matunya_bot_final.utils.visuals.plot_generator import create_graph
+from matunya_bot_final.utils.visuals.plot_generator import compose_graph_grid, create_graph
 
 
 def generate_task_11_match_signs_a_c() -> dict:
@@ -31,7 +30,7 @@ def generate_task_11_match_signs_a_c() -> dict:
             coef_sets.append((a, b, c))
 
     # --- Генерация уникального ID для задачи ---
-    unique_id_for_task = f"11_match_signs_a_c_{uuid.uuid4().hex[:6]}"
+    unique_id_for_task = f"11_match_signs_a_c_{random.getrandbits(24):06x}"
 
     save_dir = Path("matunya_bot_final/temp/task_11/match_signs_a_c")
     save_dir.mkdir(parents=True, exist_ok=True)
@@ -75,6 +74,9 @@ def generate_task_11_match_signs_a_c() -> dict:
             expected = "4"
         answer_global.append(expected)
 
+    # --- Все три графика одной картинкой (одна отправка в Telegram) ---
+    grid_path = compose_graph_grid(graph_paths, labels, str(save_dir / f"{unique_id_for_task}_grid.png"))
+
     # --- Перенумеровка в локальные 1,2,3 ---
     unique_answers = sorted(set(answer_global), key=int)   # например ["1","2","4"]
     local_map = {glob: str(i+1) for i, glob in enumerate(unique_answers)}  # {"1":"1","2":"2","4":"3"}
@@ -111,6 +113,7 @@ def generate_task_11_match_signs_a_c() -> dict:
             "params": {
                 "labels": labels,
                 "graphs": graph_paths,
+                "grid": grid_path,
                 "options": displayed_options   # только 3, перенумерованные
             }
         }
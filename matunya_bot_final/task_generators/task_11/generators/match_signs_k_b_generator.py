@@ -3,12 +3,11 @@
 Задача: установить соответствие между графиками и знаками коэффициентов k и b.
 """
 
-import uuid
 import random
 from pathlib import Path
 from typing import Dict, Any, List
 
-from matunya_bot_final.utils.visuals.plot_generator import create_graph
+from matunya_bot_final.utils.visuals.plot_generator import compose_graph_grid, create_graph
 
 
 def generate_task_11_match_signs_k_b() -> dict:
@@ -34,7 +33,7 @@ def generate_task_11_match_signs_k_b() -> dict:
             coef_sets.append((k, b))
 
     # --- ID и директория сохранения ---
-    unique_id_for_task = f"11_match_signs_k_b_{uuid.uuid4().hex[:6]}"
+    unique_id_for_task = f"11_match_signs_k_b_{random.getrandbits(24):06x}"
     save_dir = Path("matunya_bot_final/temp/task_11/match_signs_k_b")
     save_dir.mkdir(parents=True, exist_ok=True)
 
@@ -80,6 +79,9 @@ def generate_task_11_match_signs_k_b() -> dict:
 
         answer_global.append(expected)
 
+    # --- Все три графика одной картинкой (одна отправка в Telegram) ---
+    grid_path = compose_graph_grid(graph_paths, labels, str(save_dir / f"{unique_id_for_task}_grid.png"))
+
     # --- Перенумеровка в локальные варианты ---
     unique_answers = sorted(set(answer_global), key=int)
     local_map = {glob: str(i + 1) for i, glob in enumerate(unique_answers)}
@@ -115,6 +117,7 @@ def generate_task_11_match_signs_k_b() -> dict:
             "params": {
                 "labels": labels,
                 "graphs": graph_paths,
+                "grid": grid_path,
                 "options": displayed_options,
             },
         },
@@ -2,10 +2,14 @@
 # ─────────────────────────────────────────────────────────────────────────────
 # Полный генератор заданий №12 ОГЭ
 # Охвачены все 66 подтипов (геометрия, физика, разные жизненные задачи)
+#
+# Каждый генератор принимает rng — источник случайности: по умолчанию модуль
+# random, а generate_task_12_batch передаёт свой random.Random(seed), чтобы
+# пачки воспроизводились и не сбивали общий генератор.
 
 import random
 import math
-from typing import Optional, Dict, Any, Callable, Tuple
+from typing import Optional, Dict, Any, Callable, List, Tuple
 
 # ─────────────────────────────────────────────────────────────
 # Константы
@@ -32,7 +36,18 @@ def format_answer(value: float | int) -> str:
 # 1) Площадь треугольника через сторону и высоту: S = 1/2 · a · h
 #    Подбираем S и a так, чтобы h было целым.
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_area_triangle_ah() -> dict:
+# Делители 2S из [5, 40] для каждой площади S из [20, 150] — считаются один раз.
+# Площади без подходящих делителей (например, простые 139, 149) не попадают
+# в таблицу: выбор S и делителя идёт сразу из допустимых пар, без повторов.
+_TRIANGLE_AH_DIVISORS: Dict[int, Tuple[int, ...]] = {
+    S: divisors
+    for S in range(20, 151)
+    if (divisors := tuple(d for d in range(5, 41) if (2 * S) % d == 0))
+}
+_TRIANGLE_AH_AREAS: Tuple[int, ...] = tuple(_TRIANGLE_AH_DIVISORS)
+
+
+def _generate_area_triangle_ah(rng=random) -> dict:
     """
     Генерирует задачу на вычисление площади, стороны или высоты треугольника
     по формуле S = ½ah.
@@ -41,13 +56,13 @@ def _generate_area_triangle_ah() -> dict:
     plot_id = "area_triangle_ah"
 
     # Случайно выбираем, что будем искать
-    target_variable = random.choice(['S', 'a', 'h'])
+    target_variable = rng.choice(['S', 'a', 'h'])
 
     if target_variable == 'S':
         # Ищем площадь S. Генерируем a и h.
         # Делаем h четным, чтобы S всегда было целым.
-        a = random.randint(5, 25)
-        h = random.randint(4, 20) * 2
+        a = rng.randint(5, 25)
+        h = rng.randint(4, 20) * 2
         S = (a * h) // 2
         
         answer = S
@@ -59,13 +74,8 @@ def _generate_area_triangle_ah() -> dict:
     elif target_variable == 'a':
         # Ищем сторону a. Генерируем S и h.
         # Логика гарантирует, что a = (2*S)/h будет целым.
-        while True:
-            S = random.randint(20, 150)
-            divisors = [d for d in range(5, 41) if (2 * S) % d == 0]
-            if divisors:
-                break
-        
-        h = random.choice(divisors)
+        S = rng.choice(_TRIANGLE_AH_AREAS)
+        h = rng.choice(_TRIANGLE_AH_DIVISORS[S])
         a = (2 * S) // h
 
         answer = a
@@ -77,13 +87,8 @@ def _generate_area_triangle_ah() -> dict:
     else:  # target_variable == 'h'
         # Ищем высоту h. Генерируем S и a.
         # Логика гарантирует, что h = (2*S)/a будет целым.
-        while True:
-            S = random.randint(20, 150)
-            divisors = [d for d in range(5, 41) if (2 * S) % d == 0]
-            if divisors:
-                break
-        
-        a = random.choice(divisors)
+        S = rng.choice(_TRIANGLE_AH_AREAS)
+        a = rng.choice(_TRIANGLE_AH_DIVISORS[S])
         h = (2 * S) // a
 
         answer = h
@@ -116,21 +121,21 @@ def _generate_area_triangle_ah() -> dict:
 # 2) Площадь треугольника через две стороны и sin угла: S = 1/2 · b · c · sin(α)
 #    Чтобы S было целым, берём sin(α) = 1 или 1/2 и подбираем b, c.
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_area_triangle_sides_sin() -> dict:
+def _generate_area_triangle_sides_sin(rng=random) -> dict:
     subtype = "area_triangle_sides_sin"
     plot_id = "area_triangle_sides_sin"
 
-    sin_alpha = random.choice([1, 0.5])   # sin 90° или sin 30°
+    sin_alpha = rng.choice([1, 0.5])   # sin 90° или sin 30°
     if sin_alpha == 1:
         # S = 1/2 * b * c → берём b*c кратно 2
-        b = random.choice([8, 10, 12, 14, 16, 18, 20])
-        c = random.choice([6, 8, 10, 12, 14, 16])
+        b = rng.choice([8, 10, 12, 14, 16, 18, 20])
+        c = rng.choice([6, 8, 10, 12, 14, 16])
         S = (b * c) // 2
         sin_text = "1"
     else:
         # S = 1/2 * b * c * 1/2 = b*c/4 → b*c кратно 4
-        b = random.choice([8, 12, 16, 20, 24, 28])
-        c = random.choice([8, 12, 16, 20, 24, 28])
+        b = rng.choice([8, 12, 16, 20, 24, 28])
+        c = rng.choice([8, 12, 16, 20, 24, 28])
         S = (b * c) // 4
         sin_text = "0,5"
 
@@ -153,12 +158,12 @@ def _generate_area_triangle_sides_sin() -> dict:
 # 3) Площадь треугольника через радиус вписанной окружности: S = p · r
 #    Берём p и r так, чтобы S было целым.
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_area_triangle_inscribed_circle() -> dict:
+def _generate_area_triangle_inscribed_circle(rng=random) -> dict:
     subtype = "area_triangle_inscribed_circle"
     plot_id = "area_triangle_inscribed_circle"
 
-    p = random.choice([18, 20, 24, 28, 30, 36, 40, 45])  # полупериметр (см)
-    r = random.choice([2, 3, 4, 5, 6])                  # радиус (см)
+    p = rng.choice([18, 20, 24, 28, 30, 36, 40, 45])  # полупериметр (см)
+    r = rng.choice([2, 3, 4, 5, 6])                  # радиус (см)
     S = p * r
 
     text = (
@@ -179,12 +184,12 @@ def _generate_area_triangle_inscribed_circle() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 4) Площадь параллелограмма через сторону и высоту: S = a · h
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_area_parallelogram_ah() -> dict:
+def _generate_area_parallelogram_ah(rng=random) -> dict:
     subtype = "area_parallelogram_ah"
     plot_id = "area_parallelogram_ah"
 
-    a = random.choice([6, 7, 8, 9, 10, 12, 14])  # см
-    h = random.choice([4, 5, 6, 7, 8, 9])        # см
+    a = rng.choice([6, 7, 8, 9, 10, 12, 14])  # см
+    h = rng.choice([4, 5, 6, 7, 8, 9])        # см
     S = a * h
 
     text = (
@@ -205,20 +210,20 @@ def _generate_area_parallelogram_ah() -> dict:
 # 5) Площадь параллелограмма через стороны и угол: S = a · b · sin(α)
 #    Для «красивого» S берём sin(α) = 1 или 1/2.
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_area_parallelogram_ab_sin() -> dict:
+def _generate_area_parallelogram_ab_sin(rng=random) -> dict:
     subtype = "area_parallelogram_ab_sin"
     plot_id = "area_parallelogram_ab_sin"
 
-    sin_alpha = random.choice([1, 0.5])
+    sin_alpha = rng.choice([1, 0.5])
     if sin_alpha == 1:
-        a = random.choice([6, 7, 8, 9, 10, 12])
-        b = random.choice([6, 8, 9, 10, 12, 14, 15])
+        a = rng.choice([6, 7, 8, 9, 10, 12])
+        b = rng.choice([6, 8, 9, 10, 12, 14, 15])
         S = a * b
         sin_text = "1"
     else:
         # S = a*b/2 → берём a*b кратно 2
-        a = random.choice([8, 10, 12, 14, 16])
-        b = random.choice([6, 8, 10, 12, 14, 18])
+        a = rng.choice([8, 10, 12, 14, 16])
+        b = rng.choice([6, 8, 10, 12, 14, 18])
         S = (a * b) // 2
         sin_text = "0,5"
 
@@ -240,12 +245,12 @@ def _generate_area_parallelogram_ab_sin() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 6) Площадь ромба по диагоналям: S = 1/2 · d1 · d2
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_area_rhombus_d1d2() -> dict:
+def _generate_area_rhombus_d1d2(rng=random) -> dict:
     subtype = "area_rhombus_d1d2"
     plot_id = "area_rhombus_d1d2"
 
-    d1 = random.choice([8, 10, 12, 14, 16, 18, 20])
-    d2 = random.choice([6, 8, 10, 12, 14, 16])
+    d1 = rng.choice([8, 10, 12, 14, 16, 18, 20])
+    d2 = rng.choice([6, 8, 10, 12, 14, 16])
 
     if (d1 * d2) % 2 == 0:
         S = (d1 * d2) // 2
@@ -272,13 +277,13 @@ def _generate_area_rhombus_d1d2() -> dict:
 # 7) Площадь трапеции: S = (a + b) · h / 2
 #    Подбираем (a + b)·h чётным → S целое.
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_area_trapezoid_bases_h() -> dict:
+def _generate_area_trapezoid_bases_h(rng=random) -> dict:
     subtype = "area_trapezoid_bases_h"
     plot_id = "area_trapezoid_bases_h"
 
-    a = random.choice([8, 10, 12, 14, 16, 18])
-    b = random.choice([4, 6, 8, 10, 12, 14])
-    h = random.choice([4, 6, 8, 10, 12])
+    a = rng.choice([8, 10, 12, 14, 16, 18])
+    b = rng.choice([4, 6, 8, 10, 12, 14])
+    h = rng.choice([4, 6, 8, 10, 12])
 
     if ((a + b) * h) % 2 != 0:
         h += 1  # лёгкая коррекция для чётности произведения
@@ -304,19 +309,19 @@ def _generate_area_trapezoid_bases_h() -> dict:
 # 8) Площадь выпуклого четырёхугольника: S = 1/2 · d1 · d2 · sin(α)
 #    Берём sin(α) = 1 или 1/2; подбираем d1, d2 для целого S.
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_area_quadrilateral_d1d2_sin_S() -> dict:
+def _generate_area_quadrilateral_d1d2_sin_S(rng=random) -> dict:
     subtype = "area_quadrilateral_d1d2_sin_S"
     plot_id = "area_quadrilateral_d1d2_sin_S"
 
-    sin_alpha = random.choice([1, 0.5])
+    sin_alpha = rng.choice([1, 0.5])
     if sin_alpha == 1:
-        d1 = random.choice([10, 12, 14, 16, 18, 20])
-        d2 = random.choice([6, 8, 10, 12, 14, 16])
+        d1 = rng.choice([10, 12, 14, 16, 18, 20])
+        d2 = rng.choice([6, 8, 10, 12, 14, 16])
         S = (d1 * d2) // 2
         sin_text = "1"
     else:
-        d1 = random.choice([8, 12, 16, 20, 24])
-        d2 = random.choice([8, 12, 16, 20, 24])
+        d1 = rng.choice([8, 12, 16, 20, 24])
+        d2 = rng.choice([8, 12, 16, 20, 24])
         S = (d1 * d2) // 4
         sin_text = "0,5"
 
@@ -340,19 +345,19 @@ def _generate_area_quadrilateral_d1d2_sin_S() -> dict:
 # 9) Найти диагональ по площади (та же формула):  S = 1/2 · d1 · d2 · sin(α)
 #    Здесь вычисляем d2: d2 = 2S / (d1 · sinα). Подбираем так, чтобы d2 было целым.
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_area_quadrilateral_find_d_by_S() -> dict:
+def _generate_area_quadrilateral_find_d_by_S(rng=random) -> dict:
     subtype = "area_quadrilateral_find_d_by_S"
     plot_id = "area_quadrilateral_find_d_by_S"
 
-    sin_alpha = random.choice([1, 0.5])
+    sin_alpha = rng.choice([1, 0.5])
     if sin_alpha == 1:
-        d1 = random.choice([8, 10, 12, 14, 16, 18, 20])
-        d2 = random.choice([6, 8, 10, 12, 14, 16])
+        d1 = rng.choice([8, 10, 12, 14, 16, 18, 20])
+        d2 = rng.choice([6, 8, 10, 12, 14, 16])
         S = (d1 * d2) // 2
         sin_text = "1"
     else:
-        d1 = random.choice([8, 12, 16, 20, 24])
-        d2 = random.choice([8, 12, 16, 20, 24])
+        d1 = rng.choice([8, 12, 16, 20, 24])
+        d2 = rng.choice([8, 12, 16, 20, 24])
         S = (d1 * d2) // 4
         sin_text = "0,5"
 
@@ -378,13 +383,13 @@ def _generate_area_quadrilateral_find_d_by_S() -> dict:
 #     При b=c формула упрощается до: l_a = sqrt(b^2 - k^2), где a = 2k.
 #     Выбираем (b, k, m) как пифагорову тройку: b^2 - k^2 = m^2 → l_a = m — целое.
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_bisector_length_equal_legs() -> dict:
+def _generate_bisector_length_equal_legs(rng=random) -> dict:
     subtype = "bisector_length_equal_legs"
     plot_id = "bisector_length_equal_legs"
 
     # «Малые» пифагоровы тройки (b, k, m), где b² - k² = m² → l_a = m
     triples = [(5, 3, 4), (13, 5, 12), (10, 6, 8), (25, 7, 24), (15, 9, 12)]
-    b, k, m = random.choice(triples)
+    b, k, m = rng.choice(triples)
     a = 2 * k  # основание
     l_a = m    # длина биссектрисы
 
@@ -410,12 +415,12 @@ def _generate_bisector_length_equal_legs() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 11) Радиус вписанной окружности в треугольник: r = S / p
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_inscribed_circle_radius_triangle() -> dict:
+def _generate_inscribed_circle_radius_triangle(rng=random) -> dict:
     subtype = "inscribed_circle_radius_triangle"
     plot_id = "inscribed_circle_radius_triangle"
 
-    p = random.choice([18, 20, 24, 28, 30, 36])  # полупериметр
-    r = random.choice([2, 3, 4, 5])              # радиус
+    p = rng.choice([18, 20, 24, 28, 30, 36])  # полупериметр
+    r = rng.choice([2, 3, 4, 5])              # радиус
     S = p * r
 
     text = (
@@ -436,12 +441,12 @@ def _generate_inscribed_circle_radius_triangle() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 12) Радиус вписанной окружности в прямоугольный треугольник: r = (a + b − c)/2
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_inscribed_circle_radius_right_triangle() -> dict:
+def _generate_inscribed_circle_radius_right_triangle(rng=random) -> dict:
     subtype = "inscribed_circle_radius_right_triangle"
     plot_id = "inscribed_circle_radius_right_triangle"
 
     # Пифагоровы тройки → r получается целым
-    a, b, c = random.choice([(6, 8, 10), (9, 12, 15), (5, 12, 13), (8, 15, 17)])
+    a, b, c = rng.choice([(6, 8, 10), (9, 12, 15), (5, 12, 13), (8, 15, 17)])
     r = (a + b - c) / 2
 
     text = (
@@ -462,12 +467,12 @@ def _generate_inscribed_circle_radius_right_triangle() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 13) Площадь треугольника через радиус описанной окружности: S = abc / 4R
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_circumscribed_circle_area_by_R() -> dict:
+def _generate_circumscribed_circle_area_by_R(rng=random) -> dict:
     subtype = "circumscribed_circle_area_by_R"
     plot_id = "circumscribed_circle_area_by_R"
 
     # возьмём правильный треугольник
-    a = random.choice([6, 8, 10, 12])
+    a = rng.choice([6, 8, 10, 12])
     R = a / math.sqrt(3)
     S = (a * a * math.sqrt(3)) / 4
 
@@ -489,21 +494,21 @@ def _generate_circumscribed_circle_area_by_R() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 14) Радиус описанной окружности через сторону и угол: R = a / (2·sinA)
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_circumscribed_circle_R_by_side_angle() -> dict:
+def _generate_circumscribed_circle_R_by_side_angle(rng=random) -> dict:
     subtype = "circumscribed_circle_R_by_side_angle"
     plot_id = "circumscribed_circle_R_by_side_angle"
 
-    if random.choice([True, False]):
+    if rng.choice([True, False]):
         # Вариант с sin = 0,5 → ответ всегда целое (R = a)
         sin_text = "0,5"
         sinA = 0.5
-        a = random.choice([6, 8, 10, 12, 14])
+        a = rng.choice([6, 8, 10, 12, 14])
         R = a / (2 * sinA)
     else:
         # Вариант с sin = 0,866 → честный расчёт (может быть дробным)
         sin_text = "0,866"
         sinA = 0.866
-        a = random.choice([9, 17, 26])
+        a = rng.choice([9, 17, 26])
         R = a / (2 * sinA)
 
     text = (
@@ -523,11 +528,11 @@ def _generate_circumscribed_circle_R_by_side_angle() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 15) Сумма углов n-угольника: Σ = (n−2)·180
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_polygon_angles_sum() -> dict:
+def _generate_polygon_angles_sum(rng=random) -> dict:
     subtype = "polygon_angles_sum"
     plot_id = "polygon_angles_sum"
 
-    n = random.randint(5, 12)
+    n = rng.randint(5, 12)
     S = (n - 2) * 180
 
     text = (
@@ -548,12 +553,12 @@ def _generate_polygon_angles_sum() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 16) Высота пирамиды из формулы объёма: V = S·h / 3
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_height_pyramid_by_V() -> dict:
+def _generate_height_pyramid_by_V(rng=random) -> dict:
     subtype = "height_pyramid_by_V"
     plot_id = "height_pyramid_by_V"
 
-    S = random.choice([12, 18, 24, 30])   # площадь основания
-    h = random.choice([6, 9, 12])         # высота
+    S = rng.choice([12, 18, 24, 30])   # площадь основания
+    h = rng.choice([6, 9, 12])         # высота
     V = S * h // 3
 
     text = (
@@ -573,11 +578,11 @@ def _generate_height_pyramid_by_V() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 17) Радиус по длине окружности: ℓ = 2πR
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_circumference_length_find_R() -> dict:
+def _generate_circumference_length_find_R(rng=random) -> dict:
     subtype = "circumference_length_find_R"
     plot_id = "circumference_length_find_R"
 
-    R = random.choice([7, 10, 14, 21])
+    R = rng.choice([7, 10, 14, 21])
     L = 2 * PI * R
 
     text = f"Длина окружности равна {format_answer(L)} см. Найди её радиус."
@@ -595,16 +600,16 @@ def _generate_circumference_length_find_R() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 18) Диагональ четырёхугольника по площади (обратная задача к 8-му)
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_area_quadrilateral_d1d2_sin_find_d() -> dict:
+def _generate_area_quadrilateral_d1d2_sin_find_d(rng=random) -> dict:
     subtype = "area_quadrilateral_d1d2_sin_find_d"
     plot_id = "area_quadrilateral_d1d2_sin_find_d"
 
-    d1 = random.choice([6, 8, 10, 12])
-    d2 = random.choice([6, 8, 10, 12])
+    d1 = rng.choice([6, 8, 10, 12])
+    d2 = rng.choice([6, 8, 10, 12])
     sinA = 0.5
     S = 0.5 * d1 * d2 * sinA
 
-    if random.choice([True, False]):
+    if rng.choice([True, False]):
         # дано d1 → найти d2
         text = (
             f"Пусть S = {format_answer(S)} см², d₁ = {d1} см, sinα = {format_answer(sinA)}; "
@@ -637,7 +642,7 @@ def _generate_area_quadrilateral_d1d2_sin_find_d() -> dict:
 # 19) Общая формула биссектрисы (разносторонний треугольник)
 #     l_a = 2bc cos(A/2) / (b+c) или через полу-периметр
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_bisector_length_general() -> dict:
+def _generate_bisector_length_general(rng=random) -> dict:
     subtype = "bisector_length_general"
     plot_id = "bisector_length_general"
 
@@ -663,11 +668,11 @@ def _generate_bisector_length_general() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 20) Радиус описанной окружности правильного треугольника: R = a/√3
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_circumscribed_circle_radius_equilateral() -> dict:
+def _generate_circumscribed_circle_radius_equilateral(rng=random) -> dict:
     subtype = "circumscribed_circle_radius_equilateral"
     plot_id = "circumscribed_circle_radius_equilateral"
 
-    a = random.choice([6, 9, 12, 15])
+    a = rng.choice([6, 9, 12, 15])
     R = a / math.sqrt(3)
 
     text = (
@@ -688,11 +693,11 @@ def _generate_circumscribed_circle_radius_equilateral() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 21) Период маятника по длине: T = 2π√(l/g)
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_pendulum_period_by_length() -> dict:
+def _generate_pendulum_period_by_length(rng=random) -> dict:
     subtype = "pendulum_period_by_length"
     plot_id = "pendulum_period_by_length"
 
-    l = random.choice([1, 2.25, 4, 6.25, 9])  # метры, чтобы √(l/g) был красивым
+    l = rng.choice([1, 2.25, 4, 6.25, 9])  # метры, чтобы √(l/g) был красивым
     T = 2 * PI * math.sqrt(l / G)
 
     text = (
@@ -713,11 +718,11 @@ def _generate_pendulum_period_by_length() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 22) Длина маятника по периоду: l = gT² / (4π²)
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_pendulum_length_by_T() -> dict:
+def _generate_pendulum_length_by_T(rng=random) -> dict:
     subtype = "pendulum_length_by_T"
     plot_id = "pendulum_length_by_T"
 
-    T = random.choice([2, 4])  # секунды
+    T = rng.choice([2, 4])  # секунды
     l = G * T**2 / (4 * PI**2)
 
     text = (
@@ -738,12 +743,12 @@ def _generate_pendulum_length_by_T() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 23) Кинетическая энергия: найти v по m и E
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_kinetic_energy_find_v() -> dict:
+def _generate_kinetic_energy_find_v(rng=random) -> dict:
     subtype = "kinetic_energy_find_v"
     plot_id = "kinetic_energy_find_v"
 
-    m = random.choice([2, 4, 5, 10])  # кг
-    v = random.choice([3, 4, 5, 6])   # м/с
+    m = rng.choice([2, 4, 5, 10])  # кг
+    v = rng.choice([3, 4, 5, 6])   # м/с
     E = m * v**2 / 2
 
     text = (
@@ -763,12 +768,12 @@ def _generate_kinetic_energy_find_v() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 24) Кинетическая энергия: найти E по m и v
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_kinetic_energy_find_E() -> dict:
+def _generate_kinetic_energy_find_E(rng=random) -> dict:
     subtype = "kinetic_energy_find_E"
     plot_id = "kinetic_energy_find_E"
 
-    m = random.choice([2, 3, 5, 8])   # кг
-    v = random.choice([2, 3, 4, 5])   # м/с
+    m = rng.choice([2, 3, 5, 8])   # кг
+    v = rng.choice([2, 3, 4, 5])   # м/с
     E = m * v**2 / 2
 
     text = (
@@ -787,12 +792,12 @@ def _generate_kinetic_energy_find_E() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 25) Потенциальная энергия: найти m по E и h
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_potential_energy_find_m() -> dict:
+def _generate_potential_energy_find_m(rng=random) -> dict:
     subtype = "potential_energy_find_m"
     plot_id = "potential_energy_find_m"
 
-    h = random.choice([2, 3, 4, 5])  # м
-    m = random.choice([2, 4, 5, 8])  # кг
+    h = rng.choice([2, 3, 4, 5])  # м
+    m = rng.choice([2, 4, 5, 8])  # кг
     E = m * G * h
 
     text = (
@@ -812,12 +817,12 @@ def _generate_potential_energy_find_m() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 26) Потенциальная энергия: найти E по m и h
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_potential_energy_find_E() -> dict:
+def _generate_potential_energy_find_E(rng=random) -> dict:
     subtype = "potential_energy_find_E"
     plot_id = "potential_energy_find_E"
 
-    m = random.choice([2, 3, 5, 7])  # кг
-    h = random.choice([2, 4, 6, 8])  # м
+    m = rng.choice([2, 3, 5, 7])  # кг
+    h = rng.choice([2, 4, 6, 8])  # м
     E = m * G * h
 
     text = (
@@ -837,13 +842,13 @@ def _generate_potential_energy_find_E() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 27) Полная механическая энергия: E = Eₖ + Eₚ
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_mechanical_energy_total() -> dict:
+def _generate_mechanical_energy_total(rng=random) -> dict:
     subtype = "mechanical_energy_total"
     plot_id = "mechanical_energy_total"
 
-    m = random.choice([1, 2, 3])  # кг
-    v = random.choice([2, 3, 4])  # м/с
-    h = random.choice([2, 3, 4])  # м
+    m = rng.choice([1, 2, 3])  # кг
+    v = rng.choice([2, 3, 4])  # м/с
+    h = rng.choice([2, 3, 4])  # м
 
     E_k = m * v**2 / 2
     E_p = m * G * h
@@ -867,12 +872,12 @@ def _generate_mechanical_energy_total() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 28) Механическая энергия: найти m по E и h (Eₚ = mgh)
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_mechanical_energy_find_m() -> dict:
+def _generate_mechanical_energy_find_m(rng=random) -> dict:
     subtype = "mechanical_energy_find_m"
     plot_id = "mechanical_energy_find_m"
 
-    h = random.choice([2, 4, 6])  # м
-    m = random.choice([2, 4, 6])  # кг
+    h = rng.choice([2, 4, 6])  # м
+    m = rng.choice([2, 4, 6])  # кг
     E = m * G * h
 
     text = (
@@ -892,11 +897,11 @@ def _generate_mechanical_energy_find_m() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 29) Сила Архимеда: F = ρgV
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_archimedes_force_find_F() -> dict:
+def _generate_archimedes_force_find_F(rng=random) -> dict:
     subtype = "archimedes_force_find_F"
     plot_id = "archimedes_force_find_F"
 
-    V = random.choice([0.002, 0.003, 0.004])  # м³
+    V = rng.choice([0.002, 0.003, 0.004])  # м³
     F = RHO_WATER * G * V  # ← ИСПОЛЬЗУЕМ КОНСТАНТУ
 
     text = (
@@ -917,11 +922,11 @@ def _generate_archimedes_force_find_F() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 30) Сила Архимеда: найти V по F
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_archimedes_force_find_V() -> dict:
+def _generate_archimedes_force_find_V(rng=random) -> dict:
     subtype = "archimedes_force_find_V"
     plot_id = "archimedes_force_find_V"
 
-    V = random.choice([0.002, 0.003, 0.004])  # м³
+    V = rng.choice([0.002, 0.003, 0.004])  # м³
     F = RHO_WATER * G * V  # ← ИСПОЛЬЗУЕМ КОНСТАНТУ
 
     text = (
@@ -942,14 +947,14 @@ def _generate_archimedes_force_find_V() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 31) Закон всемирного тяготения: найти m1 по F, r, m2
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_newton_gravity_find_m() -> dict:
+def _generate_newton_gravity_find_m(rng=random) -> dict:
     subtype = "newton_gravity_find_m"
     plot_id = "newton_gravity_find_m"
 
     # Подбираем "красивые" числа
-    m1 = random.choice([1e12, 2e12, 5e12])   # кг
-    m2 = random.choice([1e12, 2e12, 5e12])   # кг
-    r = random.choice([1e6, 2e6, 5e6])       # м
+    m1 = rng.choice([1e12, 2e12, 5e12])   # кг
+    m2 = rng.choice([1e12, 2e12, 5e12])   # кг
+    r = rng.choice([1e6, 2e6, 5e6])       # м
 
     F = G_CONST * m1 * m2 / (r**2)
 
@@ -974,14 +979,14 @@ def _generate_newton_gravity_find_m() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 32) Закон всемирного тяготения: найти F
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_newton_gravity_find_F() -> dict:
+def _generate_newton_gravity_find_F(rng=random) -> dict:
     subtype = "newton_gravity_find_F"
     plot_id = "newton_gravity_find_F"
 
     # Подбираем "красивые" числа
-    m1 = random.choice([1e12, 2e12, 5e12])   # кг
-    m2 = random.choice([1e12, 2e12, 5e12])   # кг
-    r = random.choice([1e6, 2e6, 5e6])       # м
+    m1 = rng.choice([1e12, 2e12, 5e12])   # кг
+    m2 = rng.choice([1e12, 2e12, 5e12])   # кг
+    r = rng.choice([1e6, 2e6, 5e6])       # м
 
     F = G_CONST * m1 * m2 / (r**2)
 
@@ -1006,14 +1011,14 @@ def _generate_newton_gravity_find_F() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 33) Закон Кулона: найти q
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_coulomb_law_find_q() -> dict:
+def _generate_coulomb_law_find_q(rng=random) -> dict:
     subtype = "coulomb_law_find_q"
     plot_id = "coulomb_law_find_q"
 
     # заряды в микрокулонах (целые, "школьные")
-    q1_uC = random.choice([2, 3, 4, 5, 6])   # μКл
-    q2_uC = random.choice([2, 3, 4, 5])      # μКл (нужно найти)
-    r = random.choice([1, 2, 3])             # м
+    q1_uC = rng.choice([2, 3, 4, 5, 6])   # μКл
+    q2_uC = rng.choice([2, 3, 4, 5])      # μКл (нужно найти)
+    r = rng.choice([1, 2, 3])             # м
 
     # переводим в Кл для вычислений
     q1 = q1_uC * 1e-6
@@ -1042,13 +1047,13 @@ def _generate_coulomb_law_find_q() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 34) Закон Кулона: найти F
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_coulomb_law_find_F() -> dict:
+def _generate_coulomb_law_find_F(rng=random) -> dict:
     subtype = "coulomb_law_find_F"
     plot_id = "coulomb_law_find_F"
 
-    q1 = random.choice([2e-6, 3e-6])  # Кл
-    q2 = random.choice([4e-6, 5e-6])  # Кл
-    r = random.choice([2, 3])         # м
+    q1 = rng.choice([2e-6, 3e-6])  # Кл
+    q2 = rng.choice([4e-6, 5e-6])  # Кл
+    r = rng.choice([2, 3])         # м
     F = K_CONST * q1 * q2 / (r**2)
 
     text = (
@@ -1070,12 +1075,12 @@ def _generate_coulomb_law_find_F() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 35) Закон Джоуля-Ленца (P = I²R): найти R по P и I
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_ohm_power_find_R() -> dict:
+def _generate_ohm_power_find_R(rng=random) -> dict:
     subtype = "ohm_power_find_R"
     plot_id = "ohm_power_find_R"
 
-    I = random.choice([2, 3, 4])   # А
-    R = random.choice([5, 10, 15]) # Ом
+    I = rng.choice([2, 3, 4])   # А
+    R = rng.choice([5, 10, 15]) # Ом
     P = I**2 * R
 
     text = (
@@ -1096,12 +1101,12 @@ def _generate_ohm_power_find_R() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 36) Закон Джоуля-Ленца: найти P
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_ohm_power_find_P() -> dict:
+def _generate_ohm_power_find_P(rng=random) -> dict:
     subtype = "ohm_power_find_P"
     plot_id = "ohm_power_find_P"
 
-    I = random.choice([2, 3, 4])   # А
-    R = random.choice([5, 10, 15]) # Ом
+    I = rng.choice([2, 3, 4])   # А
+    R = rng.choice([5, 10, 15]) # Ом
     P = I**2 * R
 
     text = (
@@ -1120,13 +1125,13 @@ def _generate_ohm_power_find_P() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 37) Закон Джоуля-Ленца (Q = I²Rt): найти t
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_joule_lenz_find_t() -> dict:
+def _generate_joule_lenz_find_t(rng=random) -> dict:
     subtype = "joule_lenz_find_t"
     plot_id = "joule_lenz_find_t"
 
-    I = random.choice([2, 3])       # А
-    R = random.choice([4, 5, 6])    # Ом
-    t = random.choice([10, 20, 30]) # с
+    I = rng.choice([2, 3])       # А
+    R = rng.choice([4, 5, 6])    # Ом
+    t = rng.choice([10, 20, 30]) # с
     Q = I**2 * R * t
 
     text = (
@@ -1147,13 +1152,13 @@ def _generate_joule_lenz_find_t() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 38) Закон Джоуля-Ленца: найти R
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_joule_lenz_find_R() -> dict:
+def _generate_joule_lenz_find_R(rng=random) -> dict:
     subtype = "joule_lenz_find_R"
     plot_id = "joule_lenz_find_R"
 
-    I = random.choice([2, 3])     # А
-    t = random.choice([10, 20])   # с
-    R = random.choice([4, 6, 8])  # Ом
+    I = rng.choice([2, 3])     # А
+    t = rng.choice([10, 20])   # с
+    R = rng.choice([4, 6, 8])  # Ом
     Q = I**2 * R * t
 
     text = (
@@ -1174,13 +1179,13 @@ def _generate_joule_lenz_find_R() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 39) Работа тока: A = U²t / R
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_work_of_current_find_A() -> dict:
+def _generate_work_of_current_find_A(rng=random) -> dict:
     subtype = "work_of_current_find_A"
     plot_id = "work_of_current_find_A"
 
-    U = random.choice([10, 20])  # В
-    t = random.choice([10, 20])  # с
-    R = random.choice([5, 10])   # Ом
+    U = rng.choice([10, 20])  # В
+    t = rng.choice([10, 20])  # с
+    R = rng.choice([5, 10])   # Ом
     A = U**2 * t / R
 
     text = (
@@ -1201,12 +1206,12 @@ def _generate_work_of_current_find_A() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 40) Энергия конденсатора: W = CU²/2
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_capacitor_energy_find_W() -> dict:
+def _generate_capacitor_energy_find_W(rng=random) -> dict:
     subtype = "capacitor_energy_find_W"
     plot_id = "capacitor_energy_find_W"
 
-    C = random.choice([2e-6, 4e-6, 6e-6])   # Ф
-    U = random.choice([10, 20, 30])         # В
+    C = rng.choice([2e-6, 4e-6, 6e-6])   # Ф
+    U = rng.choice([10, 20, 30])         # В
     W = C * U**2 / 2
 
     text = (
@@ -1227,13 +1232,13 @@ def _generate_capacitor_energy_find_W() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 41) Энергия конденсатора по заряду: W = q² / (2C)
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_capacitor_energy_find_W_q() -> dict:
+def _generate_capacitor_energy_find_W_q(rng=random) -> dict:
     subtype = "capacitor_energy_find_W_q"
     plot_id = "capacitor_energy_find_W_q"
 
     # ёмкость в микрофарадах (целое число)
-    C_uF = random.choice([2, 4, 5])        # μФ
-    q_uC = random.choice([2, 3, 4])        # μКл
+    C_uF = rng.choice([2, 4, 5])        # μФ
+    q_uC = rng.choice([2, 3, 4])        # μКл
 
     # переводим в СИ
     C = C_uF * 1e-6  # Ф
@@ -1267,13 +1272,13 @@ def _generate_capacitor_energy_find_W_q() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 42) Газовый закон: найти давление P = νRT/V
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_gas_law_find_P() -> dict:
+def _generate_gas_law_find_P(rng=random) -> dict:
     subtype = "gas_law_find_P"
     plot_id = "gas_law_find_P"
 
-    n = random.choice([1, 2, 3])       # моль
-    T = random.choice([300, 400])      # K
-    V = random.choice([0.01, 0.02])    # м³
+    n = rng.choice([1, 2, 3])       # моль
+    T = rng.choice([300, 400])      # K
+    V = rng.choice([0.01, 0.02])    # м³
 
     P = n * R_UNIV * T / V
 
@@ -1294,13 +1299,13 @@ def _generate_gas_law_find_P() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 43) Газовый закон: найти температуру T
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_gas_law_find_T() -> dict:
+def _generate_gas_law_find_T(rng=random) -> dict:
     subtype = "gas_law_find_T"
     plot_id = "gas_law_find_T"
 
-    n = random.choice([1, 2])        # моль
-    V = random.choice([0.01, 0.02])  # м³
-    P = random.choice([200000, 300000])  # Па
+    n = rng.choice([1, 2])        # моль
+    V = rng.choice([0.01, 0.02])  # м³
+    P = rng.choice([200000, 300000])  # Па
 
     T = P * V / (n * R_UNIV)
 
@@ -1322,13 +1327,13 @@ def _generate_gas_law_find_T() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 44) Газовый закон: найти объём V
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_gas_law_find_V() -> dict:
+def _generate_gas_law_find_V(rng=random) -> dict:
     subtype = "gas_law_find_V"
     plot_id = "gas_law_find_V"
 
-    n = random.choice([1, 2])         # моль
-    T = random.choice([300, 350])     # K
-    P = random.choice([100000, 200000])  # Па
+    n = rng.choice([1, 2])         # моль
+    T = rng.choice([300, 350])     # K
+    P = rng.choice([100000, 200000])  # Па
 
     V = n * R_UNIV * T / P
 
@@ -1350,13 +1355,13 @@ def _generate_gas_law_find_V() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 45) Газовый закон: найти количество вещества n
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_gas_law_find_n() -> dict:
+def _generate_gas_law_find_n(rng=random) -> dict:
     subtype = "gas_law_find_n"
     plot_id = "gas_law_find_n"
 
-    V = random.choice([0.01, 0.02])    # м³
-    T = random.choice([300, 400])      # K
-    P = random.choice([100000, 200000])  # Па
+    V = rng.choice([0.01, 0.02])    # м³
+    T = rng.choice([300, 400])      # K
+    P = rng.choice([100000, 200000])  # Па
 
     n = P * V / (R_UNIV * T)
 
@@ -1378,12 +1383,12 @@ def _generate_gas_law_find_n() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 46) Центростремительное ускорение: найти R по a = ω²R
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_centripetal_acceleration_find_R() -> dict:
+def _generate_centripetal_acceleration_find_R(rng=random) -> dict:
     subtype = "centripetal_acceleration_find_R"
     plot_id = "centripetal_acceleration_find_R"
 
-    ω = random.choice([2, 3])   # рад/с
-    R = random.choice([2, 4])   # м
+    ω = rng.choice([2, 3])   # рад/с
+    R = rng.choice([2, 4])   # м
     a = ω**2 * R
 
     text = (
@@ -1403,12 +1408,12 @@ def _generate_centripetal_acceleration_find_R() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 47) Центростремительное ускорение: найти a
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_centripetal_acceleration_find_a() -> dict:
+def _generate_centripetal_acceleration_find_a(rng=random) -> dict:
     subtype = "centripetal_acceleration_find_a"
     plot_id = "centripetal_acceleration_find_a"
 
-    ω = random.choice([2, 3])   # рад/с
-    R = random.choice([2, 4])   # м
+    ω = rng.choice([2, 3])   # рад/с
+    R = rng.choice([2, 4])   # м
     a = ω**2 * R
 
     text = (
@@ -1428,12 +1433,12 @@ def _generate_centripetal_acceleration_find_a() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 48) Центростремительное ускорение: найти ω
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_centripetal_acceleration_find_omega() -> dict:
+def _generate_centripetal_acceleration_find_omega(rng=random) -> dict:
     subtype = "centripetal_acceleration_find_omega"
     plot_id = "centripetal_acceleration_find_omega"
 
-    R = random.choice([2, 3])  # м
-    ω = random.choice([2, 3])  # рад/с
+    R = rng.choice([2, 3])  # м
+    ω = rng.choice([2, 3])  # рад/с
     a = ω**2 * R
 
     text = (
@@ -1454,13 +1459,13 @@ def _generate_centripetal_acceleration_find_omega() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 49) Работа тока: найти R (A = U²t/R)
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_work_of_current_find_R() -> dict:
+def _generate_work_of_current_find_R(rng=random) -> dict:
     subtype = "work_of_current_find_R"
     plot_id = "work_of_current_find_R"
 
-    U = random.choice([10, 20])   # В
-    t = random.choice([10, 20])   # с
-    R = random.choice([5, 10])    # Ом
+    U = rng.choice([10, 20])   # В
+    t = rng.choice([10, 20])   # с
+    R = rng.choice([5, 10])    # Ом
     A = U**2 * t / R
 
     text = (
@@ -1481,13 +1486,13 @@ def _generate_work_of_current_find_R() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 50) Закон Джоуля-Ленца: найти Q (Q = I²Rt)
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_joule_lenz_find_Q() -> dict:
+def _generate_joule_lenz_find_Q(rng=random) -> dict:
     subtype = "joule_lenz_find_Q"
     plot_id = "joule_lenz_find_Q"
 
-    I = random.choice([2, 3])    # А
-    R = random.choice([4, 6])    # Ом
-    t = random.choice([10, 20])  # с
+    I = rng.choice([2, 3])    # А
+    R = rng.choice([4, 6])    # Ом
+    t = rng.choice([10, 20])  # с
     Q = I**2 * R * t
 
     text = (
@@ -1508,12 +1513,12 @@ def _generate_joule_lenz_find_Q() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 51) Длина шага в метрах
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_step_length_meters() -> dict:
+def _generate_step_length_meters(rng=random) -> dict:
     subtype = "step_length_meters"
     plot_id = "step_length_meters"
 
-    step = random.choice([0.6, 0.7, 0.8])  # м
-    n = random.randint(20, 50)
+    step = rng.choice([0.6, 0.7, 0.8])  # м
+    n = rng.randint(20, 50)
     s = step * n
 
     text = (
@@ -1533,12 +1538,12 @@ def _generate_step_length_meters() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 52) Длина шага в сантиметрах
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_step_length_cm() -> dict:
+def _generate_step_length_cm(rng=random) -> dict:
     subtype = "step_length_cm"
     plot_id = "step_length_cm"
 
-    step = random.choice([60, 70, 80])  # см
-    n = random.randint(50, 100)
+    step = rng.choice([60, 70, 80])  # см
+    n = rng.randint(50, 100)
     s = step * n / 100  # переводим в метры
 
     text = (
@@ -1559,12 +1564,12 @@ def _generate_step_length_cm() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 53) Перевод шагов в километры
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_step_length_km() -> dict:
+def _generate_step_length_km(rng=random) -> dict:
     subtype = "step_length_km"
     plot_id = "step_length_km"
 
-    step = random.choice([0.7, 0.8])  # м
-    n = random.randint(1000, 2000)
+    step = rng.choice([0.7, 0.8])  # м
+    n = rng.randint(1000, 2000)
     s = step * n / 1000  # переводим в километры
 
     text = (
@@ -1585,11 +1590,11 @@ def _generate_step_length_km() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 54) Расстояние до молнии: s = 330t
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_lightning_distance() -> dict:
+def _generate_lightning_distance(rng=random) -> dict:
     subtype = "lightning_distance"
     plot_id = "lightning_distance"
 
-    t = random.randint(2, 6)       # время в секундах
+    t = rng.randint(2, 6)       # время в секундах
     s = V_SOUND * t                # ← ИСПОЛЬЗУЕМ КОНСТАНТУ
 
     text = (
@@ -1609,12 +1614,12 @@ def _generate_lightning_distance() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 55) Стоимость поездки на такси (линейная): C = k·t
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_taxi_cost_linear() -> dict:
+def _generate_taxi_cost_linear(rng=random) -> dict:
     subtype = "taxi_cost_linear"
     plot_id = "taxi_cost_linear"
 
-    k = random.choice([5, 10])   # руб/мин
-    t = random.randint(10, 30)   # минуты
+    k = rng.choice([5, 10])   # руб/мин
+    t = rng.randint(10, 30)   # минуты
     C = k * t                    # стоимость
 
     text = (
@@ -1636,13 +1641,13 @@ def _generate_taxi_cost_linear() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 56) Стоимость поездки с порогом времени
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_taxi_cost_with_threshold() -> dict:
+def _generate_taxi_cost_with_threshold(rng=random) -> dict:
     subtype = "taxi_cost_with_threshold"
     plot_id = "taxi_cost_with_threshold"
 
     c0 = 100  # фиксированная цена за первые 5 минут
     c1 = 10   # цена за каждую следующую минуту
-    t = random.randint(6, 20)  # общее время поездки (мин)
+    t = rng.randint(6, 20)  # общее время поездки (мин)
     C = c0 + c1 * (t - 5)
 
     text = (
@@ -1664,12 +1669,12 @@ def _generate_taxi_cost_with_threshold() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 57) Стоимость рытья колодца (линейная): C = k·n
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_well_cost_linear() -> dict:
+def _generate_well_cost_linear(rng=random) -> dict:
     subtype = "well_cost_linear"
     plot_id = "well_cost_linear"
 
-    k = random.choice([500, 600])  # руб/кольцо
-    n = random.randint(5, 15)      # количество колец
+    k = rng.choice([500, 600])  # руб/кольцо
+    n = rng.randint(5, 15)      # количество колец
     C = k * n
 
     text = (
@@ -1690,13 +1695,13 @@ def _generate_well_cost_linear() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 58) Стоимость колодца с постоянным и переменным членом
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_well_cost_with_constant() -> dict:
+def _generate_well_cost_with_constant(rng=random) -> dict:
     subtype = "well_cost_with_constant"
     plot_id = "well_cost_with_constant"
 
     c0 = 1000  # фиксированная доставка
-    c1 = random.choice([400, 500])  # руб/кольцо
-    n = random.randint(5, 10)       # количество колец
+    c1 = rng.choice([400, 500])  # руб/кольцо
+    n = rng.randint(5, 10)       # количество колец
     C = c0 + c1 * n
 
     text = (
@@ -1717,13 +1722,13 @@ def _generate_well_cost_with_constant() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 59) Две фирмы: сравнить стоимость
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_well_cost_two_companies() -> dict:
+def _generate_well_cost_two_companies(rng=random) -> dict:
     subtype = "well_cost_two_companies"
     plot_id = "well_cost_two_companies"
 
     c1, k1 = 800, 500  # первая фирма: фикс + за кольцо
     c2, k2 = 0, 600    # вторая фирма: только за кольцо
-    n = random.randint(5, 15)
+    n = rng.randint(5, 15)
 
     C1 = c1 + k1 * n
     C2 = c2 + k2 * n
@@ -1747,11 +1752,11 @@ def _generate_well_cost_two_companies() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 60) Перевод температуры: F → C
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_temperature_F_to_C() -> dict:
+def _generate_temperature_F_to_C(rng=random) -> dict:
     subtype = "temperature_F_to_C"
     plot_id = "temperature_F_to_C"
 
-    F = random.choice([32, 50, 68, 86])
+    F = rng.choice([32, 50, 68, 86])
     C = (F - 32) / 1.8
 
     text = f"Температура воздуха равна {F}°F. Переведите её в градусы Цельсия."
@@ -1769,11 +1774,11 @@ def _generate_temperature_F_to_C() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 61) Перевод температуры: C → F
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_temperature_C_to_F() -> dict:
+def _generate_temperature_C_to_F(rng=random) -> dict:
     subtype = "temperature_C_to_F"
     plot_id = "temperature_C_to_F"
 
-    C = random.choice([-10, 0, 10, 20, 30])
+    C = rng.choice([-10, 0, 10, 20, 30])
     F = 1.8 * C + 32
 
     text = f"Температура воздуха равна {C}°C. Переведите её в градусы Фаренгейта."
@@ -1791,11 +1796,11 @@ def _generate_temperature_C_to_F() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 62) Отрицательные температуры (вариация)
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_temperature_negative() -> dict:
+def _generate_temperature_negative(rng=random) -> dict:
     subtype = "temperature_negative"
     plot_id = "temperature_negative"
 
-    C = random.choice([-20, -15, -5])
+    C = rng.choice([-20, -15, -5])
     F = 1.8 * C + 32
 
     text = f"Температура на улице {C}°C. Сколько это градусов Фаренгейта?"
@@ -1813,7 +1818,7 @@ def _generate_temperature_negative() -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 63–66) Дополнительные жизненные варианты (чтобы всё покрыть)
 # ─────────────────────────────────────────────────────────────────────────────
-def _generate_step_daily_walk() -> dict:
+def _generate_step_daily_walk(rng=random) -> dict:
     subtype = "step_daily_walk"
     plot_id = "step_daily_walk"
 
@@ -1837,7 +1842,7 @@ def _generate_step_daily_walk() -> dict:
     }
 
 
-def _generate_taxi_night_tariff() -> dict:
+def _generate_taxi_night_tariff(rng=random) -> dict:
     subtype = "taxi_night_tariff"
     plot_id = "taxi_night_tariff"
 
@@ -1862,7 +1867,7 @@ def _generate_taxi_night_tariff() -> dict:
     }
 
 
-def _generate_well_cost_example_story() -> dict:
+def _generate_well_cost_example_story(rng=random) -> dict:
     subtype = "well_cost_example_story"
     plot_id = "well_cost_example_story"
 
@@ -1887,7 +1892,7 @@ def _generate_well_cost_example_story() -> dict:
     }
 
 
-def _generate_temperature_extreme() -> dict:
+def _generate_temperature_extreme(rng=random) -> dict:
     subtype = "temperature_extreme"
     plot_id = "temperature_extreme"
 
@@ -1984,17 +1989,7 @@ GENERATOR_MAP: Dict[str, Callable[[], Tuple[str, str, str]]] = {
 # ─────────────────────────────────────────────────────────────────────────────
 # Главная функция-дирижёр
 # ─────────────────────────────────────────────────────────────────────────────
-async def generate_task_12_by_subtype(
-    subtype_key: Optional[str] = None
-) -> Optional[Dict[str, Any]]:
-    if subtype_key is None:
-        subtype_key = random.choice(list(GENERATOR_MAP.keys()))
-    generator = GENERATOR_MAP.get(subtype_key)
-    if not generator:
-        return None
-
-    res = generator()
-
+def _normalize_result(subtype_key: str, res: Any) -> Dict[str, Any]:
     # Если генератор уже возвращает dict — отдаем как есть
     if isinstance(res, dict):
         for k in ("subtype", "text", "answer"):
@@ -2012,4 +2007,36 @@ async def generate_task_12_by_subtype(
         "subtype": key,
         "text": text,
         "answer": answer,
-    }
\ No newline at end of file
+    }
+
+
+async def generate_task_12_by_subtype(
+    subtype_key: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    if subtype_key is None:
+        subtype_key = random.choice(list(GENERATOR_MAP.keys()))
+    generator = GENERATOR_MAP.get(subtype_key)
+    if not generator:
+        return None
+
+    return _normalize_result(subtype_key, generator())
+
+
+def generate_task_12_batch(
+    subtype_key: str,
+    n: int,
+    seed: Optional[int | str] = None
+) -> List[Dict[str, Any]]:
+    """
+    n задач одного подтипа за один вызов (для наполнения tasks_12.json и пулов).
+
+    Все генераторы выбирают параметры прямо из допустимых наборов, поэтому
+    время растёт линейно с n. С одинаковым seed пачка совпадает до символа;
+    общий генератор random при этом не трогается.
+    """
+    generator = GENERATOR_MAP.get(subtype_key)
+    if not generator:
+        raise KeyError(f"Неизвестный подтип задания 12: {subtype_key}")
+
+    rng = random.Random(seed)
+    return [_normalize_result(subtype_key, generator(rng)) for _ in range(n)]
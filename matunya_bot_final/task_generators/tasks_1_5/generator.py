@@ -1,19 +1,266 @@
 from matunya_bot_final.utils import db_manager
 from matunya_bot_final.utils.text_formatters import bold_numbers
+import copy
 import json
 import os
 import random
 import importlib
 import logging
 import re
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, List, Optional, Set
-from string import Template
+from types import MappingProxyType, ModuleType
+from typing import Any, List, Mapping, Optional, Set
+from string import Formatter, Template
 from collections import defaultdict
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 
 logger = logging.getLogger(__name__)
 
+SUBTYPES_ROOT = Path(__file__).resolve().parent
+
+_DOLLAR_PLACEHOLDER = re.compile(r'\$([a-zA-Z_][a-zA-Z0-9_]*)')
+_FORMATTER = Formatter()
+
+
+class _SafeDict(dict):
+    """Контекст для format_map: отсутствующий плейсхолдер виден в тексте, а не роняет форматирование."""
+
+    def __missing__(self, key):
+        return f"[ОТСУТСТВУЕТ:{key}]"
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Шаблон, разобранный один раз: формат, набор плейсхолдеров и исходный словарь из JSON."""
+
+    text: str
+    requirements: frozenset
+    uses_braces: bool
+    dollar_template: Optional[Template]
+
+    def render(self, context: Mapping[str, Any]) -> str:
+        if self.uses_braces:
+            return self.text.format_map(_SafeDict(context))
+        return self.dollar_template.safe_substitute(context)
+
+
+_compiled_templates: dict[str, CompiledTemplate] = {}
+
+
+def compile_template(text: str) -> CompiledTemplate:
+    """Разбирает шаблон ({variable} или $variable) один раз на процесс."""
+    compiled = _compiled_templates.get(text)
+    if compiled is not None:
+        return compiled
+
+    uses_braces = '{' in text and '}' in text
+    requirements = set(_DOLLAR_PLACEHOLDER.findall(text))
+    if uses_braces:
+        try:
+            requirements.update(
+                field.split('.', 1)[0].split('[', 1)[0]
+                for _, field, _, _ in _FORMATTER.parse(text)
+                if field
+            )
+        except ValueError as e:
+            logger.warning(f"Шаблон не разобран ({e}): {text}")
+    compiled = CompiledTemplate(
+        text=text,
+        requirements=frozenset(requirements),
+        uses_braces=uses_braces,
+        dollar_template=None if uses_braces else Template(text),
+    )
+    _compiled_templates[text] = compiled
+    return compiled
+
+
+@dataclass(frozen=True)
+class PlotResource:
+    """Сюжет из plots/*.json: разобранные данные и заранее посчитанные совместимые вопросы."""
+
+    path: Path
+    data: Mapping[str, Any]
+    capabilities: Mapping[str, frozenset]
+    compatible_questions: Mapping[str, tuple]
+
+    def fresh_data(self) -> dict[str, Any]:
+        """Изменяемая копия данных сюжета для одного пакета (генератор правит пары шин)."""
+        return copy.deepcopy(dict(self.data))
+
+
+@dataclass(frozen=True)
+class SubtypeResources:
+    """Общие для процесса неизменяемые ресурсы подтипа: конфиг, тексты, лексемы и сюжеты."""
+
+    subtype: str
+    config: ModuleType
+    intros: tuple
+    conditions: tuple
+    questions: Mapping[str, tuple]
+    lexemes: Mapping[str, dict[str, str]]
+    plots: tuple
+
+
+_resources: dict[str, SubtypeResources] = {}
+_resources_lock = threading.Lock()
+
+
+def _load_subtype_config(subtype: str) -> ModuleType:
+    """Динамически импортирует конфигурацию подтипа."""
+    try:
+        config_module_path = f"matunya_bot_final.task_generators.tasks_1_5.{subtype}.config"
+        config = importlib.import_module(config_module_path)
+        logger.info(f"Конфигурация '{config_module_path}' загружена")
+        return config
+    except ImportError as e:
+        logger.error(f"Не удалось загрузить конфигурацию для подтипа '{subtype}': {e}")
+        raise RuntimeError(f"Ошибка конфигурации: {e}")
+
+
+def _load_subtype_texts(config: ModuleType) -> dict[str, Any]:
+    """Загружает текстовые данные из JSON-файлов."""
+    texts: dict[str, Any] = {"intros": [], "conditions": [], "questions": {}, "lexemes": {}}
+    try:
+        for key, path in config.TEXT_FILES.items():
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                if key in texts:
+                    texts[key] = data if data else texts[key]
+            logger.info(f"Загружены данные из {path}")
+
+        if not texts["intros"]:
+            raise ValueError("Список вступлений пуст")
+        if not texts["conditions"]:
+            raise ValueError("Список условий пуст")
+        if not all(texts["questions"].get(q) for q in config.QUESTION_KEYS + config.Q5_ALTERNATIVES):
+            raise ValueError("Не все типы вопросов найдены в questions.json")
+    except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
+        logger.error(f"Ошибка загрузки текстовых данных: {e}")
+        raise RuntimeError(f"Ошибка загрузки текстовых данных: {e}")
+    return texts
+
+
+def _load_plot_file(plot_file: Path) -> dict[str, Any]:
+    """Загружает данные из файла плота."""
+    try:
+        with open(plot_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Ошибка загрузки плота {plot_file}: {e}")
+        raise RuntimeError(f"Ошибка загрузки плота: {e}")
+
+
+def analyze_plot_capabilities(config: ModuleType, plot_data: Mapping[str, Any]) -> dict[str, Set[str]]:
+    """
+    Анализирует доступные плейсхолдеры для каждого типа вопроса.
+    """
+    capabilities = {q: set() for q in config.QUESTION_KEYS + config.Q5_ALTERNATIVES}
+    task_specific_data = plot_data.get("task_specific_data", {})
+    base_marking = plot_data.get("base_tire_marking", {}).get("full_marking", "")
+
+    for i, q_key in enumerate(config.QUESTION_KEYS + ["q5"], 1):
+        task_key = f"task_{i}_data"
+        if task_key in task_specific_data:
+            task_data = task_specific_data[task_key]
+            capabilities[q_key].update(["veh_acc", "veh_nom", "veh_gen"])
+            if base_marking:
+                capabilities[q_key].add("base_marking")
+            capabilities[q_key].update(task_data.keys())
+
+    if "task_5_data" in task_specific_data:
+        task_5_data = task_specific_data["task_5_data"]
+        if "service_choice_data" in task_5_data:
+            capabilities["q6"].update(["wheels_count", "service_ids", "veh_acc", "veh_nom", "veh_gen"])
+            if base_marking:
+                capabilities["q6"].add("base_marking")
+
+    return capabilities
+
+
+def _compatible_questions(questions: Mapping[str, tuple], capabilities: Mapping[str, frozenset]) -> dict[str, tuple]:
+    """Шаблоны каждого типа вопроса, чьи плейсхолдеры сюжет умеет заполнить."""
+    return {
+        q_type: tuple(
+            template for template in templates
+            if compile_template(template["text"]).requirements <= capabilities.get(q_type, frozenset())
+        )
+        for q_type, templates in questions.items()
+    }
+
+
+def _build_subtype_resources(subtype: str) -> SubtypeResources:
+    config = _load_subtype_config(subtype)
+    texts = _load_subtype_texts(config)
+
+    plots_dir = Path(config.PLOTS_DIR)
+    if not plots_dir.exists():
+        raise RuntimeError(f"Папка с плотами не найдена: {plots_dir}")
+    plot_files = sorted(plots_dir.glob("*.json"))
+    if not plot_files:
+        raise RuntimeError(f"Не найдено файлов плотов в {plots_dir}")
+
+    questions = MappingProxyType({q_type: tuple(templates) for q_type, templates in texts["questions"].items()})
+    for template in (*texts["intros"], *texts["conditions"], *(t for ts in questions.values() for t in ts)):
+        compile_template(template["text"])
+
+    plots = []
+    for plot_file in plot_files:
+        data = _load_plot_file(plot_file)
+        capabilities = {
+            q_type: frozenset(keys) for q_type, keys in analyze_plot_capabilities(config, data).items()
+        }
+        plots.append(PlotResource(
+            path=plot_file,
+            data=MappingProxyType(data),
+            capabilities=MappingProxyType(capabilities),
+            compatible_questions=MappingProxyType(_compatible_questions(questions, capabilities)),
+        ))
+
+    logger.info(
+        f"Ресурсы подтипа '{subtype}' загружены: {len(plots)} сюжетов, "
+        f"{sum(len(ts) for ts in questions.values())} шаблонов вопросов"
+    )
+    return SubtypeResources(
+        subtype=subtype,
+        config=config,
+        intros=tuple(texts["intros"]),
+        conditions=tuple(texts["conditions"]),
+        questions=questions,
+        lexemes=MappingProxyType(texts["lexemes"]),
+        plots=tuple(plots),
+    )
+
+
+def get_subtype_resources(subtype: str) -> SubtypeResources:
+    """Ресурсы подтипа: читаются с диска один раз на процесс, дальше — из памяти."""
+    resources = _resources.get(subtype)
+    if resources is None:
+        with _resources_lock:
+            resources = _resources.get(subtype)
+            if resources is None:
+                resources = _build_subtype_resources(subtype)
+                _resources[subtype] = resources
+    return resources
+
+
+def clear_subtype_resources() -> None:
+    """Сбрасывает загруженные ресурсы (после правки JSON без перезапуска, в тестах)."""
+    with _resources_lock:
+        _resources.clear()
+        _compiled_templates.clear()
+
+
+def warm_task_resources() -> None:
+    """Загружает ресурсы всех подтипов 1–5 на старте, чтобы первая генерация не читала диск."""
+    for config_path in sorted(SUBTYPES_ROOT.glob("*/config.py")):
+        subtype = config_path.parent.name
+        try:
+            get_subtype_resources(subtype)
+        except RuntimeError as e:
+            logger.error(f"Ресурсы подтипа '{subtype}' не загружены: {e}")
+
 class TaskGenerator:
     """
     Универсальный оркестратор для генерации задач подтипа (e.g., 'tires').
@@ -30,69 +277,19 @@ class TaskGenerator:
         """
         self.subtype = subtype
         self.session_maker = session_maker
-        self.config = None
-        self.intros: List[dict[str, Any]] = []
-        self.conditions: List[dict[str, Any]] = []
-        self.questions: dict[str, List[dict[str, Any]]] = {}
-        self.lexemes: dict[str, dict[str, str]] = {}
-        self.plot_files: List[Path] = []
+        self.resources = get_subtype_resources(subtype)
+        self.config = self.resources.config
+        self.intros = self.resources.intros
+        self.conditions = self.resources.conditions
+        self.questions = self.resources.questions
+        self.lexemes = self.resources.lexemes
+        self.plot_files: List[Path] = [plot.path for plot in self.resources.plots]
         self.calculator = None
         self.table_renderer = None
 
-        self._load_config()
-        self._load_text_data()
-        self._load_plots_list()
         self._initialize_specialists()
         logger.info(f"TaskGenerator для подтипа '{subtype}' инициализирован")
 
-    def _load_config(self) -> None:
-        """Динамически импортирует конфигурацию подтипа."""
-        try:
-            config_module_path = f"matunya_bot_final.task_generators.tasks_1_5.{self.subtype}.config"
-            self.config = importlib.import_module(config_module_path)
-            logger.info(f"Конфигурация '{config_module_path}' загружена")
-        except ImportError as e:
-            logger.error(f"Не удалось загрузить конфигурацию для подтипа '{self.subtype}': {e}")
-            raise RuntimeError(f"Ошибка конфигурации: {e}")
-
-    def _load_text_data(self) -> None:
-        """Загружает текстовые данные из JSON-файлов."""
-        try:
-            for key, path in self.config.TEXT_FILES.items():
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if key == "intros":
-                        self.intros = data if data else []
-                    elif key == "conditions":
-                        self.conditions = data if data else []
-                    elif key == "questions":
-                        self.questions = data if data else {}
-                    elif key == "lexemes":
-                        self.lexemes = data if data else {}
-                logger.info(f"Загружены данные из {path}")
-
-            if not self.intros:
-                raise ValueError("Список вступлений пуст")
-            if not self.conditions:
-                raise ValueError("Список условий пуст")
-            if not all(self.questions.get(q) for q in self.config.QUESTION_KEYS + self.config.Q5_ALTERNATIVES):
-                raise ValueError("Не все типы вопросов найдены в questions.json")
-        except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
-            logger.error(f"Ошибка загрузки текстовых данных: {e}")
-            raise RuntimeError(f"Ошибка загрузки текстовых данных: {e}")
-
-    def _load_plots_list(self) -> None:
-        """Загружает список доступных файлов плотов."""
-        plots_dir = Path(self.config.PLOTS_DIR)
-        if not plots_dir.exists():
-            raise RuntimeError(f"Папка с плотами не найдена: {plots_dir}")
-
-        self.plot_files = list(plots_dir.glob("*.json"))
-        if not self.plot_files:
-            raise RuntimeError(f"Не найдено файлов плотов в {plots_dir}")
-
-        logger.info(f"Найдено {len(self.plot_files)} файлов плотов")
-
     def _initialize_specialists(self) -> None:
         """Динамически импортирует специалистов."""
         try:
@@ -110,49 +307,32 @@ class TaskGenerator:
             raise RuntimeError(f"Ошибка загрузки специалистов: {e}")
 
     def _load_plot_data(self, plot_file: Path) -> dict[str, Any]:
-        """Загружает данные из файла плота."""
-        try:
-            with open(plot_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Ошибка загрузки плота {plot_file}: {e}")
-            raise RuntimeError(f"Ошибка загрузки плота: {e}")
+        """Изменяемая копия уже загруженного сюжета (с диска — только если файла нет в ресурсах)."""
+        for plot in self.resources.plots:
+            if plot.path == plot_file:
+                return plot.fresh_data()
+        return _load_plot_file(plot_file)
 
     def _get_template_requirements(self, template_text: str) -> Set[str]:
         """Извлекает все плейсхолдеры из шаблона."""
-        placeholders = re.findall(r'\$([a-zA-Z_][a-zA-Z0-9_]*)', template_text)
-        return set(placeholders)
+        return set(compile_template(template_text).requirements)
 
     def _analyze_plot_capabilities(self, plot_data: dict[str, Any]) -> dict[str, Set[str]]:
         """
         Анализирует доступные плейсхолдеры для каждого типа вопроса.
         """
-        capabilities = {q: set() for q in self.config.QUESTION_KEYS + self.config.Q5_ALTERNATIVES}
-        task_specific_data = plot_data.get("task_specific_data", {})
-        base_marking = plot_data.get("base_tire_marking", {}).get("full_marking", "")
-
-        for i, q_key in enumerate(self.config.QUESTION_KEYS + ["q5"], 1):
-            task_key = f"task_{i}_data"
-            if task_key in task_specific_data:
-                task_data = task_specific_data[task_key]
-                capabilities[q_key].update(["veh_acc", "veh_nom", "veh_gen"])
-                if base_marking:
-                    capabilities[q_key].add("base_marking")
-                capabilities[q_key].update(task_data.keys())
-
-        if "task_5_data" in task_specific_data:
-            task_5_data = task_specific_data["task_5_data"]
-            if "service_choice_data" in task_5_data:
-                capabilities["q6"].update(["wheels_count", "service_ids", "veh_acc", "veh_nom", "veh_gen"])
-                if base_marking:
-                    capabilities["q6"].add("base_marking")
-
-        return capabilities
-
-    def _select_compatible_questions(self, plot_capabilities: dict[str, Set[str]], plot_data: dict[str, Any]) -> List[dict[str, Any]]:
+        return analyze_plot_capabilities(self.config, plot_data)
+
+    def _select_compatible_questions(self, plot_capabilities: dict[str, Set[str]], plot_data: dict[str, Any],
+                                     compatible: Optional[Mapping[str, tuple]] = None) -> List[dict[str, Any]]:
         """
         Выбирает совместимые шаблоны вопросов с учетом типов данных.
+
+        compatible — заранее посчитанные для сюжета совместимые шаблоны (PlotResource);
+        без них совместимость считается по plot_capabilities.
         """
+        if compatible is None:
+            compatible = _compatible_questions(self.questions, plot_capabilities)
         selected = []
         task_specific_data = plot_data.get("task_specific_data", {})
 
@@ -197,19 +377,24 @@ class TaskGenerator:
                 task_2_data = task_specific_data.get("task_2_data", {})
                 if task_2_data.get("comparison_with_base") or task_2_data.get("comparison_type") == "base_comparison":
                     # Ищем шаблоны с {base_marking}
-                    suitable_templates = [t for t in self.questions[q_type] if "{base_marking}" in t["text"]]
+                    suitable_templates = [
+                        t for t in self.questions[q_type]
+                        if "base_marking" in compile_template(t["text"]).requirements
+                    ]
                 else:
                     # Ищем шаблоны с {tire_1} и {tire_2}
-                    suitable_templates = [t for t in self.questions[q_type] if "{tire_1}" in t["text"] and "{tire_2}" in t["text"]]
+                    suitable_templates = [
+                        t for t in self.questions[q_type]
+                        if {"tire_1", "tire_2"} <= compile_template(t["text"]).requirements
+                    ]
 
                 template = random.choice(suitable_templates) if suitable_templates else self.questions[q_type][0]
 
             else:
                 # Для остальных типов используем старую логику
-                compatible_templates = [
-                    t for t in self.questions[q_type]
-                    if self._get_template_requirements(t["text"]).issubset(plot_capabilities.get(q_type, set()))
-                ]
+                compatible_templates = compatible.get(q_type, ())
+                if not compatible_templates:
+                    logger.warning(f"Нет шаблонов {q_type}, совместимых с сюжетом — берём первый шаблон")
                 template = random.choice(compatible_templates) if compatible_templates else self.questions[q_type][0]
 
             selected.append({"type": q_type, "data": template})
@@ -219,10 +404,9 @@ class TaskGenerator:
         if not self.questions.get(q5_type):
             q5_type = "q5"
 
-        compatible_templates = [
-            t for t in self.questions.get(q5_type, [])
-            if self._get_template_requirements(t["text"]).issubset(plot_capabilities.get(q5_type, set()))
-        ]
+        compatible_templates = compatible.get(q5_type, ())
+        if not compatible_templates:
+            logger.warning(f"Нет шаблонов {q5_type}, совместимых с сюжетом — берём первый шаблон")
         selected.append({
             "type": q5_type,
             "data": random.choice(compatible_templates) if compatible_templates else self.questions.get(q5_type, self.questions["q5"])[0]
@@ -462,18 +646,8 @@ class TaskGenerator:
             Отформатированная строка без пустых плейсхолдеров.
         """
         try:
-            # Поддерживаем оба формата: {variable} и $variable
-            if '{' in template and '}' in template:
-                # Используем format_map для безопасной подстановки
-                class SafeDict(dict):
-                    def __missing__(self, key):
-                        return f"[ОТСУТСТВУЕТ:{key}]"
-
-                safe_context = SafeDict(context)
-                result = template.format_map(safe_context)
-            else:
-                # Формат $variable
-                result = Template(template).safe_substitute(context)
+            # Поддерживаем оба формата: {variable} и $variable (разбор — один раз на шаблон)
+            result = compile_template(template).render(context)
 
             logger.info(f"DEBUG: Результат форматирования: {result}")
             return result
@@ -529,8 +703,8 @@ class TaskGenerator:
             # ---------------------------
 
             # Выбор компонентов
-            plot_file = random.choice(self.plot_files)
-            plot_data = self._load_plot_data(plot_file)
+            plot = random.choice(self.resources.plots)
+            plot_data = plot.fresh_data()
             self._ensure_unique_tire_variants(plot_data)
             vehicle_id = plot_data.get("vehicle_id", "car_any")
             lexemes = self.lexemes.get(vehicle_id, self.lexemes.get("car_any", {}))
@@ -544,8 +718,10 @@ class TaskGenerator:
             base_context["base_marking"] = base_tire.get("full_marking", "")
             # ----------------------------------------
 
-            plot_capabilities = self._analyze_plot_capabilities(plot_data)
-            selected_questions = self._select_compatible_questions(plot_capabilities, plot_data)
+            # Пары шин правятся только в значениях — возможности сюжета посчитаны при загрузке
+            selected_questions = self._select_compatible_questions(
+                dict(plot.capabilities), plot_data, compatible=plot.compatible_questions
+            )
 
             # Расчёты
             answers = self.calculator.calculate_all_tasks(plot_data)
@@ -604,13 +780,11 @@ class TaskGenerator:
                     }
                     tasks.append(task)
 
-                    # 6. Регистрация в БД
-                    task_id = await register_task(session, q_data["id"], text, answer)
-                    if task_id is not None:
-                        db_task_ids.append(task_id)
-                    else:
+                # 6. Регистрация в БД — весь пакет одной транзакцией
+                db_task_ids = await db_manager.register_tasks_bulk(session, tasks)
+                for i, task_id in enumerate(db_task_ids):
+                    if task_id is None:
                         logger.warning(f"Задача {i+1} не зарегистрирована в БД (task_id is None)")
-                        db_task_ids.append(None)
 
             task_package = {
                 "subtype": self.subtype,
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from matunya_bot_final import loader
+
+TASKS = [{"id": "a", "pattern": "p1"}, {"id": "b", "pattern": "p2"}]
+
+
+@pytest.fixture
+def lazy_db(tmp_path, monkeypatch):
+    source = tmp_path / "tasks_x.json"
+    source.write_text(json.dumps(TASKS), encoding="utf-8")
+    monkeypatch.setattr(loader, "SNAPSHOT_DIR", tmp_path / "snapshots")
+    monkeypatch.setattr(loader, "LOAD_TIMINGS", {})
+    return source, loader.LazyTasksDB({"x": source})
+
+
+def test_store_is_parsed_on_first_access(lazy_db):
+    _, db = lazy_db
+
+    assert "x" in db
+    assert not db.is_loaded("x")
+    assert db["x"] == TASKS
+    assert db.is_loaded("x")
+    assert loader.get_load_timings()["x"]["source"] == "json"
+
+
+def test_snapshot_is_used_until_source_changes(lazy_db):
+    source, db = lazy_db
+    db["x"]
+
+    restarted = loader.LazyTasksDB({"x": source})
+    assert restarted.get("x") == TASKS
+    assert loader.get_load_timings()["x"]["source"] == "snapshot"
+
+    source.write_text(json.dumps(TASKS[:1]) + " ", encoding="utf-8")
+    changed = loader.LazyTasksDB({"x": source})
+    assert changed["x"] == TASKS[:1]
+    assert loader.get_load_timings()["x"]["source"] == "json"
+
+
+def test_unknown_key_behaves_like_dict(lazy_db):
+    _, db = lazy_db
+
+    assert db.get("nope", []) == []
+    with pytest.raises(KeyError):
+        db["nope"]
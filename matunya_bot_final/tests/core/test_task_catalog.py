@@ -0,0 +1,51 @@
+import random
+
+from matunya_bot_final.core import task_catalog
+from matunya_bot_final.core.task_catalog import TaskBucket, TaskCatalog
+
+
+TASKS = [
+    {"id": "t1", "pattern": "a", "subtype": "s1", "category": "calc", "subcategory": "geometry"},
+    {"id": "t2", "pattern": "b", "subtype": "s1", "category": "calc", "subcategory": "physics"},
+    {"id": "t3", "pattern": "a", "subtype": "s2", "category": "eq", "subcategory": "geometry"},
+    {"id": "t4", "pattern": "c", "subtype": "s2", "category": "calc", "subcategory": "geometry"},
+]
+
+
+def test_bucket_by_single_and_multiple_values():
+    catalog = TaskCatalog(TASKS)
+
+    assert {t["id"] for t in catalog.bucket(subtype="s1").tasks} == {"t1", "t2"}
+    assert {t["id"] for t in catalog.bucket(pattern=("a", "c")).tasks} == {"t1", "t3", "t4"}
+    assert {t["id"] for t in catalog.bucket(category="calc", subcategory="geometry").tasks} == {"t1", "t4"}
+    assert not catalog.bucket(subtype="missing")
+    # повторный запрос отдаёт ту же (закэшированную) корзину
+    assert catalog.bucket(subtype="s1") is catalog.bucket(subtype="s1")
+    assert catalog.get("t3")["pattern"] == "a"
+
+
+def test_pick_excludes_pattern_and_id():
+    bucket = TaskBucket(TASKS)
+    rng = random.Random(0)
+
+    for _ in range(200):
+        assert bucket.pick(exclude_pattern="a", rng=rng)["pattern"] != "a"
+        assert bucket.pick(exclude_id="t2", rng=rng)["id"] != "t2"
+        picked = bucket.pick(exclude_pattern="a", exclude_id="t4", rng=rng)
+        assert picked["id"] == "t2"
+
+
+def test_pick_falls_back_when_everything_is_excluded():
+    bucket = TaskBucket([TASKS[0]])
+
+    assert bucket.pick(exclude_id="t1")["id"] == "t1"
+    assert TaskBucket([]).pick() is None
+
+
+def test_get_catalog_unwraps_dict_store(monkeypatch):
+    monkeypatch.setitem(task_catalog.TASKS_DB, "test_store", {"tasks": TASKS})
+
+    catalog = task_catalog.get_catalog("test_store")
+
+    assert len(catalog) == 4
+    assert task_catalog.get_catalog("test_store") is catalog
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from matunya_bot_final.core.task_pool import TaskPool
+
+
+def make_pool(tmp_path, fail_subtypes=()):
+    calls = []
+
+    async def generate(subtype):
+        calls.append(subtype)
+        if subtype in fail_subtypes:
+            return None
+        return {"text": f"{subtype} #{len(calls)}", "answer": "1"}
+
+    pool = TaskPool("99", generate, lambda: ["a", "b"], low=2, high=4, path=tmp_path / "task_99.json")
+    return pool, calls
+
+
+@pytest.mark.asyncio
+async def test_refill_tops_up_to_high_and_pop_is_fifo(tmp_path):
+    pool, calls = make_pool(tmp_path)
+
+    assert pool.pop("a") is None
+    assert await pool.refill() == 8
+    assert pool.stats() == {"a": 4, "b": 4}
+
+    first = pool.pop("a")
+    assert first["text"].startswith("a #")
+    assert pool.size("a") == 3
+    # выше нижней отметки — не доливаем
+    assert await pool.refill() == 0
+    assert pool.metrics["hits"] == 1 and pool.metrics["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_queues_survive_restart(tmp_path):
+    pool, _ = make_pool(tmp_path)
+    await pool.refill()
+    pool.pop("b")
+    await pool.stop()
+
+    restored, calls = make_pool(tmp_path)
+    assert restored.stats() == {"a": 4, "b": 3}
+    assert restored.pop("b") is not None
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_failed_subtype_is_skipped_until_retry(tmp_path):
+    pool, calls = make_pool(tmp_path, fail_subtypes={"a"})
+
+    assert await pool.refill() == 4
+    assert await pool.refill() == 0
+    assert calls.count("a") == 1
+    assert pool.metrics["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_refills_after_pop(tmp_path):
+    pool, _ = make_pool(tmp_path)
+    pool.start()
+    try:
+        for _ in range(50):
+            if pool.stats() == {"a": 4, "b": 4}:
+                break
+            await asyncio.sleep(0.01)
+        for _ in range(3):
+            pool.pop("a")
+        for _ in range(50):
+            if pool.size("a") == 4:
+                break
+            await asyncio.sleep(0.01)
+        assert pool.size("a") == 4
+    finally:
+        await pool.stop()
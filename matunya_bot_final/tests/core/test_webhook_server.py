@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+
+from matunya_bot_final.webhook_server import UpdateScheduler, create_webhook_app
+
+
+def _message_update(update_id: int, chat_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Ученик"},
+            "text": text,
+        },
+    }
+
+
+def _make_dispatcher(seen: list, delay: float = 0.02):
+    router = Router()
+    state = {"running": 0, "peak": 0}
+
+    @router.message()
+    async def record(message: Message):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(delay)
+        seen.append((message.chat.id, message.text))
+        state["running"] -= 1
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp, state
+
+
+async def _client(dp, scheduler, bot, secret=None):
+    app = create_webhook_app(dp, bot, scheduler, path="/webhook", secret=secret)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_acks_fast_and_keeps_chat_order_under_concurrency_limit():
+    seen = []
+    dp, state = _make_dispatcher(seen)
+    bot = Bot("42:TEST")  # сеть не нужна: хендлеры ничего не отправляют
+
+    async def handle(update):
+        await dp.feed_update(bot, update)
+
+    scheduler = UpdateScheduler(handle, max_concurrency=2, max_pending=100)
+    client = await _client(dp, scheduler, bot)
+    try:
+        update_id = 0
+        for step in range(3):
+            for chat_id in (1, 2, 3, 4):
+                update_id += 1
+                response = await client.post("/webhook", json=_message_update(update_id, chat_id, f"{chat_id}:{step}"))
+                assert response.status == 200
+        # Ответы пришли раньше, чем обработаны все апдейты
+        assert scheduler.pending > 0
+
+        assert await scheduler.drain(timeout=5)
+        health = await (await client.get("/healthz")).json()
+    finally:
+        await client.close()
+        await bot.session.close()
+
+    assert len(seen) == 12
+    for chat_id in (1, 2, 3, 4):
+        assert [text for chat, text in seen if chat == chat_id] == [f"{chat_id}:{s}" for s in range(3)]
+    assert state["peak"] <= 2
+    assert health["processed"] == 12 and health["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_rejects_bad_secret_invalid_body_and_overload():
+    release = asyncio.Event()
+
+    async def handle(update):
+        await release.wait()
+
+    scheduler = UpdateScheduler(handle, max_concurrency=1, max_pending=2)
+    bot = Bot("42:TEST")
+    client = await _client(Dispatcher(), scheduler, bot, secret="s3cr3t")
+    headers = {"X-Telegram-Bot-Api-Secret-Token": "s3cr3t"}
+    try:
+        assert (await client.post("/webhook", json=_message_update(1, 1, "a"))).status == 401
+        assert (await client.post("/webhook", data="не json", headers=headers)).status == 400
+
+        statuses = [
+            (await client.post("/webhook", json=_message_update(i, i, "x"), headers=headers)).status
+            for i in range(1, 4)
+        ]
+        assert statuses == [200, 200, 503]
+
+        release.set()
+        assert await scheduler.drain(timeout=5)
+        # После остановки новые апдейты не принимаются
+        assert (await client.post("/webhook", json=_message_update(9, 9, "x"), headers=headers)).status == 503
+    finally:
+        await client.close()
+        await bot.session.close()
+
+    assert scheduler.metrics["processed"] == 2 and scheduler.metrics["rejected"] == 2
+
+
+@pytest.mark.asyncio
+async def test_drain_timeout_cancels_stuck_updates():
+    async def handle(update):
+        await asyncio.sleep(60)
+
+    scheduler = UpdateScheduler(handle, max_concurrency=4, max_pending=10)
+    bot = Bot("42:TEST")
+    client = await _client(Dispatcher(), scheduler, bot)
+    try:
+        assert (await client.post("/webhook", json=_message_update(1, 1, "x"))).status == 200
+        assert await scheduler.drain(timeout=0.05) is False
+    finally:
+        await client.close()
+        await bot.session.close()
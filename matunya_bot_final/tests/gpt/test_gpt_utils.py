@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from datetime import datetime, timedelta
+
+from matunya_bot_final.gpt import gpt_utils, response_cache
+from matunya_bot_final.utils import db_manager
+
+
+def _make_response(text: str) -> dict:
+    return {
+        "id": "resp_stub",
+        "object": "response",
+        "created_at": 0,
+        "model": "gpt-4.1-mini",
+        "status": "completed",
+        "output": [
+            {
+                "id": "msg_stub",
+                "type": "message",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+    }
+
+
+@pytest_asyncio.fixture
+async def stub_openai(monkeypatch):
+    """Локальный стаб Responses API: отвечает эхом последнего user-сообщения."""
+    stats = {"active": 0, "max_active": 0, "calls": 0}
+
+    async def handle(request: web.Request) -> web.Response:
+        payload = await request.json()
+        stats["active"] += 1
+        stats["calls"] += 1
+        stats["max_active"] = max(stats["max_active"], stats["active"])
+        await asyncio.sleep(0.05)
+        stats["active"] -= 1
+        user_text = payload["input"][-1]["content"]
+        return web.json_response(_make_response(f"echo: {user_text}"))
+
+    app = web.Application()
+    app.router.add_post("/v1/responses", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv(gpt_utils.BASE_URL_ENV, f"http://127.0.0.1:{port}/v1")
+    monkeypatch.setenv(gpt_utils.MAX_CONCURRENCY_ENV, "2")
+    await gpt_utils.close_gpt_client()
+
+    yield stats
+
+    await gpt_utils.close_gpt_client()
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_ask_gpt_returns_reply_and_history(stub_openai):
+    reply, history = await gpt_utils.ask_gpt_with_history("Привет", dialog_history=[])
+
+    assert reply == "echo: Привет"
+    assert history == [
+        {"role": "user", "content": "Привет"},
+        {"role": "assistant", "content": "echo: Привет"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ask_gpt_concurrency_is_bounded(stub_openai):
+    results = await asyncio.gather(
+        *(gpt_utils.ask_gpt_with_history(f"q{i}") for i in range(6))
+    )
+
+    assert [reply for reply, _ in results] == [f"echo: q{i}" for i in range(6)]
+    assert stub_openai["max_active"] <= 2
+    metrics = gpt_utils.get_gpt_metrics()
+    assert metrics["in_flight"] == 0
+    assert metrics["waiting"] == 0
+    assert metrics["max_waiting"] >= 4
+
+
+@pytest_asyncio.fixture
+async def cache_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'gpt_cache.db'}")
+    engine, session_maker = await db_manager.setup_database()
+    await db_manager.init_db(engine)
+    monkeypatch.setattr(response_cache, "_metrics", dict.fromkeys(response_cache._metrics, 0))
+
+    yield session_maker
+
+    await db_manager.close_database(engine)
+    monkeypatch.setattr(db_manager, "session_maker", None)
+    monkeypatch.setattr(db_manager, "engine", None)
+
+
+@pytest.mark.asyncio
+async def test_cached_prompt_hits_gpt_once(stub_openai, cache_db):
+    first, _ = await gpt_utils.ask_gpt_with_history("Теория к заданию", dialog_history=[], use_cache=True)
+    second, history = await gpt_utils.ask_gpt_with_history("Теория к заданию", dialog_history=[], use_cache=True)
+    other_temperature, _ = await gpt_utils.ask_gpt_with_history("Теория к заданию", temperature=0.2, use_cache=True)
+
+    assert first == second == other_temperature == "echo: Теория к заданию"
+    assert history[-1] == {"role": "assistant", "content": first}
+    assert stub_openai["calls"] == 2
+    metrics = response_cache.get_cache_metrics()
+    assert (metrics["hits"], metrics["misses"], metrics["stores"]) == (1, 2, 2)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_prompts_share_one_call(stub_openai, cache_db):
+    results = await asyncio.gather(
+        *(gpt_utils.ask_gpt_with_history("Одна теория", use_cache=True) for _ in range(5))
+    )
+
+    assert {reply for reply, _ in results} == {"echo: Одна теория"}
+    assert stub_openai["calls"] == 1
+    assert response_cache.get_cache_metrics()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_waiters(cache_db):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return f"ответ {len(calls)}"
+
+    leader = asyncio.create_task(response_cache.cached_reply("k", "m", compute))
+    await asyncio.sleep(0.01)
+    waiters = [asyncio.create_task(response_cache.cached_reply("k", "m", compute)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert await asyncio.gather(*waiters) == ["ответ 2"] * 3
+    assert len(calls) == 2
+    assert response_cache.get_cache_metrics()["leader_cancelled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_and_least_recent_entries_are_evicted(cache_db):
+    now = datetime.utcnow()
+    async with cache_db() as session:
+        await db_manager.save_gpt_cached_response(session, "old", "m", "a", now - timedelta(seconds=1))
+        for key in ("k1", "k2", "k3"):
+            await db_manager.save_gpt_cached_response(session, key, "m", key, now + timedelta(days=1))
+        assert await db_manager.get_gpt_cached_response(session, "old") is None
+        await db_manager.get_gpt_cached_response(session, "k1")  # k1 — недавно использован
+
+        assert await db_manager.evict_gpt_cached_responses(session, max_entries=2) == 2
+        assert await db_manager.get_gpt_cached_response(session, "k1") == "k1"
+        assert await db_manager.get_gpt_cached_response(session, "k2") is None
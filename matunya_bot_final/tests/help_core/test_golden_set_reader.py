@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import pytest
+
+from matunya_bot_final.help_core.knowledge import golden_set_reader
+from matunya_bot_final.help_core.knowledge.golden_set_reader import GoldenSetStore
+
+ROWS = [
+    ("11", "match_signs_a_c", "Парабола — как улыбка"),
+    ("11", "match_signs_k_b", "Прямая — как горка"),
+    ("8", "powers", "Степень — это повтор"),
+]
+
+
+@pytest.fixture
+def sheet(monkeypatch):
+    """Поддельная таблица: считает запросы, умеет падать."""
+    state = {"calls": 0, "fail": False}
+
+    def fetch():
+        state["calls"] += 1
+        if state["fail"]:
+            raise RuntimeError("503 Service Unavailable")
+        return list(ROWS)
+
+    monkeypatch.setenv(golden_set_reader.SERVICE_ACCOUNT_ENV, "{}")
+    monkeypatch.setenv(golden_set_reader.SHEET_URL_ENV, "https://example.invalid/sheet")
+    monkeypatch.setattr(golden_set_reader, "_fetch_rows_sync", fetch)
+    return state
+
+
+async def _settle(store: GoldenSetStore) -> None:
+    if store._refresh_task is not None:
+        await store._refresh_task
+
+
+@pytest.mark.asyncio
+async def test_cold_miss_returns_immediately_then_serves_snapshot(sheet, tmp_path):
+    store = GoldenSetStore(mirror_path=tmp_path / "snapshot.json", ttl=3600)
+
+    assert store.get("match_signs_a_c", 11) == []
+    await _settle(store)
+
+    assert store.get("match_signs_a_c", 11) == ["Парабола — как улыбка"]
+    assert len(store.get("", 11)) == 2
+    assert store.get("no_such_subtype", 16) == []
+    assert sheet["calls"] == 1  # одна выгрузка на все подтипы, пустые ответы — без запросов
+
+
+@pytest.mark.asyncio
+async def test_stale_snapshot_is_served_while_revalidating(sheet, tmp_path):
+    store = GoldenSetStore(mirror_path=tmp_path / "snapshot.json", ttl=0)
+    await store.refresh()
+
+    assert store.get("powers", 8) == ["Степень — это повтор"]
+    assert store.metrics["stale_served"] == 1
+    await _settle(store)
+    assert sheet["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_mirror_is_used_on_cold_start_without_google(sheet, tmp_path, monkeypatch):
+    mirror = tmp_path / "snapshot.json"
+    await GoldenSetStore(mirror_path=mirror).refresh()
+    assert json.loads(mirror.read_text(encoding="utf-8"))["rows"]
+
+    monkeypatch.delenv(golden_set_reader.SERVICE_ACCOUNT_ENV)
+    store = GoldenSetStore(mirror_path=mirror, ttl=3600)
+    assert store.get("match_signs_k_b", 11) == ["Прямая — как горка"]
+    assert sheet["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_breaker_stops_calling_failing_sheet(sheet, tmp_path, monkeypatch):
+    monkeypatch.setenv(golden_set_reader.BREAKER_THRESHOLD_ENV, "2")
+    monkeypatch.setenv(golden_set_reader.BREAKER_COOLDOWN_ENV, "300")
+    store = GoldenSetStore(mirror_path=tmp_path / "snapshot.json", ttl=3600)
+    sheet["fail"] = True
+
+    for _ in range(5):
+        assert store.get("match_signs_a_c", 11) == []
+        await _settle(store)
+        await asyncio.sleep(0)
+
+    assert sheet["calls"] == 2
+    assert store.breaker.state == "open"
+    assert store.stats()["breaker_skips"] == 3
+
+    store.breaker.opened_at -= 301  # cooldown прошёл: одна пробная попытка
+    sheet["fail"] = False
+    store.get("match_signs_a_c", 11)
+    await _settle(store)
+    assert store.breaker.state == "closed"
+    assert store.get("match_signs_a_c", 11) == ["Парабола — как улыбка"]
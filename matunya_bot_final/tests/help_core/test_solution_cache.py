@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import os
+import sys
+import types
+
+import pytest
+
+from matunya_bot_final.help_core import solution_cache
+from matunya_bot_final.help_core.dispatchers.common import call_dynamic_solver
+from matunya_bot_final.loader import TASKS_DB
+
+SOLVER_MODULE = "matunya_bot_final.help_core.solvers.task_99.counting_solver"
+TASK = {"id": "t99_1", "subtype": "counting", "text": "2+2"}
+
+
+@pytest.fixture
+def counting_solver(tmp_path, monkeypatch):
+    calls = []
+
+    def solve(task_data):
+        calls.append(task_data["id"])
+        return {"answer": 4, "steps": ["2+2=4"]}
+
+    module = types.ModuleType(SOLVER_MODULE)
+    module.solve = solve
+    module.SOLVER_VERSION = "v1"
+    monkeypatch.setitem(sys.modules, SOLVER_MODULE, module)
+    monkeypatch.setitem(TASKS_DB, "99", [TASK])
+    monkeypatch.setattr(solution_cache, "SOLUTION_CACHE", solution_cache.SolutionCache(8, tmp_path))
+    return module, calls
+
+
+@pytest.mark.asyncio
+async def test_stored_task_is_solved_once(counting_solver):
+    _, calls = counting_solver
+
+    first = await call_dynamic_solver("99", "counting", dict(TASK))
+    first["answer"] = "испорчено"
+    second = await call_dynamic_solver("99", "counting", {**TASK, "theme_key": "extra"})
+
+    assert calls == ["t99_1"]
+    assert second == {"answer": 4, "steps": ["2+2=4"]}
+    assert solution_cache.get_solution_cache_metrics()["memory_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_survives_restart_and_version_bump(counting_solver, tmp_path, monkeypatch):
+    module, calls = counting_solver
+    await call_dynamic_solver("99", "counting", dict(TASK))
+
+    monkeypatch.setattr(solution_cache, "SOLUTION_CACHE", solution_cache.SolutionCache(8, tmp_path))
+    await call_dynamic_solver("99", "counting", dict(TASK))
+    assert calls == ["t99_1"]
+    assert solution_cache.get_solution_cache_metrics()["disk_hits"] == 1
+
+    module.SOLVER_VERSION = "v2"
+    await call_dynamic_solver("99", "counting", dict(TASK))
+    assert calls == ["t99_1", "t99_1"]
+
+
+@pytest.mark.asyncio
+async def test_changed_or_generated_task_is_not_cached(counting_solver):
+    _, calls = counting_solver
+
+    await call_dynamic_solver("99", "counting", {**TASK, "text": "3+3"})
+    await call_dynamic_solver("99", "counting", {**TASK, "id": "generated"})
+
+    assert len(calls) == 2
+    assert solution_cache.get_solution_cache_metrics()["uncacheable"] == 2
+
+
+@pytest.mark.asyncio
+async def test_humanized_text_is_cached(counting_solver):
+    rendered = []
+
+    def humanize(core):
+        rendered.append(core)
+        return f"Ответ: {core['answer']}"
+
+    for _ in range(3):
+        text = await solution_cache.humanize_cached(humanize, {"answer": 4}, 99, "counting", dict(TASK))
+
+    assert text == "Ответ: 4"
+    assert len(rendered) == 1
+
+
+@pytest.fixture
+def store_99(counting_solver, tmp_path, monkeypatch):
+    humanizer = types.ModuleType("matunya_bot_final.tests.fake_humanizer_99")
+    humanizer.humanize = lambda core: f"Ответ: {core['answer']}"
+    monkeypatch.setitem(sys.modules, humanizer.__name__, humanizer)
+    monkeypatch.setitem(
+        solution_cache.WARMUP_PLAN,
+        "99",
+        (lambda task: task["subtype"], lambda task, subtype: task, f"{humanizer.__name__}:humanize"),
+    )
+
+    store_path = tmp_path / "tasks_99.json"
+    store_path.write_text('[{"id": "t99_1"}]', encoding="utf-8")
+    monkeypatch.setitem(solution_cache.TASK_FILES, "99", store_path)
+    return store_path
+
+
+@pytest.mark.asyncio
+async def test_build_sidecar_answers_without_solving(counting_solver, store_99):
+    _, calls = counting_solver
+
+    entries, errors = solution_cache.precompute_solutions("99", [dict(TASK)])
+    assert errors == []
+    assert solution_cache.write_sidecar("99", entries) == store_99.with_name("tasks_99.solutions.json")
+    calls.clear()
+
+    solution = await call_dynamic_solver("99", "counting", dict(TASK))
+    text = await solution_cache.humanize_cached(lambda core: "не вызывается", solution, 99, "counting", dict(TASK))
+
+    assert calls == []
+    assert solution == {"answer": 4, "steps": ["2+2=4"]}
+    assert text == "Ответ: 4"
+    assert solution_cache.get_solution_cache_metrics()["sidecar_hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_sidecar_is_ignored_after_store_or_solver_change(counting_solver, store_99):
+    module, calls = counting_solver
+    entries, _ = solution_cache.precompute_solutions("99", [dict(TASK)])
+    solution_cache.write_sidecar("99", entries)
+    calls.clear()
+
+    module.SOLVER_VERSION = "v2"
+    await call_dynamic_solver("99", "counting", dict(TASK))
+    assert calls == ["t99_1"]
+
+    module.SOLVER_VERSION = "v1"
+    store_99.write_text('[{"id": "t99_1"}, {"id": "t99_2"}]', encoding="utf-8")
+    await call_dynamic_solver("99", "counting", dict(TASK))
+    assert calls == ["t99_1", "t99_1"]
+    assert solution_cache.get_solution_cache_metrics()["sidecar_hits"] == 0
+
+
+def test_helper_edit_changes_solver_version(tmp_path, monkeypatch):
+    helper_name = "matunya_bot_final.help_core.solvers.task_99.helper_formatter"
+    helper_path = tmp_path / "helper_formatter.py"
+    helper_path.write_text("def fmt(x):\n    return str(x)\n", encoding="utf-8")
+    helper = types.ModuleType(helper_name)
+    helper.__file__ = str(helper_path)
+    exec(helper_path.read_text(encoding="utf-8"), helper.__dict__)
+
+    solver_path = tmp_path / "plain_solver.py"
+    solver_path.write_text("def solve(task):\n    return fmt(task)\n", encoding="utf-8")
+    solver = types.ModuleType("matunya_bot_final.help_core.solvers.task_99.plain_solver")
+    solver.__file__ = str(solver_path)
+    solver.fmt = helper.fmt
+    monkeypatch.setitem(sys.modules, helper_name, helper)
+    monkeypatch.setitem(sys.modules, solver.__name__, solver)
+
+    before = solution_cache.code_version(solver)
+    helper_path.write_text("def fmt(x):\n    return f'<b>{x}</b>'\n", encoding="utf-8")
+    os.utime(helper_path, ns=(0, 10**9))
+
+    after_edit = solution_cache.code_version(solver)
+    assert after_edit != before
+
+    monkeypatch.setattr(solution_cache, "CACHE_VERSION", solution_cache.CACHE_VERSION + 1)
+    assert solution_cache.code_version(solver) != after_edit
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+import types
+
+import pytest
+
+from matunya_bot_final.help_core import solve_pool
+from matunya_bot_final.help_core.dispatchers.common import call_dynamic_solver
+
+SLOW_MODULE = "matunya_bot_final.help_core.solvers.task_99.slow_solver"
+
+
+def _slow_solve(task_data):
+    time.sleep(task_data["sleep"])
+    return {"answer": task_data["answer"]}
+
+
+async def _busy_async_solve(task_data):
+    # как решатели 11/16/20: async def без единого await
+    deadline = time.perf_counter() + task_data["busy"]
+    while time.perf_counter() < deadline:
+        pass
+    return {"answer": task_data["answer"]}
+
+
+@pytest.fixture
+def slow_solver(monkeypatch):
+    module = types.ModuleType(SLOW_MODULE)
+    module.solve = _slow_solve
+    monkeypatch.setitem(sys.modules, SLOW_MODULE, module)
+    monkeypatch.setitem(solve_pool.SOLVER_TIMEOUTS, "99", 0.3)
+    monkeypatch.setattr(solve_pool, "_latencies", {})
+    yield
+    solve_pool.shutdown_solver_pool()
+
+
+@pytest.mark.asyncio
+async def test_solve_runs_off_the_event_loop(slow_solver):
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.create_task(ticker())
+    result = await call_dynamic_solver("99", "slow", {"sleep": 0.15, "answer": 42})
+    ticker_task.cancel()
+
+    assert result == {"answer": 42}
+    assert ticks >= 5
+    metrics = solve_pool.get_solver_metrics()["solve:99/slow"]
+    assert metrics["count"] == 1
+    assert metrics["max_seconds"] >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_slow_solver_times_out(slow_solver):
+    result = await call_dynamic_solver("99", "slow", {"sleep": 1.0, "answer": 42})
+
+    assert result is None
+    assert solve_pool.get_solver_metrics()["solve:99/slow"]["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_busy_async_solver_times_out_without_blocking_loop(slow_solver):
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    with pytest.raises(solve_pool.SolveTimeoutError):
+        await solve_pool.run_in_pool(
+            "solve", _busy_async_solve, {"busy": 1.0, "answer": 42}, task_type="99", task_subtype="busy", timeout=0.3
+        )
+    waited = time.perf_counter() - started
+    ticker_task.cancel()
+
+    assert waited < 0.8
+    assert ticks >= 10
+    assert solve_pool.get_solver_metrics()["solve:99/busy"]["timeouts"] == 1
+
+    result = await solve_pool.run_in_pool(
+        "solve", _busy_async_solve, {"busy": 0.05, "answer": 7}, task_type="99", task_subtype="busy"
+    )
+    assert result == {"answer": 7}
+
+
+@pytest.mark.asyncio
+async def test_humanizer_latency_is_recorded(slow_solver):
+    text = await solve_pool.run_humanizer(lambda core: f"ответ {core['answer']}", {"answer": 7}, 99, "slow")
+
+    assert text == "ответ 7"
+    assert solve_pool.get_solver_metrics()["humanize:99/slow"]["count"] == 1
+
+
+def test_per_solver_timeout_lookup(monkeypatch):
+    monkeypatch.setitem(solve_pool.SOLVER_TIMEOUTS, "6/fractions", 2.0)
+    monkeypatch.setenv(solve_pool.TIMEOUT_ENV, "9")
+
+    assert solve_pool.get_solver_timeout("6", "fractions") == 2.0
+    assert solve_pool.get_solver_timeout("16", "any") == solve_pool.SOLVER_TIMEOUTS["16"]
+    assert solve_pool.get_solver_timeout("20", "any") == 9.0
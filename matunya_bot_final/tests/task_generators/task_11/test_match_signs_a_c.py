@@ -137,4 +137,19 @@ def test_all_images_are_generated():
     assert len(empty_files) == 0, \
         f"Следующие файлы пустые ({len(empty_files)} шт.):\n" + "\n".join(empty_files[:5])
     
-    print(f"✅ Все проверки пройдены: {len(all_graph_paths)} файлов созданы и уникальны")
\ No newline at end of file
+    print(f"✅ Все проверки пройдены: {len(all_graph_paths)} файлов созданы и уникальны")
+
+def test_graphs_are_composed_into_one_grid():
+    """
+    Тест 5: Все три графика склеены в одну картинку — одна отправка в Telegram.
+    """
+    from PIL import Image
+    from matunya_bot_final.utils.visuals.plot_generator import GRID_CELL_PX
+
+    task = generate_task_11_match_signs_a_c()
+    grid = Path(task["source_plot"]["params"]["grid"])
+
+    assert grid.exists()
+    with Image.open(grid) as image:
+        assert image.width > 3 * GRID_CELL_PX
+        assert image.height < 2 * GRID_CELL_PX
@@ -3,7 +3,13 @@ import inspect
 import ast
 import pytest
 import re
-from matunya_bot_final.task_generators.task_12.task_12_generator import generate_task_12_by_subtype, GENERATOR_MAP
+import random
+from matunya_bot_final.task_generators.task_12.task_12_generator import (
+    GENERATOR_MAP,
+    _TRIANGLE_AH_DIVISORS,
+    generate_task_12_batch,
+    generate_task_12_by_subtype,
+)
 from matunya_bot_final.task_generators.task_12.task_12_validator import validator_map, validate_task
 
 # ─────────────────────────────────────────────────────────────
@@ -68,7 +74,32 @@ def test_constants_usage():
     assert "G" in gen_consts or "G" in val_consts, "Нет использования G в коде"
 
 # ─────────────────────────────────────────────────────────────
-# 4. Удобный запуск для отладки
+# 4. Пакетная генерация: воспроизводимость и корректность
+# ─────────────────────────────────────────────────────────────
+def test_batch_is_reproducible_and_valid():
+    random.seed(123)
+    expected_global = random.random()
+    random.seed(123)
+
+    for subtype in GENERATOR_MAP:
+        batch = generate_task_12_batch(subtype, 10, seed=f"7:{subtype}")
+        assert batch == generate_task_12_batch(subtype, 10, seed=f"7:{subtype}")
+        assert all(task["subtype"] == subtype and validate_task(task) for task in batch)
+
+    # Пачки не сдвигают общий генератор random
+    assert random.random() == expected_global
+
+
+def test_triangle_ah_table_covers_only_integer_answers():
+    assert 149 not in _TRIANGLE_AH_DIVISORS and 150 in _TRIANGLE_AH_DIVISORS
+    assert all((2 * S) % d == 0 and 5 <= d <= 40 for S, ds in _TRIANGLE_AH_DIVISORS.items() for d in ds)
+
+    batch = generate_task_12_batch("area_triangle_ah", 300, seed=1)
+    assert {next(iter(task["hidden_params"])) for task in batch} == {"_hidden_S", "_hidden_a", "_hidden_h"}
+
+
+# ─────────────────────────────────────────────────────────────
+# 5. Удобный запуск для отладки
 # ─────────────────────────────────────────────────────────────
 if __name__ == "__main__":
     asyncio.run(test_generator_vs_validator())
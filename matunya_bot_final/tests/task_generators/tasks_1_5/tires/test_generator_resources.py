@@ -0,0 +1,66 @@
+import json
+
+import pytest
+import pytest_asyncio
+
+from matunya_bot_final.task_generators.tasks_1_5 import generator as tasks_1_5_generator
+from matunya_bot_final.task_generators.tasks_1_5.generator import TaskGenerator, compile_template
+from matunya_bot_final.utils import db_manager
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'tasks.db'}")
+    engine, maker = await db_manager.setup_database()
+    await db_manager.init_db(engine)
+    yield maker
+    await db_manager.close_database(engine)
+    db_manager.invalidate_skill_type_cache()
+    monkeypatch.setattr(db_manager, "session_maker", None)
+    monkeypatch.setattr(db_manager, "engine", None)
+
+
+def test_template_is_compiled_once_with_requirements():
+    compiled = compile_template("Шину {tire_1} заменили на {tire_2} у {veh_gen}.")
+
+    assert compiled is compile_template("Шину {tire_1} заменили на {tire_2} у {veh_gen}.")
+    assert compiled.requirements == {"tire_1", "tire_2", "veh_gen"}
+    assert compiled.render({"tire_1": "205/55 R16"}) == (
+        "Шину 205/55 R16 заменили на [ОТСУТСТВУЕТ:tire_2] у [ОТСУТСТВУЕТ:veh_gen]."
+    )
+    assert compile_template("Цена $price руб.").requirements == {"price"}
+
+
+def test_generic_question_types_keep_every_template_compatible():
+    # q1/q2 выбираются своими ветками; остальные — по совместимости с сюжетом.
+    # До разбора {var}-плейсхолдеров совместимыми считались все шаблоны —
+    # выбор не должен тихо схлопнуться до questions[q][0].
+    resources = tasks_1_5_generator.get_subtype_resources("tires")
+    config = resources.config
+    generic = [q for q in config.QUESTION_KEYS if q not in ("q1", "q2")] + config.Q5_ALTERNATIVES
+
+    for plot in resources.plots:
+        for q_type in generic:
+            assert plot.compatible_questions[q_type] == resources.questions[q_type], (plot.path.name, q_type)
+
+
+@pytest.mark.asyncio
+async def test_package_generation_reads_nothing_from_disk(session_maker, monkeypatch):
+    tasks_1_5_generator.clear_subtype_resources()
+    first = TaskGenerator("tires", session_maker)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("ресурсы должны браться из памяти")
+
+    monkeypatch.setattr(json, "load", fail)
+    second = TaskGenerator("tires", session_maker)
+    assert second.resources is first.resources
+
+    pristine = json.dumps([dict(plot.data) for plot in first.resources.plots], sort_keys=True)
+    for _ in range(5):
+        package = await second.generate_task_package()
+        assert len(package["tasks"]) == 5
+        assert not any("ОТСУТСТВУЕТ" in task["text"] for task in package["tasks"])
+
+    # пакет правит свою копию сюжета, общие ресурсы остаются нетронутыми
+    assert json.dumps([dict(plot.data) for plot in first.resources.plots], sort_keys=True) == pristine
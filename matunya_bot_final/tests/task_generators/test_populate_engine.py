@@ -0,0 +1,161 @@
+import json
+import random
+from functools import partial
+
+import pytest
+
+from pathlib import Path
+
+from matunya_bot_final.scripts.populate.populate_engine import (
+    PopulateJob,
+    content_hash,
+    even_quotas,
+    journal_path,
+    populate,
+)
+
+
+def _generate_small():
+    a = random.randint(1, 12)
+    pattern = "even" if a % 2 == 0 else "odd"
+    return {
+        "id": f"t_{random.getrandbits(32):08x}",
+        "subtype": "toy",
+        "question_text": f"Реши:  x + {a} = {2 * a}",
+        "answer": [str(a)],
+        "variables": {"solution_pattern": pattern},
+    }
+
+
+def _validate_not_seven(task):
+    if task["answer"] == ["7"]:
+        raise ValueError("семёрку не берём")
+
+
+def _validate_tuple(task):
+    return task["answer"] != ["5"], ["пятёрку не берём"]
+
+
+def _generate_with_picture(picture_dir):
+    # как задание 11: случайные имена картинок и id, мало различных задач
+    k = random.randint(1, 4)
+    name = f"{random.getrandbits(24):06x}"
+    picture = picture_dir / f"{name}.png"
+    picture.write_bytes(b"png")
+    return {"id": f"11_{name}", "coeffs": {"k": k}, "answer": [str(k)], "graphs": [str(picture)]}
+
+
+def _hash_without_pictures(task):
+    return content_hash({"coeffs": task["coeffs"], "answer": task["answer"]})
+
+
+def _remove_pictures(task):
+    for picture in task["graphs"]:
+        Path(picture).unlink(missing_ok=True)
+
+
+def _validate_not_four(task):
+    return task["answer"] != ["4"]
+
+
+def _job(target, **kwargs):
+    return PopulateJob(name="toy", generate=_generate_small, target=target, **kwargs)
+
+
+def test_content_hash_ignores_id_and_whitespace():
+    task = {"id": "a", "question_text": "x + 1 = 2", "answer": ["1"]}
+    same = {"id": "b", "question_text": "x+1  =\n2", "answer": ["1"]}
+    assert content_hash(task) == content_hash(same)
+    assert content_hash(task) != content_hash({**task, "answer": ["2"]})
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_dedupes_validates_respects_quotas_and_keeps_other_records(tmp_path, workers):
+    path = tmp_path / "tasks.json"
+    other = {"id": "other_1", "subtype": "other", "question_text": "?"}
+    stale = {"id": "toy_old", "subtype": "toy", "question_text": "старое"}
+    path.write_text(json.dumps([other, stale], ensure_ascii=False), encoding="utf-8")
+
+    job = _job(
+        8,
+        validate=_validate_not_seven,
+        replaces=lambda task: task.get("subtype") == "toy",
+        quotas=even_quotas(8, ["even", "odd"]),
+    )
+    results = populate(path, [job], workers=workers, seed=5, sort_key=lambda task: task["id"])
+
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    toys = [task for task in saved if task["subtype"] == "toy"]
+    assert other in saved and stale not in saved
+    assert len(toys) == 8
+    assert len({content_hash(task) for task in toys}) == 8
+    assert all(task["answer"] != ["7"] for task in toys)
+    assert results["toy"].patterns == {"even": 4, "odd": 4}
+    assert not journal_path(path, job).exists()
+
+
+def test_same_seed_same_workers_is_reproducible(tmp_path):
+    first = populate(tmp_path / "a.json", [_job(6, validate=_validate_tuple)], workers=2, seed="s")
+    second = populate(tmp_path / "b.json", [_job(6, validate=_validate_tuple)], workers=2, seed="s")
+    assert first["toy"].records == second["toy"].records
+    assert all(task["answer"] != ["5"] for task in first["toy"].records)
+
+
+def test_resumes_from_journal_after_interruption(tmp_path):
+    path = tmp_path / "tasks.json"
+    job = _job(5)
+    journal = journal_path(path, job)
+    done = [
+        {"id": f"j{i}", "subtype": "toy", "question_text": f"x = {i}", "answer": [str(i)],
+         "variables": {"solution_pattern": "odd"}}
+        for i in (101, 103)
+    ]
+    lines = [json.dumps({"hash": content_hash(t), "pattern": "odd", "record": t}, ensure_ascii=False) for t in done]
+    journal.write_text("\n".join(lines) + '\n{"hash": "обрыв', encoding="utf-8")
+
+    results = populate(path, [job], workers=1, seed=1)
+
+    assert results["toy"].resumed == 2
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert len(saved) == 5 and saved[:2] == done
+    assert not journal.exists()
+
+
+def test_shortage_keeps_database_and_journal(tmp_path):
+    path = tmp_path / "tasks.json"
+    path.write_text("[]", encoding="utf-8")
+    job = _job(30, max_attempts_factor=3)  # различных задач всего 12
+
+    with pytest.raises(RuntimeError, match="Not enough unique tasks"):
+        populate(path, [job], workers=1, seed=1)
+
+    assert path.read_text(encoding="utf-8") == "[]"
+    assert len(journal_path(path, job).read_text(encoding="utf-8").splitlines()) == 12
+
+
+def _picture_job(picture_dir):
+    return PopulateJob(
+        name="graphs",
+        generate=partial(_generate_with_picture, picture_dir),
+        target=3,
+        validate=_validate_not_four,
+        hash_of=_hash_without_pictures,
+        discard=_remove_pictures,
+    )
+
+
+def test_job_hash_dedupes_random_file_names_and_cleans_leftovers(tmp_path):
+    pictures = tmp_path / "temp"
+    pictures.mkdir()
+
+    result = populate(tmp_path / "tasks.json", [_picture_job(pictures)], workers=1, seed=4)["graphs"]
+
+    assert sorted(task["answer"] for task in result.records) == [["1"], ["2"], ["3"]]
+    assert result.duplicates > 0 and result.rejected > 0
+    kept = {picture for task in result.records for picture in task["graphs"]}
+    assert {str(path) for path in pictures.iterdir()} == kept
+
+    again = tmp_path / "again"
+    again.mkdir()
+    repeated = populate(tmp_path / "again.json", [_picture_job(again)], workers=1, seed=4)["graphs"]
+    assert [task["id"] for task in repeated.records] == [task["id"] for task in result.records]
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+
+from matunya_bot_final.utils import analytics_core, analytics_rollups, db_manager
+from matunya_bot_final.utils.models import AnswerLog, SkillType, Task, User
+
+
+@pytest_asyncio.fixture
+async def analytics_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'analytics.db'}")
+    engine, session_maker = await db_manager.setup_database()
+    await db_manager.init_db(engine)
+
+    now = datetime.utcnow()
+    async with session_maker() as session:
+        session.add_all([
+            User(id=1, telegram_id=100, name="Аня"),
+            SkillType(id=1, source_id="paper_q1", name="Форматы", task_number="1"),
+            Task(id=1, skill_type_id=1, theme="Бумага", text="…", answer="1"),
+            AnswerLog(user_id=1, task_id=1, is_correct=True, help_used=True, timestamp=now),
+            AnswerLog(user_id=1, task_id=1, is_correct=False, timestamp=now - timedelta(days=1)),
+            AnswerLog(user_id=1, task_id=1, is_correct=True, timestamp=now - timedelta(days=30)),
+        ])
+        await session.commit()
+        # логи вставлены напрямую, мимо db_manager, — сводки строим пересчетом
+        await analytics_rollups.rebuild_rollups(session)
+
+    yield session_maker
+
+    await db_manager.close_database(engine)
+    monkeypatch.setattr(db_manager, "session_maker", None)
+    monkeypatch.setattr(db_manager, "engine", None)
+
+
+@pytest.mark.asyncio
+async def test_window_queries_count_only_recent_answers(analytics_db):
+    async with analytics_db() as session:
+        skills = await analytics_core.get_user_performance_by_skills(session, 1)
+        help_stats = await analytics_core.get_help_usage_stats(session, 1)
+
+    assert skills == {"Форматы": {"correct": 1, "total": 2, "success_rate": 0.5, "task_number": "1"}}
+    assert help_stats["total_answers"] == 2
+    assert help_stats["answers_with_help"] == 1
+
+
+@pytest.mark.asyncio
+async def test_user_window_uses_composite_index(analytics_db):
+    async with analytics_db() as session:
+        plan = await session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT count(id) FROM answer_logs "
+            "WHERE user_id = 1 AND timestamp >= '2026-01-01'"
+        ))
+        details = " ".join(str(row[-1]) for row in plan)
+
+    assert "ix_answer_logs_user_id_timestamp" in details
+
+
+@pytest.mark.asyncio
+async def test_logged_answers_update_rollups_incrementally(analytics_db):
+    async with analytics_db() as session:
+        await db_manager.log_answer(session, user_id=1, task_id=1, is_correct=True, help_used=True)
+        await db_manager.log_activity(session, user_id=1, activity_type="theme_pack_start", pack_type="theme", pack_theme="Бумага")
+        started = await db_manager.start_session(session, user_id=1)
+        await db_manager.end_session(session, started.id, tasks_attempted=4)
+        await db_manager.end_session(session, started.id, tasks_attempted=4)
+
+        themes = await analytics_core.get_user_performance_by_themes(session, 1)
+        help_stats = await analytics_core.get_help_usage_stats(session, 1)
+        packs = await analytics_core.get_pack_usage_stats(session, 1)
+        sessions = await analytics_core.get_session_patterns(session, 1)
+
+    assert themes["Бумага"]["total"] == 3
+    assert themes["Бумага"]["correct"] == 2
+    assert help_stats["answers_with_help"] == 2
+    assert packs["theme_packs"] == {"Бумага": 1}
+    assert sessions["total_sessions"] == 1 and sessions["total_tasks"] == 4
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_incremental_rollups(analytics_db):
+    async with analytics_db() as session:
+        await db_manager.log_answer(session, user_id=1, task_id=1, is_correct=False, is_timed=True)
+        incremental = await analytics_core.get_user_performance_by_skills(session, 1, days_back=60)
+        consistency = await analytics_core.calculate_consistency_score(session, 1, days_back=60)
+
+        counts = await analytics_rollups.rebuild_rollups(session, user_id=1)
+        rebuilt = await analytics_core.get_user_performance_by_skills(session, 1, days_back=60)
+
+    assert incremental == rebuilt
+    assert rebuilt["Форматы"]["total"] == 4
+    assert consistency == round(3 / 60, 3)
+    assert counts["user_daily_answer_stats"] == 3
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from matunya_bot_final.utils import analytics_core, db_manager
+from matunya_bot_final.utils.analytics_frames import compute_ai_quality
+from matunya_bot_final.utils.analytics_reports import get_ai_quality_report
+from matunya_bot_final.utils.models import AIInteractionLog, User
+
+
+@pytest_asyncio.fixture
+async def ai_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'ai.db'}")
+    engine, session_maker = await db_manager.setup_database()
+    await db_manager.init_db(engine)
+
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    logs = [
+        AIInteractionLog(
+            user_id=1,
+            question_text="Почему так?",
+            task_theme=rng.choice(["Шины", "Печи", None]),
+            question_category=rng.choice(["concept", "step", None]),
+            follow_up_count=rng.randint(0, 3),
+            is_repeat_question=rng.random() < 0.2,
+            used_theory_after=rng.random() < 0.1,
+            solved_task_after=rng.choice([True, False, None]),
+            time_to_solution=rng.choice([None, rng.randint(5, 600)]),
+            abandoned_task=rng.random() < 0.1,
+            timestamp=now - timedelta(days=rng.choice([0, 1, 2, 30])),
+        )
+        for _ in range(600)
+    ]
+    async with session_maker() as session:
+        session.add(User(id=1, telegram_id=100, name="Аня"))
+        session.add_all(logs)
+        await session.commit()
+
+    yield session_maker, logs
+
+    await db_manager.close_database(engine)
+    monkeypatch.setattr(db_manager, "session_maker", None)
+    monkeypatch.setattr(db_manager, "engine", None)
+
+
+@pytest.mark.asyncio
+async def test_columnar_metrics_match_sql_aggregates(ai_db):
+    session_maker, _ = ai_db
+    async with session_maker() as session:
+        quality = await compute_ai_quality(session, chunk_size=7)
+        overall = await analytics_core.get_ai_interaction_metrics(session)
+        themes = await analytics_core.get_ai_performance_by_themes(session)
+
+    assert {key: quality["overall"][key] for key in overall} == overall
+    assert {theme: {key: stats[key] for key in themes[theme]} for theme, stats in quality["themes"].items()} == themes
+    assert sum(stats["interactions"] for stats in quality["categories"].values()) == overall["total_interactions"]
+
+
+@pytest.mark.asyncio
+async def test_time_to_solution_percentiles_are_exact(ai_db):
+    session_maker, logs = ai_db
+    cutoff = datetime.utcnow() - timedelta(days=7)
+    recent = [log for log in logs if log.timestamp >= cutoff and log.time_to_solution is not None]
+
+    async with session_maker() as session:
+        quality = await compute_ai_quality(session)
+
+    expected = np.percentile([log.time_to_solution for log in recent], [50, 90, 95])
+    assert list(quality["overall"]["time_to_solution"].values()) == [round(float(v), 1) for v in expected]
+    tires = [log.time_to_solution for log in recent if log.task_theme == "Шины"]
+    assert quality["themes"]["Шины"]["median_time_to_solution"] == round(float(np.median(tires)), 1)
+
+
+@pytest.mark.asyncio
+async def test_report_uses_columnar_path(ai_db):
+    session_maker, _ = ai_db
+    async with session_maker() as session:
+        report = await get_ai_quality_report(session)
+        empty = await get_ai_quality_report(session, days_back=0)
+
+    assert "p90" in report["overall_metrics"]["time_to_solution"]
+    assert set(report["category_performance"]) == {"concept", "step", "unknown"}
+    assert empty["status"] == "insufficient_data"
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiogram.fsm.storage.base import StorageKey
+
+from matunya_bot_final.loader import TASKS_DB
+from matunya_bot_final.utils import db_manager
+from matunya_bot_final.utils.fsm_storage import SQLiteStorage
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+TASK = {"id": 7, "pattern": "p", "question_text": "Вычислите " + "x" * 300, "answer": "1"}
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'fsm.db'}")
+    monkeypatch.setitem(TASKS_DB, "6", {"tasks": [TASK]})
+    engine, maker = await db_manager.setup_database()
+    await db_manager.init_db(engine)
+
+    yield maker
+
+    await db_manager.close_database(engine)
+    monkeypatch.setattr(db_manager, "session_maker", None)
+    monkeypatch.setattr(db_manager, "engine", None)
+
+
+@pytest.mark.asyncio
+async def test_state_survives_restart(session_maker):
+    storage = SQLiteStorage(session_maker)
+    await storage.set_state(KEY, "TaskState:waiting_for_answer_6")
+    await storage.update_data(KEY, {"current_theme": "fractions", "task_6_data": TASK})
+
+    restarted = SQLiteStorage(session_maker)
+    assert await restarted.get_state(KEY) == "TaskState:waiting_for_answer_6"
+    assert await restarted.get_data(KEY) == {"current_theme": "fractions", "task_6_data": TASK}
+
+
+@pytest.mark.asyncio
+async def test_store_task_is_saved_by_reference(session_maker):
+    storage = SQLiteStorage(session_maker)
+    edited = {**TASK, "theme_key": "fractions"}
+    await storage.set_data(KEY, {"task_6_data": edited})
+
+    metrics = storage.get_metrics()
+    assert metrics["task_refs"] == 1
+    assert metrics["key_sizes"]["task_6_data"]["last"] < 100
+    assert await SQLiteStorage(session_maker).get_data(KEY) == {"task_6_data": edited}
+
+
+@pytest.mark.asyncio
+async def test_updates_within_one_update_are_coalesced(session_maker):
+    storage = SQLiteStorage(session_maker)
+
+    async with storage.coalesce():
+        await storage.set_state(KEY, "S:a")
+        for i in range(5):
+            await storage.update_data(KEY, {f"k{i}": i})
+        assert await storage.get_data(KEY) == {f"k{i}": i for i in range(5)}
+        assert storage.get_metrics()["db_writes"] == 0
+
+    metrics = storage.get_metrics()
+    assert metrics["db_writes"] == 1
+    assert metrics["db_reads"] == 1
+    assert await SQLiteStorage(session_maker).get_state(KEY) == "S:a"
+
+
+@pytest.mark.asyncio
+async def test_clear_removes_record(session_maker):
+    storage = SQLiteStorage(session_maker)
+    await storage.set_state(KEY, "S:a")
+    await storage.update_data(KEY, {"x": 1})
+
+    await storage.set_state(KEY, None)
+    await storage.set_data(KEY, {})
+
+    async with session_maker() as session:
+        assert await db_manager.get_fsm_record(session, storage.key_builder.build(KEY)) is None
+
+
+@pytest.mark.asyncio
+async def test_overlapping_updates_for_one_chat_do_not_lose_writes(session_maker):
+    storage = SQLiteStorage(session_maker)
+    await storage.set_state(KEY, "S:menu")
+    first_started = asyncio.Event()
+    release_first = asyncio.Event()
+
+    async def slow_update():
+        # как диалог с GPT: меняет состояние и долго ждёт ответа
+        async with storage.coalesce():
+            await storage.set_state(KEY, "S:dialog")
+            await storage.update_data(KEY, {"dialog": 1})
+            first_started.set()
+            await release_first.wait()
+            await storage.update_data(KEY, {"messages": [1, 2]})
+
+    async def quick_update():
+        async with storage.coalesce():
+            state = await storage.get_state(KEY)
+            await storage.update_data(KEY, {"button": "back"})
+            return state
+
+    slow = asyncio.create_task(slow_update())
+    await first_started.wait()
+    quick = asyncio.create_task(quick_update())
+    await asyncio.sleep(0.05)
+    assert not quick.done()  # ждёт, пока первый апдейт запишет своё
+
+    release_first.set()
+    await slow
+    assert await quick == "S:dialog"
+
+    restarted = SQLiteStorage(session_maker)
+    assert await restarted.get_state(KEY) == "S:dialog"
+    assert await restarted.get_data(KEY) == {"dialog": 1, "messages": [1, 2], "button": "back"}
+    assert storage.get_metrics()["lock_waits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reference_survives_regenerated_store(session_maker, monkeypatch):
+    storage = SQLiteStorage(session_maker)
+    edited = {**TASK, "theme_key": "fractions"}
+    await storage.set_data(KEY, {"task_6_data": edited})
+
+    # склад перегенерировали: под тем же id теперь другое задание
+    monkeypatch.setitem(TASKS_DB, "6", {"tasks": [{**TASK, "question_text": "Другое задание", "answer": "5"}]})
+
+    restarted = SQLiteStorage(session_maker)
+    assert await restarted.get_data(KEY) == {"task_6_data": edited}
+    assert restarted.get_metrics()["stale_task_refs"] == 1
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.methods import SendMessage
+from aiogram.types import CallbackQuery, Message, Update
+
+from matunya_bot_final.middlewares import (
+    HandlerLatencyMiddleware,
+    TelegramLatencyMiddleware,
+    UpdateLatencyMiddleware,
+)
+from matunya_bot_final.utils import latency_metrics
+from matunya_bot_final.utils.latency_metrics import Histogram, observe, render_prometheus, summary
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics(monkeypatch):
+    monkeypatch.setattr(latency_metrics, "_histograms", {})
+    monkeypatch.setattr(latency_metrics, "_collectors", {})
+
+
+def test_histogram_quantiles_follow_buckets():
+    histogram = Histogram()
+    for _ in range(90):
+        histogram.observe(0.003)
+    for _ in range(10):
+        histogram.observe(0.2)
+
+    assert 0 < histogram.quantile(0.5) <= 0.005
+    assert 0.1 < histogram.quantile(0.95) <= 0.25
+    histogram.observe(120)
+    assert histogram.quantile(1.0) == latency_metrics.BUCKETS[-1]
+
+
+def test_prometheus_text_and_collectors():
+    observe("handler_seconds", {"router": "task_7", "handler": "show"}, 0.02)
+    observe("handler_seconds", {"router": "task_7", "handler": "show"}, 0.3)
+    latency_metrics.register_collector("gpt", lambda: {"waiting": 2, "hit_rate": 0.5, "flag": True})
+    latency_metrics.register_collector("solver", lambda: {"solve:16/x": {"count": 3, "avg_seconds": 0.1}})
+
+    text = render_prometheus()
+    assert "# TYPE matunya_handler_seconds histogram" in text
+    assert 'matunya_handler_seconds_bucket{handler="show",router="task_7",le="0.025"} 1' in text
+    assert 'matunya_handler_seconds_bucket{handler="show",router="task_7",le="+Inf"} 2' in text
+    assert 'matunya_handler_seconds_count{handler="show",router="task_7"} 2' in text
+    assert "matunya_gpt_waiting 2" in text and "matunya_gpt_hit_rate 0.5" in text
+    assert "flag" not in text
+    assert 'matunya_solver_count{series="solve:16/x"} 3' in text
+
+
+def test_series_cardinality_is_capped(monkeypatch):
+    monkeypatch.setattr(latency_metrics, "MAX_SERIES_PER_METRIC", 3)
+    for i in range(10):
+        observe("update_seconds", {"event": "callback_query", "action": f"theme:{i}"}, 0.01)
+
+    series = summary()["update_seconds"]
+    assert len(series) == 4
+    assert series["action=other,event=other"]["count"] == 7
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_and_bot_api_middlewares_record_latency():
+    router = Router(name="tasks")
+
+    @router.callback_query()
+    async def on_task(callback: CallbackQuery):
+        await asyncio.sleep(0.01)
+
+    @router.message()
+    async def on_message(message: Message):
+        pass
+
+    dp = Dispatcher()
+    dp.update.outer_middleware(UpdateLatencyMiddleware())
+    dp.callback_query.middleware(HandlerLatencyMiddleware())
+    dp.message.middleware(HandlerLatencyMiddleware())
+    dp.include_router(router)
+    bot = Bot("42:TEST")
+
+    user = {"id": 1, "is_bot": False, "first_name": "Аня"}
+    message = {"message_id": 1, "date": 0, "chat": {"id": 1, "type": "private"}, "from": user, "text": "/start@matunya"}
+    callback = {"id": "c1", "from": user, "chat_instance": "i", "data": "task:get_help:tires:1"}
+    try:
+        await dp.feed_update(bot, Update.model_validate({"update_id": 1, "message": message}, context={"bot": bot}))
+        await dp.feed_update(bot, Update.model_validate({"update_id": 2, "callback_query": callback}, context={"bot": bot}))
+
+        async def make_request(bot, method):
+            return "ok"
+
+        await TelegramLatencyMiddleware()(make_request, bot, SendMessage(chat_id=1, text="привет"))
+    finally:
+        await bot.session.close()
+
+    report = summary()
+    assert set(report["update_seconds"]) == {"action=/start,event=message", "action=task:get_help,event=callback_query"}
+    assert report["update_seconds"]["action=task:get_help,event=callback_query"]["p50"] >= 5
+    assert set(report["handler_seconds"]) == {"handler=on_message,router=tasks", "handler=on_task,router=tasks"}
+    assert report["telegram_api_seconds"]["method=sendMessage,outcome=ok"]["count"] == 1
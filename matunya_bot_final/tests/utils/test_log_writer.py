@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+
+from matunya_bot_final.utils import db_manager
+from matunya_bot_final.utils.log_writer import log_writer
+from matunya_bot_final.utils.models import ActivityLog, AIInteractionLog, AnswerLog, User
+
+
+@pytest_asyncio.fixture
+async def logs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'logs.db'}")
+    engine, session_maker = await db_manager.setup_database()
+    await db_manager.init_db(engine)
+    async with session_maker() as session:
+        session.add(User(id=1, telegram_id=100, name="Аня"))
+        await session.commit()
+
+    yield engine, session_maker
+
+    await db_manager.close_database(engine)
+    monkeypatch.setattr(db_manager, "session_maker", None)
+    monkeypatch.setattr(db_manager, "engine", None)
+
+
+async def count(session_maker, model) -> int:
+    async with session_maker() as session:
+        return await session.scalar(select(func.count(model.id)))
+
+
+@pytest.mark.asyncio
+async def test_sync_mode_writes_immediately(logs_db):
+    engine, session_maker = logs_db
+    log_writer.start(session_maker, sync=True)
+
+    async with session_maker() as session:
+        log = await db_manager.log_answer(session, user_id=1, task_id=1, is_correct=True)
+
+    assert log.id is None and log.timestamp is not None
+    assert await count(session_maker, AnswerLog) == 1
+
+
+@pytest.mark.asyncio
+async def test_queued_logs_are_batched_and_drained_on_close(logs_db):
+    engine, session_maker = logs_db
+    log_writer.start(session_maker, sync=False, batch_size=100, flush_ms=50, max_queue=50)
+    batches_before = log_writer.metrics["batches"]
+
+    async with session_maker() as session:
+        # очередь меньше числа логов — submit ждёт места, но ничего не теряется
+        for i in range(300):
+            await db_manager.log_answer(session, user_id=1, task_id=i, is_correct=i % 2 == 0)
+            await db_manager.log_activity(session, user_id=1, activity_type="theory")
+
+    await db_manager.close_database(engine)
+
+    assert not log_writer.running
+    assert await count(session_maker, AnswerLog) == 300
+    assert await count(session_maker, ActivityLog) == 300
+    assert log_writer.metrics["batches"] - batches_before < 600
+
+
+@pytest.mark.asyncio
+async def test_flush_interval_writes_without_close(logs_db):
+    engine, session_maker = logs_db
+    log_writer.start(session_maker, sync=False, batch_size=100, flush_ms=10)
+
+    async with session_maker() as session:
+        await db_manager.log_ai_interaction(session, user_id=1, question_text="Почему так?")
+    for _ in range(100):
+        if await count(session_maker, AIInteractionLog):
+            break
+        await asyncio.sleep(0.01)
+
+    assert await count(session_maker, AIInteractionLog) == 1
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from matunya_bot_final.utils import message_manager
+from matunya_bot_final.utils.message_manager import (
+    cleanup_messages_by_category,
+    message_tracker,
+    send_tracked_message,
+)
+
+
+class CountingStorage(MemoryStorage):
+    def __init__(self) -> None:
+        super().__init__()
+        self.reads = 0
+        self.writes = 0
+
+    async def get_data(self, key):
+        self.reads += 1
+        return await super().get_data(key)
+
+    async def set_data(self, key, data):
+        self.writes += 1
+        await super().set_data(key, data)
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.next_id = 100
+        self.bulk_deletes = []
+        self.single_deletes = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.next_id += 1
+        return SimpleNamespace(message_id=self.next_id)
+
+    async def delete_messages(self, chat_id, message_ids):
+        self.bulk_deletes.append(list(message_ids))
+        return True
+
+    async def delete_message(self, chat_id, message_id):
+        self.single_deletes.append(message_id)
+        return True
+
+
+@pytest.fixture
+def state():
+    storage = CountingStorage()
+    return FSMContext(storage=storage, key=StorageKey(bot_id=1, chat_id=1, user_id=1))
+
+
+@pytest.mark.asyncio
+async def test_cleanup_of_several_categories_is_one_round_trip(state):
+    bot = FakeBot()
+    async with message_tracker(state):
+        await send_tracked_message(bot, 1, state, "a", "menu", category="menus")
+        await send_tracked_message(bot, 1, state, "b", "task", category="tasks")
+        await send_tracked_message(bot, 1, state, "c", "note", category="notifications")
+    state.storage.reads = state.storage.writes = 0
+
+    await cleanup_messages_by_category(bot, state, 1, "menus", "tasks")
+
+    # одно чтение трекера + одно внутри update_data при сохранении
+    assert state.storage.reads == 2
+    assert state.storage.writes == 1
+    assert bot.bulk_deletes == [[101, 102]]
+    data = await state.get_data()
+    assert data["tracked_messages"] == {"note": 103}
+    assert data["message_tags_by_category"] == {"notifications": ["note"]}
+
+
+@pytest.mark.asyncio
+async def test_tracker_scope_flushes_once(state):
+    bot = FakeBot()
+
+    async with message_tracker(state):
+        await cleanup_messages_by_category(bot, state, 1, "tasks")
+        await send_tracked_message(bot, 1, state, "a", "task_image", category="tasks")
+        await send_tracked_message(bot, 1, state, "b", "task_text", category="tasks")
+        assert state.storage.writes == 0
+
+    # одно чтение трекера + одно внутри update_data при сохранении
+    assert state.storage.reads == 2
+    assert state.storage.writes == 1
+    assert (await state.get_data())["message_tags_by_category"] == {"tasks": ["task_image", "task_text"]}
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_is_chunked_and_falls_back(monkeypatch):
+    from aiogram.exceptions import TelegramBadRequest
+
+    bot = FakeBot()
+    await message_manager.delete_messages_bulk(bot, 1, list(range(250)))
+    assert [len(chunk) for chunk in bot.bulk_deletes] == [100, 100, 50]
+
+    async def failing_bulk(chat_id, message_ids):
+        raise TelegramBadRequest(method=None, message="bad request")
+
+    monkeypatch.setattr(bot, "delete_messages", failing_bulk)
+    await message_manager.delete_messages_bulk(bot, 1, [1, 2, 3])
+    assert sorted(bot.single_deletes) == [1, 2, 3]
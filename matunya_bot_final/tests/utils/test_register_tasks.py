@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select
+
+from matunya_bot_final.utils import db_manager
+from matunya_bot_final.utils.models import Task
+
+
+@pytest_asyncio.fixture
+async def tasks_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'tasks.db'}")
+    engine, session_maker = await db_manager.setup_database()
+    await db_manager.init_db(engine)
+
+    statements: list[str] = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    yield session_maker, statements
+
+    await db_manager.close_database(engine)
+    db_manager.invalidate_skill_type_cache()
+    monkeypatch.setattr(db_manager, "session_maker", None)
+    monkeypatch.setattr(db_manager, "engine", None)
+
+
+def _skill_lookups(statements: list[str]) -> int:
+    return sum(1 for sql in statements if sql.lstrip().upper().startswith("SELECT") and "skill_types" in sql)
+
+
+@pytest.mark.asyncio
+async def test_bulk_registration_keeps_order_and_uses_cache(tasks_db):
+    session_maker, statements = tasks_db
+    async with session_maker() as session:
+        for source_id in ("q1", "q2"):
+            await db_manager.add_skill_type(session, source_id, name=source_id)
+
+    statements.clear()
+    async with session_maker() as session:
+        task_ids = await db_manager.register_tasks_bulk(session, [
+            {"skill_source_id": "q1", "text": "Задача 1", "answer": 1},
+            {"skill_source_id": "unknown", "text": "Задача 2", "answer": "2"},
+            {"skill_source_id": "q2", "text": "Задача 3", "answer": "3", "theme": "tires"},
+        ])
+
+    assert task_ids[0] is not None and task_ids[2] is not None
+    assert task_ids[1] is None
+    # q1/q2 уже в кеше после add_skill_type — дочитывается только неизвестный
+    assert _skill_lookups(statements) == 1
+    assert sum(1 for sql in statements if sql.lstrip().upper().startswith("INSERT")) >= 1
+
+    async with session_maker() as session:
+        stored = (await session.execute(select(Task).order_by(Task.id))).scalars().all()
+    assert [(t.id, t.answer, t.theme) for t in stored] == [(task_ids[0], "1", None), (task_ids[2], "3", "tires")]
+
+
+@pytest.mark.asyncio
+async def test_warm_cache_serves_register_task_without_lookup(tasks_db):
+    session_maker, statements = tasks_db
+    async with session_maker() as session:
+        await db_manager.add_skill_type(session, "q1")
+        db_manager.invalidate_skill_type_cache()
+        assert await db_manager.warm_skill_type_cache(session) == 1
+
+    statements.clear()
+    async with session_maker() as session:
+        assert await db_manager.register_task(session, "q1", "Текст", "42") is not None
+    assert _skill_lookups(statements) == 0
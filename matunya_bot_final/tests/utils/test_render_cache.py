@@ -0,0 +1,72 @@
+import pytest
+
+from matunya_bot_final.utils.visuals import plot_generator
+from matunya_bot_final.utils.visuals.render_cache import RenderCache
+
+AXIS_DATA = {
+    "points": [{"value_num": 1.0, "value_text": "1", "type": "solid"}],
+    "intervals": [{"range": [-2, 1], "sign": "-"}, {"range": [1, 3], "sign": "+"}],
+    "shading_ranges": [[1, 3]],
+}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = RenderCache(directory=tmp_path / "cache", max_memory_bytes=64 * 1024 * 1024)
+    monkeypatch.setattr(plot_generator, "render_cache", cache)
+    return cache
+
+
+def test_repeated_graph_is_not_rendered_again(cache, tmp_path):
+    """Та же функция (даже другой лямбдой) — одинаковые точки — один рендер."""
+    first = plot_generator.create_graph({"func": lambda x: 2 * x + 1}, str(tmp_path / "a.png"))
+    second = plot_generator.create_graph({"func": lambda x: 1 + 2 * x}, str(tmp_path / "b.png"))
+
+    assert cache.metrics["renders"] == 1
+    assert cache.metrics["memory_hits"] == 1
+    assert open(first, "rb").read() == open(second, "rb").read()
+
+    plot_generator.create_graph({"coeffs": {"a": 1, "b": 0, "c": -2}}, str(tmp_path / "c.png"))
+    assert cache.metrics["renders"] == 2
+
+
+def test_disk_level_survives_new_cache(cache, tmp_path):
+    png = cache.render("k" * 64, plot_generator.draw_number_axis, AXIS_DATA, "print")
+
+    fresh = RenderCache(directory=cache.directory, max_memory_bytes=1024 * 1024)
+    assert fresh.get("k" * 64) == png
+    assert fresh.metrics["disk_hits"] == 1
+
+
+def test_telegram_profile_is_lighter(cache):
+    key_print = plot_generator.render_key("number_axis", AXIS_DATA, "print")
+    key_telegram = plot_generator.render_key("number_axis", AXIS_DATA, "telegram")
+    assert key_print != key_telegram
+
+    heavy = cache.render(key_print, plot_generator.draw_number_axis, AXIS_DATA, "print")
+    light = cache.render(key_telegram, plot_generator.draw_number_axis, AXIS_DATA, "telegram")
+    assert len(light) < len(heavy)
+
+
+def test_memory_lru_is_bounded_by_bytes(tmp_path):
+    cache = RenderCache(directory=None, max_memory_bytes=25)
+    for key in "abc":
+        cache.put(key, b"x" * 10)
+    # a уже выселен; b читаем — он свежее c, поэтому следующим уходит c
+    cache.get("b")
+    cache.put("d", b"x" * 10)
+
+    assert cache.get_metrics()["memory_bytes"] <= 25
+    assert cache.get("a") is None and cache.get("c") is None
+    assert cache.get("b") is not None
+
+
+@pytest.mark.asyncio
+async def test_async_render_in_process_pool(cache):
+    try:
+        png = await plot_generator.render_number_axis_png(AXIS_DATA)
+        again = await plot_generator.render_number_axis_png(AXIS_DATA)
+    finally:
+        cache.shutdown()
+    assert png.startswith(b"\x89PNG") and again == png
+    assert cache.metrics["renders"] == 1
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import io
+import random
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from aiogram.types import FSInputFile
+from PIL import Image
+
+from matunya_bot_final.utils import telegram_assets, telegram_file_cache
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def send_photo(self, chat_id, photo, **kwargs):
+        self.sent.append(photo)
+        return SimpleNamespace(message_id=len(self.sent), photo=[SimpleNamespace(file_id=f"fid-{len(self.sent)}")])
+
+
+def _noisy_png(size: int) -> bytes:
+    """Тяжёлая картинка с прозрачностью — как сгенерированные иллюстрации."""
+    rng = random.Random(0)
+    image = Image.new("RGBA", (size, size), (255, 255, 255, 0))
+    image.putdata([(rng.randrange(256), 120, 60, 255) if i % 3 else (0, 0, 0, 0) for i in range(size * size)])
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def assets(tmp_path, monkeypatch):
+    root = tmp_path / "non_generators"
+    (root / "task_x" / "assets").mkdir(parents=True)
+    monkeypatch.setattr(telegram_assets, "ASSET_ROOTS", (root,))
+    monkeypatch.setattr(telegram_assets, "VARIANTS_DIR", tmp_path / "variants")
+    telegram_assets.reset_manifest()
+    telegram_file_cache.FILE_CACHE.clear()
+    yield root / "task_x" / "assets"
+    telegram_assets.reset_manifest()
+    telegram_file_cache.FILE_CACHE.clear()
+
+
+def test_variant_is_downscaled_and_flattened():
+    optimized, ext = telegram_assets.optimize_image(_noisy_png(1600), max_side=1280)
+
+    with Image.open(io.BytesIO(optimized)) as image:
+        assert max(image.size) == 1280
+        assert image.mode in ("RGB", "P", "L")
+    assert ext in ("png", "jpg")
+
+
+@pytest.mark.asyncio
+async def test_send_uses_variant_and_manifest(assets):
+    image = assets / "heavy.png"
+    image.write_bytes(_noisy_png(1400))
+    bot = FakeBot()
+
+    assert telegram_assets.is_asset(image)
+    await telegram_file_cache.send_cached_photo(bot, 1, image)
+    await telegram_file_cache.send_cached_photo(bot, 1, image)
+
+    uploaded = bot.sent[0]
+    assert isinstance(uploaded, FSInputFile)
+    assert str(telegram_assets.VARIANTS_DIR) in str(uploaded.path)
+    assert bot.sent[1] == "fid-1"
+
+    telegram_assets.reset_manifest()
+    entry = telegram_assets.load_manifest()[telegram_file_cache._asset_key(image)]
+    assert entry["variant_bytes"] < entry["bytes"]
+
+
+def test_unreadable_asset_is_sent_as_is(assets):
+    image = assets / "broken.png"
+    image.write_bytes(b"not a png")
+
+    entry = telegram_assets.build_variant(image, "broken")
+    assert entry["variant"] is None
+    assert telegram_assets.variant_for("broken", entry["sha1"]) is None
+    with pytest.raises(KeyError):
+        telegram_assets.variant_for("broken", "other-hash")
+
+
+def test_concurrent_first_builds_keep_every_manifest_entry(assets):
+    images = []
+    for i in range(8):
+        image = assets / f"heavy_{i}.png"
+        image.write_bytes(_noisy_png(300 + i))
+        images.append(image)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        entries = list(pool.map(lambda image: telegram_assets.build_variant(image, image.name), images))
+
+    telegram_assets.reset_manifest()
+    manifest = telegram_assets.load_manifest()
+    assert set(manifest) == {image.name for image in images}
+    assert all(manifest[image.name]["sha1"] == entry["sha1"] for image, entry in zip(images, entries))
+    assert not list(telegram_assets.VARIANTS_DIR.rglob("*.tmp"))
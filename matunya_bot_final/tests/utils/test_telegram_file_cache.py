@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from aiogram.types import FSInputFile
+
+from matunya_bot_final.utils import db_manager, telegram_file_cache
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def send_photo(self, chat_id, photo, **kwargs):
+        self.sent.append(photo)
+        file_id = f"fid-{len(self.sent)}"
+        return SimpleNamespace(message_id=len(self.sent), photo=[SimpleNamespace(file_id=file_id)])
+
+
+@pytest_asyncio.fixture
+async def file_cache_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}")
+    engine, _ = await db_manager.setup_database()
+    await db_manager.init_db(engine)
+    telegram_file_cache.FILE_CACHE.clear()
+
+    yield
+
+    telegram_file_cache.FILE_CACHE.clear()
+    await db_manager.close_database(engine)
+    monkeypatch.setattr(db_manager, "session_maker", None)
+    monkeypatch.setattr(db_manager, "engine", None)
+
+
+@pytest.mark.asyncio
+async def test_file_id_survives_restart(tmp_path, file_cache_db):
+    image = tmp_path / "image.png"
+    image.write_bytes(b"png-v1")
+    bot = FakeBot()
+
+    await telegram_file_cache.send_cached_photo(bot, 1, image)
+    # «рестарт»: память процесса пуста, но запись в БД осталась
+    telegram_file_cache.FILE_CACHE.clear()
+    await telegram_file_cache.send_cached_photo(bot, 1, image)
+
+    assert isinstance(bot.sent[0], FSInputFile)
+    assert bot.sent[1] == "fid-1"
+
+
+@pytest.mark.asyncio
+async def test_changed_file_is_uploaded_again(tmp_path, file_cache_db):
+    image = tmp_path / "image.png"
+    image.write_bytes(b"png-v1")
+    bot = FakeBot()
+
+    await telegram_file_cache.send_cached_photo(bot, 1, image)
+    image.write_bytes(b"png-v2-bigger")
+    await telegram_file_cache.send_cached_photo(bot, 1, image)
+    await telegram_file_cache.send_cached_photo(bot, 1, image)
+
+    assert isinstance(bot.sent[1], FSInputFile)
+    assert bot.sent[2] == "fid-2"
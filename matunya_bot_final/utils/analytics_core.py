@@ -2,18 +2,23 @@
 Analytics Core для проекта "Матюня"
 Ядро аналитических расчетов - чистые функции для сбора и обработки данных
 Возвращает только числа, факты и сырые данные без форматирования
+
+Статистика ученика читается из дневных сводок (utils/analytics_rollups.py):
+окно days_back — последние days_back календарных дней, включая сегодня (UTC).
 """
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
-from sqlalchemy import select, func, and_, desc, case
+from sqlalchemy import Float, Integer, select, func, and_, desc, case, cast
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from .models import (
     User, SkillType, Task, AnswerLog, 
-    ActivityLog, SessionLog, AIInteractionLog
+    ActivityLog, SessionLog, AIInteractionLog,
+    UserDailyAnswerStats, UserDailyActivityStats, UserDailySessionStats
 )
+from .analytics_rollups import window_start_day
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -44,20 +49,19 @@ async def get_user_performance_by_skills(
         dict: {skill_name: {"correct": int, "total": int, "success_rate": float, "task_number": str}}
     """
     try:
-        cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+        start_day = window_start_day(days_back)
         
         result = await session.execute(
             select(
                 SkillType.name,
                 SkillType.task_number,
-                func.count(AnswerLog.id).label('total_attempts'),
-                func.sum(func.cast(AnswerLog.is_correct, func.Integer)).label('correct_attempts')
+                func.sum(UserDailyAnswerStats.total).label('total_attempts'),
+                func.sum(UserDailyAnswerStats.correct).label('correct_attempts')
             )
-            .join(Task, AnswerLog.task_id == Task.id)
-            .join(SkillType, Task.skill_type_id == SkillType.id)
+            .join(SkillType, UserDailyAnswerStats.skill_type_id == SkillType.id)
             .where(and_(
-                AnswerLog.user_id == user_id,
-                AnswerLog.timestamp >= cutoff_date
+                UserDailyAnswerStats.user_id == user_id,
+                UserDailyAnswerStats.day >= start_day
             ))
             .group_by(SkillType.id, SkillType.name, SkillType.task_number)
         )
@@ -101,22 +105,21 @@ async def get_user_performance_by_themes(
         dict: {theme: {"correct": int, "total": int, "success_rate": float, "last_attempt": datetime}}
     """
     try:
-        cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+        start_day = window_start_day(days_back)
         
         result = await session.execute(
             select(
-                Task.theme,
-                func.count(AnswerLog.id).label('total_attempts'),
-                func.sum(func.cast(AnswerLog.is_correct, func.Integer)).label('correct_attempts'),
-                func.max(AnswerLog.timestamp).label('last_attempt')
+                UserDailyAnswerStats.theme,
+                func.sum(UserDailyAnswerStats.total).label('total_attempts'),
+                func.sum(UserDailyAnswerStats.correct).label('correct_attempts'),
+                func.max(UserDailyAnswerStats.last_attempt).label('last_attempt')
             )
-            .join(Task, AnswerLog.task_id == Task.id)
             .where(and_(
-                AnswerLog.user_id == user_id,
-                AnswerLog.timestamp >= cutoff_date,
-                Task.theme.isnot(None)
+                UserDailyAnswerStats.user_id == user_id,
+                UserDailyAnswerStats.day >= start_day,
+                UserDailyAnswerStats.theme != ""
             ))
-            .group_by(Task.theme)
+            .group_by(UserDailyAnswerStats.theme)
         )
         
         performance = {}
@@ -158,18 +161,18 @@ async def get_weekly_activity_counts(
         dict: {activity_type: count}
     """
     try:
-        cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+        start_day = window_start_day(days_back)
         
         result = await session.execute(
             select(
-                ActivityLog.activity_type,
-                func.count(ActivityLog.id).label('activity_count')
+                UserDailyActivityStats.activity_type,
+                func.sum(UserDailyActivityStats.count).label('activity_count')
             )
             .where(and_(
-                ActivityLog.user_id == user_id,
-                ActivityLog.timestamp >= cutoff_date
+                UserDailyActivityStats.user_id == user_id,
+                UserDailyActivityStats.day >= start_day
             ))
-            .group_by(ActivityLog.activity_type)
+            .group_by(UserDailyActivityStats.activity_type)
         )
         
         activity_counts = {}
@@ -201,35 +204,30 @@ async def get_session_patterns(
         dict: Статистика сессий
     """
     try:
-        cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+        start_day = window_start_day(days_back)
         
-        # Получаем завершенные сессии
+        # Завершенные сессии (сводка пополняется в end_session)
         result = await session.execute(
             select(
-                func.count(SessionLog.id).label('total_sessions'),
-                func.sum(SessionLog.tasks_attempted).label('total_tasks'),
-                func.sum(SessionLog.activities_count).label('total_activities'),
-                func.avg(
-                    func.cast(
-                        (func.julianday(SessionLog.session_end) - func.julianday(SessionLog.session_start)) * 24 * 60,
-                        func.Float
-                    )
-                ).label('avg_session_minutes')
+                func.sum(UserDailySessionStats.sessions).label('total_sessions'),
+                func.sum(UserDailySessionStats.tasks_attempted).label('total_tasks'),
+                func.sum(UserDailySessionStats.activities_count).label('total_activities'),
+                func.sum(UserDailySessionStats.total_minutes).label('total_minutes')
             )
             .where(and_(
-                SessionLog.user_id == user_id,
-                SessionLog.session_start >= cutoff_date,
-                SessionLog.session_end.isnot(None)
+                UserDailySessionStats.user_id == user_id,
+                UserDailySessionStats.day >= start_day
             ))
         )
         
         row = result.first()
+        total_sessions = row.total_sessions or 0
         
         patterns = {
-            "total_sessions": row.total_sessions or 0,
+            "total_sessions": total_sessions,
             "total_tasks": row.total_tasks or 0,
             "total_activities": row.total_activities or 0,
-            "avg_session_minutes": round(row.avg_session_minutes or 0, 1),
+            "avg_session_minutes": round((row.total_minutes or 0) / total_sessions, 1) if total_sessions else 0,
             "avg_tasks_per_session": 0,
             "sessions_per_day": 0
         }
@@ -264,18 +262,18 @@ async def get_help_usage_stats(
         dict: Статистика использования помощи
     """
     try:
-        cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+        start_day = window_start_day(days_back)
         
         # Общая статистика по ответам
         answer_stats = await session.execute(
             select(
-                func.count(AnswerLog.id).label('total_answers'),
-                func.sum(func.cast(AnswerLog.help_used, func.Integer)).label('answers_with_help'),
-                func.sum(func.cast(AnswerLog.is_timed, func.Integer)).label('timed_answers')
+                func.sum(UserDailyAnswerStats.total).label('total_answers'),
+                func.sum(UserDailyAnswerStats.help_used).label('answers_with_help'),
+                func.sum(UserDailyAnswerStats.timed).label('timed_answers')
             )
             .where(and_(
-                AnswerLog.user_id == user_id,
-                AnswerLog.timestamp >= cutoff_date
+                UserDailyAnswerStats.user_id == user_id,
+                UserDailyAnswerStats.day >= start_day
             ))
         )
         
@@ -338,11 +336,11 @@ async def get_ai_interaction_metrics(
         overall_stats = await session.execute(
             select(
                 func.count(AIInteractionLog.id).label('total_interactions'),
-                func.avg(func.cast(AIInteractionLog.solved_task_after, func.Float)).label('success_rate'),
-                func.avg(func.cast(AIInteractionLog.follow_up_count, func.Float)).label('avg_follow_ups'),
-                func.sum(func.cast(AIInteractionLog.is_repeat_question, func.Integer)).label('repeat_questions'),
-                func.sum(func.cast(AIInteractionLog.used_theory_after, func.Integer)).label('theory_fallbacks'),
-                func.sum(func.cast(AIInteractionLog.abandoned_task, func.Integer)).label('task_abandonments')
+                func.avg(cast(AIInteractionLog.solved_task_after, Float)).label('success_rate'),
+                func.avg(cast(AIInteractionLog.follow_up_count, Float)).label('avg_follow_ups'),
+                func.sum(cast(AIInteractionLog.is_repeat_question, Integer)).label('repeat_questions'),
+                func.sum(cast(AIInteractionLog.used_theory_after, Integer)).label('theory_fallbacks'),
+                func.sum(cast(AIInteractionLog.abandoned_task, Integer)).label('task_abandonments')
             )
             .where(and_(*base_filter))
         )
@@ -393,8 +391,8 @@ async def get_ai_performance_by_themes(
             select(
                 AIInteractionLog.task_theme,
                 func.count(AIInteractionLog.id).label('interactions'),
-                func.avg(func.cast(AIInteractionLog.solved_task_after, func.Float)).label('success_rate'),
-                func.avg(func.cast(AIInteractionLog.follow_up_count, func.Float)).label('avg_follow_ups')
+                func.avg(cast(AIInteractionLog.solved_task_after, Float)).label('success_rate'),
+                func.avg(cast(AIInteractionLog.follow_up_count, Float)).label('avg_follow_ups')
             )
             .where(and_(
                 AIInteractionLog.timestamp >= cutoff_date,
@@ -508,19 +506,19 @@ async def calculate_consistency_score(
         float: Оценка от 0.0 до 1.0 (1.0 = максимальная регулярность)
     """
     try:
-        cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+        start_day = window_start_day(days_back)
         
         # Получаем дни с активностью
         result = await session.execute(
             select(
-                func.date(AnswerLog.timestamp).label('activity_date'),
-                func.count(AnswerLog.id).label('daily_attempts')
+                UserDailyAnswerStats.day.label('activity_date'),
+                func.sum(UserDailyAnswerStats.total).label('daily_attempts')
             )
             .where(and_(
-                AnswerLog.user_id == user_id,
-                AnswerLog.timestamp >= cutoff_date
+                UserDailyAnswerStats.user_id == user_id,
+                UserDailyAnswerStats.day >= start_day
             ))
-            .group_by(func.date(AnswerLog.timestamp))
+            .group_by(UserDailyAnswerStats.day)
         )
         
         active_days = result.fetchall()
@@ -561,21 +559,21 @@ async def get_pack_usage_stats(
         dict: Статистика использования паков
     """
     try:
-        cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+        start_day = window_start_day(days_back)
         
         # Статистика по пакам из активности
         pack_activity = await session.execute(
             select(
-                ActivityLog.pack_type,
-                ActivityLog.pack_theme,
-                func.count(ActivityLog.id).label('pack_starts')
+                UserDailyActivityStats.pack_type,
+                UserDailyActivityStats.pack_theme,
+                func.sum(UserDailyActivityStats.count).label('pack_starts')
             )
             .where(and_(
-                ActivityLog.user_id == user_id,
-                ActivityLog.timestamp >= cutoff_date,
-                ActivityLog.activity_type.in_(['theme_pack_start', 'exam_pack_start'])
+                UserDailyActivityStats.user_id == user_id,
+                UserDailyActivityStats.day >= start_day,
+                UserDailyActivityStats.activity_type.in_(['theme_pack_start', 'exam_pack_start'])
             ))
-            .group_by(ActivityLog.pack_type, ActivityLog.pack_theme)
+            .group_by(UserDailyActivityStats.pack_type, UserDailyActivityStats.pack_theme)
         )
         
         pack_stats = {
@@ -0,0 +1,169 @@
+"""
+Колоночная аналитика для проекта "Матюня"
+Отчет о качестве ИИ по всем ученикам за один проход по AIInteractionLog.
+
+База сворачивает окно до компактной таблицы (тема × категория ×
+time_to_solution) с частичными суммами — SQLite не создает Python-объект
+на каждое взаимодействие. Эта таблица читается пачками в numpy/pandas,
+а все метрики (доли, средние, перцентили, разбивки по темам и категориям)
+считаются векторно. Размер результата зависит от числа тем и различных
+значений time_to_solution, а не от числа взаимодействий.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Integer, case, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import AIInteractionLog
+from .analytics_core import DEFAULT_ANALYSIS_DAYS, MIN_ATTEMPTS_FOR_STATS
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Сколько строк свернутой таблицы читаем за раз
+CHUNK_SIZE = 50_000
+PERCENTILES = (50, 90, 95)
+
+SUM_COLUMNS = [
+    "interactions", "follow_ups", "with_follow_ups", "repeats", "theory_fallbacks",
+    "abandonments", "solved", "solved_known",
+]
+
+
+def _as_int(column):
+    return func.coalesce(cast(column, Integer), 0)
+
+
+def _rollup_query(cutoff_date: datetime, user_id: Optional[int]):
+    """Окно, свернутое по (тема, категория, time_to_solution); -1 = время неизвестно."""
+    log = AIInteractionLog
+    theme = func.coalesce(log.task_theme, "").label("theme")
+    category = func.coalesce(log.question_category, "").label("category")
+    tts = func.coalesce(log.time_to_solution, -1).label("time_to_solution")
+    follow_ups = func.coalesce(log.follow_up_count, 0)
+
+    query = (
+        select(
+            theme, category, tts,
+            func.count().label("interactions"),
+            func.sum(follow_ups).label("follow_ups"),
+            func.sum(case((follow_ups > 0, 1), else_=0)).label("with_follow_ups"),
+            func.sum(_as_int(log.is_repeat_question)).label("repeats"),
+            func.sum(_as_int(log.used_theory_after)).label("theory_fallbacks"),
+            func.sum(_as_int(log.abandoned_task)).label("abandonments"),
+            func.sum(_as_int(log.solved_task_after)).label("solved"),
+            func.count(log.solved_task_after).label("solved_known"),
+        )
+        .where(log.timestamp >= cutoff_date)
+        .group_by(theme, category, tts)
+    )
+    if user_id:
+        query = query.where(log.user_id == user_id)
+    return query
+
+
+def _rates(sums: pd.DataFrame) -> pd.DataFrame:
+    """Доли и средние из накопленных сумм (векторно по всем группам)."""
+    interactions = sums["interactions"]
+    solved_known = sums["solved_known"].where(sums["solved_known"] > 0)
+    return pd.DataFrame({
+        "interactions": interactions.astype(np.int64),
+        # как avg(solved_task_after) в SQL: NULL не учитываются
+        "success_rate": (sums["solved"] / solved_known).fillna(0.0).round(3),
+        "avg_follow_ups": (sums["follow_ups"] / interactions).round(2),
+        "follow_up_rate": (sums["with_follow_ups"] / interactions).round(3),
+        "repeat_question_rate": (sums["repeats"] / interactions).round(3),
+        "theory_fallback_rate": (sums["theory_fallbacks"] / interactions).round(3),
+        "abandonment_rate": (sums["abandonments"] / interactions).round(3),
+    })
+
+
+def _weighted_quantiles(values: np.ndarray, counts: np.ndarray, quantiles: Tuple[float, ...]) -> np.ndarray:
+    """Квантили по гистограмме значение -> количество (как np.percentile на развернутых данных)."""
+    order = np.argsort(values)
+    values, cum = values[order], np.cumsum(counts[order])
+    positions = np.asarray(quantiles) / 100 * (cum[-1] - 1)
+    lower = np.floor(positions)
+    # k-е значение в отсортированных данных = первое, где накопленный счетчик > k
+    low_values = values[np.searchsorted(cum, lower, side="right")]
+    high_values = values[np.searchsorted(cum, np.minimum(lower + 1, cum[-1] - 1), side="right")]
+    return low_values + (high_values - low_values) * (positions - lower)
+
+
+def _percentiles(timed: Optional[pd.DataFrame]) -> Dict[str, Optional[float]]:
+    if timed is None or timed.empty:
+        return {f"p{p}": None for p in PERCENTILES}
+    values = _weighted_quantiles(timed["time_to_solution"].to_numpy(np.float64), timed["interactions"].to_numpy(), PERCENTILES)
+    return {f"p{p}": round(float(v), 1) for p, v in zip(PERCENTILES, values)}
+
+
+def _to_dict(rates: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    return {
+        key: {name: (int(value) if name == "interactions" else float(value)) for name, value in stats.items()}
+        for key, stats in rates.to_dict(orient="index").items()
+    }
+
+
+async def compute_ai_quality(
+    session: AsyncSession,
+    days_back: int = DEFAULT_ANALYSIS_DAYS,
+    user_id: Optional[int] = None,
+    min_interactions: int = MIN_ATTEMPTS_FOR_STATS,
+    chunk_size: int = CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Считает метрики качества ИИ за окно одним проходом.
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        days_back: Количество дней назад для анализа
+        user_id: ID конкретного пользователя (опционально)
+        min_interactions: Минимум взаимодействий, чтобы тема попала в разбивку
+        chunk_size: Сколько строк свернутой таблицы читать за раз
+
+    Returns:
+        dict: {"overall": {...}, "themes": {theme: {...}}, "categories": {category: {...}}}
+        Метрики overall/themes совместимы с get_ai_interaction_metrics / get_ai_performance_by_themes
+        и дополнены follow_up_rate, перцентилями time_to_solution (сек) и разбивкой по категориям.
+    """
+    cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+    query = _rollup_query(cutoff_date, user_id).execution_options(yield_per=chunk_size)
+
+    # Core-соединение: строки без ORM-обработки
+    connection = await session.connection()
+    result = await connection.stream(query)
+    chunks: List[pd.DataFrame] = []
+    async for rows in result.partitions(chunk_size):
+        chunks.append(pd.DataFrame.from_records(rows, columns=list(result.keys())))
+
+    if not chunks:
+        return {"overall": {"total_interactions": 0, "message": "Недостаточно данных для анализа"}, "themes": {}, "categories": {}}
+
+    frame = pd.concat(chunks, ignore_index=True)
+    frame[SUM_COLUMNS] = frame[SUM_COLUMNS].fillna(0).astype(np.int64)
+    timed = frame[frame["time_to_solution"] >= 0]
+
+    overall_row = _rates(frame[SUM_COLUMNS].sum().to_frame().T).iloc[0]
+    overall = {
+        "total_interactions": int(overall_row["interactions"]),
+        **{name: float(overall_row[name]) for name in overall_row.index if name != "interactions"},
+        "time_to_solution": _percentiles(timed),
+    }
+
+    theme_rates = _rates(frame.groupby("theme")[SUM_COLUMNS].sum().drop(index="", errors="ignore"))
+    theme_rates = theme_rates[theme_rates["interactions"] >= min_interactions]
+    themes = _to_dict(theme_rates)
+    timed_by_theme = dict(tuple(timed.groupby("theme")))
+    for theme, stats in themes.items():
+        stats["median_time_to_solution"] = _percentiles(timed_by_theme.get(theme))["p50"]
+
+    categories = _to_dict(_rates(frame.groupby("category")[SUM_COLUMNS].sum()))
+    if "" in categories:
+        categories["unknown"] = categories.pop("")
+
+    logger.debug(f"Колоночный отчет ИИ: {overall['total_interactions']} взаимодействий, {len(themes)} тем")
+    return {"overall": overall, "themes": themes, "categories": categories}
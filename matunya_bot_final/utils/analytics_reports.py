@@ -22,6 +22,7 @@ from .analytics_core import (
     calculate_consistency_score,
     get_pack_usage_stats
 )
+from .analytics_frames import compute_ai_quality
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -446,9 +447,10 @@ async def get_ai_quality_report(session: AsyncSession, days_back: int = DEFAULT_
     try:
         logger.info(f"Генерируем отчет качества ИИ за {days_back} дней")
         
-        # Получаем метрики из analytics_core
-        overall_metrics = await get_ai_interaction_metrics(session, days_back)
-        theme_performance = await get_ai_performance_by_themes(session, days_back)
+        # Все метрики за один потоковый проход по логам (analytics_frames)
+        quality = await compute_ai_quality(session, days_back)
+        overall_metrics = quality["overall"]
+        theme_performance = quality["themes"]
         
         if overall_metrics.get("total_interactions", 0) == 0:
             return {"status": "insufficient_data", "message": "Недостаточно данных для анализа"}
@@ -464,6 +466,7 @@ async def get_ai_quality_report(session: AsyncSession, days_back: int = DEFAULT_
             "period_days": days_back,
             "overall_metrics": overall_metrics,
             "theme_performance": theme_performance,
+            "category_performance": quality["categories"],
             "analysis": {
                 "problematic_themes": problematic_themes,
                 "recommendations": _generate_ai_improvement_recommendations(overall_metrics, theme_performance)
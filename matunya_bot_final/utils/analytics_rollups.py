@@ -0,0 +1,233 @@
+"""
+Дневные сводки для аналитики проекта "Матюня"
+
+Отчёт ученика и дайджест для родителя раньше каждый раз пересчитывали
+сырые answer_logs / activity_logs / session_logs за окно. Теперь счётчики
+копятся в трёх таблицах-сводках (ученик × день × ...), а analytics_core
+читает уже их — объём работы не зависит от длины истории.
+
+- apply_log_rows() — инкрементальное обновление в той же транзакции,
+  что и запись логов (db_manager и utils/log_writer.py);
+- apply_session_end() — учёт завершённой сессии (db_manager.end_session);
+- rebuild_rollups() — полный пересчёт из сырых логов (бэкфилл, починка):
+  python -m matunya_bot_final.scripts.rebuild_analytics_rollups
+"""
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from sqlalchemy import Integer, cast, delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import (
+    Task, AnswerLog, ActivityLog, SessionLog,
+    UserDailyAnswerStats, UserDailyActivityStats, UserDailySessionStats
+)
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+
+def window_start_day(days_back: int) -> date:
+    """Первый день окна: последние days_back календарных дней, включая сегодня (UTC)."""
+    return (datetime.utcnow() - timedelta(days=max(days_back, 1) - 1)).date()
+
+
+async def _upsert(session: AsyncSession, model: Type[Any], rows: List[Dict[str, Any]], counters: Iterable[str], keys: List[str]) -> None:
+    """Прибавляет счётчики к существующим строкам сводки (INSERT ... ON CONFLICT DO UPDATE)."""
+    if not rows:
+        return
+    table = model.__table__
+    stmt = sqlite_insert(model).values(rows)
+    update = {name: table.c[name] + stmt.excluded[name] for name in counters}
+    if "last_attempt" in table.c:
+        update["last_attempt"] = func.max(
+            func.coalesce(table.c.last_attempt, stmt.excluded.last_attempt), stmt.excluded.last_attempt
+        )
+    await session.execute(stmt.on_conflict_do_update(index_elements=keys, set_=update))
+
+
+# ====================================================================
+# ИНКРЕМЕНТАЛЬНОЕ ОБНОВЛЕНИЕ
+# ====================================================================
+
+async def apply_answer_logs(session: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """
+    Учитывает новые ответы в user_daily_answer_stats.
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy (коммитит вызывающий)
+        rows: Значения колонок AnswerLog (с timestamp)
+    """
+    task_ids = {row["task_id"] for row in rows}
+    result = await session.execute(
+        select(Task.id, Task.skill_type_id, Task.theme).where(Task.id.in_(task_ids))
+    )
+    tasks = {row.id: (row.skill_type_id, row.theme or "") for row in result}
+
+    stats: Dict[tuple, Dict[str, Any]] = defaultdict(lambda: {"total": 0, "correct": 0, "help_used": 0, "timed": 0, "last_attempt": None})
+    for row in rows:
+        timestamp = row.get("timestamp") or datetime.utcnow()
+        skill_type_id, theme = tasks.get(row["task_id"], (0, ""))
+        item = stats[(row["user_id"], timestamp.date(), skill_type_id, theme)]
+        item["total"] += 1
+        item["correct"] += int(bool(row.get("is_correct")))
+        item["help_used"] += int(bool(row.get("help_used")))
+        item["timed"] += int(bool(row.get("is_timed")))
+        item["last_attempt"] = max(item["last_attempt"] or timestamp, timestamp)
+
+    await _upsert(
+        session,
+        UserDailyAnswerStats,
+        [
+            {"user_id": user_id, "day": day, "skill_type_id": skill_type_id, "theme": theme, **counters}
+            for (user_id, day, skill_type_id, theme), counters in stats.items()
+        ],
+        counters=("total", "correct", "help_used", "timed"),
+        keys=["user_id", "day", "skill_type_id", "theme"],
+    )
+
+
+async def apply_activity_logs(session: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """
+    Учитывает новые записи активности в user_daily_activity_stats.
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy (коммитит вызывающий)
+        rows: Значения колонок ActivityLog (с timestamp)
+    """
+    counts: Dict[tuple, int] = defaultdict(int)
+    for row in rows:
+        timestamp = row.get("timestamp") or datetime.utcnow()
+        key = (row["user_id"], timestamp.date(), row["activity_type"], row.get("pack_type") or "", row.get("pack_theme") or "")
+        counts[key] += 1
+
+    await _upsert(
+        session,
+        UserDailyActivityStats,
+        [
+            {"user_id": user_id, "day": day, "activity_type": activity_type,
+             "pack_type": pack_type, "pack_theme": pack_theme, "count": count}
+            for (user_id, day, activity_type, pack_type, pack_theme), count in counts.items()
+        ],
+        counters=("count",),
+        keys=["user_id", "day", "activity_type", "pack_type", "pack_theme"],
+    )
+
+
+async def apply_session_end(session: AsyncSession, session_log: SessionLog) -> None:
+    """
+    Учитывает завершённую сессию в user_daily_session_stats.
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy (коммитит вызывающий)
+        session_log: Сессия с заполненным session_end
+    """
+    minutes = (session_log.session_end - session_log.session_start).total_seconds() / 60
+    await _upsert(
+        session,
+        UserDailySessionStats,
+        [{
+            "user_id": session_log.user_id,
+            "day": session_log.session_start.date(),
+            "sessions": 1,
+            "tasks_attempted": session_log.tasks_attempted or 0,
+            "activities_count": session_log.activities_count or 0,
+            "total_minutes": minutes,
+        }],
+        counters=("sessions", "tasks_attempted", "activities_count", "total_minutes"),
+        keys=["user_id", "day"],
+    )
+
+
+async def apply_log_rows(session: AsyncSession, model: Type[Any], rows: List[Dict[str, Any]]) -> None:
+    """Обновляет сводки по пачке логов модели model (логи без сводок пропускаются)."""
+    if model is AnswerLog:
+        await apply_answer_logs(session, rows)
+    elif model is ActivityLog:
+        await apply_activity_logs(session, rows)
+
+
+# ====================================================================
+# ПОЛНЫЙ ПЕРЕСЧЕТ
+# ====================================================================
+
+async def rebuild_rollups(session: AsyncSession, user_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Пересчитывает сводки из сырых логов (все ученики или один).
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        user_id: ID пользователя (None — все)
+
+    Returns:
+        dict: {имя таблицы сводки: число строк после пересчета}
+    """
+    def only_user(model):
+        return [model.user_id == user_id] if user_id is not None else []
+
+    try:
+        for model in (UserDailyAnswerStats, UserDailyActivityStats, UserDailySessionStats):
+            await session.execute(delete(model).where(*only_user(model)))
+
+        answer_day = func.date(AnswerLog.timestamp)
+        skill_type_id = func.coalesce(Task.skill_type_id, 0)
+        theme = func.coalesce(Task.theme, "")
+        await session.execute(
+            insert(UserDailyAnswerStats).from_select(
+                ["user_id", "day", "skill_type_id", "theme", "total", "correct", "help_used", "timed", "last_attempt"],
+                select(
+                    AnswerLog.user_id, answer_day, skill_type_id, theme,
+                    func.count(AnswerLog.id),
+                    func.coalesce(func.sum(cast(AnswerLog.is_correct, Integer)), 0),
+                    func.coalesce(func.sum(cast(AnswerLog.help_used, Integer)), 0),
+                    func.coalesce(func.sum(cast(AnswerLog.is_timed, Integer)), 0),
+                    func.max(AnswerLog.timestamp),
+                )
+                .outerjoin(Task, AnswerLog.task_id == Task.id)
+                .where(*only_user(AnswerLog))
+                .group_by(AnswerLog.user_id, answer_day, skill_type_id, theme)
+            )
+        )
+
+        activity_day = func.date(ActivityLog.timestamp)
+        pack_type = func.coalesce(ActivityLog.pack_type, "")
+        pack_theme = func.coalesce(ActivityLog.pack_theme, "")
+        await session.execute(
+            insert(UserDailyActivityStats).from_select(
+                ["user_id", "day", "activity_type", "pack_type", "pack_theme", "count"],
+                select(ActivityLog.user_id, activity_day, ActivityLog.activity_type, pack_type, pack_theme, func.count(ActivityLog.id))
+                .where(*only_user(ActivityLog))
+                .group_by(ActivityLog.user_id, activity_day, ActivityLog.activity_type, pack_type, pack_theme)
+            )
+        )
+
+        session_day = func.date(SessionLog.session_start)
+        await session.execute(
+            insert(UserDailySessionStats).from_select(
+                ["user_id", "day", "sessions", "tasks_attempted", "activities_count", "total_minutes"],
+                select(
+                    SessionLog.user_id, session_day,
+                    func.count(SessionLog.id),
+                    func.coalesce(func.sum(SessionLog.tasks_attempted), 0),
+                    func.coalesce(func.sum(SessionLog.activities_count), 0),
+                    func.coalesce(func.sum((func.julianday(SessionLog.session_end) - func.julianday(SessionLog.session_start)) * 24 * 60), 0),
+                )
+                .where(SessionLog.session_end.isnot(None), *only_user(SessionLog))
+                .group_by(SessionLog.user_id, session_day)
+            )
+        )
+        await session.commit()
+
+        counts = {}
+        for model in (UserDailyAnswerStats, UserDailyActivityStats, UserDailySessionStats):
+            counts[model.__tablename__] = await session.scalar(select(func.count()).select_from(model).where(*only_user(model)))
+        logger.info(f"Сводки аналитики пересчитаны (user_id={user_id}): {counts}")
+        return counts
+
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Ошибка при пересчете сводок аналитики (user_id={user_id}): {e}")
+        raise
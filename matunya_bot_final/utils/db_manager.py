@@ -8,15 +8,18 @@ CRUD операции и базовое логирование данных
 
 import logging
 from datetime import datetime
-from typing import Optional
-from sqlalchemy import select, desc
+from typing import Any, Iterable, Optional
+from sqlalchemy import delete, func, select, desc
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.exc import IntegrityError
 
 from .models import (
     Base, User, SkillType, Task, AnswerLog,
-    ActivityLog, SessionLog, AIInteractionLog
+    ActivityLog, SessionLog, AIInteractionLog, TelegramFileCache, FSMRecord, FSMTaskSnapshot,
+    GPTResponseCache
 )
+from .log_writer import log_writer
+from .analytics_rollups import apply_log_rows, apply_session_end
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -28,6 +31,11 @@ DATABASE_URL = "sqlite+aiosqlite:///matunya.db"
 engine: Optional[AsyncEngine] = None
 session_maker: Optional[async_sessionmaker[AsyncSession]] = None
 
+# Кеш skill_types: source_id -> id. Справочник маленький и почти не меняется,
+# поэтому register_task не ходит за ним в базу на каждую задачу.
+# Сбрасывается при setup_database (новая база), пополняется при вставке навыка.
+_skill_type_ids: dict[str, int] = {}
+
 
 # ====================================================================
 # ИНИЦИАЛИЗАЦИЯ И НАСТРОЙКА БД
@@ -39,6 +47,7 @@ async def setup_database() -> tuple[AsyncEngine, async_sessionmaker[AsyncSession
     """
     global engine, session_maker
 
+    _skill_type_ids.clear()
     engine = create_async_engine(
         DATABASE_URL,
         echo=False,         # Включите True, чтобы увидеть подробные SQL-логи при отладке.
@@ -85,6 +94,8 @@ async def close_database(engine: AsyncEngine) -> None:
         engine: Асинхронный движок SQLAlchemy
     """
     try:
+        # Сначала дописываем отложенные логи, потом закрываем пул соединений
+        await log_writer.stop()
         await engine.dispose()
         logger.info("Подключение к базе данных закрыто")
     except Exception as e:
@@ -268,6 +279,7 @@ async def add_skill_type(
 
         if existing_skill:
             logger.debug(f"Тип навыка с source_id={source_id} уже существует")
+            _skill_type_ids[source_id] = existing_skill.id
             return existing_skill
 
         # Создаем новый тип навыка
@@ -281,6 +293,7 @@ async def add_skill_type(
         session.add(new_skill)
         await session.commit()
         await session.refresh(new_skill)
+        _skill_type_ids[source_id] = new_skill.id
 
         logger.info(f"Создан новый тип навыка: {new_skill}")
         return new_skill
@@ -292,7 +305,10 @@ async def add_skill_type(
         result = await session.execute(
             select(SkillType).where(SkillType.source_id == source_id)
         )
-        return result.scalar_one_or_none()
+        existing_skill = result.scalar_one_or_none()
+        if existing_skill:
+            _skill_type_ids[source_id] = existing_skill.id
+        return existing_skill
 
     except Exception as e:
         await session.rollback()
@@ -300,6 +316,43 @@ async def add_skill_type(
         return None
 
 
+async def warm_skill_type_cache(session: AsyncSession) -> int:
+    """
+    Загружает весь справочник skill_types в кеш одним запросом (на старте бота).
+
+    Returns:
+        int: Количество навыков в кеше
+    """
+    result = await session.execute(select(SkillType.source_id, SkillType.id))
+    _skill_type_ids.clear()
+    _skill_type_ids.update({source_id: skill_id for source_id, skill_id in result.all()})
+    logger.info(f"Кеш типов навыков прогрет: {len(_skill_type_ids)} шт.")
+    return len(_skill_type_ids)
+
+
+def invalidate_skill_type_cache(source_id: Optional[str] = None) -> None:
+    """Сбрасывает кеш skill_types целиком или для одного source_id."""
+    if source_id is None:
+        _skill_type_ids.clear()
+    else:
+        _skill_type_ids.pop(source_id, None)
+
+
+async def get_skill_type_ids(session: AsyncSession, source_ids: Iterable[str]) -> dict[str, int]:
+    """
+    Возвращает {source_id: id} для известных навыков.
+    Чего нет в кеше — дочитывается одним запросом; ненайденные в ответ не попадают.
+    """
+    wanted = set(source_ids)
+    missing = [source_id for source_id in wanted if source_id not in _skill_type_ids]
+    if missing:
+        result = await session.execute(
+            select(SkillType.source_id, SkillType.id).where(SkillType.source_id.in_(missing))
+        )
+        _skill_type_ids.update({source_id: skill_id for source_id, skill_id in result.all()})
+    return {source_id: _skill_type_ids[source_id] for source_id in wanted if source_id in _skill_type_ids}
+
+
 async def register_task(
     session: AsyncSession,
     skill_source_id: str,
@@ -322,19 +375,16 @@ async def register_task(
         Optional[int]: ID созданной задачи, если регистрация успешна; None, если навык не найден или произошла ошибка
     """
     try:
-        # Ищем навык по source_id
-        result = await session.execute(
-            select(SkillType).where(SkillType.source_id == skill_source_id)
-        )
-        skill_type = result.scalar_one_or_none()
+        # Ищем навык по source_id (обычно — из кеша, без запроса)
+        skill_type_id = (await get_skill_type_ids(session, [skill_source_id])).get(skill_source_id)
 
-        if not skill_type:
+        if skill_type_id is None:
             logger.warning(f"Навык с source_id={skill_source_id} не найден в базе")
             return None
 
         # Создаем новую задачу
         new_task = Task(
-            skill_type_id=skill_type.id,
+            skill_type_id=skill_type_id,
             text=text,
             answer=str(answer),
             theme=theme,
@@ -354,6 +404,54 @@ async def register_task(
         return None
 
 
+async def register_tasks_bulk(session: AsyncSession, tasks: list[dict[str, Any]]) -> list[Optional[int]]:
+    """
+    Регистрирует пакет задач одной транзакцией (один commit на весь пакет).
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        tasks: Список словарей с ключами skill_source_id, text, answer
+               и необязательными theme, solution_data
+
+    Returns:
+        list[Optional[int]]: ID задач в том же порядке; None — навык не найден
+        (при ошибке транзакции — None для всех задач)
+    """
+    if not tasks:
+        return []
+
+    try:
+        skill_ids = await get_skill_type_ids(session, (str(task["skill_source_id"]) for task in tasks))
+
+        new_tasks: list[Optional[Task]] = []
+        for task in tasks:
+            skill_type_id = skill_ids.get(str(task["skill_source_id"]))
+            if skill_type_id is None:
+                logger.warning(f"Навык с source_id={task['skill_source_id']} не найден в базе")
+                new_tasks.append(None)
+                continue
+            new_tasks.append(Task(
+                skill_type_id=skill_type_id,
+                text=task["text"],
+                answer=str(task["answer"]),
+                theme=task.get("theme"),
+                solution_data=task.get("solution_data")
+            ))
+
+        session.add_all([task for task in new_tasks if task is not None])
+        await session.flush()  # id появляются без отдельного refresh на каждую задачу
+        task_ids = [task.id if task is not None else None for task in new_tasks]
+        await session.commit()
+
+        logger.info(f"Зарегистрирован пакет задач: {len([i for i in task_ids if i is not None])}/{len(tasks)}, ID={task_ids}")
+        return task_ids
+
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Ошибка при пакетной регистрации {len(tasks)} задач: {e}")
+        return [None] * len(tasks)
+
+
 async def get_task_by_id(session: AsyncSession, task_id: int) -> Optional[Task]:
     """
     Получает задачу по её ID.
@@ -455,23 +553,31 @@ async def log_answer(
         generated_task_details: JSON с полными данными ошибочной задачи (только если is_correct=False)
 
     Returns:
-        AnswerLog: Объект лога ответа
+        AnswerLog: Объект лога ответа (при запущенном log_writer — ещё не записанный, без id)
         None: Если произошла ошибка
     """
+    values = dict(
+        user_id=user_id,
+        task_id=task_id,
+        is_correct=is_correct,
+        user_answer=user_answer,
+        time_spent=time_spent,
+        help_used=help_used,
+        is_timed=is_timed,
+        pack_session_id=pack_session_id,
+        generated_task_details=generated_task_details,
+        timestamp=datetime.utcnow()
+    )
+    if log_writer.running:
+        await log_writer.submit(AnswerLog, values)
+        logger.debug(f"Лог ответа в очереди: user_id={user_id}, task_id={task_id}, correct={is_correct}")
+        return AnswerLog(**values)
+
     try:
-        new_log = AnswerLog(
-            user_id=user_id,
-            task_id=task_id,
-            is_correct=is_correct,
-            user_answer=user_answer,
-            time_spent=time_spent,
-            help_used=help_used,
-            is_timed=is_timed,
-            pack_session_id=pack_session_id,
-            generated_task_details=generated_task_details
-        )
+        new_log = AnswerLog(**values)
 
         session.add(new_log)
+        await apply_log_rows(session, AnswerLog, [values])
         await session.commit()
         await session.refresh(new_log)
 
@@ -507,19 +613,27 @@ async def log_activity(
         pack_theme: Тема пака для тематических паков
 
     Returns:
-        ActivityLog: Объект лога активности
+        ActivityLog: Объект лога активности (при запущенном log_writer — ещё не записанный, без id)
         None: Если произошла ошибка
     """
+    values = dict(
+        user_id=user_id,
+        task_id=task_id,
+        activity_type=activity_type,
+        pack_type=pack_type,
+        pack_theme=pack_theme,
+        timestamp=datetime.utcnow()
+    )
+    if log_writer.running:
+        await log_writer.submit(ActivityLog, values)
+        logger.debug(f"Активность в очереди: user_id={user_id}, type={activity_type}, pack={pack_type}")
+        return ActivityLog(**values)
+
     try:
-        new_activity = ActivityLog(
-            user_id=user_id,
-            task_id=task_id,
-            activity_type=activity_type,
-            pack_type=pack_type,
-            pack_theme=pack_theme
-        )
+        new_activity = ActivityLog(**values)
 
         session.add(new_activity)
+        await apply_log_rows(session, ActivityLog, [values])
         await session.commit()
         await session.refresh(new_activity)
 
@@ -538,6 +652,7 @@ async def start_session(
 ) -> Optional[SessionLog]:
     """
     Начинает новую сессию пользователя.
+    Пишется сразу, в обход log_writer: id сессии нужен для end_session().
 
     Args:
         session: Асинхронная сессия SQLAlchemy
@@ -597,12 +712,16 @@ async def end_session(
             logger.warning(f"Сессия с ID={session_id} не найдена")
             return None
 
+        already_ended = session_log.session_end is not None
         session_log.session_end = datetime.utcnow()
         session_log.tasks_attempted = tasks_attempted
         session_log.activities_count = activities_count
         session_log.session_type = session_type
 
         session.add(session_log)
+        # Повторное завершение не должно второй раз попасть в сводку
+        if not already_ended:
+            await apply_session_end(session, session_log)
         await session.commit()
         await session.refresh(session_log)
 
@@ -681,23 +800,30 @@ async def log_ai_interaction(
         abandoned_task: Бросил задачу после ИИ
 
     Returns:
-        AIInteractionLog: Объект лога взаимодействия с ИИ
+        AIInteractionLog: Объект лога (при запущенном log_writer — ещё не записанный, без id)
         None: Если произошла ошибка
     """
+    values = dict(
+        user_id=user_id,
+        task_id=task_id,
+        question_text=question_text,
+        question_category=question_category,
+        task_theme=task_theme,
+        is_repeat_question=is_repeat_question,
+        follow_up_count=follow_up_count,
+        used_theory_after=used_theory_after,
+        solved_task_after=solved_task_after,
+        time_to_solution=time_to_solution,
+        abandoned_task=abandoned_task,
+        timestamp=datetime.utcnow()
+    )
+    if log_writer.running:
+        await log_writer.submit(AIInteractionLog, values)
+        logger.debug(f"Взаимодействие с ИИ в очереди: user_id={user_id}, task_id={task_id}, category={question_category}")
+        return AIInteractionLog(**values)
+
     try:
-        new_interaction = AIInteractionLog(
-            user_id=user_id,
-            task_id=task_id,
-            question_text=question_text,
-            question_category=question_category,
-            task_theme=task_theme,
-            is_repeat_question=is_repeat_question,
-            follow_up_count=follow_up_count,
-            used_theory_after=used_theory_after,
-            solved_task_after=solved_task_after,
-            time_to_solution=time_to_solution,
-            abandoned_task=abandoned_task
-        )
+        new_interaction = AIInteractionLog(**values)
 
         session.add(new_interaction)
         await session.commit()
@@ -710,3 +836,335 @@ async def log_ai_interaction(
         await session.rollback()
         logger.error(f"Ошибка при записи взаимодействия с ИИ: user_id={user_id}: {e}")
         return None
+
+
+# ====================================================================
+# КЕШ TELEGRAM FILE_ID
+# ====================================================================
+
+async def get_cached_file_id(
+    session: AsyncSession,
+    asset_path: str,
+    content_hash: str
+) -> Optional[str]:
+    """
+    Возвращает сохранённый file_id для картинки, если содержимое файла не менялось.
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        asset_path: Путь к ассету (относительно корня проекта)
+        content_hash: Хеш текущего содержимого файла
+
+    Returns:
+        str: file_id или None, если записи нет или файл изменился
+    """
+    try:
+        result = await session.execute(
+            select(TelegramFileCache).where(TelegramFileCache.asset_path == asset_path)
+        )
+        entry = result.scalar_one_or_none()
+
+        if entry is None or entry.content_hash != content_hash:
+            return None
+
+        return entry.file_id
+
+    except Exception as e:
+        logger.error(f"Ошибка при чтении кеша file_id для {asset_path}: {e}")
+        return None
+
+
+async def save_cached_file_id(
+    session: AsyncSession,
+    asset_path: str,
+    content_hash: str,
+    file_id: str
+) -> bool:
+    """
+    Сохраняет (или перезаписывает) file_id для картинки.
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        asset_path: Путь к ассету (относительно корня проекта)
+        content_hash: Хеш содержимого файла, для которого получен file_id
+        file_id: file_id, выданный Telegram
+
+    Returns:
+        bool: True если запись сохранена
+    """
+    try:
+        entry = await session.get(TelegramFileCache, asset_path)
+
+        if entry is None:
+            entry = TelegramFileCache(asset_path=asset_path, content_hash=content_hash, file_id=file_id)
+        else:
+            entry.content_hash = content_hash
+            entry.file_id = file_id
+
+        session.add(entry)
+        await session.commit()
+
+        logger.debug(f"Сохранён file_id для {asset_path}")
+        return True
+
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Ошибка при сохранении file_id для {asset_path}: {e}")
+        return False
+
+
+async def delete_cached_file_id(session: AsyncSession, asset_path: str) -> bool:
+    """
+    Удаляет запись кеша file_id (например, если Telegram отклонил file_id).
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        asset_path: Путь к ассету (относительно корня проекта)
+
+    Returns:
+        bool: True если запись удалена или её не было
+    """
+    try:
+        entry = await session.get(TelegramFileCache, asset_path)
+        if entry is not None:
+            await session.delete(entry)
+            await session.commit()
+        return True
+
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Ошибка при удалении file_id для {asset_path}: {e}")
+        return False
+
+
+# ====================================================================
+# FSM-ХРАНИЛИЩЕ
+# ====================================================================
+
+async def get_fsm_record(
+    session: AsyncSession,
+    storage_key: str
+) -> Optional[tuple[Optional[str], Optional[bytes]]]:
+    """
+    Читает состояние FSM пользователя.
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        storage_key: Ключ хранилища (fsm:<bot>:<chat>:<user>)
+
+    Returns:
+        tuple: (state, data) или None, если записи нет
+    """
+    result = await session.execute(
+        select(FSMRecord.state, FSMRecord.data).where(FSMRecord.storage_key == storage_key)
+    )
+    row = result.one_or_none()
+    return (row.state, row.data) if row is not None else None
+
+
+async def save_fsm_record(
+    session: AsyncSession,
+    storage_key: str,
+    state: Optional[str],
+    data: Optional[bytes]
+) -> None:
+    """
+    Сохраняет состояние FSM (пустое состояние без данных — удаляет запись).
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        storage_key: Ключ хранилища (fsm:<bot>:<chat>:<user>)
+        state: Имя состояния или None
+        data: Сериализованные данные или None
+    """
+    try:
+        entry = await session.get(FSMRecord, storage_key)
+
+        if state is None and data is None:
+            if entry is not None:
+                await session.delete(entry)
+        elif entry is None:
+            session.add(FSMRecord(storage_key=storage_key, state=state, data=data))
+        else:
+            entry.state = state
+            entry.data = data
+
+        await session.commit()
+
+    except Exception:
+        await session.rollback()
+        logger.exception(f"Ошибка при сохранении FSM для {storage_key}")
+        raise
+
+
+async def get_fsm_task_snapshots(
+    session: AsyncSession,
+    content_hashes: Iterable[str]
+) -> dict[str, bytes]:
+    """
+    Читает сохранённые версии заданий, на которые ссылается FSM.
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        content_hashes: Хеши содержимого заданий
+
+    Returns:
+        dict: хеш -> сжатый JSON задания (только найденные)
+    """
+    hashes = set(content_hashes)
+    if not hashes:
+        return {}
+    result = await session.execute(
+        select(FSMTaskSnapshot.content_hash, FSMTaskSnapshot.data).where(FSMTaskSnapshot.content_hash.in_(hashes))
+    )
+    return {row.content_hash: row.data for row in result}
+
+
+async def save_fsm_task_snapshots(
+    session: AsyncSession,
+    snapshots: dict[str, bytes]
+) -> None:
+    """
+    Сохраняет версии заданий, которых ещё нет в таблице (одна транзакция).
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        snapshots: хеш -> сжатый JSON задания
+    """
+    if not snapshots:
+        return
+    try:
+        existing = await get_fsm_task_snapshots(session, snapshots.keys())
+        session.add_all(
+            FSMTaskSnapshot(content_hash=content_hash, data=data)
+            for content_hash, data in snapshots.items()
+            if content_hash not in existing
+        )
+        await session.commit()
+
+    except IntegrityError:
+        # Ту же версию успел сохранить параллельный апдейт
+        await session.rollback()
+    except Exception:
+        await session.rollback()
+        logger.exception("Ошибка при сохранении версий заданий FSM")
+        raise
+
+
+# ====================================================================
+# КЕШ ОТВЕТОВ GPT
+# ====================================================================
+
+async def get_gpt_cached_response(
+    session: AsyncSession,
+    cache_key: str
+) -> Optional[str]:
+    """
+    Возвращает сохранённый ответ GPT, если он ещё не истёк (и отмечает использование).
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        cache_key: Ключ запроса (см. gpt/response_cache.make_cache_key)
+
+    Returns:
+        str: Текст ответа или None, если записи нет или она устарела
+    """
+    try:
+        entry = await session.get(GPTResponseCache, cache_key)
+        now = datetime.utcnow()
+
+        if entry is None or entry.expires_at <= now:
+            return None
+
+        entry.last_used_at = now
+        entry.hits = (entry.hits or 0) + 1
+        await session.commit()
+        return entry.response
+
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Ошибка при чтении кеша GPT для {cache_key[:12]}: {e}")
+        return None
+
+
+async def save_gpt_cached_response(
+    session: AsyncSession,
+    cache_key: str,
+    model: str,
+    response: str,
+    expires_at: datetime
+) -> bool:
+    """
+    Сохраняет (или перезаписывает) ответ GPT в кеше.
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        cache_key: Ключ запроса
+        model: Модель, которая дала ответ
+        response: Текст ответа
+        expires_at: Момент, после которого запись считается устаревшей
+
+    Returns:
+        bool: True если запись сохранена
+    """
+    try:
+        now = datetime.utcnow()
+        entry = await session.get(GPTResponseCache, cache_key)
+
+        if entry is None:
+            entry = GPTResponseCache(cache_key=cache_key, hits=0)
+        entry.model = model
+        entry.response = response
+        entry.created_at = now
+        entry.last_used_at = now
+        entry.expires_at = expires_at
+
+        session.add(entry)
+        await session.commit()
+        return True
+
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Ошибка при сохранении кеша GPT для {cache_key[:12]}: {e}")
+        return False
+
+
+async def evict_gpt_cached_responses(
+    session: AsyncSession,
+    max_entries: int
+) -> int:
+    """
+    Удаляет истёкшие ответы GPT, а сверх лимита — давно не использованные (LRU).
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        max_entries: Сколько записей оставить максимум
+
+    Returns:
+        int: Количество удалённых записей
+    """
+    try:
+        expired = await session.execute(
+            delete(GPTResponseCache).where(GPTResponseCache.expires_at <= datetime.utcnow())
+        )
+        removed = expired.rowcount or 0
+
+        total = (await session.execute(select(func.count()).select_from(GPTResponseCache))).scalar_one()
+        if total > max_entries:
+            oldest = (
+                select(GPTResponseCache.cache_key)
+                .order_by(GPTResponseCache.last_used_at)
+                .limit(total - max_entries)
+            )
+            trimmed = await session.execute(
+                delete(GPTResponseCache).where(GPTResponseCache.cache_key.in_(oldest))
+            )
+            removed += trimmed.rowcount or 0
+
+        await session.commit()
+        return removed
+
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Ошибка при очистке кеша GPT: {e}")
+        return 0
@@ -0,0 +1,386 @@
+# utils/fsm_storage.py
+"""
+Постоянное FSM-хранилище на SQLite (таблица fsm_states в matunya.db).
+
+- Переживает рестарт и позволяет запускать несколько процессов бота.
+- Задания со склада (task_6_data, current_task_full_object, ...) хранятся
+  ссылкой {"$task": [склад, id], "sha": хеш} + отличиями от складской версии,
+  а не целиком. Сама версия задания один раз ложится в fsm_task_snapshots:
+  если склад перегенерировали и под тем же id теперь другое задание, FSM
+  восстанавливает то, которое видел ученик, а не подхватывает новое.
+- Внутри одного апдейта все set_state / set_data / update_data копятся в
+  памяти и пишутся в БД одной записью (см. FSMWriteCoalescingMiddleware).
+  Апдейт, обратившийся к ключу, держит его блокировку до своей записи:
+  параллельные апдейты того же чата ждут и читают уже новое состояние,
+  а не перетирают друг друга своими копиями.
+- get_metrics() — число чтений/записей и размер каждого ключа данных в байтах.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import weakref
+import zlib
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Set, Tuple
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from matunya_bot_final.core.task_catalog import get_catalog
+from matunya_bot_final.utils import db_manager
+
+logger = logging.getLogger(__name__)
+
+# Ключ FSM -> склады TASKS_DB, из которых берётся задание
+TASK_REF_KEYS: Dict[str, Tuple[str, ...]] = {
+    "task_1_5_data": ("1_5_paper", "1_5_stoves", "1_5_apartments"),
+    "task_6_data": ("6",),
+    "task_8_data": ("8",),
+    "task_11_data": ("11",),
+    "task_15_data": ("15",),
+    "task_16_data": ("16",),
+    "task_20_data": ("20",),
+    "current_task_full_object": ("12",),
+}
+
+TASK_REF_MARKER = "$task"
+TASK_HASH_FIELD = "sha"
+
+# Данные длиннее порога сжимаются zlib (первый байт — формат)
+COMPRESS_THRESHOLD = 512
+_FORMAT_JSON = b"j"
+_FORMAT_ZLIB = b"z"
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Объект типа {type(obj).__name__} нельзя сохранить в FSM")
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+# (склад, id) -> (задание, хеш): хеш считается один раз на версию склада
+_task_hashes: Dict[Tuple[str, Any], Tuple[dict, str]] = {}
+
+
+def _task_hash(store_key: str, task: dict) -> str:
+    cached = _task_hashes.get((store_key, task.get("id")))
+    if cached is not None and cached[0] is task:
+        return cached[1]
+    canonical = json.dumps(task, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=_json_default)
+    content_hash = hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+    _task_hashes[(store_key, task.get("id"))] = (task, content_hash)
+    return content_hash
+
+
+def _to_task_ref(dict_key: str, value: Any, snapshots: Optional[Dict[str, dict]] = None) -> Any:
+    """
+    Задание со склада -> ссылка + отличия; иначе значение как есть.
+    В snapshots складываются версии заданий, на которые появились ссылки.
+    """
+    store_keys = TASK_REF_KEYS.get(dict_key)
+    if not store_keys or not isinstance(value, dict) or value.get("id") is None:
+        return value
+
+    for store_key in store_keys:
+        base = get_catalog(store_key).get(value["id"])
+        if base is None:
+            continue
+
+        overrides = {k: v for k, v in value.items() if k not in base or base[k] != v}
+        removed = [k for k in base if k not in value]
+        # Если задание почти целиком переписано — ссылка не выгодна
+        if len(overrides) + len(removed) > len(value) // 2:
+            return value
+
+        content_hash = _task_hash(store_key, base)
+        if snapshots is not None:
+            snapshots[content_hash] = base
+        ref: Dict[str, Any] = {TASK_REF_MARKER: [store_key, value["id"]], TASK_HASH_FIELD: content_hash}
+        if overrides:
+            ref["set"] = overrides
+        if removed:
+            ref["del"] = removed
+        return ref
+
+    return value
+
+
+def _stale_task_hash(value: Any) -> Optional[str]:
+    """Хеш версии задания, если склад с тех пор изменился (её надо брать из fsm_task_snapshots)."""
+    if not isinstance(value, dict) or TASK_REF_MARKER not in value:
+        return None
+    content_hash = value.get(TASK_HASH_FIELD)
+    if content_hash is None:
+        return None  # ссылка старого формата — только склад
+    store_key, task_id = value[TASK_REF_MARKER]
+    base = get_catalog(store_key).get(task_id)
+    if base is not None and _task_hash(store_key, base) == content_hash:
+        return None
+    return content_hash
+
+
+def _from_task_ref(dict_key: str, value: Any, snapshots: Mapping[str, dict]) -> Any:
+    if not isinstance(value, dict) or TASK_REF_MARKER not in value:
+        return value
+
+    store_key, task_id = value[TASK_REF_MARKER]
+    stale_hash = _stale_task_hash(value)
+    if stale_hash is None:
+        base = get_catalog(store_key).get(task_id)
+        if base is None:
+            logger.warning(f"[FSM] Задание {task_id} не найдено на складе {store_key} (ключ {dict_key})")
+            return None
+    else:
+        base = snapshots.get(stale_hash)
+        if base is None:
+            logger.warning(f"[FSM] Версия {stale_hash[:8]} задания {task_id} ({store_key}) не сохранена (ключ {dict_key})")
+            return None
+
+    removed = set(value.get("del", ()))
+    task = {k: copy.deepcopy(v) for k, v in base.items() if k not in removed}
+    task.update(value.get("set", {}))
+    return task
+
+
+@dataclass
+class _Record:
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class _WriteBuffer:
+    """Записи, накопленные за один апдейт, и блокировки их ключей."""
+    records: Dict[str, _Record] = field(default_factory=dict)
+    dirty: set = field(default_factory=set)
+    locks: List[asyncio.Lock] = field(default_factory=list)
+    closed: bool = False
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM-хранилище aiogram поверх SQLAlchemy/aiosqlite."""
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        key_builder: Optional[KeyBuilder] = None,
+        compress_threshold: int = COMPRESS_THRESHOLD,
+    ) -> None:
+        self.session_maker = session_maker
+        self.key_builder = key_builder or DefaultKeyBuilder()
+        self.compress_threshold = compress_threshold
+        self._buffer: ContextVar[Optional[_WriteBuffer]] = ContextVar(f"fsm_buffer_{id(self)}", default=None)
+        # ключ хранилища -> блокировка; живёт, пока её держат или ждут
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._metrics: Dict[str, int] = {
+            "db_reads": 0,
+            "db_writes": 0,
+            "coalesced_writes": 0,
+            "bytes_written": 0,
+            "task_refs": 0,
+            "lock_waits": 0,
+            "stale_task_refs": 0,
+        }
+        # ключ данных -> {"last": байт, "max": байт}
+        self._key_sizes: Dict[str, Dict[str, int]] = {}
+        # хеши версий заданий, уже лежащих в fsm_task_snapshots
+        self._saved_snapshots: Set[str] = set()
+
+    # ------------------------------------------------------------------
+    # Сериализация
+    # ------------------------------------------------------------------
+
+    def _encode(self, data: Mapping[str, Any], snapshots: Optional[Dict[str, dict]] = None) -> Optional[bytes]:
+        if not data:
+            return None
+
+        parts = []
+        for dict_key, value in data.items():
+            stored = _to_task_ref(dict_key, value, snapshots)
+            if stored is not value:
+                self._metrics["task_refs"] += 1
+            chunk = _dumps(stored)
+            sizes = self._key_sizes.setdefault(dict_key, {"last": 0, "max": 0})
+            sizes["last"] = len(chunk)
+            sizes["max"] = max(sizes["max"], len(chunk))
+            parts.append(_dumps(dict_key) + b":" + chunk)
+
+        raw = b"{" + b",".join(parts) + b"}"
+        if len(raw) >= self.compress_threshold:
+            return _FORMAT_ZLIB + zlib.compress(raw)
+        return _FORMAT_JSON + raw
+
+    @staticmethod
+    def _parse(blob: Optional[bytes]) -> Dict[str, Any]:
+        if not blob:
+            return {}
+        fmt, payload = blob[:1], blob[1:]
+        if fmt == _FORMAT_ZLIB:
+            payload = zlib.decompress(payload)
+        return json.loads(payload)
+
+    @staticmethod
+    def _decode(data: Mapping[str, Any], snapshots: Mapping[str, dict]) -> Dict[str, Any]:
+        return {dict_key: _from_task_ref(dict_key, value, snapshots) for dict_key, value in data.items()}
+
+    # ------------------------------------------------------------------
+    # Работа с БД
+    # ------------------------------------------------------------------
+
+    async def _load(self, storage_key: str) -> _Record:
+        self._metrics["db_reads"] += 1
+        snapshots: Dict[str, dict] = {}
+        async with self.session_maker() as session:
+            row = await db_manager.get_fsm_record(session, storage_key)
+            if row is None:
+                return _Record()
+            state, blob = row
+            data = self._parse(blob)
+            stale = {content_hash for content_hash in map(_stale_task_hash, data.values()) if content_hash}
+            if stale:
+                # Склад изменился — задание восстанавливается из сохранённой версии
+                self._metrics["stale_task_refs"] += len(stale)
+                stored = await db_manager.get_fsm_task_snapshots(session, stale)
+                snapshots = {content_hash: json.loads(zlib.decompress(raw)) for content_hash, raw in stored.items()}
+        return _Record(state=state, data=self._decode(data, snapshots))
+
+    async def _save(self, storage_key: str, record: _Record) -> None:
+        snapshots: Dict[str, dict] = {}
+        blob = self._encode(record.data, snapshots)
+        new_snapshots = {
+            content_hash: zlib.compress(_dumps(task))
+            for content_hash, task in snapshots.items()
+            if content_hash not in self._saved_snapshots
+        }
+        self._metrics["db_writes"] += 1
+        self._metrics["bytes_written"] += len(blob or b"")
+        async with self.session_maker() as session:
+            await db_manager.save_fsm_task_snapshots(session, new_snapshots)
+            await db_manager.save_fsm_record(session, storage_key, record.state, blob)
+        self._saved_snapshots.update(new_snapshots)
+
+    def _lock_for(self, storage_key: str) -> asyncio.Lock:
+        lock = self._locks.get(storage_key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[storage_key] = lock
+        return lock
+
+    async def _acquire(self, storage_key: str) -> asyncio.Lock:
+        lock = self._lock_for(storage_key)
+        if lock.locked():
+            self._metrics["lock_waits"] += 1
+        await lock.acquire()
+        return lock
+
+    @asynccontextmanager
+    async def _record(self, key: StorageKey, write: bool = False) -> AsyncIterator[_Record]:
+        """
+        Запись ключа на время одной операции.
+
+        Внутри coalesce() запись берётся из буфера апдейта (первое обращение
+        захватывает блокировку ключа до конца апдейта), иначе — читается и
+        сохраняется под блокировкой ключа.
+        """
+        storage_key = self.key_builder.build(key)
+        buffer = self._buffer.get()
+        if buffer is not None and not buffer.closed:
+            record = buffer.records.get(storage_key)
+            if record is None:
+                buffer.locks.append(await self._acquire(storage_key))
+                record = await self._load(storage_key)
+                buffer.records[storage_key] = record
+            yield record
+            if write:
+                if storage_key in buffer.dirty:
+                    self._metrics["coalesced_writes"] += 1
+                buffer.dirty.add(storage_key)
+            return
+
+        lock = await self._acquire(storage_key)
+        try:
+            record = await self._load(storage_key)
+            yield record
+            if write:
+                await self._save(storage_key, record)
+        finally:
+            lock.release()
+
+    @asynccontextmanager
+    async def coalesce(self) -> AsyncIterator[None]:
+        """Копит все изменения внутри блока и пишет их в БД один раз в конце."""
+        if self._buffer.get() is not None and not self._buffer.get().closed:
+            yield
+            return
+
+        buffer = _WriteBuffer()
+        token = self._buffer.set(buffer)
+        try:
+            yield
+        finally:
+            self._buffer.reset(token)
+            # Фоновые задачи, унаследовавшие контекст, дальше пишут напрямую
+            buffer.closed = True
+            try:
+                for storage_key in buffer.dirty:
+                    await self._save(storage_key, buffer.records[storage_key])
+            finally:
+                for lock in buffer.locks:
+                    lock.release()
+
+    # ------------------------------------------------------------------
+    # API BaseStorage
+    # ------------------------------------------------------------------
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        async with self._record(key, write=True) as record:
+            record.state = state.state if isinstance(state, State) else state
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        async with self._record(key) as record:
+            return record.state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(
+                f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            )
+        async with self._record(key, write=True) as record:
+            record.data = data.copy()
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        async with self._record(key) as record:
+            return record.data.copy()
+
+    async def update_data(self, key: StorageKey, data: Mapping[str, Any]) -> Dict[str, Any]:
+        # Чтение и запись — под одной блокировкой, чтобы параллельный апдейт не вклинился между ними
+        async with self._record(key, write=True) as record:
+            record.data = {**record.data, **data}
+            return record.data.copy()
+
+    async def close(self) -> None:
+        # Движок закрывается в close_database()
+        pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Счётчики чтений/записей и размеры ключей данных (байт, до сжатия)."""
+        return {
+            **self._metrics,
+            "key_sizes": {dict_key: dict(sizes) for dict_key, sizes in self._key_sizes.items()},
+        }
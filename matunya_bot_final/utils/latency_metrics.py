@@ -0,0 +1,239 @@
+# utils/latency_metrics.py
+"""
+Гистограммы латентностей и экспорт метрик в текстовом формате Prometheus.
+
+- observe(metric, labels, seconds) — одно наблюдение (хендлер, апдейт, метод Telegram);
+- register_collector(name, fn) — подключить готовые снимки метрик модулей
+  (GPT, кеш ответов, пул решателей, пулы заданий) как gauge-и;
+- render_prometheus() — всё сразу для GET /metrics;
+- summary() — p50/p95/p99 по каждой серии (оценка по бакетам, как histogram_quantile);
+- start_metrics_reporting() / stop_metrics_reporting() — HTTP-эндпоинт и
+  периодическая сводка в лог (METRICS_PORT, METRICS_LOG_INTERVAL).
+"""
+
+import asyncio
+import bisect
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+PORT_ENV = "METRICS_PORT"
+HOST_ENV = "METRICS_HOST"
+LOG_INTERVAL_ENV = "METRICS_LOG_INTERVAL"
+
+DEFAULT_HOST = "0.0.0.0"
+METRIC_PREFIX = "matunya"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Верхние границы бакетов, секунды (последний — +Inf)
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Защита от взрыва числа серий (например, id в callback_data)
+MAX_SERIES_PER_METRIC = 500
+OVERFLOW_LABEL = "other"
+
+HELP: Dict[str, str] = {
+    "update_seconds": "Полная обработка апдейта диспетчером",
+    "handler_seconds": "Время работы хендлера",
+    "telegram_api_seconds": "Вызовы Telegram Bot API",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        logger.warning(f"[Metrics] Некорректное значение {name}, используем {default}")
+        return default
+
+
+class Histogram:
+    """Кумулятивная гистограмма одной серии: бакеты, сумма, количество."""
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Линейная интерполяция внутри бакета; выше последней границы — сама граница."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(BUCKETS):
+                    return BUCKETS[-1]
+                lower = BUCKETS[index - 1] if index else 0.0
+                return lower + (BUCKETS[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return BUCKETS[-1]
+
+
+_histograms: Dict[str, Dict[Labels, Histogram]] = {}
+_collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+_runner: Optional[web.AppRunner] = None
+_summary_task: Optional[asyncio.Task] = None
+
+
+def observe(metric: str, labels: Dict[str, str], seconds: float) -> None:
+    series = _histograms.setdefault(metric, {})
+    key = tuple(sorted((name, str(value)) for name, value in labels.items()))
+    histogram = series.get(key)
+    if histogram is None:
+        if len(series) >= MAX_SERIES_PER_METRIC:
+            key = tuple((name, OVERFLOW_LABEL) for name, _ in key)
+            histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+    histogram.observe(seconds)
+
+
+def register_collector(name: str, collect: Callable[[], Dict[str, Any]]) -> None:
+    """
+    collect() возвращает {ключ: число} или {серия: {ключ: число}};
+    во втором случае серия уходит в метку series.
+    """
+    _collectors[name] = collect
+
+
+def reset_metrics() -> None:
+    _histograms.clear()
+
+
+def summary() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """{metric: {"router=...,handler=...": {"count", "avg", "p50", "p95", "p99"}}} в миллисекундах."""
+    report: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for metric, series in _histograms.items():
+        for labels, histogram in series.items():
+            stats = {"count": histogram.count, "avg": round(histogram.total / histogram.count * 1000, 1)}
+            for q in QUANTILES:
+                stats[f"p{int(q * 100)}"] = round(histogram.quantile(q) * 1000, 1)
+            report.setdefault(metric, {})[",".join(f"{k}={v}" for k, v in labels)] = stats
+    return report
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _render_collectors(lines: List[str]) -> None:
+    for name, collect in _collectors.items():
+        try:
+            snapshot = collect()
+        except Exception as e:
+            logger.warning(f"[Metrics] Коллектор {name} упал: {e}")
+            continue
+        rows: Dict[str, List[Tuple[Labels, float]]] = {}
+        for key, value in snapshot.items():
+            if isinstance(value, dict):
+                for field, number in value.items():
+                    if isinstance(number, (int, float)) and not isinstance(number, bool):
+                        rows.setdefault(field, []).append(((("series", str(key)),), number))
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                rows.setdefault(key, []).append(((), value))
+        for field, samples in rows.items():
+            full_name = f"{METRIC_PREFIX}_{name}_{field}"
+            lines.append(f"# TYPE {full_name} gauge")
+            lines.extend(f"{full_name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric, series in _histograms.items():
+        full_name = f"{METRIC_PREFIX}_{metric}"
+        if metric in HELP:
+            lines.append(f"# HELP {full_name} {HELP[metric]}")
+        lines.append(f"# TYPE {full_name} histogram")
+        for labels, histogram in series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS + (float("inf"),), histogram.counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{full_name}_bucket{_format_labels(labels, (('le', le),))} {cumulative}")
+            lines.append(f"{full_name}_sum{_format_labels(labels)} {histogram.total!r}")
+            lines.append(f"{full_name}_count{_format_labels(labels)} {histogram.count}")
+    _render_collectors(lines)
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(body=render_prometheus().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def _start_metrics_server(port: str) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    host = os.getenv(HOST_ENV) or DEFAULT_HOST
+    await web.TCPSite(runner, host, int(port)).start()
+    logger.info(f"[Metrics] Prometheus-метрики на {host}:{port}/metrics")
+    return runner
+
+
+def _log_summary() -> None:
+    for metric, series in summary().items():
+        top = sorted(series.items(), key=lambda item: item[1]["p95"], reverse=True)[:10]
+        for labels, stats in top:
+            logger.info(
+                f"[Metrics] {metric} {labels}: n={stats['count']} p50={stats['p50']} "
+                f"p95={stats['p95']} p99={stats['p99']} мс"
+            )
+
+
+async def _summary_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        _log_summary()
+
+
+async def start_metrics_reporting() -> None:
+    """
+    Сервер GET /metrics, если задан METRICS_PORT (в режиме webhook /metrics есть и так),
+    и сводка p50/p95/p99 в лог раз в METRICS_LOG_INTERVAL секунд (0 — выключено).
+    """
+    global _runner, _summary_task
+    port = os.getenv(PORT_ENV)
+    if port and _runner is None:
+        _runner = await _start_metrics_server(port)
+    interval = _env_number(LOG_INTERVAL_ENV, 0)
+    if interval > 0 and _summary_task is None:
+        _summary_task = asyncio.create_task(_summary_loop(interval), name="metrics_summary")
+
+
+async def stop_metrics_reporting() -> None:
+    global _runner, _summary_task
+    if _summary_task is not None:
+        _summary_task.cancel()
+        await asyncio.gather(_summary_task, return_exceptions=True)
+        _summary_task = None
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
@@ -0,0 +1,198 @@
+# matunya_bot_final/utils/log_writer.py
+"""
+Отложенная (write-behind) запись логов: ответы, активность, обращения к ИИ.
+
+Раньше каждый лог — это отдельные add → commit → refresh, и на SQLite
+каждое действие ученика ждало fsync. Теперь db_manager.log_answer /
+log_activity / log_ai_interaction кладут строку в очередь, а фоновая
+задача пишет накопленное одной транзакцией (executemany по таблицам
+вместе с дневными сводками utils/analytics_rollups.py):
+
+- сброс раз в LOG_WRITER_FLUSH_MS мс (по умолчанию 200) или сразу,
+  как набралось LOG_WRITER_BATCH_SIZE строк (по умолчанию 500);
+- очередь ограничена LOG_WRITER_MAX_QUEUE (по умолчанию 10000): если диск
+  не успевает, submit() ждёт свободного места (backpressure), а не копит
+  память бесконечно;
+- close_database() дожидается записи всего, что в очереди;
+- LOG_WRITER_SYNC=1 (или start(..., sync=True)) — синхронный режим для
+  тестов и отладки: каждая строка пишется сразу, в вызове submit().
+
+Пока писатель не запущен, db_manager пишет логи по-старому, построчно.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .analytics_rollups import apply_log_rows
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_ENV = "LOG_WRITER_BATCH_SIZE"
+FLUSH_MS_ENV = "LOG_WRITER_FLUSH_MS"
+MAX_QUEUE_ENV = "LOG_WRITER_MAX_QUEUE"
+SYNC_ENV = "LOG_WRITER_SYNC"
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_MS = 200
+DEFAULT_MAX_QUEUE = 10_000
+
+# Сколько ждать записи очереди при остановке
+DRAIN_TIMEOUT_SECONDS = 30.0
+
+# (модель, значения колонок)
+LogRecord = Tuple[Type[Any], Dict[str, Any]]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        logger.warning(f"[LogWriter] Некорректное значение {name}, используем {default}")
+        return default
+
+
+class LogWriter:
+    """Очередь логов и фоновая задача, пишущая их пачками."""
+
+    def __init__(self) -> None:
+        self.batch_size = DEFAULT_BATCH_SIZE
+        self.flush_interval = DEFAULT_FLUSH_MS / 1000
+        self.sync = False
+        self._session_maker: Optional[async_sessionmaker[AsyncSession]] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.metrics: Dict[str, int] = {"queued": 0, "written": 0, "failed": 0, "batches": 0, "max_batch": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._session_maker is not None
+
+    def start(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        sync: Optional[bool] = None,
+        batch_size: Optional[int] = None,
+        flush_ms: Optional[int] = None,
+        max_queue: Optional[int] = None,
+    ) -> None:
+        """Запускает писателя в текущем event loop (параметры по умолчанию — из окружения)."""
+        if self.running:
+            return
+        self._session_maker = session_maker
+        self.sync = sync if sync is not None else os.getenv(SYNC_ENV) == "1"
+        self.batch_size = max(1, batch_size or _env_int(BATCH_SIZE_ENV, DEFAULT_BATCH_SIZE))
+        self.flush_interval = max(0, flush_ms if flush_ms is not None else _env_int(FLUSH_MS_ENV, DEFAULT_FLUSH_MS)) / 1000
+
+        if not self.sync:
+            self._queue = asyncio.Queue(maxsize=max(1, max_queue or _env_int(MAX_QUEUE_ENV, DEFAULT_MAX_QUEUE)))
+            self._worker = asyncio.create_task(self._run(), name="log_writer")
+        logger.info(
+            f"[LogWriter] Запущен: {'синхронно' if self.sync else f'пачки до {self.batch_size} строк / {self.flush_interval * 1000:.0f} мс'}"
+        )
+
+    async def submit(self, model: Type[Any], values: Dict[str, Any]) -> None:
+        """Ставит строку в очередь (ждёт только если очередь переполнена)."""
+        self.metrics["queued"] += 1
+        if self.sync or self._queue is None:
+            await self._write([(model, values)])
+            return
+        await self._queue.put((model, values))
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+
+    async def _write(self, batch: List[LogRecord]) -> None:
+        """Пишет пачку одной транзакцией; при ошибке — построчно, чтобы не терять соседей."""
+        assert self._session_maker is not None
+        by_model: Dict[Type[Any], List[Dict[str, Any]]] = {}
+        for model, values in batch:
+            by_model.setdefault(model, []).append(values)
+
+        async with self._session_maker() as session:
+            try:
+                for model, rows in by_model.items():
+                    await session.execute(insert(model), rows)
+                    # Дневные сводки аналитики — в той же транзакции
+                    await apply_log_rows(session, model, rows)
+                await session.commit()
+                self.metrics["written"] += len(batch)
+                self.metrics["batches"] += 1
+                self.metrics["max_batch"] = max(self.metrics["max_batch"], len(batch))
+                return
+            except Exception as e:
+                await session.rollback()
+                if len(batch) == 1:
+                    self.metrics["failed"] += 1
+                    logger.error(f"[LogWriter] Не удалось записать {batch[0][0].__tablename__}: {e}")
+                    return
+                logger.warning(f"[LogWriter] Пачка из {len(batch)} строк не записалась ({e}), пишем построчно")
+
+        for record in batch:
+            await self._write([record])
+
+    async def _collect(self) -> List[LogRecord]:
+        """Ждёт первую строку, затем добирает пачку до batch_size или до конца интервала."""
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        while True:
+            batch = await self._collect()
+            try:
+                await self._write(batch)
+            except Exception:
+                self.metrics["failed"] += len(batch)
+                logger.exception(f"[LogWriter] Потеряна пачка из {len(batch)} строк")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def stop(self, timeout: float = DRAIN_TIMEOUT_SECONDS) -> None:
+        """Дописывает очередь (не дольше timeout) и останавливает писателя."""
+        if not self.running:
+            return
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"[LogWriter] Не успели дописать {self._queue.qsize()} строк за {timeout:.0f} с")
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        logger.info(f"[LogWriter] Остановлен: {self.metrics}")
+        self._worker = None
+        self._queue = None
+        self._session_maker = None
+
+
+log_writer = LogWriter()
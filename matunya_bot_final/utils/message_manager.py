@@ -4,13 +4,131 @@
 Рефакторинг: переход от простых именных бирок к категорийному управлению сообщениями
 """
 
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from contextvars import ContextVar
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Optional
+from uuid import uuid4
+
 from aiogram import Bot
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, InlineKeyboardMarkup, BufferedInputFile
 from aiogram.exceptions import TelegramBadRequest
-from contextlib import suppress
-from typing import Optional
-from uuid import uuid4
+
+from matunya_bot_final.utils.telegram_file_cache import send_cached_photo
+
+# Telegram deleteMessages принимает не больше 100 id за вызов
+DELETE_MESSAGES_LIMIT = 100
+
+
+# --- ТРЕКЕР СООБЩЕНИЙ: ОДНО ЧТЕНИЕ И ОДНА ЗАПИСЬ STATE НА ПАКЕТ ОПЕРАЦИЙ ---
+
+class MessageTracker:
+    """
+    Копия tracked_messages / message_tags_by_category в памяти.
+    Все отправки и уборки внутри message_tracker(state) работают с ней,
+    а в state изменения пишутся один раз — при выходе из блока.
+    """
+
+    def __init__(self, state: FSMContext, data: dict) -> None:
+        self.state = state
+        self.tracked_messages: dict[str, int] = dict(data.get("tracked_messages", {}))
+        self.message_tags_by_category: dict[str, list[str]] = {
+            category: list(tags) for category, tags in data.get("message_tags_by_category", {}).items()
+        }
+        self.dirty = False
+
+    def track(self, message_tag: str, message_id: int, category: Optional[str] = None) -> None:
+        # Всегда добавляем сообщение в основной словарь отслеживания
+        self.tracked_messages[message_tag] = message_id
+
+        # Если указана категория, добавляем тег в соответствующий контейнер
+        if category:
+            self.message_tags_by_category.setdefault(category, []).append(message_tag)
+        self.dirty = True
+
+    def pop_categories(self, categories: Iterable[str]) -> list[int]:
+        """Снимает с учёта все сообщения категорий и возвращает их message_id."""
+        message_ids = []
+        for category in categories:
+            for tag in self.message_tags_by_category.pop(category, []):
+                if tag in self.tracked_messages:
+                    message_ids.append(self.tracked_messages.pop(tag))
+            self.dirty = True
+        return message_ids
+
+    def pop_all(self) -> list[int]:
+        message_ids = list(self.tracked_messages.values())
+        self.tracked_messages = {}
+        self.message_tags_by_category = {}
+        self.dirty = True
+        return message_ids
+
+    async def flush(self) -> None:
+        if not self.dirty:
+            return
+        await self.state.update_data(
+            tracked_messages=self.tracked_messages,
+            message_tags_by_category=self.message_tags_by_category,
+        )
+        self.dirty = False
+
+
+# Открытые трекеры текущего апдейта (по ключу FSM)
+_active_trackers: ContextVar[Optional[dict]] = ContextVar("active_message_trackers", default=None)
+
+
+@asynccontextmanager
+async def message_tracker(state: FSMContext) -> AsyncIterator[MessageTracker]:
+    """
+    Пакетный режим: send_tracked_* и cleanup_* внутри блока не читают и
+    не пишут state по отдельности — трекер грузится один раз и
+    сохраняется один раз на выходе. Повторный вход переиспользует трекер.
+    Не вызывайте state.clear() внутри блока — выход перезапишет трекинг.
+    """
+    active = _active_trackers.get() or {}
+    tracker = active.get(state.key)
+    if tracker is not None:
+        yield tracker
+        return
+
+    tracker = MessageTracker(state, await state.get_data())
+    token = _active_trackers.set({**active, state.key: tracker})
+    try:
+        yield tracker
+    finally:
+        _active_trackers.reset(token)
+        await tracker.flush()
+
+
+async def delete_messages_bulk(bot: Bot, chat_id: int, message_ids: list[int]) -> None:
+    """
+    Удаляет сообщения пачками через deleteMessages; если пачка не прошла —
+    удаляем по одному, но параллельно. Уже удалённые сообщения игнорируются.
+    """
+    if not message_ids:
+        return
+
+    async def _delete_one(message_id: int) -> None:
+        with suppress(TelegramBadRequest):
+            await bot.delete_message(chat_id=chat_id, message_id=message_id)
+
+    async def _delete_chunk(chunk: list[int]) -> None:
+        if len(chunk) > 1 and hasattr(bot, "delete_messages"):
+            try:
+                await bot.delete_messages(chat_id=chat_id, message_ids=chunk)
+                return
+            except TelegramBadRequest as e:
+                print(f"--- DEBUG: deleteMessages не прошёл ({e}), удаляем по одному")
+        await asyncio.gather(*(_delete_one(message_id) for message_id in chunk))
+
+    chunks = [
+        message_ids[i:i + DELETE_MESSAGES_LIMIT]
+        for i in range(0, len(message_ids), DELETE_MESSAGES_LIMIT)
+    ]
+    await asyncio.gather(*(_delete_chunk(chunk) for chunk in chunks))
+
 
 # --- НОВАЯ УТИЛИТА ДЛЯ ПОИСКА ---
 async def get_message_id_by_tag(state: FSMContext, tag: str) -> int | None:
@@ -58,28 +176,9 @@ async def send_tracked_message(
     parse_mode=parse_mode
     )
 
-    data = await state.get_data()
-
-    # Получаем структуры отслеживания из state
-    tracked_messages = data.get("tracked_messages", {})
-    message_tags_by_category = data.get("message_tags_by_category", {})
-
-    # Всегда добавляем сообщение в основной словарь отслеживания
-    tracked_messages[message_tag] = sent_message.message_id
-
-    # Если указана категория, добавляем тег в соответствующий контейнер
-    if category:
-        if category not in message_tags_by_category:
-            message_tags_by_category[category] = []
-        message_tags_by_category[category].append(message_tag)
-
-    print("DEBUG tracked_messages:", len(tracked_messages))
-
-    # Обновляем state
-    await state.update_data(
-        tracked_messages=tracked_messages,
-        message_tags_by_category=message_tags_by_category
-    )
+    async with message_tracker(state) as tracker:
+        tracker.track(message_tag, sent_message.message_id, category)
+        print("DEBUG tracked_messages:", len(tracker.tracked_messages))
 
     return sent_message
 
@@ -92,25 +191,14 @@ async def track_existing_message(
     category: Optional[str] = None,
 ) -> None:
     """Register already-sent message so cleanup routines can delete it later."""
-    data = await state.get_data()
-    tracked_messages = data.get("tracked_messages", {})
-    message_tags_by_category = data.get("message_tags_by_category", {})
-
-    tracked_messages[message_tag] = message_id
-
-    if category:
-        message_tags_by_category.setdefault(category, []).append(message_tag)
-
-    await state.update_data(
-        tracked_messages=tracked_messages,
-        message_tags_by_category=message_tags_by_category,
-    )
+    async with message_tracker(state) as tracker:
+        tracker.track(message_tag, message_id, category)
 
 async def send_tracked_photo(
     bot: Bot,
     chat_id: int,
     state: FSMContext,
-    photo: str | BufferedInputFile,
+    photo: str | BufferedInputFile | Path,
     message_tag: str,
     caption: str = None,
     category: Optional[str] = None,
@@ -123,7 +211,7 @@ async def send_tracked_photo(
         bot: Экземпляр бота
         chat_id: ID чата
         state: FSM контекст
-        photo: Фото для отправки
+        photo: Фото для отправки (Path — через кеш file_id)
         message_tag: Уникальная именная бирка для сообщения
         caption: Подпись к фото (опционально)
         category: Категория сообщения для группового управления (опционально)
@@ -131,83 +219,58 @@ async def send_tracked_photo(
     Returns:
         Отправленное сообщение
     """
-    sent_message = await bot.send_photo(
-        chat_id=chat_id,
-        photo=photo,
-        caption=caption,
-        parse_mode=parse_mode # 2. Используем переданный аргумент
-    )
-
-    data = await state.get_data()
-
-    # Получаем структуры отслеживания из state
-    tracked_messages = data.get("tracked_messages", {})
-    message_tags_by_category = data.get("message_tags_by_category", {})
-
-    # Всегда добавляем сообщение в основной словарь отслеживания
-    tracked_messages[message_tag] = sent_message.message_id
-
-    # Если указана категория, добавляем тег в соответствующий контейнер
-    if category:
-        if category not in message_tags_by_category:
-            message_tags_by_category[category] = []
-        message_tags_by_category[category].append(message_tag)
-
-    # Обновляем state
-    await state.update_data(
-        tracked_messages=tracked_messages,
-        message_tags_by_category=message_tags_by_category
-    )
+    if isinstance(photo, Path):
+        # Статический ассет: отправляем по file_id, если уже загружали
+        sent_message = await send_cached_photo(
+            bot=bot,
+            chat_id=chat_id,
+            path=photo,
+            caption=caption,
+            parse_mode=parse_mode,
+        )
+    else:
+        sent_message = await bot.send_photo(
+            chat_id=chat_id,
+            photo=photo,
+            caption=caption,
+            parse_mode=parse_mode # 2. Используем переданный аргумент
+        )
+
+    async with message_tracker(state) as tracker:
+        tracker.track(message_tag, sent_message.message_id, category)
 
     return sent_message
 
 # --- ПРОФЕССИОНАЛЬНАЯ "КЛИНИНГОВАЯ СЛУЖБА" - АРХИТЕКТУРА "КОНТЕЙНЕРОВ ПАМЯТИ" ---
 
-async def cleanup_messages_by_category(bot: Bot, state: FSMContext, chat_id: int, category: str):
+async def cleanup_messages_by_category(
+    bot: Bot,
+    state: FSMContext,
+    chat_id: int,
+    *categories: str,
+    category: Optional[str] = None,
+):
     """
-    Категорийная очистка: удаляет сообщения определенной категории
+    Категорийная очистка: удаляет сообщения одной или нескольких категорий
+    за одно чтение/запись state; сообщения удаляются пакетно и параллельно
 
     Args:
         bot: Экземпляр бота
         state: FSM контекст
         chat_id: ID чата
-        category: Категория сообщений для удаления
+        categories: Категории сообщений для удаления
+        category: То же для вызова с именованным аргументом
     """
-    data = await state.get_data()
-
-    tracked_messages = data.get("tracked_messages", {})
-    message_tags_by_category = data.get("message_tags_by_category", {})
-
-    # Получаем теги сообщений в указанной категории
-    tags_to_remove = message_tags_by_category.get(category, [])
-
-    print(f"--- DEBUG: Категорийная очистка '{category}'. Тегов к удалению: {len(tags_to_remove)}")
-    print(f"--- DEBUG: Теги: {tags_to_remove}")
-
-    # Удаляем сообщения по тегам из указанной категории
-    for tag in tags_to_remove:
-        if tag in tracked_messages:
-            message_id = tracked_messages[tag]
-            print(f"--- DEBUG: Удаляем сообщение категории '{category}': '{tag}' (ID: {message_id})")
-
-            # Удаляем сообщение
-            with suppress(TelegramBadRequest):
-                await bot.delete_message(chat_id=chat_id, message_id=message_id)
-
-            # Удаляем запись из основного словаря отслеживания
-            del tracked_messages[tag]
+    if category:
+        categories = (*categories, category)
 
-    # Очищаем список тегов для данной категории
-    if category in message_tags_by_category:
-        del message_tags_by_category[category]
+    async with message_tracker(state) as tracker:
+        message_ids = tracker.pop_categories(categories)
+        print(f"--- DEBUG: Категорийная очистка {list(categories)}. Сообщений к удалению: {len(message_ids)}")
 
-    # Обновляем state
-    await state.update_data(
-        tracked_messages=tracked_messages,
-        message_tags_by_category=message_tags_by_category
-    )
+        await delete_messages_bulk(bot, chat_id, message_ids)
 
-    print(f"--- DEBUG: Категорийная очистка '{category}' завершена. Осталось сообщений: {len(tracked_messages)}")
+        print(f"--- DEBUG: Категорийная очистка {list(categories)} завершена. Осталось сообщений: {len(tracker.tracked_messages)}")
 
 async def cleanup_all_messages(bot: Bot, state: FSMContext, chat_id: int):
     """
@@ -218,23 +281,11 @@ async def cleanup_all_messages(bot: Bot, state: FSMContext, chat_id: int):
         state: FSM контекст
         chat_id: ID чата
     """
-    data = await state.get_data()
+    async with message_tracker(state) as tracker:
+        message_ids = tracker.pop_all()
+        print(f"--- DEBUG: Полная очистка всех отслеживаемых сообщений. Всего: {len(message_ids)}")
 
-    tracked_messages = data.get("tracked_messages", {})
-
-    print(f"--- DEBUG: Полная очистка всех отслеживаемых сообщений. Всего: {len(tracked_messages)}")
-
-    # Удаляем все отслеживаемые сообщения
-    for tag, message_id in tracked_messages.items():
-        print(f"--- DEBUG: Удаляем сообщение '{tag}' (ID: {message_id})")
-        with suppress(TelegramBadRequest):
-            await bot.delete_message(chat_id=chat_id, message_id=message_id)
-
-    # Полностью очищаем систему отслеживания в state
-    await state.update_data(
-        tracked_messages={},
-        message_tags_by_category={}
-    )
+        await delete_messages_bulk(bot, chat_id, message_ids)
 
     print(f"--- DEBUG: Полная очистка завершена. Все сообщения удалены.")
 
@@ -250,6 +301,4 @@ async def cleanup_tracked_messages(bot: Bot, chat_id: int, messages_to_delete: l
     print(f"--- WARNING: Используется устаревшая функция cleanup_tracked_messages")
     print(f"--- DEBUG: Удаляем сообщения с ID: {messages_to_delete}")
 
-    for message_id in messages_to_delete:
-        with suppress(TelegramBadRequest):
-            await bot.delete_message(chat_id=chat_id, message_id=message_id)
+    await delete_messages_bulk(bot, chat_id, list(messages_to_delete))
@@ -2,8 +2,8 @@
 Модели базы данных для проекта "Матюня"
 SQLAlchemy 2.0 модели для профессиональной аналитики
 """
-from datetime import datetime
-from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Integer, String, Text, Float
+from datetime import date, datetime
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, ForeignKey, Index, Integer, LargeBinary, String, Text, Float
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from typing import Optional, List
 from sqlalchemy import JSON
@@ -40,7 +40,7 @@ class SkillType(Base):
     __tablename__ = "skill_types"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    source_id: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    source_id: Mapped[str] = mapped_column(String, nullable=False, unique=True)  # UNIQUE уже даёт индекс для поиска при register_task
     name: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     task_number: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -57,8 +57,8 @@ class Task(Base):
     __tablename__ = "tasks"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    skill_type_id: Mapped[int] = mapped_column(Integer, ForeignKey("skill_types.id"), nullable=False)
-    theme: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # "Шины", "Квартиры", "Печи"
+    skill_type_id: Mapped[int] = mapped_column(Integer, ForeignKey("skill_types.id"), nullable=False, index=True)
+    theme: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)  # "Шины", "Квартиры", "Печи"
     text: Mapped[str] = mapped_column(Text, nullable=False)
     answer: Mapped[str] = mapped_column(String, nullable=False)
     solution_data: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)  # JSON с подробностями решения, включая шаги, формулы, графики и т.д.
@@ -77,10 +77,14 @@ class Task(Base):
 class AnswerLog(Base):
     """Лог ответов пользователей"""
     __tablename__ = "answer_logs"
+    __table_args__ = (
+        # Запросы analytics_core: WHERE user_id = ? AND timestamp >= cutoff
+        Index("ix_answer_logs_user_id_timestamp", "user_id", "timestamp"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
-    task_id: Mapped[int] = mapped_column(Integer, ForeignKey("tasks.id"), nullable=False)
+    task_id: Mapped[int] = mapped_column(Integer, ForeignKey("tasks.id"), nullable=False, index=True)
     user_answer: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # ответ пользователя
     is_correct: Mapped[bool] = mapped_column(Boolean, nullable=False)
     time_spent: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # время в секундах
@@ -101,6 +105,9 @@ class AnswerLog(Base):
 class ActivityLog(Base):
     """Лог активности пользователей - все действия в боте"""
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        Index("ix_activity_logs_user_id_timestamp", "user_id", "timestamp"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
@@ -122,6 +129,9 @@ class ActivityLog(Base):
 class SessionLog(Base):
     """Лог сессий работы пользователей"""
     __tablename__ = "session_logs"
+    __table_args__ = (
+        Index("ix_session_logs_user_id_session_start", "user_id", "session_start"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
@@ -141,6 +151,9 @@ class SessionLog(Base):
 class AIInteractionLog(Base):
     """Лог взаимодействий с ИИ для анализа качества помощи"""
     __tablename__ = "ai_interaction_logs"
+    __table_args__ = (
+        Index("ix_ai_interaction_logs_user_id_timestamp", "user_id", "timestamp"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
@@ -158,7 +171,7 @@ class AIInteractionLog(Base):
     solved_task_after: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True)  # решил задачу в итоге
     time_to_solution: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # секунд от вопроса до решения
     abandoned_task: Mapped[bool] = mapped_column(Boolean, default=False)  # бросил задачу после ИИ
-    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)  # сводки ИИ по всем ученикам
 
     # Связи с другими таблицами
     user: Mapped["User"] = relationship("User", back_populates="ai_interactions")
@@ -166,3 +179,110 @@ class AIInteractionLog(Base):
 
     def __repr__(self) -> str:
         return f"<AIInteractionLog(id={self.id}, user_id={self.user_id}, task_id={self.task_id}, question_category='{self.question_category}')>"
+
+
+# ====================================================================
+# ДНЕВНЫЕ СВОДКИ ДЛЯ АНАЛИТИКИ (см. utils/analytics_rollups.py)
+# Обновляются вместе с записью логов; пустая строка / 0 в ключе = "нет значения"
+# ====================================================================
+
+class UserDailyAnswerStats(Base):
+    """Сводка ответов: ученик × день × навык × тема"""
+    __tablename__ = "user_daily_answer_stats"
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    skill_type_id: Mapped[int] = mapped_column(Integer, primary_key=True, default=0)  # 0 — задача без навыка
+    theme: Mapped[str] = mapped_column(String, primary_key=True, default="")  # "" — задача без темы
+    total: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    correct: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    help_used: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    timed: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    last_attempt: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<UserDailyAnswerStats(user_id={self.user_id}, day={self.day}, skill_type_id={self.skill_type_id}, total={self.total})>"
+
+
+class UserDailyActivityStats(Base):
+    """Сводка активности: ученик × день × тип активности × пак"""
+    __tablename__ = "user_daily_activity_stats"
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    activity_type: Mapped[str] = mapped_column(String, primary_key=True)
+    pack_type: Mapped[str] = mapped_column(String, primary_key=True, default="")
+    pack_theme: Mapped[str] = mapped_column(String, primary_key=True, default="")
+    count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    def __repr__(self) -> str:
+        return f"<UserDailyActivityStats(user_id={self.user_id}, day={self.day}, activity_type='{self.activity_type}', count={self.count})>"
+
+
+class UserDailySessionStats(Base):
+    """Сводка завершённых сессий: ученик × день начала сессии"""
+    __tablename__ = "user_daily_session_stats"
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    sessions: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    tasks_attempted: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    activities_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    total_minutes: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
+
+    def __repr__(self) -> str:
+        return f"<UserDailySessionStats(user_id={self.user_id}, day={self.day}, sessions={self.sessions})>"
+
+
+class TelegramFileCache(Base):
+    """Кеш Telegram file_id для статических картинок (путь + хеш содержимого)"""
+    __tablename__ = "telegram_file_ids"
+
+    asset_path: Mapped[str] = mapped_column(String, primary_key=True)  # путь относительно корня проекта
+    content_hash: Mapped[str] = mapped_column(String, nullable=False)  # sha1 содержимого файла
+    file_id: Mapped[str] = mapped_column(String, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<TelegramFileCache(asset_path='{self.asset_path}', content_hash='{self.content_hash[:8]}')>"
+
+
+class FSMRecord(Base):
+    """Состояние FSM одного пользователя (state + сжатые данные)"""
+    __tablename__ = "fsm_states"
+
+    storage_key: Mapped[str] = mapped_column(String, primary_key=True)  # fsm:<bot>:<chat>:<user>
+    state: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    data: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)  # см. utils/fsm_storage.py
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<FSMRecord(storage_key='{self.storage_key}', state='{self.state}')>"
+
+
+class FSMTaskSnapshot(Base):
+    """Версия складского задания, на которую ссылается FSM (адресация по хешу содержимого)"""
+    __tablename__ = "fsm_task_snapshots"
+
+    content_hash: Mapped[str] = mapped_column(String, primary_key=True)  # sha1 задания, см. utils/fsm_storage.py
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)  # сжатый JSON задания
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<FSMTaskSnapshot(content_hash='{self.content_hash[:8]}')>"
+
+
+class GPTResponseCache(Base):
+    """Кеш ответов GPT по содержимому запроса (модель + промпты + температура)"""
+    __tablename__ = "gpt_response_cache"
+
+    cache_key: Mapped[str] = mapped_column(String, primary_key=True)  # sha256, см. gpt/response_cache.py
+    model: Mapped[str] = mapped_column(String, nullable=False)
+    response: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)  # TTL
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)  # LRU-вытеснение
+    hits: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    def __repr__(self) -> str:
+        return f"<GPTResponseCache(cache_key='{self.cache_key[:12]}', model='{self.model}', hits={self.hits})>"
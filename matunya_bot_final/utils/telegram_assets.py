@@ -0,0 +1,233 @@
+# utils/telegram_assets.py
+"""
+Облегчённые варианты статических картинок для отправки в Telegram.
+
+Telegram показывает фото не крупнее 1280 px по длинной стороне и всё равно
+пережимает их, а часть ассетов весит 0.7–0.9 МБ (шины, печи) — первая
+загрузка такого файла занимала 10–20 секунд. Поэтому для каждого ассета из
+non_generators/**/assets и data/tasks_1_5/*/assets строим вариант:
+
+- уменьшенный до TELEGRAM_ASSET_MAX_SIDE (по умолчанию 1280) по длинной стороне;
+- прозрачность — на белом фоне; из PNG, PNG с палитрой из 256 цветов (если
+  она не портит картинку) и JPEG берём самый лёгкий; JPG остаётся JPEG;
+- вариант сохраняется, только если он заметно меньше оригинала.
+
+Варианты лежат в data/.telegram_assets/<хеш[:2]>/<хеш>.<ext> (адресация по
+содержимому), manifest.json хранит для каждого ассета хеш оригинала, путь и
+хеш варианта. Сборка всех вариантов:
+
+    python -m matunya_bot_final.scripts.build_telegram_assets
+
+Если ассет не собран или изменился, вариант строится при первой отправке
+(в потоке, см. telegram_file_cache) — поэтому манифест и запись файлов
+защищены блокировкой, а временные файлы у каждой записи свои.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from PIL import Image, ImageChops, ImageStat
+
+from matunya_bot_final.loader import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+MAX_SIDE_ENV = "TELEGRAM_ASSET_MAX_SIDE"
+DEFAULT_MAX_SIDE = 1280
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+ASSET_ROOTS = (PROJECT_ROOT / "non_generators", PROJECT_ROOT / "data" / "tasks_1_5")
+ASSET_SUFFIXES = (".png", ".jpg", ".jpeg")
+
+VARIANTS_DIR = DATA_DIR / ".telegram_assets"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Вариант нужен, только если он хотя бы на 10% меньше оригинала
+MIN_SAVING = 0.10
+# Средняя ошибка палитры (0–255 на канал), выше которой палитра портит картинку
+MAX_PALETTE_ERROR = 1.5
+JPEG_QUALITY = 85
+
+_manifest: Optional[Dict[str, Dict[str, Any]]] = None
+# Манифест меняют потоки первых отправок разных ассетов одновременно
+_manifest_lock = threading.RLock()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        logger.warning(f"[Assets] Некорректное значение {name}, используем {default}")
+        return default
+
+
+def is_asset(path: Path) -> bool:
+    resolved = Path(path).resolve()
+    return (
+        resolved.suffix.lower() in ASSET_SUFFIXES
+        and resolved.parent.name == "assets"
+        and any(resolved.is_relative_to(root) for root in ASSET_ROOTS)
+    )
+
+
+def iter_assets() -> Iterator[Path]:
+    for root in ASSET_ROOTS:
+        if not root.exists():
+            continue
+        for path in sorted(root.rglob("assets/*")):
+            if path.is_file() and path.suffix.lower() in ASSET_SUFFIXES:
+                yield path
+
+
+# --- оптимизация ---
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """RGB на белом фоне: Telegram всё равно не показывает прозрачность у фото."""
+    if image.mode in ("RGBA", "LA", "P", "PA"):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _encode(image: Image.Image, fmt: str, **params: Any) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **params)
+    return buffer.getvalue()
+
+
+def _palette_error(original: Image.Image, quantized: Image.Image) -> float:
+    diff = ImageChops.difference(original, quantized.convert("RGB"))
+    return sum(ImageStat.Stat(diff).mean) / 3
+
+
+def optimize_image(data: bytes, max_side: Optional[int] = None) -> Tuple[bytes, str]:
+    """Лучший вариант картинки для Telegram: (байты, расширение)."""
+    max_side = max_side or _env_int(MAX_SIDE_ENV, DEFAULT_MAX_SIDE)
+    with Image.open(io.BytesIO(data)) as source:
+        source_format = source.format
+        image = _flatten(source)
+
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+    if source_format == "JPEG":
+        return _encode(image, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True), "jpg"
+
+    # Telegram всё равно хранит фото в JPEG, так что JPEG — честный кандидат;
+    # для чертежей обычно выигрывает PNG с палитрой (чёткие линии, мало цветов)
+    candidates = [
+        (_encode(image, "PNG", optimize=True), "png"),
+        (_encode(image, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True), "jpg"),
+    ]
+    quantized = image.quantize(colors=256, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    if _palette_error(image, quantized) <= MAX_PALETTE_ERROR:
+        candidates.append((_encode(quantized, "PNG", optimize=True), "png"))
+    return min(candidates, key=lambda candidate: len(candidate[0]))
+
+
+# --- манифест ---
+
+def _manifest_path() -> Path:
+    return VARIANTS_DIR / MANIFEST_NAME
+
+
+def _unique_tmp(path: Path) -> Path:
+    """Свой временный файл на каждую запись: параллельные записи не делят один .tmp."""
+    return path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+def load_manifest() -> Dict[str, Dict[str, Any]]:
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            manifest = {}
+            path = _manifest_path()
+            if path.exists():
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    if data.get("version") == MANIFEST_VERSION:
+                        manifest = data.get("assets", {})
+                except (OSError, ValueError) as e:
+                    logger.warning(f"[Assets] Манифест {path} не прочитан: {e}")
+            _manifest = manifest
+        return _manifest
+
+
+def save_manifest() -> None:
+    path = _manifest_path()
+    with _manifest_lock:
+        assets = {key: dict(entry) for key, entry in load_manifest().items()}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = _unique_tmp(path)
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "assets": assets}, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"[Assets] Не удалось сохранить манифест: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+
+def reset_manifest() -> None:
+    global _manifest
+    with _manifest_lock:
+        _manifest = None
+
+
+def build_variant(path: Path, key: str, save: bool = True) -> Dict[str, Any]:
+    """
+    Строит вариант ассета и записывает его в манифест.
+    Сжатие идёт без блокировки, запись файла и манифеста — под ней.
+    """
+    data = Path(path).read_bytes()
+    entry: Dict[str, Any] = {"sha1": hashlib.sha1(data).hexdigest(), "bytes": len(data), "variant": None}
+    try:
+        optimized, ext = optimize_image(data)
+    except Exception as e:
+        logger.warning(f"[Assets] {key}: не удалось оптимизировать ({e}), отправляем оригинал")
+        optimized, ext = data, ""
+
+    with _manifest_lock:
+        if len(optimized) <= len(data) * (1 - MIN_SAVING):
+            variant_hash = hashlib.sha1(optimized).hexdigest()
+            relative = f"{variant_hash[:2]}/{variant_hash}.{ext}"
+            target = VARIANTS_DIR / relative
+            if not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = _unique_tmp(target)
+                tmp_path.write_bytes(optimized)
+                os.replace(tmp_path, target)
+            entry.update(variant=relative, variant_sha1=variant_hash, variant_bytes=len(optimized))
+
+        load_manifest()[key] = entry
+        if save:
+            save_manifest()
+    return entry
+
+
+def variant_for(key: str, source_hash: str) -> Optional[Tuple[Path, str]]:
+    """
+    (путь варианта, его хеш) по манифесту или None — отправлять оригинал.
+    KeyError — ассет не собран или изменился (нужен build_variant).
+    """
+    with _manifest_lock:
+        entry = load_manifest().get(key)
+    if entry is None or entry.get("sha1") != source_hash:
+        raise KeyError(key)
+    if not entry.get("variant"):
+        return None
+    path = VARIANTS_DIR / entry["variant"]
+    if not path.exists():
+        raise KeyError(key)
+    return path, entry["variant_sha1"]
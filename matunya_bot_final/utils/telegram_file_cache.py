@@ -1,28 +1,162 @@
 # utils/telegram_file_cache.py
+"""
+Кеш Telegram file_id для статических картинок (задания, помощь).
 
-from aiogram.types import FSInputFile
+Ключ — путь к ассету + хеш содержимого. Кеш двухуровневый:
+  1) память процесса (FILE_CACHE),
+  2) таблица telegram_file_ids в matunya.db (переживает рестарт).
+Если файл изменился (другой хеш) — запись считается устаревшей,
+картинка загружается заново и file_id перезаписывается.
+
+Ассеты заданий отправляются облегчённым вариантом (utils/telegram_assets.py);
+хеш в кеше — хеш реально загруженного файла.
+"""
+
+import asyncio
+import hashlib
+import logging
 from pathlib import Path
+from typing import Optional, Tuple, Union
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from matunya_bot_final.utils import db_manager, telegram_assets
+
+logger = logging.getLogger(__name__)
+
+# Ключи храним относительно корня проекта — одинаково на всех машинах
+_PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# путь -> (хеш содержимого, file_id)
+FILE_CACHE: dict[str, Tuple[str, str]] = {}
+
+# путь -> ((mtime_ns, size), хеш) — чтобы не перечитывать файл на каждый показ
+_HASH_CACHE: dict[str, Tuple[Tuple[int, int], str]] = {}
+
+
+def _asset_key(path: Path) -> str:
+    resolved = Path(path).resolve()
+    try:
+        return resolved.relative_to(_PROJECT_ROOT).as_posix()
+    except ValueError:
+        return resolved.as_posix()
+
+
+def file_content_hash(path: Path) -> str:
+    """SHA-1 содержимого файла (пересчитывается только при изменении mtime/size)."""
+    key = _asset_key(path)
+    stat = Path(path).stat()
+    fingerprint = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _HASH_CACHE.get(key)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    content_hash = digest.hexdigest()
+
+    _HASH_CACHE[key] = (fingerprint, content_hash)
+    return content_hash
+
+
+async def _lookup_file_id(key: str, content_hash: str) -> Optional[str]:
+    cached = FILE_CACHE.get(key)
+    if cached and cached[0] == content_hash:
+        return cached[1]
+
+    if db_manager.session_maker is None:
+        return None
+
+    async with db_manager.session_maker() as session:
+        file_id = await db_manager.get_cached_file_id(session, key, content_hash)
+
+    if file_id:
+        FILE_CACHE[key] = (content_hash, file_id)
+    return file_id
+
+
+async def _remember_file_id(key: str, content_hash: str, file_id: str) -> None:
+    FILE_CACHE[key] = (content_hash, file_id)
+
+    if db_manager.session_maker is None:
+        return
+
+    async with db_manager.session_maker() as session:
+        await db_manager.save_cached_file_id(session, key, content_hash, file_id)
+
+
+async def _forget_file_id(key: str) -> None:
+    FILE_CACHE.pop(key, None)
+
+    if db_manager.session_maker is None:
+        return
+
+    async with db_manager.session_maker() as session:
+        await db_manager.delete_cached_file_id(session, key)
+
 
-FILE_CACHE = {}
+async def _upload_source(path: Path, key: str, content_hash: str) -> Tuple[Path, str]:
+    """Что загружать в Telegram: облегчённый вариант ассета (если он есть) или сам файл."""
+    if not telegram_assets.is_asset(path):
+        return path, content_hash
+    try:
+        variant = telegram_assets.variant_for(key, content_hash)
+    except KeyError:
+        # Ассет не собран скриптом сборки или изменился — строим вариант сейчас
+        entry = await asyncio.to_thread(telegram_assets.build_variant, path, key)
+        if entry["sha1"] != content_hash:  # файл меняется прямо сейчас
+            return path, content_hash
+        variant = telegram_assets.variant_for(key, content_hash)
+    return variant if variant is not None else (path, content_hash)
 
 
-async def send_cached_photo(bot, chat_id, path: Path):
-    key = str(path)
+async def send_cached_photo(
+    bot,
+    chat_id: int,
+    path: Union[Path, str],
+    caption: Optional[str] = None,
+    parse_mode: Optional[str] = "HTML",
+    reply_markup=None,
+) -> Message:
+    """
+    Отправляет картинку по file_id, если она уже загружалась в Telegram.
+    Иначе — загружает файл и запоминает file_id (в памяти и в БД).
+    """
+    path = Path(path)
+    key = _asset_key(path)
+    upload_path, content_hash = await _upload_source(path, key, file_content_hash(path))
 
-    if key in FILE_CACHE:
-        print(f"📦 CACHE HIT: {path}")
-        return await bot.send_photo(
-            chat_id=chat_id,
-            photo=FILE_CACHE[key]
-        )
+    file_id = await _lookup_file_id(key, content_hash)
+    if file_id:
+        logger.debug(f"📦 CACHE HIT: {path}")
+        try:
+            return await bot.send_photo(
+                chat_id=chat_id,
+                photo=file_id,
+                caption=caption,
+                parse_mode=parse_mode,
+                reply_markup=reply_markup,
+            )
+        except TelegramBadRequest as e:
+            # file_id протух (другой бот/токен и т.п.) — загружаем заново
+            logger.warning(f"[FileCache] file_id отклонён для {path}: {e}. Загружаем заново.")
+            await _forget_file_id(key)
 
-    print(f"⬆️ UPLOAD IMAGE: {path}")
+    logger.info(f"⬆️ UPLOAD IMAGE: {upload_path}")
 
     msg = await bot.send_photo(
         chat_id=chat_id,
-        photo=FSInputFile(str(path))
+        photo=FSInputFile(str(upload_path), filename=path.name),
+        caption=caption,
+        parse_mode=parse_mode,
+        reply_markup=reply_markup,
     )
 
-    FILE_CACHE[key] = msg.photo[-1].file_id
+    if msg.photo:
+        await _remember_file_id(key, content_hash, msg.photo[-1].file_id)
 
     return msg
@@ -1,39 +1,35 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-from matplotlib.patches import FancyArrowPatch
+from matplotlib.patches import FancyArrowPatch, Rectangle
+from matplotlib.font_manager import FontProperties, findfont
 import matplotlib.ticker as mticker
 import matplotlib
+from PIL import Image, ImageDraw, ImageFont
 matplotlib.use("Agg")  # ✅ чтобы не требовался Tcl/Tk, только рендер в PNG
-from typing import Tuple
+from typing import Callable, List, Sequence, Tuple
+import hashlib
+import io
 import os
 
-def create_graph(
-    func_data: dict,
-    output_filename: str = "graph.png",
-    x_lim: Tuple[float, float] = (-5, 5),
-    y_lim: Tuple[float, float] = (-5, 5),
-) -> str:
-    """
-    Генератор графиков для ОГЭ. Поддерживает разрывы (гиперболы, |x|).
-    Вход:
-        func_data = {"func": callable, "color": str, "label": str}
-        x_lim, y_lim = кортежи (min, max)
-    """
+from matunya_bot_final.utils.visuals.render_cache import render_cache, render_key
 
-    # 1) Стили (без изменений)
-    sns.set_style("whitegrid")
-    plt.rcParams.update({
-        'grid.linewidth': 0.8,
-        'axes.linewidth': 1.5,
-        'figure.dpi': 300
-    })
+GRAPH_STYLE = {
+    'grid.linewidth': 0.8,
+    'axes.linewidth': 1.5,
+}
+AXIS_STYLE = {
+    'axes.linewidth': 1.2,
+}
+NUMBER_AXIS_DIR = os.path.join("matunya_bot_final", "temp", "task_20")
 
-    fig, ax = plt.subplots(figsize=(6, 6))
-    ax.set_aspect('equal', adjustable='box')
+# Сетка графиков задания 11: ширина клетки и полоса подписи, px
+GRID_CELL_PX = 600
+GRID_LABEL_PX = 64
+GRID_GAP_PX = 16
 
-    # 2) Генерация точек с обработкой разрыва (как было)
-    x_full = np.linspace(x_lim[0], x_lim[1], 2000)
+
+def _resolve_func(func_data: dict) -> Callable:
     func = func_data.get("func")
     if func is None and "coeffs" in func_data:
         coeffs = func_data["coeffs"]
@@ -43,6 +39,13 @@ def create_graph(
         func = lambda x, a=a, b=b, c=c: a * x**2 + b * x + c
     if func is None:
         raise ValueError("func_data должен содержать callable func или coeffs")
+    return func
+
+
+def _graph_series(func_data: dict, x_lim: Tuple[float, float]) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Точки графика [(x, y), ...]; при разрыве в нуле — два куска (гиперболы, |x|)."""
+    x_full = np.linspace(x_lim[0], x_lim[1], 2000)
+    func = _resolve_func(func_data)
 
     try:
         rv = func(np.array([0.001]))
@@ -58,91 +61,198 @@ def create_graph(
         split_idx = np.argmax(x_full > 0)
         x_parts = [x_full[:split_idx], x_full[split_idx:]]
 
-    # 3) Рисуем график (как было)
-    for i, x_part in enumerate(x_parts):
-        vectorized_func = np.vectorize(func, otypes=[float])
-        y_part = vectorized_func(x_part)
-        ax.plot(
-            x_part, y_part,
-            color=func_data.get("color", "orange"),
-            linewidth=2.5,
-            zorder=5,
-            label=func_data.get("label", "") if i == 0 else ""
-        )
-
-    # 4) Оси и стрелки (обновлено)
-    ax.set_xlim(x_lim)
-    ax.set_ylim(y_lim)
-    ax.set_aspect('equal', adjustable='box')
-    ax.set_box_aspect(1)
-    print(f"[DBG] limits: x={ax.get_xlim()}  y={ax.get_ylim()}  label={func_data.get('label')}")
-
-    # скрываем стандартные спайны, чтобы стрелки не перекрывались
-    for spine in ["top", "right", "left", "bottom"]:
-        ax.spines[spine].set_visible(False)
-
-    # стрелка оси X (вправо)
-    ax.add_patch(FancyArrowPatch(
-        (x_lim[0], 0), (x_lim[1] * 1.05, 0),
-        transform=ax.transData,
-        arrowstyle='->',
-        color='black',
-        linewidth=2.2,
-        mutation_scale=14,
-        clip_on=False, zorder=6
-    ))
-    # стрелка оси Y (вверх)
-    ax.add_patch(FancyArrowPatch(
-        (0, y_lim[0]), (0, y_lim[1] * 1.05),
-        transform=ax.transData,
-        arrowstyle='->',
-        color='black',
-        linewidth=2.2,
-        mutation_scale=14,
-        clip_on=False, zorder=6
-    ))
-
-    # 5) Тикеты и подписи (обновлено: убираем ±1, двигаем x/y)
-    def label_format(value, pos):
-        # без нуля и без ±1; оставляем только целые >= 2 по модулю
-        if value == 0:
-            return ''
-        return str(int(value)) if abs(value) > 1 else ''
-
-    ax.xaxis.set_major_locator(mticker.MultipleLocator(1))
-    ax.xaxis.set_major_formatter(mticker.FuncFormatter(label_format))
-    ax.yaxis.set_major_locator(mticker.MultipleLocator(1))
-    ax.yaxis.set_major_formatter(mticker.FuncFormatter(label_format))
-
-    # подписи осей возле стрелок
-    ax.text(x_lim[1] * 1.05, 0, 'x',
-            fontsize=16, fontweight='bold',
-            ha='left', va='center', clip_on=False)
-    ax.text(0, y_lim[1] * 1.05, 'y',
-            fontsize=16, fontweight='bold',
-            ha='center', va='bottom', clip_on=False)
-
-    # точка O в центре
-    ax.text(0, 0, 'O',
-            fontsize=14, fontweight='bold',
-            ha='center', va='center', zorder=10)
-
-    # 6) Финал (как было)
-    sns.despine(left=True, bottom=True, right=True, top=True)
-    ax.tick_params(axis='both', width=2.0, length=6, colors='black', labelcolor='black')
-
-    fig.set_size_inches(6, 6, forward=True)           # квадратный холст
-    fig.subplots_adjust(left=0.12, right=0.92,        # симметричные поля
-                        bottom=0.12, top=0.92)
-
-    plt.savefig(output_filename, dpi=300, transparent=False)
-    plt.close()
+    vectorized_func = np.vectorize(func, otypes=[float])
+    return [(x_part, vectorized_func(x_part)) for x_part in x_parts]
+
+
+def _graph_payload(func_data: dict, x_lim, y_lim) -> Tuple[dict, dict]:
+    """(payload для draw_graph, нормализованные параметры для ключа кеша)."""
+    series = _graph_series(func_data, x_lim)
+    digest = hashlib.sha256()
+    for x_part, y_part in series:
+        digest.update(np.ascontiguousarray(x_part, dtype=float).tobytes())
+        digest.update(np.ascontiguousarray(y_part, dtype=float).tobytes())
+        digest.update(b"|")
+    payload = {
+        "series": series,
+        "color": func_data.get("color", "orange"),
+        "label": func_data.get("label", ""),
+        "x_lim": tuple(float(v) for v in x_lim),
+        "y_lim": tuple(float(v) for v in y_lim),
+    }
+    # Сама функция в ключ не входит: одинаковые точки — одинаковая картинка
+    normalized = {**{k: v for k, v in payload.items() if k != "series"}, "series": digest.hexdigest()}
+    return payload, normalized
+
+
+def draw_graph(payload: dict, dpi: int = 300) -> bytes:
+    """
+    Рисует график по готовым точкам и возвращает PNG.
+    Чистая функция уровня модуля: её можно выполнять в отдельном процессе.
+    """
+    x_lim, y_lim = payload["x_lim"], payload["y_lim"]
+
+    # 1) Стили — локально, без изменения глобальных rcParams
+    with sns.axes_style("whitegrid"), plt.rc_context(GRAPH_STYLE):
+        fig, ax = plt.subplots(figsize=(6, 6))
+        try:
+            ax.set_aspect('equal', adjustable='box')
+
+            # 2) График (куски уже разрезаны по разрыву)
+            for i, (x_part, y_part) in enumerate(payload["series"]):
+                ax.plot(
+                    x_part, y_part,
+                    color=payload["color"],
+                    linewidth=2.5,
+                    zorder=5,
+                    label=payload["label"] if i == 0 else ""
+                )
+
+            # 3) Оси и стрелки
+            ax.set_xlim(x_lim)
+            ax.set_ylim(y_lim)
+            ax.set_aspect('equal', adjustable='box')
+            ax.set_box_aspect(1)
+
+            # скрываем стандартные спайны, чтобы стрелки не перекрывались
+            for spine in ["top", "right", "left", "bottom"]:
+                ax.spines[spine].set_visible(False)
+
+            # стрелка оси X (вправо)
+            ax.add_patch(FancyArrowPatch(
+                (x_lim[0], 0), (x_lim[1] * 1.05, 0),
+                transform=ax.transData,
+                arrowstyle='->',
+                color='black',
+                linewidth=2.2,
+                mutation_scale=14,
+                clip_on=False, zorder=6
+            ))
+            # стрелка оси Y (вверх)
+            ax.add_patch(FancyArrowPatch(
+                (0, y_lim[0]), (0, y_lim[1] * 1.05),
+                transform=ax.transData,
+                arrowstyle='->',
+                color='black',
+                linewidth=2.2,
+                mutation_scale=14,
+                clip_on=False, zorder=6
+            ))
+
+            # 4) Тикеты и подписи (убираем ±1, двигаем x/y)
+            def label_format(value, pos):
+                # без нуля и без ±1; оставляем только целые >= 2 по модулю
+                if value == 0:
+                    return ''
+                return str(int(value)) if abs(value) > 1 else ''
+
+            ax.xaxis.set_major_locator(mticker.MultipleLocator(1))
+            ax.xaxis.set_major_formatter(mticker.FuncFormatter(label_format))
+            ax.yaxis.set_major_locator(mticker.MultipleLocator(1))
+            ax.yaxis.set_major_formatter(mticker.FuncFormatter(label_format))
+
+            # подписи осей возле стрелок
+            ax.text(x_lim[1] * 1.05, 0, 'x',
+                    fontsize=16, fontweight='bold',
+                    ha='left', va='center', clip_on=False)
+            ax.text(0, y_lim[1] * 1.05, 'y',
+                    fontsize=16, fontweight='bold',
+                    ha='center', va='bottom', clip_on=False)
+
+            # точка O в центре
+            ax.text(0, 0, 'O',
+                    fontsize=14, fontweight='bold',
+                    ha='center', va='center', zorder=10)
+
+            # 5) Финал
+            sns.despine(ax=ax, left=True, bottom=True, right=True, top=True)
+            ax.tick_params(axis='both', width=2.0, length=6, colors='black', labelcolor='black')
+
+            fig.set_size_inches(6, 6, forward=True)           # квадратный холст
+            fig.subplots_adjust(left=0.12, right=0.92,        # симметричные поля
+                                bottom=0.12, top=0.92)
+
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format="png", dpi=dpi, transparent=False)
+            return buffer.getvalue()
+        finally:
+            plt.close(fig)
+
+
+def create_graph(
+    func_data: dict,
+    output_filename: str = "graph.png",
+    x_lim: Tuple[float, float] = (-5, 5),
+    y_lim: Tuple[float, float] = (-5, 5),
+    profile: str = "print",
+) -> str:
+    """
+    Генератор графиков для ОГЭ. Поддерживает разрывы (гиперболы, |x|).
+    Вход:
+        func_data = {"func": callable, "color": str, "label": str}
+        x_lim, y_lim = кортежи (min, max)
+        profile = "print" (300 dpi) или "telegram" (облегчённый)
+    Повторный график с теми же точками берётся из render_cache без рендера.
+    """
+    payload, normalized = _graph_payload(func_data, x_lim, y_lim)
+    print(f"[DBG] limits: x={payload['x_lim']}  y={payload['y_lim']}  label={func_data.get('label')}")
+    key = render_key("graph", normalized, profile)
+    png = render_cache.render(key, draw_graph, payload, profile)
+    _write_png(output_filename, png)
     print(f"[✓] Феникс-рендер: {func_data.get('label', 'graph')} -> {output_filename}")
     return output_filename  # ✅ ВОЗВРАЩАЕМ путь к PNG
 
-def create_number_axis(axis_data: dict, output_filename: str) -> str:
+
+async def render_graph_png(
+    func_data: dict,
+    x_lim: Tuple[float, float] = (-5, 5),
+    y_lim: Tuple[float, float] = (-5, 5),
+    profile: str = "telegram",
+) -> bytes:
+    """PNG графика для отправки из хендлеров: промах кеша рендерится в отдельном процессе."""
+    payload, normalized = _graph_payload(func_data, x_lim, y_lim)
+    return await render_cache.render_async(render_key("graph", normalized, profile), draw_graph, payload, profile)
+
+
+def compose_graph_grid(image_paths: Sequence[str], labels: Sequence[str], output_filename: str) -> str:
+    """
+    Склеивает готовые графики в одну картинку в ряд с подписями «График А» и т.д.
+    Одна картинка — одна загрузка в Telegram вместо трёх последовательных.
     """
-    Рисует числовую ось для решения неравенств (задание 20).
+    font = ImageFont.truetype(findfont(FontProperties(family="DejaVu Sans", weight="bold")), 36)
+    count = len(image_paths)
+    width = count * GRID_CELL_PX + (count + 1) * GRID_GAP_PX
+    height = GRID_LABEL_PX + GRID_CELL_PX + GRID_GAP_PX
+    canvas = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(canvas)
+
+    for index, image_path in enumerate(image_paths):
+        left = GRID_GAP_PX + index * (GRID_CELL_PX + GRID_GAP_PX)
+        with Image.open(image_path) as graph:
+            cell = graph.convert("RGB")
+        cell.thumbnail((GRID_CELL_PX, GRID_CELL_PX), Image.Resampling.LANCZOS)
+        canvas.paste(cell, (left + (GRID_CELL_PX - cell.width) // 2, GRID_LABEL_PX))
+        label = labels[index] if index < len(labels) else str(index + 1)
+        draw.text((left + GRID_CELL_PX // 2, GRID_LABEL_PX // 2), f"График {label}", fill="black", font=font, anchor="mm")
+
+    buffer = io.BytesIO()
+    canvas.save(buffer, format="PNG", optimize=True)
+    _write_png(output_filename, buffer.getvalue())
+    print(f"[✓] Сетка графиков: {output_filename}")
+    return output_filename
+
+
+def _write_png(path: str, png: bytes) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(png)
+
+
+def draw_number_axis(axis_data: dict, dpi: int = 300) -> bytes:
+    """
+    Рисует числовую ось для решения неравенств (задание 20) и возвращает PNG.
 
     Вход:
         axis_data: {
@@ -150,85 +260,92 @@ def create_number_axis(axis_data: dict, output_filename: str) -> str:
             "intervals": [{"range": [float, float], "sign": "+"|"-"}],
             "shading_ranges": [[float, float], ...]
         }
-        output_filename: путь для сохранения PNG
     """
+    # --- 1. Настройка холста ---
+    with plt.rc_context(AXIS_STYLE):
+        fig, ax = plt.subplots(figsize=(7, 2))
+        try:
+            ax.set_ylim(-1.5, 1.5)
+            ax.get_yaxis().set_visible(False)
+            for spine in ["top", "right", "left"]:
+                ax.spines[spine].set_visible(False)
 
-    import matplotlib.pyplot as plt
-    from matplotlib.patches import FancyArrowPatch, Rectangle
+            # --- 2. Определяем диапазон оси X ---
+            all_values = [p["value_num"] for p in axis_data.get("points", []) if isinstance(p["value_num"], (int, float))]
+            for r in axis_data.get("shading_ranges", []):
+                all_values.extend([r[0], r[1]])
+            if not all_values:
+                all_values = [-5, 5]
+            x_min, x_max = min(all_values) - 1, max(all_values) + 1
+            ax.set_xlim(x_min, x_max)
 
-    # --- 1. Настройка холста ---
-    plt.rcParams.update({
-        'axes.linewidth': 1.2,
-        'figure.dpi': 300
-    })
-    fig, ax = plt.subplots(figsize=(7, 2))
-    ax.set_ylim(-1.5, 1.5)
-    ax.get_yaxis().set_visible(False)
-    for spine in ["top", "right", "left"]:
-        ax.spines[spine].set_visible(False)
-
-    # --- 2. Определяем диапазон оси X ---
-    all_values = [p["value_num"] for p in axis_data.get("points", []) if isinstance(p["value_num"], (int, float))]
-    for r in axis_data.get("shading_ranges", []):
-        all_values.extend([r[0], r[1]])
-    if not all_values:
-        all_values = [-5, 5]
-    x_min, x_max = min(all_values) - 1, max(all_values) + 1
-    ax.set_xlim(x_min, x_max)
-
-    # --- 3. Ось X со стрелкой ---
-    ax.axhline(y=0, color="black", linewidth=1.5)
-    ax.add_patch(FancyArrowPatch(
-        (x_max - 0.3, 0), (x_max + 0.2, 0),
-        arrowstyle='->', mutation_scale=12,
-        color='black', linewidth=1.5, zorder=5
-    ))
-    ax.text(x_max + 0.3, 0, 'x', fontsize=14, va='center', ha='left', fontweight='bold')
-
-    # --- 4. Заштриховка решений ---
-    for r in axis_data.get("shading_ranges", []):
-        x0, x1 = r
-        if x0 is None or x1 is None:
-            continue
-        rect = Rectangle(
-            (x0, -0.12), x1 - x0, 0.24,
-            color='gold', alpha=0.4, zorder=1
-        )
-        ax.add_patch(rect)
-
-    # --- 5. Отрисовка точек ---
-    for point in axis_data.get("points", []):
-        x = point.get("value_num", 0)
-        t = point.get("type", "solid")
-        style = dict(facecolor="white", edgecolor="black", linewidth=1.5)
-        if t == "solid":
-            style["facecolor"] = "black"
-        circle = plt.Circle((x, 0), 0.08, **style, zorder=3)
-        ax.add_patch(circle)
-        ax.text(x, -0.35, point.get("value_text", str(x)),
-                fontsize=10, ha='center', va='top')
-
-    # --- 6. Знаки на интервалах ---
-    for interval in axis_data.get("intervals", []):
-        x0, x1 = interval.get("range", [None, None])
-        if x0 is None or x1 is None:
-            continue
-        x_mid = (x0 + x1) / 2
-        sign = interval.get("sign", "")
-        ax.text(x_mid, 0.25, sign,
-                fontsize=12, ha='center', va='bottom', fontweight='bold', color='darkblue')
-
-    # --- 7. Финал ---
-    # создаём базовую папку temp/task_20
-    base_dir = os.path.join("matunya_bot_final", "temp", "task_20")
-    os.makedirs(base_dir, exist_ok=True)
+            # --- 3. Ось X со стрелкой ---
+            ax.axhline(y=0, color="black", linewidth=1.5)
+            ax.add_patch(FancyArrowPatch(
+                (x_max - 0.3, 0), (x_max + 0.2, 0),
+                arrowstyle='->', mutation_scale=12,
+                color='black', linewidth=1.5, zorder=5
+            ))
+            ax.text(x_max + 0.3, 0, 'x', fontsize=14, va='center', ha='left', fontweight='bold')
 
+            # --- 4. Заштриховка решений ---
+            for r in axis_data.get("shading_ranges", []):
+                x0, x1 = r
+                if x0 is None or x1 is None:
+                    continue
+                rect = Rectangle(
+                    (x0, -0.12), x1 - x0, 0.24,
+                    color='gold', alpha=0.4, zorder=1
+                )
+                ax.add_patch(rect)
+
+            # --- 5. Отрисовка точек ---
+            for point in axis_data.get("points", []):
+                x = point.get("value_num", 0)
+                t = point.get("type", "solid")
+                style = dict(facecolor="white", edgecolor="black", linewidth=1.5)
+                if t == "solid":
+                    style["facecolor"] = "black"
+                circle = plt.Circle((x, 0), 0.08, **style, zorder=3)
+                ax.add_patch(circle)
+                ax.text(x, -0.35, point.get("value_text", str(x)),
+                        fontsize=10, ha='center', va='top')
+
+            # --- 6. Знаки на интервалах ---
+            for interval in axis_data.get("intervals", []):
+                x0, x1 = interval.get("range", [None, None])
+                if x0 is None or x1 is None:
+                    continue
+                x_mid = (x0 + x1) / 2
+                sign = interval.get("sign", "")
+                ax.text(x_mid, 0.25, sign,
+                        fontsize=12, ha='center', va='bottom', fontweight='bold', color='darkblue')
+
+            # --- 7. Финал ---
+            fig.tight_layout()
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+            return buffer.getvalue()
+        finally:
+            plt.close(fig)
+
+
+def create_number_axis(axis_data: dict, output_filename: str, profile: str = "print") -> str:
+    """
+    Сохраняет числовую ось (draw_number_axis) в temp/task_20/<имя файла>.
+    Одинаковые axis_data рендерятся один раз — дальше байты из render_cache.
+    """
     # сохраняем только имя файла (без поддиректорий)
-    filename = os.path.basename(output_filename)
-    final_path = os.path.join(base_dir, filename)
+    final_path = os.path.join(NUMBER_AXIS_DIR, os.path.basename(output_filename))
 
-    plt.tight_layout()
-    plt.savefig(final_path, dpi=300, bbox_inches="tight")
-    plt.close(fig)
+    key = render_key("number_axis", axis_data, profile)
+    png = render_cache.render(key, draw_number_axis, axis_data, profile)
+    _write_png(final_path, png)
     print(f"[✓] Числовая ось сохранена: {final_path}")
     return final_path
+
+
+async def render_number_axis_png(axis_data: dict, profile: str = "telegram") -> bytes:
+    """PNG числовой оси для отправки из хендлеров: промах кеша рендерится в отдельном процессе."""
+    key = render_key("number_axis", axis_data, profile)
+    return await render_cache.render_async(key, draw_number_axis, axis_data, profile)
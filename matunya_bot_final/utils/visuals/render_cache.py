@@ -0,0 +1,182 @@
+# utils/visuals/render_cache.py
+"""
+Кеш отрендеренных картинок (графики, числовые оси) по содержимому.
+
+Ключ — sha256 от нормализованных параметров рисунка и профиля качества,
+значение — готовые PNG-байты. Два уровня:
+  - LRU в памяти, ограниченный по байтам (RENDER_CACHE_MEMORY_MB, по умолчанию 64);
+  - файлы DATA_DIR/.render_cache/<ключ[:2]>/<ключ>.png — переживают рестарт.
+
+Промах рендерится функцией draw(payload, dpi) -> bytes: синхронно в
+текущем процессе (скрипты наполнения) или, из async-кода, в отдельном
+процессе (RENDER_WORKERS, по умолчанию 1) — matplotlib не занимает event loop.
+Одинаковые одновременные запросы из async-кода рендерятся один раз.
+
+Профили: "print" — 300 dpi (как раньше, для файлов в базе),
+"telegram" — 120 dpi: Telegram всё равно ужимает фото до ~1280 px.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from matunya_bot_final.loader import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+MEMORY_MB_ENV = "RENDER_CACHE_MEMORY_MB"
+WORKERS_ENV = "RENDER_WORKERS"
+DISK_ENV = "RENDER_CACHE_DISK"  # "0" — только память
+
+DEFAULT_MEMORY_MB = 64
+DEFAULT_WORKERS = 1
+
+CACHE_DIR = DATA_DIR / ".render_cache"
+
+PROFILES: Dict[str, int] = {
+    "print": 300,
+    "telegram": 120,
+}
+
+Draw = Callable[[Any, int], bytes]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        logger.warning(f"[RenderCache] Некорректное значение {name}, используем {default}")
+        return default
+
+
+def render_key(kind: str, normalized: Any, profile: str) -> str:
+    """Ключ рисунка: вид + нормализованные параметры (JSON с сортировкой ключей) + профиль."""
+    payload = json.dumps([kind, normalized, profile], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    def __init__(self, directory: Optional[Path] = CACHE_DIR, max_memory_bytes: Optional[int] = None) -> None:
+        self.directory = directory if os.getenv(DISK_ENV, "1") != "0" else None
+        self.max_memory_bytes = (
+            max_memory_bytes if max_memory_bytes is not None
+            else _env_int(MEMORY_MB_ENV, DEFAULT_MEMORY_MB) * 1024 * 1024
+        )
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.metrics: Dict[str, int] = {"memory_hits": 0, "disk_hits": 0, "renders": 0, "coalesced": 0}
+
+    # --- уровни кеша ---
+
+    def _path(self, key: str) -> Optional[Path]:
+        return self.directory / key[:2] / f"{key}.png" if self.directory else None
+
+    def _remember(self, key: str, png: bytes) -> None:
+        if len(png) > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = png
+        self._memory_bytes += len(png)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def get(self, key: str) -> Optional[bytes]:
+        png = self._memory.get(key)
+        if png is not None:
+            self._memory.move_to_end(key)
+            self.metrics["memory_hits"] += 1
+            return png
+        path = self._path(key)
+        if path is not None and path.exists():
+            png = path.read_bytes()
+            self._remember(key, png)
+            self.metrics["disk_hits"] += 1
+            return png
+        return None
+
+    def put(self, key: str, png: bytes) -> None:
+        self._remember(key, png)
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(png)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"[RenderCache] Не удалось сохранить {path}: {e}")
+
+    # --- рендер ---
+
+    def render(self, key: str, draw: Draw, payload: Any, profile: str) -> bytes:
+        """Синхронно: из кеша или рендер в текущем процессе."""
+        png = self.get(key)
+        if png is None:
+            png = draw(payload, PROFILES[profile])
+            self.metrics["renders"] += 1
+            self.put(key, png)
+        return png
+
+    async def render_async(self, key: str, draw: Draw, payload: Any, profile: str) -> bytes:
+        """Из async-кода: промах рендерится в процессе-исполнителе, дубли ждут первый запрос."""
+        png = self.get(key)
+        if png is not None:
+            return png
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.metrics["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            png = await loop.run_in_executor(self._get_executor(), draw, payload, PROFILES[profile])
+            self.metrics["renders"] += 1
+            self.put(key, png)
+            future.set_result(png)
+            return png
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # помечаем как полученное, если никто не ждал
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            workers = max(1, _env_int(WORKERS_ENV, DEFAULT_WORKERS))
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+            logger.info(f"[RenderCache] Пул рендера: {workers} процесс(ов)")
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {**self.metrics, "memory_items": len(self._memory), "memory_bytes": self._memory_bytes}
+
+
+render_cache = RenderCache()
+
+
+def get_render_metrics() -> Dict[str, int]:
+    return render_cache.get_metrics()
+
+
+def shutdown_render_pool() -> None:
+    render_cache.shutdown()
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Режим webhook для Матюни (альтернатива long polling).
+
+Telegram присылает апдейты POST-запросами на aiohttp-сервер; мы сразу
+отвечаем 200, а обработка идёт в фоне через UpdateScheduler:
+
+- апдейты одного чата обрабатываются строго по очереди (FSM ученика
+  не видит гонок), разные чаты — параллельно;
+- одновременно выполняется не больше WEBHOOK_MAX_CONCURRENCY апдейтов;
+- если в работе уже WEBHOOK_MAX_PENDING апдейтов, отвечаем 503 —
+  Telegram повторит доставку позже (backpressure);
+- при остановке сервер перестаёт принимать запросы и дожидается
+  обработки принятых апдейтов (не дольше WEBHOOK_DRAIN_SECONDS).
+
+Настройки (окружение):
+  WEBHOOK_URL              — публичный адрес, например https://bot.example.com
+  WEBHOOK_PATH             — путь (по умолчанию /webhook)
+  WEBHOOK_HOST/WEBHOOK_PORT — где слушать (по умолчанию 0.0.0.0:8080)
+  WEBHOOK_SECRET           — секрет X-Telegram-Bot-Api-Secret-Token
+  WEBHOOK_SET              — "0", чтобы не вызывать set_webhook (реплики за балансировщиком)
+"""
+
+import asyncio
+import logging
+import os
+import signal
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from matunya_bot_final.utils.latency_metrics import metrics_handler
+
+logger = logging.getLogger(__name__)
+
+URL_ENV = "WEBHOOK_URL"
+PATH_ENV = "WEBHOOK_PATH"
+HOST_ENV = "WEBHOOK_HOST"
+PORT_ENV = "WEBHOOK_PORT"
+SECRET_ENV = "WEBHOOK_SECRET"
+SET_WEBHOOK_ENV = "WEBHOOK_SET"
+MAX_CONCURRENCY_ENV = "WEBHOOK_MAX_CONCURRENCY"
+MAX_PENDING_ENV = "WEBHOOK_MAX_PENDING"
+DRAIN_SECONDS_ENV = "WEBHOOK_DRAIN_SECONDS"
+
+DEFAULT_PATH = "/webhook"
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8080
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_MAX_PENDING = 1000
+DEFAULT_DRAIN_SECONDS = 30.0
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        logger.warning(f"[Webhook] Некорректное значение {name}, используем {default}")
+        return default
+
+
+def chat_key(update: Update) -> Hashable:
+    """Ключ очереди: чат апдейта (или пользователь); без чата — сам апдейт."""
+    try:
+        event = update.event
+    except Exception:  # неизвестный тип апдейта
+        event = None
+    chat = getattr(event, "chat", None)
+    if chat is None:
+        message = getattr(event, "message", None)
+        chat = getattr(message, "chat", None)
+    if chat is not None:
+        return ("chat", chat.id)
+    user = getattr(event, "from_user", None)
+    if user is not None:
+        return ("user", user.id)
+    return ("update", update.update_id)
+
+
+class UpdateScheduler:
+    """Фоновая обработка апдейтов: порядок внутри чата, общий лимит параллельности."""
+
+    def __init__(
+        self,
+        handle: Callable[[Update], Awaitable[Any]],
+        max_concurrency: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ) -> None:
+        self.handle = handle
+        self.max_concurrency = max_concurrency or int(_env_number(MAX_CONCURRENCY_ENV, DEFAULT_MAX_CONCURRENCY))
+        self.max_pending = max_pending or int(_env_number(MAX_PENDING_ENV, DEFAULT_MAX_PENDING))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._queues: Dict[Hashable, Deque[Update]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._pending = 0
+        self._closing = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.metrics: Dict[str, int] = {"accepted": 0, "rejected": 0, "processed": 0, "errors": 0, "max_pending": 0}
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, update: Update) -> bool:
+        """Ставит апдейт в очередь его чата. False — не принят (перегрузка или остановка)."""
+        if self._closing or self._pending >= self.max_pending:
+            self.metrics["rejected"] += 1
+            return False
+
+        self._pending += 1
+        self._idle.clear()
+        self.metrics["accepted"] += 1
+        self.metrics["max_pending"] = max(self.metrics["max_pending"], self._pending)
+
+        key = chat_key(update)
+        queue = self._queues.get(key)
+        if queue is not None:
+            # Воркер этого чата уже работает — он заберёт апдейт следом
+            queue.append(update)
+            return True
+
+        self._queues[key] = deque([update])
+        task = asyncio.create_task(self._run_chat(key), name=f"webhook_chat_{key}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run_chat(self, key: Hashable) -> None:
+        queue = self._queues[key]
+        try:
+            while queue:
+                update = queue[0]
+                async with self._semaphore:
+                    try:
+                        await self.handle(update)
+                        self.metrics["processed"] += 1
+                    except Exception:
+                        self.metrics["errors"] += 1
+                        logger.exception(f"[Webhook] Ошибка обработки апдейта {update.update_id}")
+                queue.popleft()
+                self._pending -= 1
+        finally:
+            self._queues.pop(key, None)
+            if not self._queues:
+                self._idle.set()
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Перестаёт принимать апдейты и ждёт обработки принятых. True — успели всё."""
+        self._closing = True
+        timeout = timeout if timeout is not None else _env_number(DRAIN_SECONDS_ENV, DEFAULT_DRAIN_SECONDS)
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.error(f"[Webhook] Не дождались {self._pending} апдейтов за {timeout:.0f} с, прерываем")
+            for task in list(self._tasks):
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            return False
+
+
+def create_webhook_app(
+    dp: Dispatcher,
+    bot: Bot,
+    scheduler: UpdateScheduler,
+    path: Optional[str] = None,
+    secret: Optional[str] = None,
+) -> web.Application:
+    """aiohttp-приложение: POST <path> принимает апдейты, GET /healthz — состояние очереди, GET /metrics — Prometheus."""
+    path = path or os.getenv(PATH_ENV) or DEFAULT_PATH
+    secret = secret if secret is not None else os.getenv(SECRET_ENV)
+
+    async def receive_update(request: web.Request) -> web.Response:
+        if secret and request.headers.get(SECRET_HEADER) != secret:
+            return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": bot})
+        except Exception as e:
+            logger.warning(f"[Webhook] Некорректный апдейт: {e}")
+            return web.Response(status=400)
+
+        if not scheduler.submit(update):
+            # Telegram повторит доставку — так нагрузка не копится в памяти
+            return web.Response(status=503)
+        return web.Response(status=200)
+
+    async def healthz(request: web.Request) -> web.Response:
+        return web.json_response({"pending": scheduler.pending, **scheduler.metrics})
+
+    app = web.Application()
+    app.router.add_post(path, receive_update)
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/metrics", metrics_handler)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """Поднимает webhook-сервер и работает до SIGINT/SIGTERM, затем корректно останавливается."""
+    base_url = os.getenv(URL_ENV)
+    path = os.getenv(PATH_ENV) or DEFAULT_PATH
+    secret = os.getenv(SECRET_ENV)
+    host = os.getenv(HOST_ENV) or DEFAULT_HOST
+    port = int(_env_number(PORT_ENV, DEFAULT_PORT))
+
+    async def handle(update: Update) -> None:
+        await dp.feed_update(bot, update)
+
+    scheduler = UpdateScheduler(handle)
+    runner = web.AppRunner(create_webhook_app(dp, bot, scheduler, path=path, secret=secret))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: остаётся KeyboardInterrupt
+
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+    try:
+        await site.start()
+        logger.info(
+            f"[Webhook] Слушаем {host}:{port}{path}, параллельно до {scheduler.max_concurrency}, "
+            f"в очереди до {scheduler.max_pending}"
+        )
+        if os.getenv(SET_WEBHOOK_ENV, "1") != "0":
+            if not base_url:
+                raise RuntimeError(f"Для режима webhook нужен {URL_ENV}")
+            await bot.set_webhook(
+                url=base_url.rstrip("/") + path,
+                secret_token=secret,
+                allowed_updates=dp.resolve_used_update_types(),
+                max_connections=min(100, scheduler.max_concurrency * 2),
+            )
+            logger.info(f"[Webhook] Webhook зарегистрирован: {base_url.rstrip('/')}{path}")
+
+        await stop_event.wait()
+    finally:
+        logger.info("[Webhook] Остановка: перестаём принимать апдейты...")
+        await site.stop()
+        drained = await scheduler.drain()
+        logger.info(f"[Webhook] Очередь {'обработана' if drained else 'прервана'}: {scheduler.metrics}")
+        await runner.cleanup()
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)
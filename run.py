@@ -20,6 +20,11 @@ parser.add_argument(
     action="store_true",
     help="Запустить Матюню в режиме разработки с .env.local",
 )
+parser.add_argument(
+    "--webhook",
+    action="store_true",
+    help="Принимать апдейты через webhook (WEBHOOK_URL, WEBHOOK_PORT и др. — см. webhook_server.py)",
+)
 args = parser.parse_args()
 
 # ---------------------------------------
@@ -52,5 +57,5 @@ from matunya_bot_final.main_v2 import main
 # ---------------------------------------
 if __name__ == "__main__":
     mode = "DEV" if args.dev else "PROD"
-    print(f"Матюня запускается... режим: {mode}")
-    asyncio.run(main(bot_token=bot_token))
+    print(f"Матюня запускается... режим: {mode}, приём: {'webhook' if args.webhook else 'polling'}")
+    asyncio.run(main(bot_token=bot_token, webhook=args.webhook))